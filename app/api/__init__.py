@@ -5,6 +5,8 @@ from .database_connections import router as db_connections_router
 from .sql_statements import router as sql_statements_router
 from .reviews import router as reviews_router
 from .llm_configs import router as llm_configs_router
+from .search import router as search_router
+from .retention import router as retention_router
 
 # 创建主路由
 router = APIRouter()
@@ -13,4 +15,6 @@ router = APIRouter()
 router.include_router(db_connections_router, prefix="/db-connections", tags=["数据库连接"])
 router.include_router(sql_statements_router, prefix="/sql-statements", tags=["SQL语句"])
 router.include_router(reviews_router, prefix="/reviews", tags=["审查报告"])
-router.include_router(llm_configs_router, prefix="/llm-configs", tags=["LLM配置"]) 
\ No newline at end of file
+router.include_router(llm_configs_router, prefix="/llm-configs", tags=["LLM配置"])
+router.include_router(search_router, prefix="/search", tags=["全文检索"])
+router.include_router(retention_router, prefix="/retention", tags=["保留与归档"]) 
\ No newline at end of file
@@ -1,6 +1,6 @@
 """数据库连接相关API"""
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Optional
@@ -8,6 +8,9 @@ from typing import Optional
 from app.models.database import get_db
 from app.models.db_connection import DatabaseConnection, DatabaseType
 from app.services.db_connection_service import DatabaseConnectionService
+from app.services.schema_snapshot_service import SchemaSnapshotService
+from app.services.schema_watch_service import SchemaWatchService
+from app.utils.concurrency import run_external
 
 router = APIRouter()
 
@@ -24,7 +27,7 @@ class DatabaseConnectionCreate(BaseModel):
 
 
 @router.get("/")
-async def get_database_connections(db: Session = Depends(get_db)):
+def get_database_connections(db: Session = Depends(get_db)):
     """获取所有数据库连接"""
     connections = db.query(DatabaseConnection).filter(
         DatabaseConnection.is_active == True
@@ -47,7 +50,7 @@ async def get_database_connections(db: Session = Depends(get_db)):
 
 
 @router.post("/")
-async def create_database_connection(
+def create_database_connection(
     connection_data: DatabaseConnectionCreate,
     db: Session = Depends(get_db)
 ):
@@ -91,7 +94,7 @@ async def create_database_connection(
 
 
 @router.delete("/{connection_id}")
-async def delete_database_connection(
+def delete_database_connection(
     connection_id: int,
     db: Session = Depends(get_db)
 ):
@@ -110,7 +113,7 @@ async def delete_database_connection(
 
 
 @router.get("/{connection_id}")
-async def get_database_connection(
+def get_database_connection(
     connection_id: int,
     db: Session = Depends(get_db)
 ):
@@ -137,7 +140,7 @@ async def get_database_connection(
 
 
 @router.put("/{connection_id}")
-async def update_database_connection(
+def update_database_connection(
     connection_id: int,
     connection_data: DatabaseConnectionCreate,
     db: Session = Depends(get_db)
@@ -189,7 +192,7 @@ async def test_connection_config(
         password=connection_data.password or ""  # 不加密，直接测试
     )
     
-    result = service.test_connection_object(temp_connection)
+    result = await run_external(service.test_connection_object, temp_connection)
     return result
 
 
@@ -200,7 +203,7 @@ async def test_database_connection(
 ):
     """测试数据库连接"""
     service = DatabaseConnectionService(db)
-    result = service.test_connection(connection_id)
+    result = await run_external(service.test_connection, connection_id)
     
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["error"])
@@ -211,11 +214,30 @@ async def test_database_connection(
 @router.get("/{connection_id}/schema")
 async def get_database_schema(
     connection_id: int,
+    object_type: Optional[str] = Query(None, description="对象类型：table、view，为空时全部"),
+    search: Optional[str] = Query(None, description="对象名过滤（不区分大小写）"),
+    match: str = Query("prefix", description="匹配方式：prefix前缀、contains包含"),
+    page: int = Query(1, ge=1, description="页码"),
+    page_size: int = Query(100, ge=1, le=1000, description="每页数量"),
+    cursor: Optional[str] = Query(None, description="键集分页游标（上一页返回的next_cursor），传入时忽略page"),
+    with_total: bool = Query(True, description="是否返回总数"),
+    refresh: bool = Query(False, description="是否先从目标库刷新模式快照"),
     db: Session = Depends(get_db)
 ):
-    """获取数据库模式"""
+    """分页获取数据库中的表和视图（读取模式快照，首次访问或refresh时读取目标库；列信息见对象详情）"""
     service = DatabaseConnectionService(db)
-    result = service.get_database_schema(connection_id)
+    result = await run_external(
+        service.get_database_schema,
+        connection_id,
+        refresh,
+        object_type,
+        search,
+        match,
+        page,
+        page_size,
+        cursor,
+        with_total
+    )
     
     if "error" in result:
         raise HTTPException(status_code=400, detail=result["error"])
@@ -223,6 +245,48 @@ async def get_database_schema(
     return result
 
 
+@router.post("/{connection_id}/schema/check")
+async def check_schema_changes(
+    connection_id: int,
+    db: Session = Depends(get_db)
+):
+    """检查数据库模式变化，变化时将受影响的SQL语句加入复审队列"""
+    service = SchemaWatchService(db)
+    result = await run_external(service.check_connection, connection_id)
+    
+    if "error" in result:
+        raise HTTPException(status_code=400, detail=result["error"])
+    
+    return result
+
+
+@router.get("/{connection_id}/schema/snapshots")
+def get_schema_snapshots(
+    connection_id: int,
+    db: Session = Depends(get_db)
+):
+    """获取数据库模式快照版本列表"""
+    service = SchemaSnapshotService(db)
+    return service.list_snapshots(connection_id)
+
+
+@router.get("/{connection_id}/schema/changes")
+def get_schema_changes(
+    connection_id: int,
+    from_version: int = Query(..., ge=1, description="起始快照版本"),
+    to_version: int = Query(..., ge=1, description="目标快照版本"),
+    db: Session = Depends(get_db)
+):
+    """比较两个模式快照版本（表、列、索引级别的变化）"""
+    service = SchemaSnapshotService(db)
+    result = service.compare_snapshots(connection_id, from_version, to_version)
+    
+    if "error" in result:
+        raise HTTPException(status_code=404, detail=result["error"])
+    
+    return result
+
+
 @router.get("/{connection_id}/schema/{object_type}/{table_name}")
 async def get_table_details(
     connection_id: int,
@@ -230,9 +294,9 @@ async def get_table_details(
     table_name: str,
     db: Session = Depends(get_db)
 ):
-    """获取表或视图详细信息"""
+    """获取表或视图详细信息（读取模式快照）"""
     service = DatabaseConnectionService(db)
-    result = service.get_table_details(connection_id, table_name, object_type)
+    result = await run_external(service.get_table_details, connection_id, table_name, object_type)
     
     if "error" in result:
         raise HTTPException(status_code=400, detail=result["error"])
@@ -8,6 +8,7 @@ from typing import Optional
 from app.models.database import get_db
 from app.models.llm_config import LLMConfig, LLMProvider
 from app.services.llm_config_service import LLMConfigService
+from app.utils.concurrency import run_external
 
 router = APIRouter()
 
@@ -24,7 +25,7 @@ class LLMConfigCreate(BaseModel):
 
 
 @router.get("/")
-async def get_llm_configs(db: Session = Depends(get_db)):
+def get_llm_configs(db: Session = Depends(get_db)):
     """获取所有LLM配置"""
     configs = db.query(LLMConfig).filter(
         LLMConfig.is_active == True
@@ -48,7 +49,7 @@ async def get_llm_configs(db: Session = Depends(get_db)):
 
 
 @router.get("/{config_id}")
-async def get_llm_config(
+def get_llm_config(
     config_id: int,
     db: Session = Depends(get_db)
 ):
@@ -76,7 +77,7 @@ async def get_llm_config(
 
 
 @router.post("/")
-async def create_llm_config(
+def create_llm_config(
     config_data: LLMConfigCreate,
     db: Session = Depends(get_db)
 ):
@@ -103,7 +104,7 @@ async def create_llm_config(
 
 
 @router.put("/{config_id}")
-async def update_llm_config(
+def update_llm_config(
     config_id: int,
     config_data: LLMConfigCreate,
     db: Session = Depends(get_db)
@@ -131,7 +132,7 @@ async def update_llm_config(
 
 
 @router.put("/{config_id}/set-default")
-async def set_default_llm_config(
+def set_default_llm_config(
     config_id: int,
     db: Session = Depends(get_db)
 ):
@@ -146,7 +147,7 @@ async def set_default_llm_config(
 
 
 @router.delete("/{config_id}")
-async def delete_llm_config(
+def delete_llm_config(
     config_id: int,
     db: Session = Depends(get_db)
 ):
@@ -167,7 +168,7 @@ async def test_llm_config(
 ):
     """测试LLM配置"""
     service = LLMConfigService(db)
-    result = service.test_llm_config(config_id)
+    result = await run_external(service.test_llm_config, config_id)
     
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["error"])
@@ -0,0 +1,78 @@
+"""审查报告保留与归档API"""
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from pydantic import BaseModel, Field
+from typing import Optional
+
+from app.models.database import get_db
+from app.services.retention_service import RetentionService
+
+router = APIRouter()
+
+
+class RetentionPolicyUpdate(BaseModel):
+    keep_last: Optional[int] = Field(None, ge=0, description="保留最近的报告数，为空或0表示不限")
+    keep_days: Optional[int] = Field(None, ge=0, description="保留最近天数内的报告，为空或0表示不限")
+
+
+@router.get("/policies")
+def get_retention_policies(db: Session = Depends(get_db)):
+    """获取全局和各SQL语句的保留策略"""
+    return RetentionService(db).get_policies()
+
+
+@router.put("/policies/global")
+def set_global_retention_policy(
+    policy: RetentionPolicyUpdate,
+    db: Session = Depends(get_db)
+):
+    """设置全局保留策略"""
+    return RetentionService(db).set_global_policy(policy.keep_last, policy.keep_days)
+
+
+@router.put("/policies/statements/{sql_id}")
+def set_statement_retention_policy(
+    sql_id: int,
+    policy: RetentionPolicyUpdate,
+    db: Session = Depends(get_db)
+):
+    """设置SQL语句的保留策略（覆盖全局策略）"""
+    result = RetentionService(db).set_statement_policy(sql_id, policy.keep_last, policy.keep_days)
+    
+    if "error" in result:
+        raise HTTPException(status_code=400, detail=result["error"])
+    
+    return result
+
+
+@router.delete("/policies/statements/{sql_id}")
+def delete_statement_retention_policy(
+    sql_id: int,
+    db: Session = Depends(get_db)
+):
+    """删除SQL语句的保留策略（恢复使用全局策略）"""
+    if not RetentionService(db).delete_statement_policy(sql_id):
+        raise HTTPException(status_code=404, detail="保留策略不存在")
+    
+    return {"message": "保留策略删除成功"}
+
+
+@router.post("/run")
+def run_retention(
+    dry_run: bool = False,
+    db: Session = Depends(get_db)
+):
+    """立即执行一次归档（dry_run时只统计过期报告数）"""
+    result = RetentionService(db).run(dry_run=dry_run)
+    
+    if "error" in result:
+        raise HTTPException(status_code=400, detail=result["error"])
+    
+    return result
+
+
+@router.get("/archives")
+def list_retention_archives(db: Session = Depends(get_db)):
+    """列出归档文件"""
+    return RetentionService(db).list_archives()
@@ -1,29 +1,62 @@
 """审查相关API"""
 
+import json
+
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, asc, and_, or_
+from pydantic import BaseModel, Field
+from sqlalchemy import desc
 from typing import Optional, List
 
 from app.models.database import get_db
-from app.models.review_report import ReviewReport
-from app.models.sql_statement import SQLStatement
 from app.models.db_connection import DatabaseConnection
-from app.services.review_service import ReviewService
+from app.services.review_service import ReviewService, resolve_result_fields
+from app.services.export_service import ExportService, EXPORT_FORMATS
+from app.services.schema_watch_service import SchemaWatchService
+from app.utils.concurrency import run_external
 
 router = APIRouter()
 
 
+# 批量分析单次请求最多包含的SQL语句数
+ANALYZE_MAX_STATEMENTS = 1000
+
+
+class ReviewAnalyzeRequest(BaseModel):
+    sql_statement_ids: List[int] = Field(
+        ..., min_length=1, max_length=ANALYZE_MAX_STATEMENTS, description="要分析的SQL语句ID"
+    )
+
+
 @router.post("/sql/{sql_id}/review")
 async def review_sql(
     sql_id: int,
     llm_config_id: Optional[int] = None,
+    force: bool = Query(False, description="忽略上次审查结果，强制完整审查"),
+    offline: bool = Query(False, description="不调用LLM，只根据执行计划评估性能维度"),
+    db: Session = Depends(get_db)
+):
+    """审查SQL语句（仅格式或注释变化时沿用上次结果，小改动增量审查）"""
+    review_service = ReviewService(db)
+    
+    result = await run_external(review_service.review_sql_statement, sql_id, llm_config_id, force, offline)
+    
+    if "error" in result:
+        raise HTTPException(status_code=400, detail=result["error"])
+    
+    return result
+
+
+@router.post("/sql/{sql_id}/explain")
+async def explain_sql(
+    sql_id: int,
     db: Session = Depends(get_db)
 ):
-    """审查SQL语句"""
+    """获取SQL语句在关联数据库上的执行计划（EXPLAIN不执行SQL，仅支持单条SELECT/INSERT/UPDATE/DELETE）"""
     review_service = ReviewService(db)
     
-    result = review_service.review_sql_statement(sql_id, llm_config_id)
+    result = await run_external(review_service.explain_sql_statement, sql_id)
     
     if "error" in result:
         raise HTTPException(status_code=400, detail=result["error"])
@@ -31,8 +64,25 @@ async def review_sql(
     return result
 
 
+@router.post("/analyze")
+def analyze_sql_statements(
+    request: ReviewAnalyzeRequest,
+    db: Session = Depends(get_db)
+):
+    """审查前批量分析SQL语句（表名、类型、指纹）"""
+    review_service = ReviewService(db)
+    
+    results = review_service.analyze_sql_statements(request.sql_statement_ids)
+    
+    return {
+        "items": results,
+        "total": len(results),
+        "reviewable_count": sum(1 for item in results if item["reviewable"])
+    }
+
+
 @router.get("/reports/{report_id}")
-async def get_review_report(
+def get_review_report(
     report_id: int,
     db: Session = Depends(get_db)
 ):
@@ -44,6 +94,8 @@ async def get_review_report(
     if not report:
         raise HTTPException(status_code=404, detail="审查报告不存在")
     
+    texts = review_service.get_report_texts(report)
+    
     return {
         "id": report.id,
         "sql_statement_id": report.sql_statement_id,
@@ -55,57 +107,62 @@ async def get_review_report(
         "consistency": {
             "status": report.consistency_status.value if report.consistency_status else None,
             "score": report.consistency_score,
-            "details": report.consistency_details,
-            "suggestions": report.consistency_suggestions
+            "details": texts["consistency_details"],
+            "suggestions": texts["consistency_suggestions"]
         },
         "conventions": {
             "status": report.conventions_status.value if report.conventions_status else None,
             "score": report.conventions_score,
-            "details": report.conventions_details,
-            "suggestions": report.conventions_suggestions
+            "details": texts["conventions_details"],
+            "suggestions": texts["conventions_suggestions"]
         },
         "performance": {
             "status": report.performance_status.value if report.performance_status else None,
             "score": report.performance_score,
-            "details": report.performance_details,
-            "suggestions": report.performance_suggestions
+            "details": texts["performance_details"],
+            "suggestions": texts["performance_suggestions"]
         },
         "security": {
             "status": report.security_status.value if report.security_status else None,
             "score": report.security_score,
-            "details": report.security_details,
-            "suggestions": report.security_suggestions
+            "details": texts["security_details"],
+            "suggestions": texts["security_suggestions"]
         },
         "readability": {
             "status": report.readability_status.value if report.readability_status else None,
             "score": report.readability_score,
-            "details": report.readability_details,
-            "suggestions": report.readability_suggestions
+            "details": texts["readability_details"],
+            "suggestions": texts["readability_suggestions"]
         },
         "maintainability": {
             "status": report.maintainability_status.value if report.maintainability_status else None,
             "score": report.maintainability_score,
-            "details": report.maintainability_details,
-            "suggestions": report.maintainability_suggestions
+            "details": texts["maintainability_details"],
+            "suggestions": texts["maintainability_suggestions"]
         },
         "llm_info": {
             "provider": report.llm_provider,
             "model": report.llm_model
         },
-        "optimized_sql": report.optimized_sql,
+        "optimized_sql": texts["optimized_sql"],
+        "execution_plan": json.loads(report.execution_plan) if report.execution_plan else None,
+        "plan_analysis": json.loads(report.plan_analysis) if report.plan_analysis else None,
+        "sql_version": report.sql_version,
+        "review_mode": report.review_mode,
         "created_at": report.created_at
     }
 
 
 @router.get("/sql/{sql_id}/history")
-async def get_sql_review_history(
+def get_sql_review_history(
     sql_id: int,
+    limit: int = Query(50, ge=1, le=500, description="最多返回的报告数（已归档的报告见评分趋势）"),
     db: Session = Depends(get_db)
 ):
-    """获取SQL语句的审查历史"""
+    """获取SQL语句的审查历史（最近的在前）"""
     review_service = ReviewService(db)
     
-    reports = review_service.get_sql_review_history(sql_id)
+    reports = review_service.get_sql_review_history(sql_id, limit)
     
     return [
         {
@@ -114,6 +171,8 @@ async def get_sql_review_history(
             "overall_score": report.overall_score,
             "llm_provider": report.llm_provider,
             "llm_model": report.llm_model,
+            "sql_version": report.sql_version,
+            "review_mode": report.review_mode,
             "created_at": report.created_at
         }
         for report in reports
@@ -121,7 +180,7 @@ async def get_sql_review_history(
 
 
 @router.get("/results")
-async def get_review_results(
+def get_review_results(
     page: int = Query(1, ge=1, description="页码"),
     page_size: int = Query(10, ge=1, le=100, description="每页数量"),
     database_name: Optional[str] = Query(None, description="数据库名称"),
@@ -130,112 +189,117 @@ async def get_review_results(
     max_score: Optional[float] = Query(None, ge=0, le=100, description="最高评分"),
     order_by: str = Query("created_at", description="排序字段"),
     order_dir: str = Query("desc", description="排序方向"),
+    view: str = Query("summary", description="视图：summary不含SQL内容、优化后的SQL和各维度详细分析与建议，detail返回全部字段"),
+    fields: Optional[str] = Query(None, description="逗号分隔的返回字段，优先于view"),
+    cursor: Optional[str] = Query(None, description="键集分页游标（上一页返回的next_cursor），传入时忽略page"),
+    with_total: bool = Query(True, description="是否返回总数（缓存值）"),
     db: Session = Depends(get_db)
 ):
     """获取SQL审查结果列表（支持分页和筛选）"""
+    review_service = ReviewService(db)
     
-    # 构建查询，联接相关表
-    query = db.query(ReviewReport).join(
-        SQLStatement, ReviewReport.sql_statement_id == SQLStatement.id
-    ).join(
-        DatabaseConnection, SQLStatement.db_connection_id == DatabaseConnection.id
-    ).filter(
-        SQLStatement.is_active == True
+    result = review_service.get_review_results(
+        page=page,
+        page_size=page_size,
+        database_name=database_name,
+        sql_title=sql_title,
+        min_score=min_score,
+        max_score=max_score,
+        order_by=order_by,
+        order_dir=order_dir,
+        view=view,
+        fields=[name.strip() for name in fields.split(",") if name.strip()] if fields else None,
+        cursor=cursor,
+        with_total=with_total
     )
     
-    # 应用筛选条件
-    if database_name:
-        query = query.filter(DatabaseConnection.name.ilike(f"%{database_name}%"))
-    
-    if sql_title:
-        query = query.filter(SQLStatement.title.ilike(f"%{sql_title}%"))
-    
-    if min_score is not None:
-        query = query.filter(ReviewReport.overall_score >= min_score)
-    
-    if max_score is not None:
-        query = query.filter(ReviewReport.overall_score <= max_score)
-    
-    # 排序
-    if hasattr(ReviewReport, order_by):
-        order_column = getattr(ReviewReport, order_by)
-    elif hasattr(SQLStatement, order_by):
-        order_column = getattr(SQLStatement, order_by)
-    else:
-        order_column = ReviewReport.created_at
-    
-    if order_dir.lower() == "desc":
-        query = query.order_by(desc(order_column))
-    else:
-        query = query.order_by(asc(order_column))
-    
-    # 计算总数
-    total = query.count()
-    
-    # 分页
-    offset = (page - 1) * page_size
-    reports = query.offset(offset).limit(page_size).all()
-    
-    # 计算总页数
-    pages = (total + page_size - 1) // page_size
-    
-    # 构建返回数据
-    items = []
-    for report in reports:
-        sql_statement = report.sql_statement
-        db_connection = sql_statement.db_connection
-        
-        items.append({
-            "id": report.id,
-            "sql_statement_id": sql_statement.id,
-            "database_name": db_connection.name if db_connection else "未知",
-            "sql_title": sql_statement.title,
-            "sql_description": sql_statement.description,
-            "sql_content": sql_statement.sql_content,
-            "overall_score": report.overall_score,
-            "overall_status": report.overall_status.value if report.overall_status else None,
-            "overall_summary": report.overall_summary,
-            "consistency_score": report.consistency_score,
-            "consistency_status": report.consistency_status.value if report.consistency_status else None,
-            "consistency_details": report.consistency_details,
-            "consistency_suggestions": report.consistency_suggestions,
-            "conventions_score": report.conventions_score,
-            "conventions_status": report.conventions_status.value if report.conventions_status else None,
-            "conventions_details": report.conventions_details,
-            "conventions_suggestions": report.conventions_suggestions,
-            "performance_score": report.performance_score,
-            "performance_status": report.performance_status.value if report.performance_status else None,
-            "performance_details": report.performance_details,
-            "performance_suggestions": report.performance_suggestions,
-            "security_score": report.security_score,
-            "security_status": report.security_status.value if report.security_status else None,
-            "security_details": report.security_details,
-            "security_suggestions": report.security_suggestions,
-            "readability_score": report.readability_score,
-            "readability_status": report.readability_status.value if report.readability_status else None,
-            "readability_details": report.readability_details,
-            "readability_suggestions": report.readability_suggestions,
-            "maintainability_score": report.maintainability_score,
-            "maintainability_status": report.maintainability_status.value if report.maintainability_status else None,
-            "maintainability_details": report.maintainability_details,
-            "maintainability_suggestions": report.maintainability_suggestions,
-            "optimized_sql": report.optimized_sql,
-            "llm_provider": report.llm_provider,
-            "llm_model": report.llm_model,
-            "created_at": report.created_at.isoformat() if report.created_at else None
-        })
+    if "error" in result:
+        raise HTTPException(status_code=400, detail=result["error"])
     
-    return {
-        "items": items,
-        "page": page,
-        "page_size": page_size,
-        "pages": pages,
-        "total": total
-    }
+    return result
+
+
+@router.get("/export")
+def export_review_results(
+    database_name: Optional[str] = Query(None, description="数据库名称"),
+    sql_title: Optional[str] = Query(None, description="SQL标题模糊查询"),
+    min_score: Optional[float] = Query(None, ge=0, le=100, description="最低评分"),
+    max_score: Optional[float] = Query(None, ge=0, le=100, description="最高评分"),
+    view: str = Query("detail", description="视图：summary不含各维度详细分析和建议，detail导出全部字段"),
+    fields: Optional[str] = Query(None, description="逗号分隔的导出字段，优先于view"),
+    format: str = Query("csv", description="导出格式：csv、ndjson、parquet、arrow")
+):
+    """流式导出审查结果（CSV/NDJSON/Parquet/Arrow）"""
+    error = ExportService.check_format(format)
+    if error:
+        raise HTTPException(status_code=400, detail=error)
+    
+    try:
+        selected = resolve_result_fields(
+            view, [name.strip() for name in fields.split(",") if name.strip()] if fields else None
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    media_type, extension = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        ExportService().export_review_results(
+            format,
+            selected,
+            database_name=database_name,
+            sql_title=sql_title,
+            min_score=min_score,
+            max_score=max_score
+        ),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=review_results.{extension}"}
+    )
+
+
+@router.get("/statistics")
+def get_review_statistics(
+    days: int = Query(30, ge=1, le=366, description="每日审查量统计天数"),
+    db: Session = Depends(get_db)
+):
+    """获取审查统计信息（评分分布、各数据库/模型平均分、每日审查量）"""
+    review_service = ReviewService(db)
+    return review_service.get_review_statistics(days)
+
+
+@router.get("/trend")
+def get_score_trend(
+    sql_id: Optional[int] = Query(None, description="SQL语句ID，为空时统计全部"),
+    days: int = Query(30, ge=1, le=366, description="统计天数"),
+    db: Session = Depends(get_db)
+):
+    """获取每日评分趋势（包含已归档报告的每日汇总）"""
+    review_service = ReviewService(db)
+    return review_service.get_score_trend(sql_id, days)
+
+
+@router.get("/queue")
+def get_review_queue(
+    status: Optional[str] = Query(None, description="状态：pending、running、done、failed"),
+    limit: int = Query(100, ge=1, le=1000, description="最多返回的数量"),
+    db: Session = Depends(get_db)
+):
+    """获取待复审队列（目标库模式变化后受影响的SQL语句）"""
+    service = SchemaWatchService(db)
+    return service.list_queue(status, limit)
+
+
+@router.post("/queue/process")
+async def process_review_queue(
+    limit: Optional[int] = Query(None, ge=1, le=500, description="本次最多复审的数量"),
+    db: Session = Depends(get_db)
+):
+    """立即复审队列中等待的SQL语句"""
+    service = SchemaWatchService(db)
+    return await run_external(service.process_queue, limit)
 
 
 @router.get("/databases")
-async def get_databases_for_filter(db: Session = Depends(get_db)):
+def get_databases_for_filter(db: Session = Depends(get_db)):
     """获取数据库列表用于筛选下拉框"""
     databases = db.query(DatabaseConnection).filter(
         DatabaseConnection.is_active == True
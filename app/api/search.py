@@ -0,0 +1,22 @@
+"""全文检索API"""
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.models.database import get_db
+from app.services.search_service import SearchService
+
+router = APIRouter()
+
+
+@router.get("/")
+def search(
+    q: str = Query(..., min_length=1, description="检索词，多个词以空格分隔"),
+    scope: str = Query("all", pattern="^(all|statements|reports)$", description="检索范围"),
+    limit: int = Query(20, ge=1, le=100, description="每类结果的最大数量"),
+    offset: int = Query(0, ge=0, description="每类结果的偏移量"),
+    db: Session = Depends(get_db)
+):
+    """全文检索SQL语句和审查报告（按相关度排序，返回高亮摘要）"""
+    service = SearchService(db)
+    return service.search(q, scope, limit, offset)
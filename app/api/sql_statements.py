@@ -1,13 +1,17 @@
 """SQL语句相关API"""
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Response
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Optional
 
+from app.config import get_settings
 from app.models.database import get_db
 from app.models.sql_statement import SQLStatement
 from app.services.sql_statement_service import SQLStatementService
+from app.services.export_service import ExportService, EXPORT_FORMATS
+from app.utils.cache import invalidate_statement_caches, invalidate_review_caches
 
 router = APIRouter()
 
@@ -28,69 +32,84 @@ class SQLStatementUpdate(BaseModel):
     db_connection_id: Optional[int] = None
     tags: Optional[str] = None
     category: Optional[str] = None
+    updated_by: Optional[str] = None  # 修改者，SQL内容变化时记为新版本的创建者
 
 
 @router.get("/")
-async def get_sql_statements(
+def get_sql_statements(
     page: int = 1,
     page_size: int = 10,
     order_by: str = "created_at",
     order_dir: str = "desc",
+    cursor: Optional[str] = None,
+    with_total: bool = True,
     db: Session = Depends(get_db)
 ):
-    """获取SQL语句列表（支持分页）"""
-    from sqlalchemy import desc, asc
-    
-    # 构建查询
-    query = db.query(SQLStatement).filter(SQLStatement.is_active == True)
-    
-    # 排序
-    if hasattr(SQLStatement, order_by):
-        order_column = getattr(SQLStatement, order_by)
-        if order_dir.lower() == "desc":
-            query = query.order_by(desc(order_column))
-        else:
-            query = query.order_by(asc(order_column))
-    else:
-        query = query.order_by(desc(SQLStatement.created_at))
+    """获取SQL语句列表（支持页码分页和键集游标分页）"""
+    service = SQLStatementService(db)
+    result = service.list_sql_statements(page, page_size, order_by, order_dir, cursor, with_total)
     
-    # 计算总数
-    total = query.count()
+    if "error" in result:
+        raise HTTPException(status_code=400, detail=result["error"])
     
-    # 分页
-    offset = (page - 1) * page_size
-    statements = query.offset(offset).limit(page_size).all()
+    result["items"] = [
+        {
+            "id": stmt.id,
+            "title": stmt.title,
+            "sql_content": stmt.sql_content,
+            "description": stmt.description,
+            "status": stmt.status.value,
+            "db_connection_id": stmt.db_connection_id,
+            "version": stmt.version,
+            "tags": stmt.tags,
+            "category": stmt.category,
+            "created_at": stmt.created_at,
+            "updated_at": stmt.updated_at,
+            "last_reviewed_at": stmt.last_reviewed_at
+        }
+        for stmt in result["items"]
+    ]
+    return result
+
+
+@router.get("/statistics")
+def get_sql_statistics(db: Session = Depends(get_db)):
+    """获取SQL语句统计信息"""
+    service = SQLStatementService(db)
+    return service.get_statistics()
+
+
+@router.get("/export")
+@router.get("/export-csv")
+def export_sql_statements(
+    db_connection_id: Optional[int] = None,
+    status: Optional[str] = None,
+    category: Optional[str] = None,
+    format: str = Query("csv", description="导出格式：csv、ndjson、parquet、arrow")
+):
+    """流式导出SQL语句（CSV/NDJSON/Parquet/Arrow）"""
+    error = ExportService.check_format(format)
+    if error:
+        raise HTTPException(status_code=400, detail=error)
     
-    # 计算总页数
-    pages = (total + page_size - 1) // page_size
+    filters = {}
+    if db_connection_id:
+        filters["db_connection_id"] = db_connection_id
+    if status:
+        filters["status"] = status
+    if category:
+        filters["category"] = category
     
-    return {
-        "items": [
-            {
-                "id": stmt.id,
-                "title": stmt.title,
-                "sql_content": stmt.sql_content,
-                "description": stmt.description,
-                "status": stmt.status.value,
-                "db_connection_id": stmt.db_connection_id,
-                "version": stmt.version,
-                "tags": stmt.tags,
-                "category": stmt.category,
-                "created_at": stmt.created_at,
-                "updated_at": stmt.updated_at,
-                "last_reviewed_at": stmt.last_reviewed_at
-            }
-            for stmt in statements
-        ],
-        "page": page,
-        "page_size": page_size,
-        "pages": pages,
-        "total": total
-    }
+    media_type, extension = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        ExportService().export_statements(format, filters),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=sql_statements.{extension}"}
+    )
 
 
 @router.get("/{statement_id}")
-async def get_sql_statement(
+def get_sql_statement(
     statement_id: int,
     db: Session = Depends(get_db)
 ):
@@ -120,53 +139,40 @@ async def get_sql_statement(
 
 
 @router.post("/")
-async def create_sql_statement(
+def create_sql_statement(
     statement_data: SQLStatementCreate,
     db: Session = Depends(get_db)
 ):
     """创建SQL语句"""
-    statement = SQLStatement(
-        title=statement_data.title,
-        sql_content=statement_data.sql_content,
-        description=statement_data.description,
-        db_connection_id=statement_data.db_connection_id,
-        tags=statement_data.tags,
-        category=statement_data.category
-    )
+    service = SQLStatementService(db)
+    result = service.create_sql_statement(statement_data.dict())
     
-    db.add(statement)
-    db.commit()
-    db.refresh(statement)
+    if not result["success"]:
+        raise HTTPException(status_code=400, detail=result["error"])
     
-    return {"id": statement.id, "message": "SQL语句创建成功"}
+    return {"id": result["id"], "message": result["message"]}
 
 
 @router.put("/{statement_id}")
-async def update_sql_statement(
+def update_sql_statement(
     statement_id: int,
     statement_data: SQLStatementUpdate,
     db: Session = Depends(get_db)
 ):
-    """更新SQL语句"""
-    statement = db.query(SQLStatement).filter(
-        SQLStatement.id == statement_id,
-        SQLStatement.is_active == True
-    ).first()
-    
-    if not statement:
-        raise HTTPException(status_code=404, detail="SQL语句不存在")
-    
-    # 更新字段
-    for field, value in statement_data.dict(exclude_unset=True).items():
-        setattr(statement, field, value)
+    """更新SQL语句（SQL内容变化时记录新版本）"""
+    service = SQLStatementService(db)
+    result = service.update_sql_statement(statement_id, statement_data.dict(exclude_unset=True))
     
-    db.commit()
+    if not result["success"]:
+        if result["error"] == "SQL语句不存在":
+            raise HTTPException(status_code=404, detail=result["error"])
+        raise HTTPException(status_code=400, detail=result["error"])
     
-    return {"message": "SQL语句更新成功"}
+    return {"message": result["message"], "version": result["version"]}
 
 
 @router.delete("/{statement_id}")
-async def delete_sql_statement(
+def delete_sql_statement(
     statement_id: int,
     db: Session = Depends(get_db)
 ):
@@ -180,12 +186,14 @@ async def delete_sql_statement(
     
     statement.is_active = False
     db.commit()
+    invalidate_statement_caches()
+    invalidate_review_caches()
     
     return {"message": "SQL语句删除成功"}
 
 
 @router.get("/{statement_id}/versions")
-async def get_sql_versions(
+def get_sql_versions(
     statement_id: int,
     db: Session = Depends(get_db)
 ):
@@ -199,69 +207,76 @@ async def get_sql_versions(
     return versions
 
 
-@router.post("/{statement_id}/restore/{version_id}")
-async def restore_sql_version(
+@router.get("/{statement_id}/versions/{version}")
+def get_sql_version(
     statement_id: int,
-    version_id: int,
+    version: int,
     db: Session = Depends(get_db)
 ):
-    """恢复SQL语句版本"""
+    """获取指定版本的SQL内容"""
     service = SQLStatementService(db)
-    result = service.restore_version(statement_id, version_id)
+    try:
+        content = service.get_version_content(statement_id, version)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     
-    if not result["success"]:
-        raise HTTPException(status_code=400, detail=result["error"])
+    if content is None:
+        raise HTTPException(status_code=404, detail="SQL语句或版本不存在")
     
-    return result
+    return content
 
 
-@router.post("/import-csv")
-async def import_sql_from_csv(
-    file: UploadFile = File(...),
-    db_connection_id: Optional[int] = None,
+@router.get("/{statement_id}/diff")
+def diff_sql_versions(
+    statement_id: int,
+    from_version: int = Query(..., ge=1, description="旧版本号"),
+    to_version: int = Query(..., ge=1, description="新版本号"),
+    context: int = Query(3, ge=0, le=100, description="差异上下文行数"),
     db: Session = Depends(get_db)
 ):
-    """从CSV文件导入SQL语句"""
-    if not file.filename.endswith('.csv'):
-        raise HTTPException(status_code=400, detail="只支持CSV文件")
+    """对比两个版本的SQL内容（统一差异格式）"""
+    service = SQLStatementService(db)
+    result = service.diff_versions(statement_id, from_version, to_version, context)
+    
+    if "error" in result:
+        raise HTTPException(status_code=409 if result.get("corrupted") else 404, detail=result["error"])
     
+    return result
+
+
+@router.post("/{statement_id}/restore/{version}")
+def restore_sql_version(
+    statement_id: int,
+    version: int,
+    updated_by: Optional[str] = Query(None, description="执行恢复的用户，记为新版本的创建者"),
+    db: Session = Depends(get_db)
+):
+    """恢复SQL语句到指定版本号（创建内容相同的新版本）"""
     service = SQLStatementService(db)
-    result = service.import_from_csv(file, db_connection_id)
+    result = service.restore_version(statement_id, version, updated_by)
     
     if not result["success"]:
-        raise HTTPException(status_code=400, detail=result["error"])
+        raise HTTPException(status_code=409 if result.get("corrupted") else 400, detail=result["error"])
     
     return result
 
 
-@router.get("/export-csv")
-async def export_sql_to_csv(
-    db: Session = Depends(get_db),
+@router.post("/import")
+@router.post("/import-csv")
+def import_sql_from_csv(
+    file: UploadFile = File(...),
     db_connection_id: Optional[int] = None,
-    status: Optional[str] = None,
-    category: Optional[str] = None
+    db: Session = Depends(get_db)
 ):
-    """导出SQL语句为CSV"""
-    filters = {}
-    if db_connection_id:
-        filters["db_connection_id"] = db_connection_id
-    if status:
-        filters["status"] = status
-    if category:
-        filters["category"] = category
+    """从CSV文件或.sql脚本流式导入SQL语句"""
+    allowed_types = [ext.strip().lower() for ext in get_settings().allowed_file_types.split(",") if ext.strip()]
+    if not any((file.filename or "").lower().endswith(ext) for ext in allowed_types):
+        raise HTTPException(status_code=400, detail=f"只支持以下文件类型: {', '.join(allowed_types)}")
     
     service = SQLStatementService(db)
-    csv_content = service.export_to_csv(filters)
+    result = service.import_file(file, db_connection_id)
     
-    return Response(
-        content=csv_content,
-        media_type="text/csv",
-        headers={"Content-Disposition": "attachment; filename=sql_statements.csv"}
-    )
-
-
-@router.get("/statistics")
-async def get_sql_statistics(db: Session = Depends(get_db)):
-    """获取SQL语句统计信息"""
-    service = SQLStatementService(db)
-    return service.get_statistics() 
\ No newline at end of file
+    if not result["success"]:
+        raise HTTPException(status_code=400, detail=result["error"])
+    
+    return result
@@ -55,11 +55,61 @@ class Settings(BaseSettings):
     max_file_size: int = 10 * 1024 * 1024  # 10MB
     allowed_file_types: str = ".csv,.sql"
     max_upload_size: int = 10
+    import_batch_size: int = 1000  # 流式导入每批写入的行数
+    import_max_messages: int = 100  # 导入结果中最多返回的错误/警告明细条数
+    export_batch_size: int = 2000  # 流式导出每批读取和编码的行数
     
     # 功能配置
     sql_parse_timeout: int = 30
     ai_review_timeout: int = 120
     cache_ttl: int = 3600
+    count_cache_ttl: int = 60  # 分页列表总数的缓存时间(秒)
+    statistics_cache_ttl: int = 300  # 统计数据的缓存时间(秒)，保存报告时会主动失效
+    
+    # 增量审查（SQL修改后基于上次审查结果复审）
+    review_incremental: bool = True  # 仅格式或注释变化时跳过审查，小改动使用增量提示词
+    review_delta_max_changed_ratio: float = 0.3  # 变化行数占比不超过该值时使用增量审查，否则完整审查
+    review_delta_context_lines: int = 3  # 增量提示词中差异的上下文行数
+    
+    # 审查报告长文本存储
+    report_text_storage: str = "auto"  # auto: SQLite压缩存储，其他数据库内联存储；compressed: 压缩去重存储到review_texts（PostgreSQL/MySQL的全文检索不再覆盖详细分析和建议）；inline: 直接存储在review_reports
+    report_text_codec: str = "zstd"  # zstd（未安装zstandard时回退zlib）、zlib 或 none
+    
+    # SQL语句版本历史（增量存储）
+    sql_version_snapshot_interval: int = 20  # 每隔多少个版本存储一次完整快照，还原时最多应用该数量减一个增量
+    sql_version_codec: str = "zstd"  # 快照和增量的压缩算法，同report_text_codec
+    
+    # 审查报告保留与归档（数据库中的全局策略优先于这里的默认值）
+    retention_keep_last: int = 0  # 每条SQL语句保留最近的报告数，0表示不限
+    retention_keep_days: int = 0  # 保留最近天数内的报告，0表示不限
+    retention_interval: int = 3600  # 后台归档任务的执行间隔(秒)，0表示不启动
+    retention_archive_dir: str = "archive"  # 过期报告的归档目录
+    retention_archive_format: str = "ndjson"  # ndjson（gzip压缩）或 parquet
+    retention_batch_size: int = 1000  # 每批删除和汇总的报告数
+    
+    # 目标库模式快照与变化监测
+    schema_watch_interval: int = 0  # 后台刷新模式快照、复审受影响语句的间隔(秒)，0表示不启动
+    schema_snapshot_keep: int = 5  # 每个数据库连接保留的模式快照版本数
+    schema_extract_workers: int = 8  # 不在快照中的表并行反射的线程数（每个线程占用目标库连接池的一个连接）
+    schema_extract_timeout: int = 30  # 并行反射的期限(秒)，从提交时开始计算，到期未完成（包括排队中）的表记为缺失
+    table_stats_enabled: bool = True  # 审查时在表结构中附加行数、大小和索引基数等统计信息
+    table_stats_cache_ttl: int = 3600  # 表统计信息的缓存时间(秒)
+    review_explain_plan: bool = False  # 审查时在目标库执行EXPLAIN（不执行SQL本身），执行计划提供给AI并保存到报告
+    explain_timeout: float = 5  # EXPLAIN的超时时间(秒)
+    explain_max_operators: int = 50  # 执行计划中保留的最多算子数
+    plan_analysis_mode: str = "off"  # 执行计划启发式性能评分：off关闭；fallback在LLM不可用时生成只含性能维度的离线报告；first_pass另把评分提供给AI作为初步结论；offline不调用LLM
+    schema_snapshot_max_age: int = 86400  # 审查时使用模式快照生成DDL的最长时间(秒)，超过时直接读取目标库，0表示不过期
+    review_queue_batch_size: int = 20  # 每次处理的待复审语句数
+    review_queue_stale_timeout: int = 3600  # 复审中的语句超过该时间(秒)未完成时视为中断并重新排队，0表示不重新排队
+    
+    # SQL并行解析配置
+    parse_workers: int = 0  # 进程数，0表示使用CPU核心数
+    parse_chunk_size: int = 50  # 每个子进程任务解析的语句数
+    parse_parallel_threshold: int = 100  # 少于该数量时在当前进程内解析（批量分析单次最多1000条，需明显低于该上限）
+    
+    # 请求并发配置
+    threadpool_size: int = 40  # 同步路由使用的默认线程池大小
+    external_io_concurrency: int = 8  # 同时进行的目标数据库/LLM调用数，超出的请求排队而不占用默认线程池
     
     # 日志配置
     log_format: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -77,6 +127,14 @@ class Settings(BaseSettings):
     db_max_overflow: int = 20
     db_pool_timeout: int = 30
     
+    # SQLite应用库配置（仅database_url为SQLite时生效）
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"  # WAL模式下NORMAL只在检查点时刷盘
+    sqlite_busy_timeout: int = 30000  # 锁等待时间(毫秒)
+    sqlite_cache_size_kb: int = 16384  # 每个连接的页缓存大小(KB)
+    sqlite_mmap_size: int = 134217728  # 内存映射读取的大小(字节)，0表示关闭
+    sqlite_serialize_writes: bool = True  # 进程内串行化写事务，避免并发写入时报database is locked
+    
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -1,12 +1,19 @@
 """核心功能模块"""
 
+from .sql_dialect import SQLDialect, get_dialect
 from .sql_parser import SQLParser
+from .sql_splitter import SQLScriptSplitter
+from .parallel_parser import ParallelSQLParser
 from .schema_extractor import SchemaExtractor
 from .ai_reviewer import AIReviewer
 from .encryption import EncryptionService
 
 __all__ = [
+    "SQLDialect",
+    "get_dialect",
     "SQLParser",
+    "SQLScriptSplitter",
+    "ParallelSQLParser",
     "SchemaExtractor", 
     "AIReviewer",
     "EncryptionService"
@@ -24,7 +24,13 @@ class AIReviewer:
         # 新版本的OpenAI库不需要全局设置，在调用时创建客户端
         pass
     
-    def review_sql(self, sql_content: str, description: str, schema_info: Dict[str, Any]) -> Dict[str, Any]:
+    def review_sql(
+        self,
+        sql_content: str,
+        description: str,
+        schema_info: Dict[str, Any],
+        execution_plan: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
         """
         审查SQL语句
         
@@ -32,13 +38,39 @@ class AIReviewer:
             sql_content: SQL语句内容
             description: 业务描述
             schema_info: 数据库模式信息
+            execution_plan: 目标库的执行计划（PlanExplainer的结果），为None时不在提示词中提供
             
         Returns:
             审查报告
         """
+        return self._review(self._build_prompt(sql_content, description, schema_info, execution_plan))
+    
+    def review_sql_delta(
+        self,
+        sql_diff: str,
+        description: str,
+        schema_info: Dict[str, Any],
+        previous_result: Dict[str, Any],
+        execution_plan: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        增量审查SQL语句（只审查相对上次审查版本的修改）
+        
+        Args:
+            sql_diff: 相对上次审查版本的统一格式差异
+            description: 业务描述
+            schema_info: 修改涉及的表的模式信息
+            previous_result: 上次的审查结果（与review_sql返回格式相同）
+            execution_plan: 修改后SQL的执行计划，为None时不在提示词中提供
+            
+        Returns:
+            审查报告（未受修改影响的维度details和suggestions为空字符串）
+        """
+        return self._review(self._build_delta_prompt(sql_diff, description, schema_info, previous_result, execution_plan))
+    
+    def _review(self, prompt: str) -> Dict[str, Any]:
+        """发送提示词并解析审查结果"""
         try:
-            # 构建提示词
-            prompt = self._build_prompt(sql_content, description, schema_info)
             # 打印提示词
             print("***************************提示词:")
             print(prompt)
@@ -76,11 +108,22 @@ class AIReviewer:
                 "optimized_sql": ""
             }
     
-    def _build_prompt(self, sql_content: str, description: str, schema_info: Dict[str, Any]) -> str:
+    def _build_prompt(
+        self,
+        sql_content: str,
+        description: str,
+        schema_info: Dict[str, Any],
+        execution_plan: Optional[Dict[str, Any]] = None
+    ) -> str:
         """构建AI提示词"""
         
         # 格式化数据库模式信息
         schema_text = self._format_schema_info(schema_info)
+        plan_section = ""
+        if execution_plan:
+            plan_section = f"""
+4. **目标库执行计划（EXPLAIN的估算结果，SQL未实际执行）:**
+{self._format_execution_plan(execution_plan)}"""
         
         prompt = f"""
 **角色:** 你是一个专业的SQL审查专家。你的任务是分析提供的SQL查询及其描述，结合数据库模式信息，生成全面的审查报告。
@@ -96,7 +139,7 @@ class AIReviewer:
 
 3. **相关数据库模式:**
 {schema_text}
-
+{plan_section}
 **审查任务:**
 请提供一个审查报告，涵盖以下方面。对于每个方面，请说明SQL是"优秀"、"良好"、"需要改进"还是"存在问题"。然后提供具体的细节、解释和可操作的改进建议。
 
@@ -113,12 +156,13 @@ class AIReviewer:
 - 其他常见的SQL最佳实践。
 
 **3. 性能分析:**
-- 是否可能出现全表扫描。
-- 是否有效使用索引进行JOIN、WHERE、ORDER BY子句。（参考模式的索引信息）
+- 是否可能出现全表扫描。（结合统计信息中的行数判断代价，小表的全表扫描通常可以接受）
+- 是否有效使用索引进行JOIN、WHERE、ORDER BY子句。（参考模式的索引信息，以及统计信息中的行数和索引基数）
 - 子查询或CTE的效率。
 - 在WHERE子句中使用函数可能阻止索引使用。
 - 任何其他潜在的性能瓶颈。
 - 如果有益且缺失，建议具体的索引。
+- 如果提供了执行计划，以其中的访问方式、连接方式和估算行数为依据，指出具体的全表扫描、低效连接和临时排序；如果附有规则检查结论，请复核后给出最终的性能评分。
 
 **4. 安全考虑:**
 - 任何可能暗示SQL注入漏洞的模式（尽管这是静态分析，但可以标记可疑模式）。
@@ -187,6 +231,81 @@ class AIReviewer:
 }}
 ```
 
+请确保响应是有效的JSON格式。
+"""
+        return prompt
+    
+    def _build_delta_prompt(
+        self,
+        sql_diff: str,
+        description: str,
+        schema_info: Dict[str, Any],
+        previous_result: Dict[str, Any],
+        execution_plan: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """构建增量审查提示词（上次审查结论 + 修改差异）"""
+        
+        schema_text = self._format_schema_info(schema_info) if schema_info.get("tables") else "（修改未涉及表结构）"
+        plan_section = ""
+        if execution_plan:
+            plan_section = f"""
+5. **修改后SQL在目标库的执行计划（EXPLAIN的估算结果，SQL未实际执行）:**
+{self._format_execution_plan(execution_plan)}"""
+        
+        previous_lines = []
+        overall = previous_result.get("overall_assessment", {})
+        previous_lines.append(
+            f"- overall_assessment: {overall.get('status')} / {overall.get('score')} — {overall.get('summary') or ''}"
+        )
+        for dimension in ["consistency", "conventions", "performance", "security", "readability", "maintainability"]:
+            section = previous_result.get(dimension, {})
+            suggestions = (section.get("suggestions") or "").strip()
+            if len(suggestions) > 300:
+                suggestions = suggestions[:300] + "…"
+            previous_lines.append(f"- {dimension}: {section.get('status')} / {section.get('score')} — 建议: {suggestions or '无'}")
+        previous_text = "\n".join(previous_lines)
+        
+        prompt = f"""
+**角色:** 你是一个专业的SQL审查专家。这条SQL之前已审查过，现在用户做了少量修改，请只针对修改进行复审。
+
+**上下文:**
+1. **上次审查结论（状态 / 评分 — 建议）:**
+{previous_text}
+
+2. **相对上次审查版本的修改（统一差异格式，-为删除行，+为新增行）:**
+```diff
+{sql_diff}
+```
+
+3. **用户对SQL意图的描述:**
+"{description}"
+
+4. **修改涉及的数据库模式:**
+{schema_text}
+{plan_section}
+**复审任务:**
+- 判断修改是否解决了上次的建议，或引入了新的问题（一致性、规范性、性能、安全性、可读性、可维护性）。
+- 对受修改影响的维度，给出新的状态、评分、详细分析和改进建议。
+- 对未受修改影响的维度，沿用上次的状态和评分，details和suggestions返回空字符串。
+- overall_assessment根据各维度的最新结论给出，summary简要说明本次修改带来的变化。
+- 这里只有修改的差异而不是完整SQL，optimized_sql始终返回空字符串，需要的优化写在相应维度的suggestions中。
+
+**输出格式:**
+与完整审查相同的JSON格式：
+
+```json
+{{
+    "overall_assessment": {{"status": "excellent|good|needs_improvement|has_issues", "score": 85, "summary": "本次修改的复审结论"}},
+    "consistency": {{"status": "...", "score": 90, "details": "", "suggestions": ""}},
+    "conventions": {{"status": "...", "score": 80, "details": "", "suggestions": ""}},
+    "performance": {{"status": "...", "score": 75, "details": "", "suggestions": ""}},
+    "security": {{"status": "...", "score": 95, "details": "", "suggestions": ""}},
+    "readability": {{"status": "...", "score": 85, "details": "", "suggestions": ""}},
+    "maintainability": {{"status": "...", "score": 80, "details": "", "suggestions": ""}},
+    "optimized_sql": ""
+}}
+```
+
 请确保响应是有效的JSON格式。
 """
         return prompt
@@ -205,6 +324,8 @@ class AIReviewer:
                     schema_text += f"\n表名: {table_name}\n"
                     if table_info.get("ddl"):
                         schema_text += f"DDL:\n```sql\n{table_info['ddl']}\n```\n"
+                    if table_info.get("stats"):
+                        schema_text += self._format_table_stats(table_info["stats"])
             else:
                 # 处理旧格式（列表形式）
                 for table in schema_info["tables"]:
@@ -236,6 +357,68 @@ class AIReviewer:
         
         return schema_text
     
+    @staticmethod
+    def _format_table_stats(stats: Dict[str, Any]) -> str:
+        """格式化表统计信息，如：统计信息(pg_class.reltuples，估算): 约1,200,000行，约350.2 MB；索引基数: idx_a≈1,000"""
+        parts = []
+        if stats.get("row_count") is not None:
+            parts.append(f"约{stats['row_count']:,}行")
+        if stats.get("size_bytes") is not None:
+            parts.append(f"约{stats['size_bytes'] / 1024 / 1024:.1f} MB")
+        text_value = "，".join(parts) or "行数未知"
+        if stats.get("index_cardinality"):
+            text_value += "；索引基数: " + ", ".join(
+                f"{name}≈{value:,}" for name, value in sorted(stats["index_cardinality"].items())
+            )
+        return f"统计信息({stats.get('source')}，估算): {text_value}\n"
+    
+    @staticmethod
+    def _format_execution_plan(execution_plan: Dict[str, Any]) -> str:
+        """格式化执行计划：按层级缩进的算子，以及全表扫描、连接方式、临时结构等摘要"""
+        access_names = {
+            "full_scan": "全表扫描",
+            "index_scan": "全索引扫描",
+            "index_range": "索引范围扫描",
+            "index_lookup": "索引查找",
+        }
+        lines = []
+        for operator in execution_plan.get("operators", []):
+            line = "  " * operator["depth"] + f"- {operator['operation']}"
+            if operator.get("object") and operator["object"] not in operator["operation"]:
+                line += f" 对象={operator['object']}"
+            if operator.get("index") and operator["index"] not in operator["operation"]:
+                line += f" 索引={operator['index']}"
+            if operator.get("access"):
+                line += f" [{access_names.get(operator['access'], operator['access'])}]"
+            if operator.get("rows") is not None:
+                line += f" 估算行数≈{operator['rows']:,.0f}"
+            if operator.get("cost") is not None:
+                line += f" 代价={operator['cost']:,.2f}"
+            lines.append(line)
+        if execution_plan.get("truncated"):
+            lines.append("- ……（其余算子已省略）")
+        
+        summary = execution_plan.get("summary", {})
+        parts = [
+            f"全表扫描: {', '.join(str(name) for name in summary.get('full_scans') or []) or '无'}",
+            f"连接方式: {', '.join(summary.get('joins') or []) or '无'}",
+            f"临时排序/哈希: {', '.join(summary.get('temp_structures') or []) or '无'}",
+        ]
+        if summary.get("estimated_rows") is not None:
+            parts.append(f"估算结果行数≈{summary['estimated_rows']:,.0f}")
+        if summary.get("total_cost") is not None:
+            parts.append(f"估算总代价={summary['total_cost']:,.2f}")
+        lines.append("摘要: " + "；".join(parts))
+        
+        analysis = execution_plan.get("analysis")
+        if analysis:
+            # 启发式规则的初步结论，供AI复核
+            lines.append(
+                f"规则检查: 性能{analysis['status']} / {analysis['score']} — "
+                f"{analysis['details']}"
+            )
+        return "\n".join(lines) + "\n"
+    
     def _call_llm(self, prompt: str) -> str:
         """调用LLM"""
         provider = LLMProvider(self.llm_config["provider"])
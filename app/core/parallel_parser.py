@@ -0,0 +1,146 @@
+"""并行SQL解析器 - 使用进程池批量解析SQL语句"""
+
+import os
+import threading
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+from app.config import get_settings
+from app.models.db_connection import DatabaseType
+from .sql_parser import SQLParser
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+# 子进程内按数据库类型复用的解析器实例
+_worker_parsers: Dict[Optional[str], SQLParser] = {}
+
+
+def _analyze_sql(parser: SQLParser, sql: str) -> Dict[str, Any]:
+    """解析单条SQL，返回表名、类型和指纹"""
+    try:
+        parse_result = parser.parse(sql)
+        return {
+            "tables": parse_result["tables"],
+            "views": parse_result["views"],
+            "sql_type": parser.get_sql_type(sql),
+            "fingerprint": parser.fingerprint(sql)
+        }
+    except Exception as e:
+        return {
+            "tables": [],
+            "views": [],
+            "sql_type": "UNKNOWN",
+            "fingerprint": None,
+            "error": str(e)
+        }
+
+
+def _parse_chunk(items: List[Tuple[Optional[str], str]]) -> List[Dict[str, Any]]:
+    """在子进程中解析一批SQL，items为(数据库类型值, SQL)"""
+    results = []
+    for db_type_value, sql in items:
+        parser = _worker_parsers.get(db_type_value)
+        if parser is None:
+            parser = SQLParser(DatabaseType(db_type_value) if db_type_value else None)
+            _worker_parsers[db_type_value] = parser
+        results.append(_analyze_sql(parser, sql))
+    return results
+
+
+def _configured_workers() -> int:
+    """配置的进程数，0表示使用CPU核心数"""
+    workers = get_settings().parse_workers
+    return workers if workers and workers > 0 else (os.cpu_count() or 1)
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    """
+    获取共享的进程池（按需创建）
+
+    进程数固定取自配置：其他线程可能正在向进程池提交任务，不能因请求的进程数不同而关闭重建
+    """
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is None:
+            _executor_workers = _configured_workers()
+            _executor = ProcessPoolExecutor(max_workers=_executor_workers)
+        return _executor
+
+
+def shutdown_parse_executor():
+    """关闭共享的进程池（应用退出时调用）"""
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True, cancel_futures=True)
+            _executor = None
+            _executor_workers = 0
+
+
+class ParallelSQLParser:
+    """并行SQL解析器，将SQL分块分发到进程池解析，结果保持输入顺序"""
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        parallel_threshold: Optional[int] = None
+    ):
+        settings = get_settings()
+        # 为1时在当前进程内解析；大于1时使用共享进程池（进程数取自配置）
+        self.max_workers = max_workers if max_workers and max_workers > 0 else _configured_workers()
+        self.chunk_size = chunk_size or settings.parse_chunk_size
+        self.parallel_threshold = (
+            parallel_threshold if parallel_threshold is not None else settings.parse_parallel_threshold
+        )
+
+    def parse_many(
+        self,
+        sqls: List[str],
+        db_types: Optional[Sequence[Optional[DatabaseType]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        批量解析SQL语句
+
+        输入较少或只有一个工作进程时在当前进程内解析，否则分块提交到进程池
+
+        Args:
+            sqls: SQL语句列表
+            db_types: 与sqls一一对应的数据库类型（用于方言解析），为None时使用通用方言
+
+        Returns:
+            与输入顺序一致的解析结果列表，每项包含 tables、views、sql_type、fingerprint
+        """
+        if not sqls:
+            return []
+
+        if db_types is None:
+            db_types = [None] * len(sqls)
+        # 只传递枚举值，避免跨进程序列化ORM相关对象
+        items = [(db_type.value if db_type else None, sql) for db_type, sql in zip(db_types, sqls)]
+
+        if self.max_workers <= 1 or len(items) < self.parallel_threshold:
+            return _parse_chunk(items)
+
+        chunks = [items[i:i + self.chunk_size] for i in range(0, len(items), self.chunk_size)]
+        try:
+            executor = _get_executor()
+            results: List[Dict[str, Any]] = []
+            # map保证结果按分块提交顺序返回
+            for chunk_result in executor.map(_parse_chunk, chunks):
+                results.extend(chunk_result)
+            return results
+        except (BrokenProcessPool, OSError) as e:
+            logger.warning(f"进程池解析失败，回退到单进程解析: {e}")
+            shutdown_parse_executor()
+            return _parse_chunk(items)
+        except RuntimeError as e:
+            # 提交时进程池正被关闭（应用退出）
+            logger.warning(f"进程池已关闭，回退到单进程解析: {e}")
+            return _parse_chunk(items)
@@ -0,0 +1,243 @@
+"""执行计划分析器 - 根据归一化的执行计划和表统计信息，用确定性的启发式规则给性能维度评分"""
+
+import re
+from typing import Any, Dict, List, Optional
+
+from .plan_explainer import ACCESS_FULL_SCAN, ACCESS_INDEX_SCAN
+from .schema_extractor import object_key
+
+# 启发式规则的版本：修改规则或阈值时递增，报告中记录评分所用的版本
+HEURISTICS_VERSION = "plan-heuristics/1"
+
+# 表行数的分级阈值
+_LARGE_ROWS = 100000
+_HUGE_ROWS = 1000000
+_MEDIUM_ROWS = 10000
+# 嵌套循环内层表超过该行数时，每次外层循环的全表扫描代价明显
+_NESTED_LOOP_INNER_ROWS = 1000
+
+# 各规则的扣分
+_PENALTIES = {
+    "full_scan_huge": 30,  # 超过百万行的表全表扫描
+    "full_scan_large": 20,  # 超过十万行的表全表扫描
+    "full_scan_medium": 10,  # 超过一万行的表全表扫描
+    "full_scan_unknown": 5,  # 行数未知的表全表扫描
+    "nested_loop_full_scan": 20,  # 嵌套循环的内层是全表扫描（连接列缺少索引）
+    "nested_loop_full_scan_small": 5,  # 同上，内层表较小
+    "automatic_index": 10,  # SQLite为连接临时建立自动索引
+    "sort_large": 15,  # 超过十万行的排序/分组/去重
+    "sort_medium": 8,  # 超过一万行的排序/分组/去重
+    "sort_unknown": 3,  # 行数未知的排序/分组/去重
+    "full_index_scan_large": 8,  # 超过十万行的全索引扫描
+    "large_result": 10,  # 估算结果超过百万行
+}
+
+# 评分 -> 状态
+_STATUS_THRESHOLDS = [(90, "excellent"), (75, "good"), (50, "needs_improvement")]
+
+# 各规则的改进建议
+_SUGGESTIONS = {
+    "full_scan": "为{object}上WHERE条件使用的列建立索引，或增加更有选择性的过滤条件",
+    "nested_loop_full_scan": "为{object}的连接列建立索引，避免嵌套循环中对内层表的重复全表扫描",
+    "automatic_index": "为{object}的连接列建立持久索引",
+    "sort": "为排序/分组列建立与过滤条件匹配的复合索引，或通过LIMIT、更严格的条件缩小排序的数据量",
+    "full_index_scan": "检查{object}上的条件是否能使用索引的前导列，避免扫描整个索引",
+    "large_result": "结果集过大，考虑分页、聚合或增加过滤条件",
+}
+
+# 表示排序的临时结构（哈希聚合、物化和单行聚合不排序）
+_SORT_RE = re.compile(r'SORT|ORDER BY|GROUP BY|DISTINCT', re.IGNORECASE)
+
+# FROM/JOIN/UPDATE/INTO后的表名和别名，用于把SQLite执行计划中的别名还原为表名
+_TABLE_ALIAS_RE = re.compile(
+    r'\b(?:FROM|JOIN|UPDATE|INTO)\s+([\w$#."`\[\]]+)(?:\s+(?:AS\s+)?([A-Za-z_]\w*))?',
+    re.IGNORECASE
+)
+# 不是别名的关键字
+_NOT_ALIASES = {
+    "where", "on", "using", "join", "inner", "left", "right", "full", "cross", "outer", "natural", "set",
+    "group", "order", "limit", "having", "union", "values", "select", "as", "with", "window", "offset",
+}
+
+
+def table_aliases(sql: str) -> Dict[str, str]:
+    """
+    提取SQL中的表别名
+
+    Returns:
+        别名的object_key -> 表名的object_key
+    """
+    aliases = {}
+    for table, alias in _TABLE_ALIAS_RE.findall(sql):
+        if alias and alias.lower() not in _NOT_ALIASES:
+            aliases[object_key(alias)] = object_key(table)
+    return aliases
+
+
+def _children(operators: List[Dict[str, Any]], index: int) -> List[List[Dict[str, Any]]]:
+    """算子的直接子树（算子按深度优先顺序排列）"""
+    depth = operators[index]["depth"]
+    subtrees: List[List[Dict[str, Any]]] = []
+    for operator in operators[index + 1:]:
+        if operator["depth"] <= depth:
+            break
+        if operator["depth"] == depth + 1:
+            subtrees.append([])
+        if subtrees:
+            subtrees[-1].append(operator)
+    return subtrees
+
+
+def _format_rows(rows: Optional[float]) -> str:
+    return f"约{rows:,.0f}行" if rows is not None else "行数未知"
+
+
+class PlanAnalyzer:
+    """执行计划分析器，不调用LLM，毫秒级完成"""
+
+    def __init__(self, table_stats: Optional[Dict[str, Optional[Dict[str, Any]]]] = None, sql: Optional[str] = None):
+        """
+        Args:
+            table_stats: 表名 -> 统计信息（SchemaExtractor.get_table_stats的结果）
+            sql: 被解释的SQL，用于把执行计划中的别名还原为表名
+        """
+        self.table_stats = {object_key(name): stats for name, stats in (table_stats or {}).items() if stats}
+        self.aliases = table_aliases(sql) if sql else {}
+
+    def analyze(self, execution_plan: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        给执行计划的性能评分
+
+        Args:
+            execution_plan: PlanExplainer.explain的结果
+
+        Returns:
+            与AI审查结果中性能维度相同的 {status, score, details, suggestions}，
+            另含命中的规则 findings 和规则版本 heuristics_version
+        """
+        operators = execution_plan.get("operators") or []
+        findings: List[Dict[str, Any]] = []
+        for index, operator in enumerate(operators):
+            self._check_access(operator, findings)
+            self._check_join(operators, index, findings)
+            self._check_sort(operator, execution_plan, findings)
+        estimated_rows = (execution_plan.get("summary") or {}).get("estimated_rows")
+        if estimated_rows is not None and estimated_rows >= _HUGE_ROWS:
+            findings.append(self._finding(
+                "large_result", None, estimated_rows, f"估算结果集{_format_rows(estimated_rows)}"
+            ))
+
+        score = max(0, 100 - sum(finding["penalty"] for finding in findings))
+        status = next((name for threshold, name in _STATUS_THRESHOLDS if score >= threshold), "has_issues")
+        if findings:
+            details = "；".join(finding["message"] for finding in findings) + "。"
+        else:
+            details = "执行计划中没有发现大表全表扫描、无索引的嵌套循环连接或大结果集排序。"
+        suggestions = []
+        for finding in findings:
+            suggestion = _SUGGESTIONS[finding["rule"].split(":")[0]].format(object=finding.get("object") or "相关表")
+            if suggestion not in suggestions:
+                suggestions.append(suggestion)
+        return {
+            "status": status,
+            "score": score,
+            "details": f"[{HEURISTICS_VERSION}] {details}",
+            "suggestions": "；".join(suggestions),
+            "findings": findings,
+            "heuristics_version": HEURISTICS_VERSION,
+        }
+
+    def _table_rows(self, operator: Dict[str, Any]) -> Optional[float]:
+        """表的行数：优先使用统计信息，其次使用执行计划中的估算行数"""
+        name = operator.get("object")
+        if name:
+            key = object_key(name)
+            stats = self.table_stats.get(self.aliases.get(key, key)) or self.table_stats.get(key)
+            if stats and stats.get("row_count") is not None:
+                return float(stats["row_count"])
+        return operator.get("rows")
+
+    def _table_label(self, operator: Dict[str, Any]) -> Optional[str]:
+        name = operator.get("object")
+        if not name:
+            return None
+        table = self.aliases.get(object_key(name))
+        return f"{table}({name})" if table and table != object_key(name) else name
+
+    @staticmethod
+    def _finding(rule: str, obj: Optional[str], rows: Optional[float], message: str) -> Dict[str, Any]:
+        return {
+            "rule": rule,
+            "object": obj,
+            "rows": rows,
+            "penalty": _PENALTIES[rule.replace(":", "_")],
+            "message": message,
+        }
+
+    def _check_access(self, operator: Dict[str, Any], findings: List[Dict[str, Any]]):
+        """大表的全表扫描和全索引扫描"""
+        access = operator.get("access")
+        if access == ACCESS_FULL_SCAN:
+            rows = self._table_rows(operator)
+            label = self._table_label(operator)
+            if rows is None:
+                findings.append(self._finding("full_scan:unknown", label, None, f"{label}全表扫描（行数未知）"))
+            elif rows >= _MEDIUM_ROWS:
+                level = "huge" if rows >= _HUGE_ROWS else "large" if rows >= _LARGE_ROWS else "medium"
+                findings.append(self._finding(f"full_scan:{level}", label, rows, f"{label}全表扫描（{_format_rows(rows)}）"))
+        elif access == ACCESS_INDEX_SCAN:
+            rows = self._table_rows(operator)
+            if rows is not None and rows >= _LARGE_ROWS:
+                label = self._table_label(operator) or operator.get("index")
+                findings.append(self._finding(
+                    "full_index_scan:large", label, rows, f"{label}全索引扫描（{_format_rows(rows)}）"
+                ))
+        if operator.get("temp") == "AUTOMATIC INDEX":
+            label = self._table_label(operator)
+            findings.append(self._finding("automatic_index", label, None, f"{label}的连接没有可用索引，SQLite临时建立了自动索引"))
+
+    def _check_join(self, operators: List[Dict[str, Any]], index: int, findings: List[Dict[str, Any]]):
+        """
+        嵌套循环的内层为全表扫描
+
+        SQLite/MySQL的连接标记在内层表的访问算子上，其他数据库的连接是父节点，内层为第二个及之后的子树
+        """
+        operator = operators[index]
+        if operator.get("join") != "nested_loop":
+            return
+        if operator.get("access"):
+            inner = [operator]
+        else:
+            inner = [item for subtree in _children(operators, index)[1:] for item in subtree]
+        for item in inner:
+            if item.get("access") != ACCESS_FULL_SCAN:
+                continue
+            rows = self._table_rows(item)
+            label = self._table_label(item)
+            small = rows is not None and rows < _NESTED_LOOP_INNER_ROWS
+            findings.append(self._finding(
+                "nested_loop_full_scan:small" if small else "nested_loop_full_scan", label, rows,
+                f"嵌套循环连接的内层{label}没有使用索引（{_format_rows(rows)}），外层每一行都要扫描一次"
+            ))
+
+    def _check_sort(self, operator: Dict[str, Any], execution_plan: Dict[str, Any], findings: List[Dict[str, Any]]):
+        """大结果集的排序、分组和去重（临时B树、filesort、Sort节点）"""
+        temp = operator.get("temp")
+        if not temp or not _SORT_RE.search(temp) or temp.upper() == "SORT AGGREGATE":
+            return
+        rows = operator.get("rows")
+        if rows is None:
+            rows = (execution_plan.get("summary") or {}).get("estimated_rows")
+        if rows is None:
+            # SQLite不提供估算行数，以扫描的最大表的行数作为上限
+            scanned = [
+                self._table_rows(item) for item in execution_plan.get("operators") or []
+                if item.get("access") == ACCESS_FULL_SCAN
+            ]
+            scanned = [value for value in scanned if value is not None]
+            rows = max(scanned) if scanned else None
+        if rows is None:
+            findings.append(self._finding("sort:unknown", None, None, f"{temp}使用临时排序（行数未知）"))
+        elif rows >= _MEDIUM_ROWS:
+            rule = "sort:large" if rows >= _LARGE_ROWS else "sort:medium"
+            findings.append(self._finding(rule, None, rows, f"{temp}对{_format_rows(rows)}做临时排序"))
@@ -0,0 +1,489 @@
+"""执行计划提取器 - 在目标库执行不实际运行SQL的EXPLAIN，并把各方言的执行计划归一为紧凑结构"""
+
+import json
+import re
+import time
+import uuid
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+import logging
+
+from app.config import get_settings
+from app.models.db_connection import DatabaseType
+from .sql_parser import SQLParser
+from .sql_splitter import SQLScriptSplitter
+
+logger = logging.getLogger(__name__)
+
+# 可以解释的语句类型：各方言的EXPLAIN（不带ANALYZE）只生成计划，不执行语句
+EXPLAINABLE_TYPES = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+
+# 访问方式
+ACCESS_FULL_SCAN = "full_scan"  # 全表扫描
+ACCESS_INDEX_SCAN = "index_scan"  # 全索引扫描
+ACCESS_INDEX_RANGE = "index_range"  # 索引范围扫描
+ACCESS_INDEX_LOOKUP = "index_lookup"  # 索引等值查找
+
+# MySQL access_type -> 访问方式
+_MYSQL_ACCESS = {
+    "ALL": ACCESS_FULL_SCAN,
+    "index": ACCESS_INDEX_SCAN,
+    "range": ACCESS_INDEX_RANGE,
+    "index_merge": ACCESS_INDEX_RANGE,
+    "ref": ACCESS_INDEX_LOOKUP,
+    "eq_ref": ACCESS_INDEX_LOOKUP,
+    "ref_or_null": ACCESS_INDEX_LOOKUP,
+    "const": ACCESS_INDEX_LOOKUP,
+    "system": ACCESS_INDEX_LOOKUP,
+    "fulltext": ACCESS_INDEX_LOOKUP,
+    "unique_subquery": ACCESS_INDEX_LOOKUP,
+    "index_subquery": ACCESS_INDEX_LOOKUP,
+}
+# MySQL中表示排序、分组、去重的节点
+_MYSQL_TEMP_NODES = {"ordering_operation": "ORDER BY", "grouping_operation": "GROUP BY", "duplicates_removal": "DISTINCT"}
+
+# PostgreSQL节点类型 -> 连接方式
+_PG_JOINS = {"Nested Loop": "nested_loop", "Hash Join": "hash_join", "Merge Join": "merge_join"}
+# PostgreSQL中使用临时排序或哈希的节点
+_PG_TEMP_NODES = {"Sort", "Incremental Sort", "Materialize", "Hash"}
+
+# Oracle操作 -> 连接方式
+_ORACLE_JOINS = {"NESTED LOOPS": "nested_loop", "HASH JOIN": "hash_join", "MERGE JOIN": "merge_join"}
+
+# SQL Server物理算子 -> 访问方式
+_MSSQL_ACCESS = {
+    "Table Scan": ACCESS_FULL_SCAN,
+    "Clustered Index Scan": ACCESS_FULL_SCAN,
+    "Index Scan": ACCESS_INDEX_SCAN,
+    "Index Seek": ACCESS_INDEX_LOOKUP,
+    "Clustered Index Seek": ACCESS_INDEX_LOOKUP,
+    "RID Lookup": ACCESS_INDEX_LOOKUP,
+    "Key Lookup": ACCESS_INDEX_LOOKUP,
+}
+_MSSQL_JOINS = {"Nested Loops": "nested_loop", "Hash Match": "hash_join", "Merge Join": "merge_join"}
+_MSSQL_NS = "{http://schemas.microsoft.com/sqlserver/2004/07/showplan}"
+
+# SQLite EXPLAIN QUERY PLAN的访问行，如 SEARCH t0 USING COVERING INDEX ib (b>?)
+_SQLITE_ACCESS_RE = re.compile(
+    r'^(SCAN|SEARCH)\s+(?:TABLE\s+)?(\S+)(?:\s+AS\s+(\S+))?'
+    r'(?:\s+USING\s+(AUTOMATIC\s+)?(?:(?:COVERING\s+)?INDEX(?:\s+([^\s(]+))?|(?:INTEGER\s+)?PRIMARY\s+KEY))?',
+    re.IGNORECASE
+)
+_SQLITE_TEMP_RE = re.compile(r'^USE TEMP B-TREE FOR (.+)$', re.IGNORECASE)
+
+# SQLite进度回调的间隔（虚拟机指令数）
+_SQLITE_PROGRESS_STEPS = 1000
+
+
+def _number(value) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _operator(depth: int, operation: str, **fields) -> Dict[str, Any]:
+    """算子只保留有值的字段，使执行计划保持紧凑"""
+    operator = {"depth": depth, "operation": operation}
+    operator.update({key: value for key, value in fields.items() if value is not None})
+    return operator
+
+
+class PlanExplainer:
+    """执行计划提取器，使用各方言不执行语句的EXPLAIN获取优化器的估算计划"""
+
+    def __init__(self, engine: Engine, db_type: DatabaseType):
+        self.engine = engine
+        self.db_type = db_type
+        self.settings = get_settings()
+
+    def check_explainable(self, sql: str) -> Dict[str, Any]:
+        """
+        检查语句能否安全地解释：只允许单条SELECT/INSERT/UPDATE/DELETE
+
+        Returns:
+            {"sql": 去掉结尾分号的语句}，不能解释时返回error
+        """
+        statements = list(SQLScriptSplitter(db_type=self.db_type).split(sql))
+        if len(statements) != 1:
+            return {"error": "只能解释单条SQL语句"}
+        statement = statements[0]["sql"]
+        sql_type = SQLParser(self.db_type).get_sql_type(statement)
+        if sql_type not in EXPLAINABLE_TYPES:
+            return {"error": f"不支持解释{sql_type}语句，只支持SELECT、INSERT、UPDATE、DELETE"}
+        return {"sql": statement}
+
+    def explain(self, sql: str) -> Dict[str, Any]:
+        """
+        获取SQL的执行计划
+
+        在回滚的事务中执行（SQL Server在自动提交模式下执行），并按方言设置语句超时（explain_timeout秒）；
+        EXPLAIN不带ANALYZE，语句本身不会执行
+
+        Args:
+            sql: SQL语句
+
+        Returns:
+            归一化的执行计划 {dialect, operators, summary, truncated}，失败时返回error
+        """
+        checked = self.check_explainable(sql)
+        if "error" in checked:
+            return checked
+        explain = {
+            DatabaseType.SQLITE: self._explain_sqlite,
+            DatabaseType.POSTGRESQL: self._explain_postgresql,
+            DatabaseType.MYSQL: self._explain_mysql,
+            DatabaseType.ORACLE: self._explain_oracle,
+            DatabaseType.SQLSERVER: self._explain_sqlserver,
+        }.get(self.db_type)
+        if explain is None:
+            return {"error": f"不支持获取{self.db_type.value}的执行计划"}
+
+        try:
+            with self.engine.connect() as conn:
+                if self.db_type == DatabaseType.SQLSERVER:
+                    # SET SHOWPLAN_XML不能在显式事务中执行；开启后语句只返回计划，不需要回滚
+                    conn.execution_options(isolation_level="AUTOCOMMIT")
+                    operators = explain(conn, checked["sql"])
+                else:
+                    transaction = conn.begin()
+                    try:
+                        operators = explain(conn, checked["sql"])
+                    finally:
+                        # Oracle的EXPLAIN PLAN会写入PLAN_TABLE，回滚后不留痕迹
+                        transaction.rollback()
+        except Exception as e:
+            logger.warning(f"获取执行计划失败: {e}")
+            return {"error": f"获取执行计划失败: {str(e).splitlines()[0] if str(e) else type(e).__name__}"}
+        return self._build_plan(operators)
+
+    def _build_plan(self, operators: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """汇总全表扫描、索引访问、连接方式、临时结构，以及根节点的估算行数和代价"""
+        summary: Dict[str, Any] = {
+            "full_scans": [],
+            "index_access": [],
+            "joins": [],
+            "temp_structures": [],
+            "estimated_rows": None,
+            "total_cost": None,
+        }
+        for operator in operators:
+            access = operator.get("access")
+            if access == ACCESS_FULL_SCAN:
+                if operator.get("object") not in summary["full_scans"]:
+                    summary["full_scans"].append(operator.get("object"))
+            elif access is not None:
+                label = ".".join(filter(None, [operator.get("object"), operator.get("index")]))
+                summary["index_access"].append(f"{label} ({access})")
+            if operator.get("join"):
+                summary["joins"].append(operator["join"])
+            if operator.get("temp"):
+                summary["temp_structures"].append(operator["temp"])
+            if operator.get("root"):
+                summary["estimated_rows"] = operator.get("rows")
+                summary["total_cost"] = operator.get("cost")
+        limit = self.settings.explain_max_operators
+        return {
+            "dialect": self.db_type.value,
+            "operators": [
+                {key: value for key, value in operator.items() if key != "root"} for operator in operators[:limit]
+            ],
+            "summary": summary,
+            "truncated": len(operators) > limit,
+        }
+
+    @staticmethod
+    def _raw_connection(conn: Connection):
+        return conn.connection.dbapi_connection
+
+    # ---------- SQLite ----------
+
+    def _explain_sqlite(self, conn: Connection, sql: str) -> List[Dict[str, Any]]:
+        """EXPLAIN QUERY PLAN，超时由进度回调中断"""
+        raw = self._raw_connection(conn)
+        deadline = time.monotonic() + self.settings.explain_timeout
+        raw.set_progress_handler(lambda: 1 if time.monotonic() > deadline else 0, _SQLITE_PROGRESS_STEPS)
+        try:
+            rows = conn.execution_options(no_parameters=True).exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+        finally:
+            raw.set_progress_handler(None, 0)
+        return self.normalize_sqlite(rows)
+
+    @staticmethod
+    def normalize_sqlite(rows) -> List[Dict[str, Any]]:
+        """
+        归一化EXPLAIN QUERY PLAN的结果行 (id, parent, notused, detail)
+
+        SQLite只使用嵌套循环连接，同一层级的第二个及之后的表访问记为一次nested_loop；
+        SQLite不提供估算行数和代价
+        """
+        depths: Dict[int, int] = {}
+        accessed_parents = set()
+        operators = []
+        for node_id, parent, _, detail in rows:
+            depth = depths.get(parent, -1) + 1
+            depths[node_id] = depth
+            access_match = _SQLITE_ACCESS_RE.match(detail)
+            temp_match = _SQLITE_TEMP_RE.match(detail)
+            if access_match and not detail.upper().startswith(("SCAN CONSTANT ROW", "SCAN SUBQUERY")) \
+                    and not access_match.group(2).startswith("("):
+                verb, name, alias, automatic, index = access_match.groups()
+                if "PRIMARY KEY" in detail.upper() and index is None:
+                    index = "PRIMARY KEY"
+                if verb.upper() == "SEARCH":
+                    # 条件中有比较运算符时为范围扫描，如 (b>? AND b<?)
+                    access = ACCESS_INDEX_RANGE if re.search(r'\([^)]*[<>]', detail) else ACCESS_INDEX_LOOKUP
+                elif index is not None:
+                    access = ACCESS_INDEX_SCAN
+                else:
+                    access = ACCESS_FULL_SCAN
+                operators.append(_operator(
+                    depth, detail,
+                    object=alias or name,
+                    index=index,
+                    access=access,
+                    join="nested_loop" if parent in accessed_parents else None,
+                    temp="AUTOMATIC INDEX" if automatic else None,
+                ))
+                accessed_parents.add(parent)
+            elif temp_match:
+                operators.append(_operator(depth, detail, temp=temp_match.group(1)))
+            else:
+                operators.append(_operator(depth, detail))
+        return operators
+
+    # ---------- PostgreSQL ----------
+
+    def _explain_postgresql(self, conn: Connection, sql: str) -> List[Dict[str, Any]]:
+        """EXPLAIN (FORMAT JSON)，超时由事务内的statement_timeout和lock_timeout控制"""
+        timeout_ms = int(self.settings.explain_timeout * 1000)
+        conn.exec_driver_sql(f"SET LOCAL statement_timeout = {timeout_ms}")
+        conn.exec_driver_sql(f"SET LOCAL lock_timeout = {timeout_ms}")
+        value = conn.execution_options(no_parameters=True).exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}").scalar()
+        return self.normalize_postgresql(json.loads(value) if isinstance(value, str) else value)
+
+    @staticmethod
+    def normalize_postgresql(document: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """归一化EXPLAIN (FORMAT JSON)的计划树"""
+        operators: List[Dict[str, Any]] = []
+
+        def walk(node: Dict[str, Any], depth: int):
+            node_type = node.get("Node Type", "")
+            if node_type == "Seq Scan":
+                access = ACCESS_FULL_SCAN
+            elif node_type in ("Index Scan", "Index Only Scan"):
+                access = ACCESS_INDEX_LOOKUP if node.get("Index Cond") else ACCESS_INDEX_SCAN
+            elif node_type in ("Bitmap Index Scan", "Bitmap Heap Scan"):
+                access = ACCESS_INDEX_RANGE
+            else:
+                access = None
+            operation = node_type
+            if node.get("Join Type") and node_type in _PG_JOINS:
+                operation = f"{node_type} ({node['Join Type']})"
+            elif node.get("Strategy") and node_type == "Aggregate":
+                operation = f"{node['Strategy']} Aggregate"
+            operators.append(_operator(
+                depth, operation,
+                object=node.get("Relation Name"),
+                index=node.get("Index Name"),
+                access=access,
+                join=_PG_JOINS.get(node_type),
+                temp=node_type if node_type in _PG_TEMP_NODES else None,
+                rows=_number(node.get("Plan Rows")),
+                cost=_number(node.get("Total Cost")),
+                root=depth == 0 or None,
+            ))
+            for child in node.get("Plans") or []:
+                walk(child, depth + 1)
+
+        for entry in document or []:
+            if entry.get("Plan"):
+                walk(entry["Plan"], 0)
+        return operators
+
+    # ---------- MySQL ----------
+
+    def _explain_mysql(self, conn: Connection, sql: str) -> List[Dict[str, Any]]:
+        """
+        EXPLAIN FORMAT=JSON
+
+        MySQL的max_execution_time只作用于SELECT，另外用lock_wait_timeout限制元数据锁等待；
+        会话变量不随事务回滚，结束后恢复原值，避免影响连接池中该连接的后续使用
+        """
+        timeout = max(int(self.settings.explain_timeout), 1)
+        previous = conn.exec_driver_sql(
+            "SELECT @@SESSION.max_execution_time, @@SESSION.lock_wait_timeout"
+        ).first()
+        conn.exec_driver_sql(f"SET SESSION max_execution_time = {timeout * 1000}")
+        conn.exec_driver_sql(f"SET SESSION lock_wait_timeout = {timeout}")
+        try:
+            value = conn.execution_options(no_parameters=True).exec_driver_sql(f"EXPLAIN FORMAT=JSON {sql}").scalar()
+        finally:
+            conn.exec_driver_sql(f"SET SESSION max_execution_time = {int(previous[0])}")
+            conn.exec_driver_sql(f"SET SESSION lock_wait_timeout = {int(previous[1])}")
+        return self.normalize_mysql(json.loads(value) if isinstance(value, str) else value)
+
+    @staticmethod
+    def normalize_mysql(document: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """归一化EXPLAIN FORMAT=JSON的query_block树"""
+        block = (document or {}).get("query_block", {})
+        operators: List[Dict[str, Any]] = [_operator(
+            0, block.get("message") or "query_block",
+            cost=_number((block.get("cost_info") or {}).get("query_cost")),
+            root=True,
+        )]
+        last_table: Dict[str, Any] = {}
+
+        def walk(node, depth: int, join: Optional[str] = None):
+            nonlocal last_table
+            if isinstance(node, list):
+                for item in node:
+                    walk(item, depth, join)
+                return
+            if not isinstance(node, dict):
+                return
+            for key, value in node.items():
+                if key == "table" and isinstance(value, dict):
+                    join_buffer = str(value.get("using_join_buffer") or "")
+                    operator = _operator(
+                        depth, f"table ({value.get('access_type')})",
+                        object=value.get("table_name"),
+                        index=value.get("key"),
+                        access=_MYSQL_ACCESS.get(value.get("access_type")),
+                        join="hash_join" if "hash" in join_buffer.lower() else join,
+                        rows=_number(value.get("rows_examined_per_scan")),
+                    )
+                    operators.append(operator)
+                    last_table = value
+                    walk(value, depth + 1)
+                elif key == "nested_loop" and isinstance(value, list):
+                    operators.append(_operator(depth, "nested_loop"))
+                    # 嵌套循环中的第一个表是驱动表，之后的每个表是一次连接
+                    for index, item in enumerate(value):
+                        walk(item, depth + 1, "nested_loop" if index > 0 else None)
+                elif key in _MYSQL_TEMP_NODES and isinstance(value, dict):
+                    temp = None
+                    if value.get("using_filesort"):
+                        temp = f"{_MYSQL_TEMP_NODES[key]} (filesort)"
+                    elif value.get("using_temporary_table"):
+                        temp = f"{_MYSQL_TEMP_NODES[key]} (temporary table)"
+                    operators.append(_operator(depth, key, temp=temp))
+                    walk(value, depth + 1)
+                elif isinstance(value, (dict, list)):
+                    walk(value, depth + 1 if key.endswith("subqueries") or key.startswith("materialized") else depth)
+
+        walk(block, 1)
+        operators[0]["rows"] = _number(last_table.get("rows_produced_per_join"))
+        return operators
+
+    # ---------- Oracle ----------
+
+    def _explain_oracle(self, conn: Connection, sql: str) -> List[Dict[str, Any]]:
+        """EXPLAIN PLAN写入PLAN_TABLE（DBMS_XPLAN读取的同一张表），读取后随事务回滚；超时使用驱动的call_timeout"""
+        raw = self._raw_connection(conn)
+        previous_timeout = getattr(raw, "call_timeout", None)
+        if previous_timeout is not None:
+            raw.call_timeout = int(self.settings.explain_timeout * 1000)
+        statement_id = f"sqlreview_{uuid.uuid4().hex[:12]}"
+        try:
+            conn.execution_options(no_parameters=True).exec_driver_sql(
+                f"EXPLAIN PLAN SET STATEMENT_ID = '{statement_id}' FOR {sql}"
+            )
+            rows = conn.execute(text(
+                "SELECT id, depth, operation, options, object_name, cardinality, cost "
+                "FROM plan_table WHERE statement_id = :statement_id ORDER BY id"
+            ), {"statement_id": statement_id}).fetchall()
+        finally:
+            if previous_timeout is not None:
+                raw.call_timeout = previous_timeout
+        return self.normalize_oracle(rows)
+
+    @staticmethod
+    def normalize_oracle(rows) -> List[Dict[str, Any]]:
+        """归一化PLAN_TABLE的行 (id, depth, operation, options, object_name, cardinality, cost)"""
+        operators = []
+        for node_id, depth, operation, options, object_name, cardinality, cost in rows:
+            options = options or ""
+            access = None
+            obj, index = None, None
+            if operation == "TABLE ACCESS":
+                obj = object_name
+                access = ACCESS_FULL_SCAN if options.startswith("FULL") else ACCESS_INDEX_LOOKUP
+            elif operation == "INDEX":
+                index = object_name
+                if "FULL SCAN" in options:
+                    access = ACCESS_INDEX_SCAN
+                elif "RANGE SCAN" in options or "SKIP SCAN" in options:
+                    access = ACCESS_INDEX_RANGE
+                else:
+                    access = ACCESS_INDEX_LOOKUP
+            elif object_name:
+                obj = object_name
+            operators.append(_operator(
+                int(depth or 0), f"{operation} {options}".strip(),
+                object=obj,
+                index=index,
+                access=access,
+                join=_ORACLE_JOINS.get(operation),
+                temp=f"{operation} {options}".strip() if operation in ("SORT", "HASH") and options else None,
+                rows=_number(cardinality),
+                cost=_number(cost),
+                root=node_id == 0 or None,
+            ))
+        return operators
+
+    # ---------- SQL Server ----------
+
+    def _explain_sqlserver(self, conn: Connection, sql: str) -> List[Dict[str, Any]]:
+        """SET SHOWPLAN_XML ON后提交的语句只返回估算计划而不执行；超时使用pyodbc的查询超时"""
+        raw = self._raw_connection(conn)
+        previous_timeout = getattr(raw, "timeout", None)
+        if previous_timeout is not None:
+            raw.timeout = max(int(self.settings.explain_timeout), 1)
+        conn.exec_driver_sql("SET SHOWPLAN_XML ON")
+        try:
+            value = conn.execution_options(no_parameters=True).exec_driver_sql(sql).scalar()
+        finally:
+            conn.exec_driver_sql("SET SHOWPLAN_XML OFF")
+            if previous_timeout is not None:
+                raw.timeout = previous_timeout
+        return self.normalize_sqlserver(value)
+
+    @staticmethod
+    def normalize_sqlserver(document: str) -> List[Dict[str, Any]]:
+        """归一化SHOWPLAN_XML中的RelOp树"""
+        operators: List[Dict[str, Any]] = []
+
+        def walk(element, depth: int):
+            for child in element:
+                if child.tag != f"{_MSSQL_NS}RelOp":
+                    walk(child, depth)
+                    continue
+                physical = child.get("PhysicalOp", "")
+                logical = child.get("LogicalOp", "")
+                target = next(
+                    (item for item in child.iter(f"{_MSSQL_NS}Object") if item.get("Table")),
+                    None
+                ) if physical in _MSSQL_ACCESS else None
+                join = _MSSQL_JOINS.get(physical)
+                if physical == "Hash Match" and "Join" not in logical and "Semi" not in logical:
+                    join = None
+                operators.append(_operator(
+                    depth, physical if physical == logical else f"{physical} ({logical})",
+                    object=target.get("Table").strip("[]") if target is not None else None,
+                    index=(target.get("Index") or "").strip("[]") or None if target is not None else None,
+                    access=_MSSQL_ACCESS.get(physical),
+                    join=join,
+                    temp=physical if physical in ("Sort", "Table Spool", "Index Spool") or
+                    (physical == "Hash Match" and join is None) else None,
+                    rows=_number(child.get("EstimateRows")),
+                    cost=_number(child.get("EstimatedTotalSubtreeCost")),
+                    root=depth == 0 or None,
+                ))
+                walk(child, depth + 1)
+
+        walk(ET.fromstring(document), 0)
+        return operators
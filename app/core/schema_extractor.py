@@ -1,31 +1,179 @@
 """数据库模式提取器 - 生成完整的CREATE TABLE DDL语句"""
 
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from typing import Dict, List, Any, Optional
-from sqlalchemy import create_engine, text, MetaData, Table, Column, inspect
-from sqlalchemy.engine import Engine, Inspector
+from sqlalchemy import create_engine, text, bindparam, MetaData, Table, Column, inspect
+from sqlalchemy.engine import Connection, Engine, Inspector
+from sqlalchemy.engine.reflection import ObjectKind
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.schema import CreateTable
 from sqlalchemy.dialects import mysql, postgresql, sqlite, mssql, oracle
 import logging
 
+from app.config import get_settings
 from app.models.db_connection import DatabaseType
+from app.utils.cache import table_stats_cache
 
 logger = logging.getLogger(__name__)
 
 
+def object_key(name: str) -> str:
+    """对象的规范名：去掉模式前缀和引号后转小写，用于在模式快照中查找"""
+    return name.split(".")[-1].strip('"`[]').lower()
+
+
+def _type_name(column_type) -> str:
+    try:
+        return str(column_type)
+    except Exception:
+        # 部分方言类型无法脱离方言编译
+        return type(column_type).__name__
+
+
 class SchemaExtractor:
     """数据库模式提取器，用于生成完整的CREATE TABLE DDL语句"""
     
-    def __init__(self, engine: Engine, db_type: DatabaseType):
+    def __init__(self, engine: Optional[Engine], db_type: DatabaseType, snapshot: Optional[Dict[str, Dict[str, Any]]] = None):
+        """
+        Args:
+            engine: 目标库引擎，只使用模式快照时可以为None
+            db_type: 数据库类型
+            snapshot: 模式快照中的对象（object_key -> 对象），其中的表直接生成DDL而不访问目标库
+        """
         self.engine = engine
         self.db_type = db_type
-        self.inspector = inspect(engine)
+        self.snapshot = snapshot or {}
         self.metadata = MetaData()
+        self._inspector: Optional[Inspector] = None
+    
+    @property
+    def inspector(self) -> Inspector:
+        # 创建Inspector会连接目标库，表都在快照中时不需要
+        if self._inspector is None:
+            self._inspector = inspect(self.engine)
+        return self._inspector
+    
+    def capture_catalog(self) -> Dict[str, Dict[str, Any]]:
+        """
+        读取目标库全部表和视图的注释、列、主键、外键和索引
+        
+        使用批量反射（get_multi_*），大型目录只需少量目录查询
+        
+        Returns:
+            object_key -> {name, type, comment, columns, indexes, primary_key, foreign_keys}
+        """
+        objects: Dict[str, Dict[str, Any]] = {}
+        for kind, object_type in ((ObjectKind.TABLE, "table"), (ObjectKind.ANY_VIEW, "view")):
+            for (_, name), columns in self.inspector.get_multi_columns(kind=kind).items():
+                objects[object_key(name)] = {
+                    "name": name,
+                    "type": object_type,
+                    "comment": None,
+                    "columns": [
+                        {
+                            "name": column["name"],
+                            "type": _type_name(column["type"]),
+                            "nullable": bool(column.get("nullable", True)),
+                            "default": None if column.get("default") is None else str(column["default"]),
+                            "comment": column.get("comment"),
+                        }
+                        for column in columns
+                    ],
+                    "indexes": [],
+                    "primary_key": [],
+                    "foreign_keys": [],
+                }
+        
+        def table_entries(method, kind=ObjectKind.TABLE):
+            # 不支持的反射（如SQLite的注释）直接跳过
+            try:
+                items = method(kind=kind).items()
+            except NotImplementedError:
+                return
+            for (_, name), value in items:
+                entry = objects.get(object_key(name))
+                if entry is not None:
+                    yield entry, value
+        
+        for entry, comment in table_entries(self.inspector.get_multi_table_comment, ObjectKind.ANY):
+            entry["comment"] = comment.get("text")
+        for entry, primary_key in table_entries(self.inspector.get_multi_pk_constraint):
+            entry["primary_key"] = list(primary_key.get("constrained_columns") or [])
+        for entry, foreign_keys in table_entries(self.inspector.get_multi_foreign_keys):
+            entry["foreign_keys"] = sorted(
+                (
+                    {
+                        "columns": list(foreign_key["constrained_columns"]),
+                        "referred_table": foreign_key["referred_table"],
+                        "referred_columns": list(foreign_key["referred_columns"]),
+                    }
+                    for foreign_key in foreign_keys
+                ),
+                key=lambda foreign_key: (foreign_key["columns"], foreign_key["referred_table"])
+            )
+        for entry, indexes in table_entries(self.inspector.get_multi_indexes):
+            entry["indexes"] = sorted(
+                (
+                    {
+                        "name": index["name"],
+                        "columns": [column for column in index["column_names"] if column],
+                        "unique": bool(index.get("unique")),
+                    }
+                    for index in indexes
+                ),
+                key=lambda index: index["name"] or ""
+            )
+        return objects
+    
+    @staticmethod
+    def render_snapshot_ddl(entry: Dict[str, Any]) -> str:
+        """
+        根据模式快照中的表生成DDL（不访问目标库）
+        
+        Args:
+            entry: capture_catalog返回的对象
+            
+        Returns:
+            CREATE TABLE、CREATE INDEX和注释语句
+        """
+        name = entry["name"]
+        lines = []
+        for column in entry["columns"]:
+            line = f"  {column['name']} {column['type']}"
+            if not column["nullable"]:
+                line += " NOT NULL"
+            if column.get("default") is not None:
+                line += f" DEFAULT {column['default']}"
+            lines.append(line)
+        if entry.get("primary_key"):
+            lines.append(f"  PRIMARY KEY ({', '.join(entry['primary_key'])})")
+        for foreign_key in entry.get("foreign_keys") or []:
+            lines.append(
+                f"  FOREIGN KEY ({', '.join(foreign_key['columns'])}) "
+                f"REFERENCES {foreign_key['referred_table']} ({', '.join(foreign_key['referred_columns'])})"
+            )
+        ddl = f"CREATE TABLE {name} (\n" + ",\n".join(lines) + "\n);"
+        
+        statements = []
+        for index in entry.get("indexes") or []:
+            unique = "UNIQUE " if index["unique"] else ""
+            statements.append(f"CREATE {unique}INDEX {index['name']} ON {name} ({', '.join(index['columns'])});")
+        if entry.get("comment"):
+            statements.append(f"COMMENT ON TABLE {name} IS '{entry['comment']}';")
+        for column in entry["columns"]:
+            if column.get("comment"):
+                statements.append(f"COMMENT ON COLUMN {name}.{column['name']} IS '{column['comment']}';")
+        if statements:
+            ddl += "\n\n" + "\n".join(statements)
+        return ddl
     
     def get_table_schema(self, table_names: List[str]) -> Dict[str, Any]:
         """
         获取指定表的完整CREATE TABLE DDL语句
         
+        模式快照中有的表直接根据快照生成，其余的表从目标库反射
+        
         Args:
             table_names: 表名列表
             
@@ -34,57 +182,158 @@ class SchemaExtractor:
         """
         schema_info = {
             "tables": {},
-            "total_tables": 0,
+            "total_tables": len(table_names),
             "found_tables": 0,
             "missing_tables": []
         }
         
+        live_names = []
+        for table_name in table_names:
+            entry = self.snapshot.get(object_key(table_name))
+            if entry is not None and entry["type"] == "table":
+                schema_info["tables"][table_name] = {
+                    "ddl": self.render_snapshot_ddl(entry),
+                    "type": "table"
+                }
+                schema_info["found_tables"] += 1
+            else:
+                live_names.append(table_name)
+        if not live_names:
+            self._attach_table_stats(schema_info["tables"])
+            return schema_info
+        if self.engine is None:
+            schema_info["missing_tables"].extend(live_names)
+            return schema_info
+        
         try:
             # 获取数据库中所有表名
-            available_tables = self.inspector.get_table_names()
-            logger.info(f"数据库中可用的表: {available_tables}")
-            
-            for table_name in table_names:
-                if table_name in available_tables:
-                    try:
-                        ddl = self._generate_create_table_ddl(table_name)
-                        if ddl:
-                            schema_info["tables"][table_name] = {
-                                "ddl": ddl,
-                                "type": "table"
-                            }
-                            schema_info["found_tables"] += 1
-                            logger.info(f"成功生成表 {table_name} 的DDL")
-                        else:
-                            logger.warning(f"无法生成表 {table_name} 的DDL")
-                            schema_info["missing_tables"].append(table_name)
-                    except Exception as e:
-                        logger.error(f"生成表 {table_name} DDL时出错: {e}")
-                        schema_info["missing_tables"].append(table_name)
-                else:
-                    logger.warning(f"表 {table_name} 在数据库中不存在")
-                    schema_info["missing_tables"].append(table_name)
-            
-            schema_info["total_tables"] = len(table_names)
-            
+            available_tables = set(self.inspector.get_table_names())
+            logger.info(f"数据库中可用的表: {len(available_tables)}个")
         except SQLAlchemyError as e:
             logger.error(f"获取表结构时出错: {e}")
+            schema_info["missing_tables"].extend(live_names)
+            return schema_info
+        
+        existing = []
+        for table_name in live_names:
+            if table_name in available_tables:
+                existing.append(table_name)
+            else:
+                logger.warning(f"表 {table_name} 在数据库中不存在")
+        ddls = self._extract_ddls(existing)
         
+        # 按传入顺序输出
+        tables = schema_info["tables"]
+        schema_info["tables"] = {}
+        for table_name in table_names:
+            if table_name in tables:
+                schema_info["tables"][table_name] = tables[table_name]
+            elif ddls.get(table_name):
+                schema_info["tables"][table_name] = {
+                    "ddl": ddls[table_name],
+                    "type": "table"
+                }
+                schema_info["found_tables"] += 1
+            else:
+                schema_info["missing_tables"].append(table_name)
+        
+        self._attach_table_stats(schema_info["tables"])
         return schema_info
     
-    def _generate_create_table_ddl(self, table_name: str) -> Optional[str]:
+    def _extract_ddls(self, table_names: List[str]) -> Dict[str, Optional[str]]:
+        """
+        并行生成多个表的DDL
+        
+        每个表在线程池中使用引擎连接池的独立连接反射，线程数不超过schema_extract_workers；
+        全部表共用从提交时开始计算的schema_extract_timeout秒期限，到期时未完成的表（包括仍在排队的）记为缺失，
+        排队的任务取消，正在执行的任务作废其连接，使阻塞在目标库上的反射出错退出
+        
+        Args:
+            table_names: 表名列表（已确认存在）
+            
+        Returns:
+            表名 -> DDL，失败或超时的表为None
+        """
+        if not table_names:
+            return {}
+        settings = get_settings()
+        workers = min(max(settings.schema_extract_workers, 1), len(table_names))
+        if workers == 1:
+            return {table_name: self._extract_ddl(table_name) for table_name in table_names}
+        
+        timeout = settings.schema_extract_timeout
+        results: Dict[str, Optional[str]] = {}
+        active: Dict[str, Connection] = {}
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="schema-extract")
+        deadline = time.monotonic() + timeout
+        futures = {executor.submit(self._extract_ddl, table_name, active): table_name for table_name in table_names}
+        pending = set(futures)
+        try:
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[futures[future]] = future.result()
+            if pending:
+                timed_out = sorted(futures[future] for future in pending)
+                logger.error(f"生成表DDL超时（{timeout}秒），未完成的表: {', '.join(timed_out)}")
+                for table_name in timed_out:
+                    results[table_name] = None
+                    connection = active.get(table_name)
+                    if connection is not None:
+                        # 引擎的dispose()无法关闭仍被线程占用的连接，作废连接使阻塞的反射尽快出错退出
+                        try:
+                            connection.invalidate()
+                        except Exception as e:
+                            logger.warning(f"作废表 {table_name} 的反射连接失败: {e}")
+        finally:
+            # 取消仍在排队的任务，不等待执行中的任务结束
+            executor.shutdown(wait=False, cancel_futures=True)
+        return results
+    
+    def _extract_ddl(self, table_name: str, active: Optional[Dict[str, Connection]] = None) -> Optional[str]:
+        """
+        生成单个表的DDL（在工作线程中执行，异常记为失败）
+        
+        Args:
+            table_name: 表名
+            active: 并行生成时登记执行中的表使用的连接，超时时用于作废连接
+        """
+        try:
+            with self.engine.connect() as conn:
+                if active is not None:
+                    active[table_name] = conn
+                try:
+                    ddl = self._generate_create_table_ddl(table_name, conn)
+                finally:
+                    if active is not None:
+                        active.pop(table_name, None)
+            if ddl:
+                logger.info(f"成功生成表 {table_name} 的DDL")
+            else:
+                logger.warning(f"无法生成表 {table_name} 的DDL")
+            return ddl
+        except Exception as e:
+            logger.error(f"生成表 {table_name} DDL时出错: {e}")
+            return None
+    
+    def _generate_create_table_ddl(self, table_name: str, conn: Optional[Connection] = None) -> Optional[str]:
         """
         使用SQLAlchemy Inspector生成CREATE TABLE DDL语句
         
         Args:
             table_name: 表名
+            conn: 使用的连接，并行生成时每个线程传入自己的连接（同时使用独立的MetaData）
             
         Returns:
             CREATE TABLE DDL语句
         """
         try:
             # 使用Inspector反射表结构
-            table = Table(table_name, self.metadata, autoload_with=self.engine)
+            metadata = MetaData() if conn is not None else self.metadata
+            table = Table(table_name, metadata, autoload_with=conn if conn is not None else self.engine)
             
             # 根据数据库类型选择方言
             dialect = self._get_dialect()
@@ -94,7 +343,9 @@ class SchemaExtractor:
             ddl = str(create_table_stmt.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
             
             # 添加索引信息
-            indexes_ddl = self._generate_indexes_ddl(table_name, dialect)
+            indexes_ddl = self._generate_indexes_ddl(
+                table_name, dialect, inspect(conn) if conn is not None else self.inspector
+            )
             if indexes_ddl:
                 ddl += "\n\n" + indexes_ddl
             
@@ -105,6 +356,175 @@ class SchemaExtractor:
             # 尝试备用方法
             return self._generate_ddl_fallback(table_name)
     
+    # ---------- 表统计信息 ----------
+    
+    # 各数据库的统计信息查询：(表统计SQL, 索引基数SQL, 来源说明)
+    # 表统计返回 (表名, 行数, 字节数)，索引基数返回 (表名, 索引名, 基数)，均按小写表名过滤
+    _STATS_QUERIES = {
+        DatabaseType.POSTGRESQL: (
+            """
+            SELECT c.relname, c.reltuples, pg_total_relation_size(c.oid)
+            FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE c.relkind IN ('r', 'p', 'm') AND n.nspname = ANY(current_schemas(false))
+            AND lower(c.relname) IN :keys
+            """,
+            # 索引首列的n_distinct，负数表示占行数的比例
+            """
+            SELECT t.relname, i.relname, s.n_distinct
+            FROM pg_index x
+            JOIN pg_class t ON t.oid = x.indrelid
+            JOIN pg_class i ON i.oid = x.indexrelid
+            JOIN pg_namespace n ON n.oid = t.relnamespace
+            JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = x.indkey[0]
+            LEFT JOIN pg_stats s ON s.schemaname = n.nspname AND s.tablename = t.relname AND s.attname = a.attname
+            WHERE n.nspname = ANY(current_schemas(false)) AND lower(t.relname) IN :keys
+            """,
+            "pg_class.reltuples"
+        ),
+        DatabaseType.MYSQL: (
+            """
+            SELECT TABLE_NAME, TABLE_ROWS, DATA_LENGTH + INDEX_LENGTH
+            FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = DATABASE() AND LOWER(TABLE_NAME) IN :keys
+            """,
+            """
+            SELECT TABLE_NAME, INDEX_NAME, MAX(CARDINALITY)
+            FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE() AND LOWER(TABLE_NAME) IN :keys
+            GROUP BY TABLE_NAME, INDEX_NAME
+            """,
+            "information_schema.TABLES.TABLE_ROWS"
+        ),
+        DatabaseType.ORACLE: (
+            """
+            SELECT table_name, num_rows, num_rows * avg_row_len
+            FROM all_tables
+            WHERE owner = SYS_CONTEXT('USERENV', 'CURRENT_SCHEMA') AND LOWER(table_name) IN :keys
+            """,
+            """
+            SELECT table_name, index_name, distinct_keys
+            FROM all_indexes
+            WHERE table_owner = SYS_CONTEXT('USERENV', 'CURRENT_SCHEMA') AND LOWER(table_name) IN :keys
+            """,
+            "ALL_TABLES.NUM_ROWS"
+        ),
+        DatabaseType.SQLSERVER: (
+            """
+            SELECT t.name, SUM(CASE WHEN ps.index_id IN (0, 1) THEN ps.row_count ELSE 0 END),
+                   SUM(ps.used_page_count) * 8192
+            FROM sys.dm_db_partition_stats ps JOIN sys.tables t ON t.object_id = ps.object_id
+            WHERE LOWER(t.name) IN :keys
+            GROUP BY t.name
+            """,
+            None,
+            "sys.dm_db_partition_stats"
+        ),
+    }
+    
+    def get_table_stats(self, table_names: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        获取表的统计信息（行数、大小、索引基数），按目标库和表缓存table_stats_cache_ttl秒
+        
+        统计值来自数据库自身的统计信息（估算值，可能过期），不执行COUNT
+        
+        Args:
+            table_names: 表名列表
+            
+        Returns:
+            表名 -> {row_count, size_bytes, index_cardinality, source}，没有统计信息的表为None
+        """
+        if self.engine is None or not table_names:
+            return {}
+        url = str(self.engine.url)
+        keys = {table_name: object_key(table_name) for table_name in table_names}
+        missing = object()
+        cached = {key: table_stats_cache.get(("table_stats", url, key), missing) for key in set(keys.values())}
+        uncached = sorted(key for key, value in cached.items() if value is missing)
+        if uncached:
+            try:
+                collected = self._query_table_stats(uncached)
+            except Exception as e:
+                # 统计信息只用于辅助审查，失败时不缓存，下次重试
+                logger.warning(f"获取表统计信息失败: {e}")
+                collected = None
+            for key in uncached:
+                value = collected.get(key) if collected is not None else None
+                if collected is not None:
+                    table_stats_cache.set(("table_stats", url, key), value)
+                cached[key] = value
+        return {table_name: cached[key] for table_name, key in keys.items()}
+    
+    def _query_table_stats(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """按数据库类型查询统计信息，返回 object_key -> 统计信息"""
+        if self.db_type == DatabaseType.SQLITE:
+            return self._query_sqlite_stats(keys)
+        queries = self._STATS_QUERIES.get(self.db_type)
+        if queries is None:
+            return {}
+        table_sql, index_sql, source = queries
+        stats: Dict[str, Dict[str, Any]] = {}
+        with self.engine.connect() as conn:
+            for name, row_count, size_bytes in conn.execute(
+                text(table_sql).bindparams(bindparam("keys", expanding=True)), {"keys": keys}
+            ):
+                # PostgreSQL从未ANALYZE的表reltuples为-1，Oracle未收集统计时num_rows为空
+                stats[object_key(name)] = {
+                    "row_count": int(row_count) if row_count is not None and row_count >= 0 else None,
+                    "size_bytes": int(size_bytes) if size_bytes is not None else None,
+                    "index_cardinality": {},
+                    "source": source,
+                }
+            if index_sql:
+                for table_name, index_name, cardinality in conn.execute(
+                    text(index_sql).bindparams(bindparam("keys", expanding=True)), {"keys": keys}
+                ):
+                    entry = stats.get(object_key(table_name))
+                    if entry is None or cardinality is None:
+                        continue
+                    if cardinality < 0:
+                        if entry["row_count"] is None:
+                            continue
+                        cardinality = -cardinality * entry["row_count"]
+                    entry["index_cardinality"][index_name] = int(cardinality)
+        return stats
+    
+    def _query_sqlite_stats(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """SQLite的统计信息来自ANALYZE生成的sqlite_stat1，未执行过ANALYZE时为空"""
+        with self.engine.connect() as conn:
+            exists = conn.execute(text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")).first()
+            if not exists:
+                return {}
+            rows = conn.execute(
+                text("SELECT tbl, idx, stat FROM sqlite_stat1 WHERE lower(tbl) IN :keys").bindparams(
+                    bindparam("keys", expanding=True)
+                ),
+                {"keys": keys}
+            ).all()
+        stats: Dict[str, Dict[str, Any]] = {}
+        for table_name, index_name, stat in rows:
+            # stat为"总行数 首列每个取值的平均行数 ..."
+            numbers = [int(value) for value in stat.split() if value.isdigit()]
+            if not numbers:
+                continue
+            entry = stats.setdefault(object_key(table_name), {
+                "row_count": numbers[0],
+                "size_bytes": None,
+                "index_cardinality": {},
+                "source": "sqlite_stat1",
+            })
+            entry["row_count"] = max(entry["row_count"], numbers[0])
+            if index_name and len(numbers) > 1 and numbers[1] > 0:
+                entry["index_cardinality"][index_name] = max(numbers[0] // numbers[1], 1)
+        return stats
+    
+    def _attach_table_stats(self, tables: Dict[str, Dict[str, Any]]):
+        """为生成了DDL的表附加统计信息（stats）"""
+        if not tables or not get_settings().table_stats_enabled:
+            return
+        for table_name, stats in self.get_table_stats(list(tables)).items():
+            if stats:
+                tables[table_name]["stats"] = stats
+    
     def _get_dialect(self):
         """根据数据库类型获取SQLAlchemy方言"""
         if self.db_type == DatabaseType.MYSQL:
@@ -121,10 +541,10 @@ class SchemaExtractor:
             # 默认使用通用方言
             return None
     
-    def _generate_indexes_ddl(self, table_name: str, dialect) -> str:
+    def _generate_indexes_ddl(self, table_name: str, dialect, inspector: Optional[Inspector] = None) -> str:
         """生成索引的DDL语句"""
         try:
-            indexes = self.inspector.get_indexes(table_name)
+            indexes = (inspector or self.inspector).get_indexes(table_name)
             index_ddls = []
             
             for index in indexes:
@@ -0,0 +1,182 @@
+"""SQL方言 - 按数据库类型预处理SQL，便于准确提取表名"""
+
+import re
+from typing import Dict, Optional
+
+from app.models.db_connection import DatabaseType
+
+
+_SIMPLE_IDENTIFIER_RE = re.compile(r'^[A-Za-z_][A-Za-z0-9_$#]*$')
+
+# PostgreSQL类型转换 ::type，支持多词类型、长度和数组
+_PG_CAST = (
+    r'::\s*(?:double\s+precision|character\s+varying|bit\s+varying'
+    r'|(?:timestamp|time)(?:\s*\(\s*\d+\s*\))?\s+with(?:out)?\s+time\s+zone'
+    r'|"[^"]+"|[A-Za-z_][\w.]*)'
+    r'(?:\s*\(\s*\d+(?:\s*,\s*\d+)?\s*\))?(?:\s*\[\s*\d*\s*\])*'
+)
+# Oracle数据库链接 schema.table@dblink
+_ORACLE_DBLINK = r'(?<=[\w"$#])@[A-Za-z_][\w$#]*(?:\.[A-Za-z_][\w$#]*)*'
+# Oracle旧式外连接 (+)
+_ORACLE_OUTER_JOIN = r'\(\s*\+\s*\)'
+# SQL Server表提示 WITH (NOLOCK) 等
+_TSQL_TABLE_HINT = (
+    r'\bWITH\s*\(\s*(?:NOLOCK|READUNCOMMITTED|READCOMMITTED|REPEATABLEREAD|SERIALIZABLE|UPDLOCK'
+    r'|ROWLOCK|PAGLOCK|TABLOCKX?|HOLDLOCK|READPAST|XLOCK|NOWAIT|FORCESEEK|FORCESCAN'
+    r'|INDEX\s*\([^)]*\)|INDEX\s*=\s*\w+|[\s,])+\)'
+)
+
+
+class SQLDialect:
+    """
+    通用SQL方言
+
+    使用方言相关的词法规则扫描SQL：识别该方言的字符串、注释和引号标识符，
+    把引号标识符还原为普通标识符，并去除会干扰表名提取的方言语法
+    """
+
+    name = "generic"
+    # 引号标识符：开始符号 -> 结束符号
+    identifier_quotes: Dict[str, str] = {'"': '"', '`': '`', '[': ']'}
+    # 字符串中是否允许反斜杠转义
+    backslash_escapes = False
+    # 双引号是否表示字符串（而非标识符）
+    double_quoted_strings = False
+    # 是否支持 # 行注释
+    hash_comments = False
+    # 是否支持 $tag$ 美元引号字符串
+    dollar_quotes = True
+    # 需要删除的方言语法片段（正则）
+    removable_syntax: tuple = ()
+
+    def __init__(self):
+        self._pattern = self._build_pattern()
+
+    def _build_pattern(self):
+        """构建方言词法正则"""
+        alternatives = [r'(?P<comment>--[^\n]*|/\*.*?(?:\*/|$)' + (r'|#[^\n]*' if self.hash_comments else '') + ')']
+
+        string_quotes = ["'", '"'] if self.double_quoted_strings else ["'"]
+        strings = []
+        for quote in string_quotes:
+            if self.backslash_escapes:
+                strings.append(rf"{quote}(?:[^{quote}\\]|\\.|{quote}{quote})*{quote}?")
+            else:
+                strings.append(rf"{quote}(?:[^{quote}]|{quote}{quote})*{quote}?")
+        alternatives.append("(?P<string>" + "|".join(strings) + ")")
+
+        if self.dollar_quotes:
+            alternatives.append(r'(?P<dollar>\$(?P<tag>[A-Za-z_]\w*|)\$.*?\$(?P=tag)\$)')
+
+        for index, (open_char, close_char) in enumerate(self.identifier_quotes.items()):
+            o, c = re.escape(open_char), re.escape(close_char)
+            alternatives.append(rf'(?P<quoted{index}>{o}(?:[^{c}]|{c}{c})*{c})')
+
+        for index, syntax in enumerate(self.removable_syntax):
+            alternatives.append(rf'(?P<remove{index}>{syntax})')
+
+        return re.compile("|".join(alternatives), re.DOTALL | re.IGNORECASE)
+
+    def prepare(self, sql: str) -> str:
+        """
+        预处理SQL，生成便于提取表名的通用形式
+
+        Args:
+            sql: 原始SQL
+
+        Returns:
+            预处理后的SQL
+        """
+        return self._pattern.sub(self._replace, sql)
+
+    def _replace(self, match) -> str:
+        kind = match.lastgroup
+        text = match.group()
+
+        if kind == "comment":
+            return " "
+        if kind.startswith("remove"):
+            return ""
+        if kind.startswith("quoted"):
+            close_char = self.identifier_quotes[text[0]]
+            name = text[1:-1].replace(close_char * 2, close_char)
+            if _SIMPLE_IDENTIFIER_RE.match(name):
+                return name
+            return '"' + name.replace('"', '""') + '"'
+        return text
+
+    def is_valid_identifier(self, identifier: str) -> bool:
+        """检查是否为该方言下有效的未加引号标识符"""
+        return bool(_SIMPLE_IDENTIFIER_RE.match(identifier))
+
+
+class MySQLDialect(SQLDialect):
+    """MySQL方言：反引号标识符、反斜杠转义、# 注释、双引号字符串"""
+
+    name = "mysql"
+    identifier_quotes = {'`': '`'}
+    backslash_escapes = True
+    hash_comments = True
+    double_quoted_strings = True
+    dollar_quotes = False
+
+
+class PostgreSQLDialect(SQLDialect):
+    """PostgreSQL方言：双引号标识符、美元引号、:: 类型转换"""
+
+    name = "postgresql"
+    identifier_quotes = {'"': '"'}
+    removable_syntax = (_PG_CAST,)
+
+
+class OracleDialect(SQLDialect):
+    """Oracle方言：双引号标识符、@dblink、(+) 外连接"""
+
+    name = "oracle"
+    identifier_quotes = {'"': '"'}
+    dollar_quotes = False
+    removable_syntax = (_ORACLE_DBLINK, _ORACLE_OUTER_JOIN)
+
+
+class SQLServerDialect(SQLDialect):
+    """SQL Server方言：方括号/双引号标识符、表提示"""
+
+    name = "sqlserver"
+    identifier_quotes = {'[': ']', '"': '"'}
+    dollar_quotes = False
+    removable_syntax = (_TSQL_TABLE_HINT,)
+
+
+class SQLiteDialect(SQLDialect):
+    """SQLite方言：兼容双引号、反引号和方括号标识符"""
+
+    name = "sqlite"
+    dollar_quotes = False
+
+
+_DIALECT_CLASSES = {
+    DatabaseType.MYSQL: MySQLDialect,
+    DatabaseType.POSTGRESQL: PostgreSQLDialect,
+    DatabaseType.ORACLE: OracleDialect,
+    DatabaseType.SQLSERVER: SQLServerDialect,
+    DatabaseType.SQLITE: SQLiteDialect,
+}
+
+_dialect_cache: Dict[Optional[DatabaseType], SQLDialect] = {}
+
+
+def get_dialect(db_type: Optional[DatabaseType] = None) -> SQLDialect:
+    """
+    获取数据库类型对应的SQL方言（实例会被缓存复用）
+
+    Args:
+        db_type: 数据库类型，为None时返回通用方言
+
+    Returns:
+        SQL方言实例
+    """
+    dialect = _dialect_cache.get(db_type)
+    if dialect is None:
+        dialect = _DIALECT_CLASSES.get(db_type, SQLDialect)()
+        _dialect_cache[db_type] = dialect
+    return dialect
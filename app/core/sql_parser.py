@@ -1,8 +1,10 @@
 """SQL解析器"""
 
 import re
+import hashlib
+import logging
 import sqlparse
-from typing import List, Set, Dict, Any
+from typing import List, Set, Dict, Any, Iterable, Iterator, Optional, Union
 from sqlparse.sql import IdentifierList, Identifier, Function
 from sqlparse.tokens import Keyword, DML
 
@@ -10,13 +12,51 @@ try:
     from sql_metadata import get_query_tables, get_query_columns
     SQL_METADATA_AVAILABLE = True
 except ImportError:
-    SQL_METADATA_AVAILABLE = False
+    try:
+        # sql-metadata 2.x及以上版本只提供Parser类
+        from sql_metadata import Parser as _MetadataParser
+
+        def get_query_tables(sql: str) -> List[str]:
+            return _MetadataParser(sql).tables
+
+        SQL_METADATA_AVAILABLE = True
+    except ImportError:
+        SQL_METADATA_AVAILABLE = False
+
+from app.models.db_connection import DatabaseType
+from .sql_dialect import get_dialect
+from .sql_splitter import SQLScriptSplitter
+
+logger = logging.getLogger(__name__)
+
+
+# 用于规范化SQL的词法单元
+_TOKEN_RE = re.compile(r"""
+    (?P<comment>--[^\n]*|/\*.*?(?:\*/|$))
+  | (?P<string>'(?:[^']|'')*'?)
+  | (?P<quoted>"(?:[^"]|"")*"?|`[^`]*`?|\[[^\]]*\]?)
+  | (?P<dollar>\$(?P<tag>[A-Za-z_]\w*|)\$.*?\$(?P=tag)\$)
+  | (?P<number>\b\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b)
+  | (?P<word>[^\W\d][\w$#]*)
+  | (?P<space>\s+)
+  | (?P<operator><=|>=|<>|!=|::|\|\||:=)
+  | (?P<other>.)
+""", re.VERBOSE | re.DOTALL)
+
+# get_sql_type识别的语句类型
+_SQL_TYPES = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'CREATE', 'DROP', 'ALTER')
 
 
 class SQLParser:
     """SQL解析器，用于提取SQL中的表名和视图名"""
     
-    def __init__(self):
+    def __init__(self, db_type: Optional[DatabaseType] = None):
+        """
+        Args:
+            db_type: SQL所属的数据库类型，用于选择方言相关的预处理规则
+        """
+        self.db_type = db_type
+        self.dialect = get_dialect(db_type)
         self.table_names: Set[str] = set()
         self.view_names: Set[str] = set()
     
@@ -33,6 +73,9 @@ class SQLParser:
         self.table_names.clear()
         self.view_names.clear()
         
+        # 按方言预处理：还原引号标识符，去除dblink、类型转换、表提示等方言语法
+        sql = self.dialect.prepare(sql)
+        
         try:
             # 优先使用sql-metadata库
             if SQL_METADATA_AVAILABLE:
@@ -41,7 +84,7 @@ class SQLParser:
                 # 回退到原有方法
                 return self._extract_with_sqlparse(sql)
         except Exception as e:
-            print(f"SQL解析失败，使用备选方案: {e}")
+            logger.warning(f"SQL解析失败，使用备选方案: {e}")
             # 如果解析失败，使用正则表达式作为备选方案
             return self._fallback_parse(sql)
     
@@ -57,19 +100,20 @@ class SQLParser:
                 # 处理schema.table格式
                 if '.' in table:
                     table = table.split('.')[-1]
-                # 移除引号
-                table = table.strip('"').strip("'").strip('`')
-                if table and self._is_valid_identifier(table):
+                # 移除引号（引号标识符允许包含空格等特殊字符）
+                quoted = table[:1] in ('"', '`', '[') or f'"{table}"' in sql
+                table = table.strip('"').strip("'").strip('`').lstrip('[').rstrip(']')
+                if table and (quoted or self._is_valid_identifier(table)):
                     cleaned_tables.append(table)
             
-            print(f"sql-metadata提取到的表名: {cleaned_tables}")
+            logger.debug(f"sql-metadata提取到的表名: {cleaned_tables}")
             
             return {
                 "tables": cleaned_tables,
                 "views": []  # sql-metadata无法区分表和视图，统一当作表处理
             }
         except Exception as e:
-            print(f"sql-metadata解析失败: {e}")
+            logger.debug(f"sql-metadata解析失败: {e}")
             # 回退到sqlparse方法
             return self._extract_with_sqlparse(sql)
     
@@ -87,7 +131,7 @@ class SQLParser:
                 "views": list(self.view_names)
             }
         except Exception as e:
-            print(f"sqlparse解析失败: {e}")
+            logger.debug(f"sqlparse解析失败: {e}")
             return self._fallback_parse(sql)
     
     def _extract_from_statement_improved(self, statement):
@@ -97,14 +141,14 @@ class SQLParser:
         
         # 使用正则表达式提取FROM和JOIN后的表名
         patterns = [
-            r'\bFROM\s+([a-zA-Z_][a-zA-Z0-9_]*(?:\.[a-zA-Z_][a-zA-Z0-9_]*)?)\s*(?:[a-zA-Z_][a-zA-Z0-9_]*)?',
-            r'\bJOIN\s+([a-zA-Z_][a-zA-Z0-9_]*(?:\.[a-zA-Z_][a-zA-Z0-9_]*)?)\s*(?:[a-zA-Z_][a-zA-Z0-9_]*)?',
-            r'\bINNER\s+JOIN\s+([a-zA-Z_][a-zA-Z0-9_]*(?:\.[a-zA-Z_][a-zA-Z0-9_]*)?)\s*(?:[a-zA-Z_][a-zA-Z0-9_]*)?',
-            r'\bLEFT\s+JOIN\s+([a-zA-Z_][a-zA-Z0-9_]*(?:\.[a-zA-Z_][a-zA-Z0-9_]*)?)\s*(?:[a-zA-Z_][a-zA-Z0-9_]*)?',
-            r'\bRIGHT\s+JOIN\s+([a-zA-Z_][a-zA-Z0-9_]*(?:\.[a-zA-Z_][a-zA-Z0-9_]*)?)\s*(?:[a-zA-Z_][a-zA-Z0-9_]*)?',
-            r'\bFULL\s+JOIN\s+([a-zA-Z_][a-zA-Z0-9_]*(?:\.[a-zA-Z_][a-zA-Z0-9_]*)?)\s*(?:[a-zA-Z_][a-zA-Z0-9_]*)?',
-            r'\bINTO\s+([a-zA-Z_][a-zA-Z0-9_]*(?:\.[a-zA-Z_][a-zA-Z0-9_]*)?)',
-            r'\bUPDATE\s+([a-zA-Z_][a-zA-Z0-9_]*(?:\.[a-zA-Z_][a-zA-Z0-9_]*)?)',
+            r'\bFROM\s+([a-zA-Z_][a-zA-Z0-9_$#]*(?:\.[a-zA-Z_][a-zA-Z0-9_$#]*)?)\s*(?:[a-zA-Z_][a-zA-Z0-9_]*)?',
+            r'\bJOIN\s+([a-zA-Z_][a-zA-Z0-9_$#]*(?:\.[a-zA-Z_][a-zA-Z0-9_$#]*)?)\s*(?:[a-zA-Z_][a-zA-Z0-9_]*)?',
+            r'\bINNER\s+JOIN\s+([a-zA-Z_][a-zA-Z0-9_$#]*(?:\.[a-zA-Z_][a-zA-Z0-9_$#]*)?)\s*(?:[a-zA-Z_][a-zA-Z0-9_]*)?',
+            r'\bLEFT\s+JOIN\s+([a-zA-Z_][a-zA-Z0-9_$#]*(?:\.[a-zA-Z_][a-zA-Z0-9_$#]*)?)\s*(?:[a-zA-Z_][a-zA-Z0-9_]*)?',
+            r'\bRIGHT\s+JOIN\s+([a-zA-Z_][a-zA-Z0-9_$#]*(?:\.[a-zA-Z_][a-zA-Z0-9_$#]*)?)\s*(?:[a-zA-Z_][a-zA-Z0-9_]*)?',
+            r'\bFULL\s+JOIN\s+([a-zA-Z_][a-zA-Z0-9_$#]*(?:\.[a-zA-Z_][a-zA-Z0-9_$#]*)?)\s*(?:[a-zA-Z_][a-zA-Z0-9_]*)?',
+            r'\bINTO\s+([a-zA-Z_][a-zA-Z0-9_$#]*(?:\.[a-zA-Z_][a-zA-Z0-9_$#]*)?)',
+            r'\bUPDATE\s+([a-zA-Z_][a-zA-Z0-9_$#]*(?:\.[a-zA-Z_][a-zA-Z0-9_$#]*)?)',
         ]
         
         for pattern in patterns:
@@ -180,9 +224,8 @@ class SQLParser:
         if not identifier:
             return False
         
-        # 基本的标识符验证
-        pattern = r'^[a-zA-Z_][a-zA-Z0-9_]*$'
-        return bool(re.match(pattern, identifier))
+        # 按方言验证（允许Oracle的$、#等字符）
+        return self.dialect.is_valid_identifier(identifier)
     
     def _fallback_parse(self, sql: str) -> Dict[str, List[str]]:
         """备选解析方法，使用正则表达式"""
@@ -190,14 +233,14 @@ class SQLParser:
         
         # 更全面的正则表达式模式
         patterns = [
-            r'\bFROM\s+([a-zA-Z_][a-zA-Z0-9_]*(?:\.[a-zA-Z_][a-zA-Z0-9_]*)?)',
-            r'\bJOIN\s+([a-zA-Z_][a-zA-Z0-9_]*(?:\.[a-zA-Z_][a-zA-Z0-9_]*)?)',
-            r'\bINNER\s+JOIN\s+([a-zA-Z_][a-zA-Z0-9_]*(?:\.[a-zA-Z_][a-zA-Z0-9_]*)?)',
-            r'\bLEFT\s+JOIN\s+([a-zA-Z_][a-zA-Z0-9_]*(?:\.[a-zA-Z_][a-zA-Z0-9_]*)?)',
-            r'\bRIGHT\s+JOIN\s+([a-zA-Z_][a-zA-Z0-9_]*(?:\.[a-zA-Z_][a-zA-Z0-9_]*)?)',
-            r'\bFULL\s+JOIN\s+([a-zA-Z_][a-zA-Z0-9_]*(?:\.[a-zA-Z_][a-zA-Z0-9_]*)?)',
-            r'\bINTO\s+([a-zA-Z_][a-zA-Z0-9_]*(?:\.[a-zA-Z_][a-zA-Z0-9_]*)?)',
-            r'\bUPDATE\s+([a-zA-Z_][a-zA-Z0-9_]*(?:\.[a-zA-Z_][a-zA-Z0-9_]*)?)',
+            r'\bFROM\s+([a-zA-Z_][a-zA-Z0-9_$#]*(?:\.[a-zA-Z_][a-zA-Z0-9_$#]*)?)',
+            r'\bJOIN\s+([a-zA-Z_][a-zA-Z0-9_$#]*(?:\.[a-zA-Z_][a-zA-Z0-9_$#]*)?)',
+            r'\bINNER\s+JOIN\s+([a-zA-Z_][a-zA-Z0-9_$#]*(?:\.[a-zA-Z_][a-zA-Z0-9_$#]*)?)',
+            r'\bLEFT\s+JOIN\s+([a-zA-Z_][a-zA-Z0-9_$#]*(?:\.[a-zA-Z_][a-zA-Z0-9_$#]*)?)',
+            r'\bRIGHT\s+JOIN\s+([a-zA-Z_][a-zA-Z0-9_$#]*(?:\.[a-zA-Z_][a-zA-Z0-9_$#]*)?)',
+            r'\bFULL\s+JOIN\s+([a-zA-Z_][a-zA-Z0-9_$#]*(?:\.[a-zA-Z_][a-zA-Z0-9_$#]*)?)',
+            r'\bINTO\s+([a-zA-Z_][a-zA-Z0-9_$#]*(?:\.[a-zA-Z_][a-zA-Z0-9_$#]*)?)',
+            r'\bUPDATE\s+([a-zA-Z_][a-zA-Z0-9_$#]*(?:\.[a-zA-Z_][a-zA-Z0-9_$#]*)?)',
         ]
         
         for pattern in patterns:
@@ -211,7 +254,7 @@ class SQLParser:
                 if table_name and self._is_valid_identifier(table_name):
                     tables.add(table_name)
         
-        print(f"备选方案提取到的表名: {list(tables)}")
+        logger.debug(f"备选方案提取到的表名: {list(tables)}")
         
         return {
             "tables": list(tables),
@@ -219,22 +262,107 @@ class SQLParser:
         }
     
     def get_sql_type(self, sql: str) -> str:
-        """获取SQL语句类型"""
-        sql_upper = sql.strip().upper()
-        
-        if sql_upper.startswith('SELECT'):
-            return 'SELECT'
-        elif sql_upper.startswith('INSERT'):
-            return 'INSERT'
-        elif sql_upper.startswith('UPDATE'):
-            return 'UPDATE'
-        elif sql_upper.startswith('DELETE'):
-            return 'DELETE'
-        elif sql_upper.startswith('CREATE'):
-            return 'CREATE'
-        elif sql_upper.startswith('DROP'):
-            return 'DROP'
-        elif sql_upper.startswith('ALTER'):
-            return 'ALTER'
-        else:
-            return 'UNKNOWN' 
\ No newline at end of file
+        """
+        获取SQL语句类型
+
+        跳过开头的注释和括号；对WITH开头的CTE语句，返回CTE之后的主语句类型
+        """
+        depth = 0
+        in_cte = False
+        for kind, value in self._iter_tokens(sql):
+            if kind in ('comment', 'space'):
+                continue
+            if value == '(':
+                depth += 1
+                continue
+            if value == ')':
+                depth -= 1
+                continue
+            if kind != 'word':
+                if not in_cte:
+                    break
+                continue
+
+            word = value.upper()
+            if word == 'WITH' and not in_cte:
+                in_cte = True
+                continue
+            if in_cte:
+                # CTE定义体内的语句不代表主语句类型
+                if depth <= 0 and word in _SQL_TYPES:
+                    return word
+                continue
+            return word if word in _SQL_TYPES else 'UNKNOWN'
+
+        return 'UNKNOWN'
+
+    def normalize(self, sql: str, mask_literals: bool = False) -> str:
+        """
+        规范化SQL文本
+
+        去除注释、统一空白和关键字大小写，使仅格式或注释不同的SQL得到相同结果
+
+        Args:
+            sql: SQL语句
+            mask_literals: 是否将字符串和数字常量替换为占位符
+
+        Returns:
+            规范化后的SQL
+        """
+        tokens = []
+        for kind, value in self._iter_tokens(sql):
+            if kind in ('comment', 'space'):
+                continue
+            if kind == 'word':
+                tokens.append(value.upper())
+            elif mask_literals and kind in ('string', 'number', 'dollar'):
+                tokens.append('?')
+            else:
+                tokens.append(value)
+
+        while tokens and tokens[-1] == ';':
+            tokens.pop()
+        return ' '.join(tokens)
+
+    def fingerprint(self, sql: str) -> str:
+        """
+        计算SQL指纹
+
+        基于规范化后的SQL计算，格式和注释的变化不会改变指纹，常量的变化会改变指纹
+
+        Args:
+            sql: SQL语句
+
+        Returns:
+            SHA1十六进制指纹
+        """
+        return hashlib.sha1(self.normalize(sql).encode('utf-8')).hexdigest()
+
+    def parse_script(self, source: Union[str, Iterable[str]]) -> Iterator[Dict[str, Any]]:
+        """
+        流式解析多语句SQL脚本
+
+        逐条拆分脚本，并为每条语句单独提取类型、表名和指纹
+
+        Args:
+            source: SQL脚本文本，或逐行产出文本的可迭代对象（如以文本模式打开的文件）
+
+        Returns:
+            语句解析结果迭代器
+        """
+        splitter = SQLScriptSplitter(db_type=self.db_type)
+        for statement in splitter.split(source):
+            sql = statement["sql"]
+            parse_result = self.parse(sql)
+            statement.update({
+                "sql_type": self.get_sql_type(sql),
+                "tables": parse_result["tables"],
+                "views": parse_result["views"],
+                "fingerprint": self.fingerprint(sql)
+            })
+            yield statement
+
+    def _iter_tokens(self, sql: str) -> Iterator:
+        """按词法单元遍历SQL，产出(类型, 文本)"""
+        for match in _TOKEN_RE.finditer(sql):
+            yield match.lastgroup, match.group()
@@ -0,0 +1,344 @@
+"""SQL脚本拆分器 - 将多语句SQL脚本流式拆分为单条语句"""
+
+import io
+import re
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Union
+
+from app.models.db_connection import DatabaseType
+from .sql_dialect import get_dialect
+
+
+# GO批处理分隔符（SQL Server），可带重复次数
+_GO_RE = re.compile(r'^\s*GO(?:\s+\d+)?\s*(?:--.*)?$', re.IGNORECASE)
+# MySQL客户端的DELIMITER指令
+_DELIMITER_RE = re.compile(r'^\s*DELIMITER\s+(\S+)\s*$', re.IGNORECASE)
+# Oracle SQL*Plus的块结束符
+_SLASH_RE = re.compile(r'^\s*/\s*$')
+
+# 可能开启过程化代码块的语句开头
+_BLOCK_HEADS = {"CREATE", "DECLARE", "BEGIN"}
+# CREATE语句中表示过程化对象的关键字
+_BLOCK_OBJECTS = {"PROCEDURE", "FUNCTION", "PACKAGE", "TRIGGER", "TYPE"}
+# CREATE语句中表示普通对象的关键字
+_PLAIN_OBJECTS = {"TABLE", "VIEW", "INDEX", "SEQUENCE", "SCHEMA", "DATABASE", "UNIQUE", "SYNONYM", "USER", "ROLE"}
+# BEGIN后紧跟这些关键字时为事务控制语句而非代码块
+_TRANSACTION_WORDS = {"TRAN", "TRANSACTION", "WORK", "DEFERRED", "IMMEDIATE", "EXCLUSIVE", "DISTRIBUTED"}
+# END后紧跟这些关键字时不关闭BEGIN块（IF/LOOP等本身不计入嵌套深度）
+_END_QUALIFIERS = {"IF", "LOOP", "WHILE", "REPEAT", "FOR"}
+
+_HEAD_SIZE = 8
+
+
+class _StatementState:
+    """单条语句扫描过程中的状态"""
+
+    def __init__(self):
+        self.parts: List[str] = []
+        self.start_line: Optional[int] = None
+        self.has_content = False
+        self.head: List[str] = []
+        self.is_block: Optional[bool] = None
+        self.depth = 0
+        self.seen_block = False
+        self.saw_as = False
+        self.after_as = False
+        self.pending_is = False
+        self.pending_end = False
+        self.literal_body = False
+
+    @property
+    def track_words(self) -> bool:
+        """是否需要继续跟踪关键字"""
+        if len(self.head) < _HEAD_SIZE and self.is_block is not False:
+            return True
+        return bool(self.is_block)
+
+
+class SQLScriptSplitter:
+    """
+    SQL脚本拆分器
+
+    按行流式读取脚本，在不加载整个文件的情况下逐条输出语句。支持：
+    - 分号及MySQL的DELIMITER自定义分隔符
+    - SQL Server的GO批处理分隔符
+    - Oracle PL/SQL块（BEGIN...END及行首的"/"结束符）
+    - PostgreSQL的$tag$美元引号函数体
+    - 字符串、引号标识符与注释中的分隔符不会被误判（引号和注释规则随数据库方言变化）
+    """
+
+    def __init__(self, delimiter: str = ";", db_type: Optional[DatabaseType] = None):
+        self.default_delimiter = delimiter
+        self.dialect = get_dialect(db_type)
+        self._patterns: Dict[Any, Any] = {}
+        self._quote_ends: Dict[str, Any] = {}
+
+        # 开始符号 -> 结束符号
+        self._quotes = {"'": "'"}
+        if self.dialect.double_quoted_strings:
+            self._quotes['"'] = '"'
+        self._quotes.update(self.dialect.identifier_quotes)
+
+    def split(self, source: Union[str, Iterable[str]]) -> Iterator[Dict[str, Any]]:
+        """
+        拆分SQL脚本
+
+        Args:
+            source: SQL脚本文本，或逐行产出文本的可迭代对象（如以文本模式打开的文件）
+
+        Returns:
+            语句迭代器，每项包含 index、sql、start_line、end_line
+        """
+        if isinstance(source, str):
+            source = io.StringIO(source)
+
+        delimiter = self.default_delimiter
+        state = _StatementState()
+        index = 0
+        line_no = 0
+        quote: Optional[str] = None
+
+        for line_no, line in enumerate(source, start=1):
+            if quote is None:
+                # 行级指令只在语句之外或代码块之间生效
+                stripped = line.strip()
+                if not state.has_content:
+                    match = _DELIMITER_RE.match(stripped)
+                    if match:
+                        delimiter = match.group(1)
+                        continue
+                if _GO_RE.match(stripped) or _SLASH_RE.match(stripped):
+                    statement = self._finish(state, index, line_no - 1)
+                    if statement:
+                        yield statement
+                        index += 1
+                    state = _StatementState()
+                    continue
+
+            pos = 0
+            length = len(line)
+            while pos < length:
+                if quote is not None:
+                    close = self._find_quote_end(line, pos, quote)
+                    if close < 0:
+                        state.parts.append(line[pos:])
+                        break
+                    state.parts.append(line[pos:close])
+                    pos = close
+                    quote = None
+                    continue
+
+                match = self._get_pattern(delimiter, state.track_words).search(line, pos)
+                if not match:
+                    self._append_text(state, line[pos:], line_no)
+                    break
+
+                start, end = match.span()
+                if start > pos:
+                    self._append_text(state, line[pos:start], line_no)
+                token = match.group()
+                pos = end
+
+                if token == delimiter:
+                    if self._ends_statement(state, delimiter):
+                        if state.is_block and not state.literal_body and delimiter == ";":
+                            # PL/SQL块的END后必须保留分号
+                            state.parts.append(token)
+                        statement = self._finish(state, index, line_no)
+                        if statement:
+                            yield statement
+                            index += 1
+                        state = _StatementState()
+                    else:
+                        state.parts.append(token)
+                elif token == "--" or token == "#":
+                    state.parts.append(line[start:])
+                    break
+                elif token == "/*":
+                    quote = "*/"
+                    state.parts.append(token)
+                elif token[0] in "'\"`[$":
+                    if token[0] == "$" and start > 0 and (line[start - 1].isalnum() or line[start - 1] == "_"):
+                        # 标识符中的$（如Oracle的v$session），不是美元引号
+                        self._append_text(state, token, line_no)
+                        continue
+                    if state.after_as:
+                        # AS后直接跟字符串/美元引号：函数体是字面量（PostgreSQL风格）
+                        state.literal_body = True
+                        state.after_as = False
+                    quote = self._quotes.get(token, token)
+                    state.parts.append(token)
+                    self._mark_content(state, line_no)
+                else:
+                    self._append_text(state, token, line_no)
+                    self._on_word(state, token)
+
+        statement = self._finish(state, index, line_no)
+        if statement:
+            yield statement
+
+    def _get_pattern(self, delimiter: str, track_words: bool):
+        """获取普通状态下查找下一个关键位置的正则（按分隔符缓存）"""
+        key = (delimiter, track_words)
+        pattern = self._patterns.get(key)
+        if pattern is None:
+            alternatives = [r'--', r'/\*', "[" + re.escape("".join(self._quotes)) + "]"]
+            if self.dialect.hash_comments:
+                alternatives.append(r'#')
+            if self.dialect.dollar_quotes:
+                alternatives.append(r'\$(?:[A-Za-z_]\w*)?\$')
+            alternatives.append(re.escape(delimiter))
+            if track_words:
+                if delimiter == ";":
+                    alternatives.append(r'[A-Za-z_@#][\w$#@]*')
+                else:
+                    # 自定义分隔符（如$$）可能由标识符字符组成，单词不能吞掉分隔符
+                    alternatives.append(rf'[A-Za-z_@#](?:(?!{re.escape(delimiter)})[\w$#@])*')
+            pattern = re.compile("|".join(alternatives))
+            self._patterns[key] = pattern
+        return pattern
+
+    def _find_quote_end(self, line: str, pos: int, quote: str) -> int:
+        """查找引号/注释在本行的结束位置，未结束返回-1"""
+        if quote == "*/" or quote.startswith("$"):
+            found = line.find(quote, pos)
+            return found + len(quote) if found >= 0 else -1
+
+        pattern = self._quote_ends.get(quote)
+        if pattern is None:
+            q = re.escape(quote)
+            if self.dialect.backslash_escapes and quote in ("'", '"'):
+                body = rf'(?:[^{q}\\]|\\.|{q}{q})*'
+            else:
+                body = rf'(?:[^{q}]|{q}{q})*'
+            # 连续两个引号表示转义
+            pattern = re.compile(body + rf'{q}(?!{q})', re.DOTALL)
+            self._quote_ends[quote] = pattern
+
+        match = pattern.match(line, pos)
+        return match.end() if match else -1
+
+    def _append_text(self, state: _StatementState, text: str, line_no: int):
+        """追加普通文本"""
+        state.parts.append(text)
+        if text.strip():
+            # AS之后出现了非字面量内容，说明函数体不是字符串
+            state.after_as = False
+            self._mark_content(state, line_no)
+
+    def _mark_content(self, state: _StatementState, line_no: int):
+        """标记语句已有有效内容"""
+        if not state.has_content:
+            state.has_content = True
+            state.start_line = line_no
+
+    def _on_word(self, state: _StatementState, word: str):
+        """处理普通状态下的关键字，维护语句开头和代码块嵌套深度"""
+        upper = word.upper()
+
+        if len(state.head) < _HEAD_SIZE:
+            state.head.append(upper)
+            if state.is_block is None:
+                state.is_block = self._classify(state.head, final=False)
+
+        if state.is_block is False:
+            return
+
+        if state.pending_is:
+            state.pending_is = False
+            if upper not in ("NULL", "NOT"):
+                state.saw_as = True
+                state.after_as = True
+
+        if state.pending_end:
+            state.pending_end = False
+            if upper in _END_QUALIFIERS:
+                return
+            state.depth -= 1
+            if upper == "CASE":
+                return
+
+        if upper in ("BEGIN", "CASE"):
+            state.depth += 1
+            state.seen_block = True
+        elif upper == "END":
+            state.pending_end = True
+        elif state.depth == 0 and not state.seen_block:
+            if upper == "AS":
+                state.saw_as = True
+                state.after_as = True
+            elif upper == "IS":
+                state.pending_is = True
+
+    def _classify(self, head: List[str], final: bool) -> Optional[bool]:
+        """
+        根据语句开头的关键字判断是否为过程化代码块
+
+        Returns:
+            True/False，信息不足以判断时返回None
+        """
+        first = head[0]
+        if first not in _BLOCK_HEADS:
+            return False
+
+        if first == "BEGIN":
+            if len(head) < 2:
+                return False if final else None
+            return head[1] not in _TRANSACTION_WORDS
+
+        if first == "DECLARE":
+            if len(head) < 2:
+                return False if final else None
+            if head[1].startswith("@"):
+                return False
+            if "CURSOR" in head[2:]:
+                return False
+            if len(head) < 4 and not final:
+                return None
+            return True
+
+        # CREATE [OR REPLACE] [EDITIONABLE] PROCEDURE/FUNCTION/...
+        for word in head[1:]:
+            if word in _BLOCK_OBJECTS:
+                return True
+            if word in _PLAIN_OBJECTS:
+                return False
+        if len(head) < _HEAD_SIZE and not final:
+            return None
+        return False
+
+    def _ends_statement(self, state: _StatementState, delimiter: str) -> bool:
+        """判断遇到分隔符时是否结束当前语句"""
+        if delimiter != ";":
+            return True
+
+        if state.pending_is:
+            state.pending_is = False
+        if state.pending_end:
+            state.pending_end = False
+            state.depth -= 1
+
+        if state.is_block is None:
+            state.is_block = self._classify(state.head, final=True) if state.head else False
+        if not state.is_block or state.literal_body:
+            return True
+        if state.saw_as:
+            # Oracle/SQL Server风格的过程体，需等待"/"、GO或文件结尾
+            return False
+        if state.head[0] == "DECLARE" and not state.seen_block:
+            # 匿名块的声明部分，等待BEGIN...END
+            return False
+        return state.depth <= 0
+
+    def _finish(self, state: _StatementState, index: int, end_line: int) -> Optional[Dict[str, Any]]:
+        """结束当前语句，生成输出项"""
+        if not state.has_content:
+            return None
+        sql = "".join(state.parts).strip()
+        if not sql:
+            return None
+        return {
+            "index": index,
+            "sql": sql,
+            "start_line": state.start_line,
+            "end_line": max(end_line, state.start_line or end_line)
+        }
@@ -1,6 +1,7 @@
 """FastAPI应用主文件"""
 
 import os
+import asyncio
 from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
@@ -8,8 +9,13 @@ from fastapi.responses import HTMLResponse
 from contextlib import asynccontextmanager
 
 from app.config import get_settings
-from app.models.database import create_tables
+from app.models.database import create_tables, engine
+from app.models.migrations import run_migrations, verify_indexes
 from app.api import router as api_router
+from app.core.parallel_parser import shutdown_parse_executor
+from app.services.retention_service import retention_loop
+from app.services.schema_watch_service import schema_watch_loop
+from app.utils.concurrency import configure_threadpools
 
 # 设置Oracle环境变量
 def setup_oracle_environment():
@@ -43,10 +49,27 @@ setup_oracle_environment()
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """应用生命周期管理"""
-    # 启动时创建数据表
+    # 启动时创建数据表并执行迁移
     create_tables()
+    run_migrations(engine)
+    missing_indexes = verify_indexes(engine)
+    if missing_indexes:
+        print(f"警告: 以下数据库索引缺失，相关查询将退化为全表扫描: {', '.join(missing_indexes)}")
+    configure_threadpools()
+    # 后台定期归档过期审查报告
+    retention_task = None
+    if settings.retention_interval > 0:
+        retention_task = asyncio.create_task(retention_loop(settings.retention_interval))
+    # 后台定期检查目标库模式变化并复审受影响的语句
+    schema_watch_task = None
+    if settings.schema_watch_interval > 0:
+        schema_watch_task = asyncio.create_task(schema_watch_loop(settings.schema_watch_interval))
     yield
-    # 关闭时的清理工作（如果需要）
+    for task in (retention_task, schema_watch_task):
+        if task is not None:
+            task.cancel()
+    # 关闭时释放SQL解析进程池
+    shutdown_parse_executor()
 
 
 # 创建FastAPI应用实例
@@ -2,8 +2,13 @@
 
 from .database import Base, engine, SessionLocal, get_db
 from .db_connection import DatabaseConnection
-from .sql_statement import SQLStatement
+from .sql_statement import SQLStatement, SQLStatementTable
+from .sql_version import SQLStatementVersion
 from .review_report import ReviewReport
+from .review_text import ReviewText
+from .retention import RetentionPolicy, ReviewRollup
+from .schema_snapshot import SchemaSnapshot, SchemaSnapshotObject
+from .review_queue import ReviewQueueItem
 from .llm_config import LLMConfig
 
 __all__ = [
@@ -13,6 +18,14 @@ __all__ = [
     "get_db",
     "DatabaseConnection",
     "SQLStatement", 
+    "SQLStatementTable",
+    "SQLStatementVersion",
     "ReviewReport",
+    "ReviewText",
+    "RetentionPolicy",
+    "ReviewRollup",
+    "SchemaSnapshot",
+    "SchemaSnapshotObject",
+    "ReviewQueueItem",
     "LLMConfig"
 ] 
\ No newline at end of file
@@ -6,17 +6,22 @@ from sqlalchemy.orm import sessionmaker, Session
 from typing import Generator
 
 from app.config import get_settings
+from .sqlite_profile import is_sqlite_url, sqlite_engine_options, install_sqlite_profile
 
 settings = get_settings()
 
-# 创建数据库引擎
-engine = create_engine(
-    settings.database_url,
-    pool_size=settings.db_pool_size,
-    max_overflow=settings.db_max_overflow,
-    pool_timeout=settings.db_pool_timeout,
-    echo=settings.debug
-)
+# 创建数据库引擎（SQLite使用单独的连接参数、PRAGMA和写锁）
+if is_sqlite_url(settings.database_url):
+    engine = create_engine(settings.database_url, **sqlite_engine_options(settings.database_url, settings))
+    install_sqlite_profile(engine, settings)
+else:
+    engine = create_engine(
+        settings.database_url,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        echo=settings.debug
+    )
 
 # 创建会话工厂
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
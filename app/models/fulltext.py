@@ -0,0 +1,259 @@
+"""全文索引定义
+
+SQLite使用FTS5表并通过触发器与源表保持同步；
+PostgreSQL使用基于to_tsvector表达式的GIN索引；MySQL使用ngram解析器的FULLTEXT索引。
+"""
+
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from .review_text import COMPRESSED_TEXT_FIELDS, hydrate_text_fields, text_id_column
+
+# 源表 -> (FTS5表名, 参与索引的文本列)
+FULLTEXT_TABLES: Dict[str, Dict] = {
+    "sql_statements": {
+        "fts_table": "sql_statements_fts",
+        "columns": ["title", "description", "sql_content"],
+        # bm25列权重：标题 > 描述 > SQL内容
+        "weights": [10.0, 5.0, 1.0],
+    },
+    "review_reports": {
+        "fts_table": "review_reports_fts",
+        "columns": [
+            "overall_summary",
+            "consistency_details", "consistency_suggestions",
+            "conventions_details", "conventions_suggestions",
+            "performance_details", "performance_suggestions",
+            "security_details", "security_suggestions",
+            "readability_details", "readability_suggestions",
+            "maintainability_details", "maintainability_suggestions",
+            "optimized_sql",
+        ],
+        "weights": [5.0] + [1.0] * 13,
+        # 长文本可能压缩存储在review_texts中：SQLite使用contentless的FTS5表，只保存索引不保存原文，
+        # 触发器不依赖解压函数；含压缩文本的行由应用写入索引（见insert_sqlite_fulltext_rows），摘要在Python中生成
+        "contentless": True,
+    },
+}
+
+# trigram分词器（支持中文等无空格文本的子串匹配）需要SQLite 3.34+
+SQLITE_TRIGRAM = sqlite3.sqlite_version_info >= (3, 34, 0)
+# trigram分词器下可走索引的最短查询词长度
+SQLITE_TRIGRAM_MIN_LENGTH = 3
+# contentless表按rowid删除（contentless_delete=1）需要SQLite 3.43+，更早的版本删除时需提供写入时的列值
+SQLITE_CONTENTLESS_DELETE = sqlite3.sqlite_version_info >= (3, 43, 0)
+
+
+def postgresql_document(table: str, alias: str = "") -> str:
+    """PostgreSQL全文检索使用的文档表达式（建索引与查询必须一致）"""
+    prefix = f"{alias}." if alias else ""
+    parts = " || ' ' || ".join(f"coalesce({prefix}{column}, '')" for column in FULLTEXT_TABLES[table]["columns"])
+    return f"to_tsvector('simple', {parts})"
+
+
+def _text_id_columns(conn: Connection, table: str, columns: List[str]) -> List[str]:
+    """源表中已有的文本ID列（旧库在补充文本ID列之前没有压缩存储的文本）"""
+    existing = {row[1] for row in conn.execute(text(f"PRAGMA table_info({table})"))}
+    return [
+        text_id_column(column) for column in columns
+        if column in COMPRESSED_TEXT_FIELDS and text_id_column(column) in existing
+    ]
+
+
+def sqlite_fulltext_values(conn: Connection, table: str, row_ids: List[int]) -> List[Dict[str, Any]]:
+    """
+    读取行参与全文索引的原文（压缩存储的文本在Python中解压）
+
+    Args:
+        conn: 应用数据库连接
+        table: 源表名
+        row_ids: 源表行ID
+
+    Returns:
+        包含id和各索引列原文的字典列表
+    """
+    if not row_ids:
+        return []
+    columns = FULLTEXT_TABLES[table]["columns"]
+    select_columns = ["id"] + columns + _text_id_columns(conn, table, columns)
+    params = {f"id_{index}": row_id for index, row_id in enumerate(row_ids)}
+    rows = conn.execute(text(
+        f"SELECT {', '.join(select_columns)} FROM {table} WHERE id IN ({', '.join(f':{key}' for key in params)})"
+    ), params).mappings().all()
+    return hydrate_text_fields(conn, [dict(row) for row in rows])
+
+
+def insert_sqlite_fulltext_rows(conn: Connection, table: str, rows: List[Dict[str, Any]]):
+    """
+    把行写入contentless的SQLite全文索引（含压缩存储文本的行不由触发器写入）
+
+    Args:
+        conn: 应用数据库连接
+        table: 源表名
+        rows: 包含id和各索引列原文的字典列表
+    """
+    if not rows:
+        return
+    config = FULLTEXT_TABLES[table]
+    fts = config["fts_table"]
+    columns = config["columns"]
+    conn.execute(
+        text(f"INSERT INTO {fts}(rowid, {', '.join(columns)}) VALUES (:id, {', '.join(f':{column}' for column in columns)})"),
+        [{"id": row["id"], **{column: row.get(column) for column in columns}} for row in rows]
+    )
+
+
+def delete_sqlite_fulltext_rows(conn: Connection, table: str, row_ids: List[int]):
+    """
+    删除源表行之前从contentless的SQLite全文索引中移除
+
+    SQLite 3.43+由删除触发器按rowid处理；更早的版本需用写入时的原文执行'delete'命令
+
+    Args:
+        conn: 应用数据库连接
+        table: 源表名
+        row_ids: 即将删除的源表行ID
+    """
+    if SQLITE_CONTENTLESS_DELETE or not FULLTEXT_TABLES[table].get("contentless"):
+        return
+    if not fulltext_available(conn, table):
+        return
+    config = FULLTEXT_TABLES[table]
+    fts = config["fts_table"]
+    columns = config["columns"]
+    rows = sqlite_fulltext_values(conn, table, row_ids)
+    if rows:
+        conn.execute(
+            text(
+                f"INSERT INTO {fts}({fts}, rowid, {', '.join(columns)}) "
+                f"VALUES ('delete', :id, {', '.join(f':{column}' for column in columns)})"
+            ),
+            [{"id": row["id"], **{column: row.get(column) for column in columns}} for row in rows]
+        )
+
+
+def _populate_sqlite_contentless(conn: Connection, table: str, batch_size: int = 500):
+    """为contentless的FTS5表写入已有数据"""
+    last_id = 0
+    while True:
+        row_ids = [row[0] for row in conn.execute(text(
+            f"SELECT id FROM {table} WHERE id > :last_id ORDER BY id LIMIT :limit"
+        ), {"last_id": last_id, "limit": batch_size})]
+        if not row_ids:
+            break
+        insert_sqlite_fulltext_rows(conn, table, sqlite_fulltext_values(conn, table, row_ids))
+        last_id = row_ids[-1]
+
+
+def _create_sqlite(conn: Connection, table: str):
+    config = FULLTEXT_TABLES[table]
+    fts = config["fts_table"]
+    columns = config["columns"]
+    column_list = ", ".join(columns)
+    tokenize = "trigram" if SQLITE_TRIGRAM else "unicode61"
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+
+    if config.get("contentless"):
+        if fulltext_available(conn, table):
+            return
+        options = "content=''" + (", contentless_delete=1" if SQLITE_CONTENTLESS_DELETE else "")
+        conn.execute(text(f"CREATE VIRTUAL TABLE {fts} USING fts5({column_list}, {options}, tokenize='{tokenize}')"))
+        # 触发器只索引内联存储的行；报告写入后不再修改，不需要更新触发器
+        text_ids = _text_id_columns(conn, table, columns)
+        inline_only = f"WHEN {' AND '.join(f'new.{name} IS NULL' for name in text_ids)} " if text_ids else ""
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} {inline_only}BEGIN "
+            f"INSERT INTO {fts}(rowid, {column_list}) VALUES (new.id, {new_values}); END"
+        ))
+        if SQLITE_CONTENTLESS_DELETE:
+            conn.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+                f"DELETE FROM {fts} WHERE rowid = old.id; END"
+            ))
+        _populate_sqlite_contentless(conn, table)
+        return
+
+    conn.execute(text(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{column_list}, content='{table}', content_rowid='id', tokenize='{tokenize}')"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {column_list}) VALUES (new.id, {new_values}); END"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); END"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {column_list} ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {fts}(rowid, {column_list}) VALUES (new.id, {new_values}); END"
+    ))
+    # 为已有数据建立索引
+    conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+
+def drop_sqlite_fulltext_index(conn: Connection, table: str):
+    """删除SQLite全文索引及其触发器（用于重建）"""
+    fts = FULLTEXT_TABLES[table]["fts_table"]
+    for suffix in ("ai", "ad", "au", "bu"):
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {fts}_{suffix}"))
+    conn.execute(text(f"DROP TABLE IF EXISTS {fts}"))
+
+
+def _create_postgresql(conn: Connection, table: str):
+    conn.execute(text(
+        f"CREATE INDEX IF NOT EXISTS ix_{table}_fulltext ON {table} USING GIN ({postgresql_document(table)})"
+    ))
+
+
+def _create_mysql(conn: Connection, table: str):
+    columns = ", ".join(FULLTEXT_TABLES[table]["columns"])
+    exists = conn.execute(text(
+        "SELECT COUNT(*) FROM information_schema.statistics "
+        "WHERE table_schema = DATABASE() AND table_name = :table AND index_name = :index"
+    ), {"table": table, "index": f"ft_{table}"}).scalar()
+    if not exists:
+        conn.execute(text(f"ALTER TABLE {table} ADD FULLTEXT INDEX ft_{table} ({columns}) WITH PARSER ngram"))
+
+
+def create_fulltext_indexes(conn: Connection, tables: List[str] = None):
+    """
+    按应用数据库类型创建全文索引
+
+    不支持的数据库类型直接跳过，检索时回退到LIKE匹配
+    """
+    creators = {
+        "sqlite": _create_sqlite,
+        "postgresql": _create_postgresql,
+        "mysql": _create_mysql,
+    }
+    creator = creators.get(conn.dialect.name)
+    if creator is None:
+        return
+    for table in tables or list(FULLTEXT_TABLES):
+        creator(conn, table)
+
+
+def fulltext_available(conn: Connection, table: str) -> bool:
+    """检查指定表的全文索引是否已创建"""
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        return conn.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"
+        ), {"name": FULLTEXT_TABLES[table]["fts_table"]}).first() is not None
+    if dialect == "postgresql":
+        return conn.execute(text(
+            "SELECT 1 FROM pg_indexes WHERE indexname = :name"
+        ), {"name": f"ix_{table}_fulltext"}).first() is not None
+    if dialect == "mysql":
+        return bool(conn.execute(text(
+            "SELECT COUNT(*) FROM information_schema.statistics "
+            "WHERE table_schema = DATABASE() AND table_name = :table AND index_name = :index"
+        ), {"table": table, "index": f"ft_{table}"}).scalar())
+    return False
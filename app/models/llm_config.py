@@ -1,6 +1,6 @@
 """LLM配置模型"""
 
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, Float, Enum
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, Float, Enum, Index
 from sqlalchemy.sql import func
 import enum
 
@@ -53,5 +53,10 @@ class LLMConfig(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now(), comment="更新时间")
     last_tested_at = Column(DateTime(timezone=True), comment="最后测试时间")
     
+    __table_args__ = (
+        # 查找默认配置
+        Index("ix_llm_configs_default_active", "is_default", "is_active"),
+    )
+    
     def __repr__(self):
         return f"<LLMConfig(name='{self.name}', provider='{self.provider.value}', model='{self.model_name}')>" 
\ No newline at end of file
@@ -0,0 +1,224 @@
+"""轻量级数据库迁移
+
+create_all 只会创建缺失的表，不会为已有表补充索引或字段。
+这里按版本号顺序执行迁移，已执行的版本记录在 schema_migrations 表中。
+"""
+
+import logging
+from datetime import datetime
+from typing import Callable, List, Tuple
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, or_, select, text, update
+from sqlalchemy.engine import Connection, Engine
+
+from app.config import get_settings
+from .database import Base
+from .fulltext import create_fulltext_indexes, drop_sqlite_fulltext_index
+from .review_report import ReviewReport
+from .review_queue import ReviewQueueItem
+from .schema_snapshot import SchemaSnapshot, SchemaSnapshotObject
+from .sql_statement import SQLStatement
+from .review_text import (
+    COMPRESSED_TEXT_FIELDS, ReviewText, get_or_create_text_ids, report_texts_compressed, text_id_column
+)
+
+logger = logging.getLogger(__name__)
+
+_migration_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    _migration_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String(200), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+# 需要存在的索引：表名 -> 索引名列表
+HOT_QUERY_INDEXES = {
+    "review_reports": [
+        "ix_review_reports_statement_created",
+        "ix_review_reports_created_id",
+        "ix_review_reports_overall_score",
+    ],
+    "sql_statements": [
+        "ix_sql_statements_active_created",
+        "ix_sql_statements_db_connection_id",
+        "ix_sql_statements_status",
+        "ix_sql_statements_parent_id",
+    ],
+    "llm_configs": [
+        "ix_llm_configs_default_active",
+    ],
+    "schema_snapshot_objects": [
+        "ix_schema_snapshot_objects_snapshot_key",
+    ],
+}
+
+
+def _create_model_indexes(conn: Connection, index_names: List[str]):
+    """按模型中的定义创建索引（已存在则跳过）"""
+    wanted = set(index_names)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name in wanted:
+                index.create(bind=conn, checkfirst=True)
+
+
+def _add_hot_query_indexes(conn: Connection):
+    _create_model_indexes(conn, [name for names in HOT_QUERY_INDEXES.values() for name in names])
+
+
+def _add_missing_columns(conn: Connection, table, column_names: List[str]):
+    """为已有表补充模型中新增的可空列"""
+    existing = {column["name"] for column in inspect(conn).get_columns(table.name)}
+    for name in column_names:
+        if name in existing:
+            continue
+        column = table.c[name]
+        column_type = column.type.compile(dialect=conn.dialect)
+        references = ""
+        for foreign_key in column.foreign_keys:
+            references = f" REFERENCES {foreign_key.column.table.name}({foreign_key.column.name})"
+        conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {name} {column_type}{references}"))
+
+
+def _move_report_texts(conn: Connection, codec: str, batch_size: int = 500):
+    """把已有报告中内联存储的长文本压缩去重后移到review_texts"""
+    table = ReviewReport.__table__
+    has_text = or_(*[table.c[field] != "" for field in COMPRESSED_TEXT_FIELDS])
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            select(table.c.id, *[table.c[field] for field in COMPRESSED_TEXT_FIELDS])
+            .where(table.c.id > last_id, has_text)
+            .order_by(table.c.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        text_ids = get_or_create_text_ids(
+            conn, (getattr(row, field) for row in rows for field in COMPRESSED_TEXT_FIELDS), codec
+        )
+        for row in rows:
+            values = {}
+            for field in COMPRESSED_TEXT_FIELDS:
+                value = getattr(row, field)
+                if value:
+                    values[field] = None
+                    values[text_id_column(field)] = text_ids[value]
+            conn.execute(update(table).where(table.c.id == row.id).values(**values))
+        last_id = rows[-1].id
+
+
+def _compress_review_texts(conn: Connection):
+    ReviewText.__table__.create(bind=conn, checkfirst=True)
+    _add_missing_columns(
+        conn, ReviewReport.__table__, [text_id_column(field) for field in COMPRESSED_TEXT_FIELDS]
+    )
+    sqlite = conn.dialect.name == "sqlite"
+    if sqlite:
+        # 先删除旧的全文索引，迁移数据后重建
+        drop_sqlite_fulltext_index(conn, "review_reports")
+    if report_texts_compressed(conn.dialect.name):
+        _move_report_texts(conn, get_settings().report_text_codec)
+    if sqlite:
+        create_fulltext_indexes(conn, ["review_reports"])
+
+
+def _add_review_fingerprint(conn: Connection):
+    _add_missing_columns(conn, ReviewReport.__table__, ["sql_fingerprint", "sql_version", "review_mode"])
+
+
+def _add_statement_table_refs(conn: Connection):
+    _add_missing_columns(conn, SQLStatement.__table__, ["table_refs_version"])
+
+
+def _extend_schema_snapshots(conn: Connection):
+    _add_missing_columns(conn, SchemaSnapshotObject.__table__, ["object_key", "comment", "primary_key", "foreign_keys"])
+    _create_model_indexes(conn, ["ix_schema_snapshot_objects_snapshot_key"])
+    # 对象签名加入了注释和约束，旧快照无法与新快照比较：清空后下次检查重新生成基线，避免误判为全部变化
+    conn.execute(update(ReviewQueueItem.__table__).values(schema_snapshot_id=None))
+    conn.execute(SchemaSnapshotObject.__table__.delete())
+    conn.execute(SchemaSnapshot.__table__.delete())
+
+
+def _add_review_execution_plan(conn: Connection):
+    _add_missing_columns(conn, ReviewReport.__table__, ["execution_plan"])
+
+
+def _add_review_plan_analysis(conn: Connection):
+    _add_missing_columns(conn, ReviewReport.__table__, ["plan_analysis"])
+
+
+def _rebuild_report_fulltext_index(conn: Connection):
+    if conn.dialect.name != "sqlite":
+        return
+    # 旧的全文索引从调用review_text_decode的视图读取原文，没有注册该函数的连接写入报告会失败；
+    # 改为只保存索引的contentless表
+    drop_sqlite_fulltext_index(conn, "review_reports")
+    conn.execute(text("DROP VIEW IF EXISTS review_reports_search"))
+    create_fulltext_indexes(conn, ["review_reports"])
+
+
+# (版本号, 名称, 迁移函数)，新迁移追加到末尾
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "add_hot_query_indexes", _add_hot_query_indexes),
+    (2, "add_fulltext_search", create_fulltext_indexes),
+    (3, "compress_review_texts", _compress_review_texts),
+    (4, "add_review_fingerprint", _add_review_fingerprint),
+    (5, "add_statement_table_refs", _add_statement_table_refs),
+    (6, "extend_schema_snapshots", _extend_schema_snapshots),
+    (7, "add_review_execution_plan", _add_review_execution_plan),
+    (8, "add_review_plan_analysis", _add_review_plan_analysis),
+    (9, "rebuild_report_fulltext_index", _rebuild_report_fulltext_index),
+]
+
+
+def run_migrations(engine: Engine) -> List[int]:
+    """
+    执行尚未执行的迁移
+
+    Args:
+        engine: 应用数据库引擎
+
+    Returns:
+        本次执行的迁移版本号列表
+    """
+    _migration_metadata.create_all(bind=engine)
+
+    with engine.connect() as conn:
+        applied = {row[0] for row in conn.execute(schema_migrations.select().with_only_columns(schema_migrations.c.version))}
+
+    executed = []
+    for version, name, migrate in MIGRATIONS:
+        if version in applied:
+            continue
+        # 每个迁移在独立事务中执行，失败时回滚且不记录版本
+        with engine.begin() as conn:
+            migrate(conn)
+            conn.execute(schema_migrations.insert().values(
+                version=version, name=name, applied_at=datetime.utcnow()
+            ))
+        logger.info(f"已执行数据库迁移 {version}: {name}")
+        executed.append(version)
+    return executed
+
+
+def verify_indexes(engine: Engine) -> List[str]:
+    """
+    检查热点查询所需的索引是否存在
+
+    Returns:
+        缺失的索引列表（格式为 表名.索引名）
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    missing = []
+    for table_name, index_names in HOT_QUERY_INDEXES.items():
+        if table_name not in existing_tables:
+            missing.extend(f"{table_name}.{name}" for name in index_names)
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table_name)}
+        missing.extend(f"{table_name}.{name}" for name in index_names if name not in existing)
+    return missing
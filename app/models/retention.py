@@ -0,0 +1,53 @@
+"""审查报告保留策略和每日汇总模型"""
+
+from sqlalchemy import Column, Integer, Float, String, Date, DateTime, ForeignKey, Enum, UniqueConstraint, Index
+from sqlalchemy.sql import func
+
+from .database import Base
+from .review_report import ReviewStatus
+
+
+class RetentionPolicy(Base):
+    """审查报告保留策略（sql_statement_id为空表示全局策略）"""
+
+    __tablename__ = "retention_policies"
+
+    id = Column(Integer, primary_key=True, index=True)
+    sql_statement_id = Column(Integer, ForeignKey("sql_statements.id"), unique=True, comment="SQL语句ID，为空表示全局策略")
+    keep_last = Column(Integer, comment="每条SQL语句保留最近的报告数，为空或0表示不限")
+    keep_days = Column(Integer, comment="保留最近天数内的报告，为空或0表示不限")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), comment="更新时间")
+
+    def __repr__(self):
+        return f"<RetentionPolicy(sql_id={self.sql_statement_id}, keep_last={self.keep_last}, keep_days={self.keep_days})>"
+
+
+class ReviewRollup(Base):
+    """已归档审查报告的每日汇总（分组维度与审查统计一致，归档后统计和趋势不丢失）"""
+
+    __tablename__ = "review_daily_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False, comment="日期")
+    sql_statement_id = Column(Integer, ForeignKey("sql_statements.id"), nullable=False, comment="SQL语句ID")
+    llm_provider = Column(String(50), comment="LLM提供商")
+    llm_model = Column(String(100), comment="LLM模型")
+    overall_status = Column(Enum(ReviewStatus), comment="总体评估状态")
+    bucket = Column(Integer, nullable=False, comment="评分区间(0-9)")
+    report_count = Column(Integer, nullable=False, default=0, comment="报告数")
+    scored_count = Column(Integer, nullable=False, default=0, comment="有评分的报告数")
+    score_sum = Column(Float, nullable=False, default=0.0, comment="评分之和")
+    score_min = Column(Float, comment="最低评分")
+    score_max = Column(Float, comment="最高评分")
+
+    __table_args__ = (
+        UniqueConstraint(
+            "day", "sql_statement_id", "llm_provider", "llm_model", "overall_status", "bucket",
+            name="uq_review_daily_rollups_key"
+        ),
+        # 单条语句的趋势
+        Index("ix_review_daily_rollups_statement_day", "sql_statement_id", "day"),
+    )
+
+    def __repr__(self):
+        return f"<ReviewRollup(day={self.day}, sql_id={self.sql_statement_id}, count={self.report_count})>"
@@ -0,0 +1,37 @@
+"""待复审队列模型"""
+
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+
+from .database import Base
+
+# 队列项状态
+QUEUE_PENDING = "pending"
+QUEUE_RUNNING = "running"
+QUEUE_DONE = "done"
+QUEUE_FAILED = "failed"
+
+
+class ReviewQueueItem(Base):
+    """待复审的SQL语句（如目标库模式变化后，引用了变化对象的语句）"""
+
+    __tablename__ = "review_queue"
+
+    id = Column(Integer, primary_key=True, index=True)
+    sql_statement_id = Column(Integer, ForeignKey("sql_statements.id"), nullable=False, comment="SQL语句ID")
+    reason = Column(Text, comment="入队原因")
+    status = Column(String(20), nullable=False, default=QUEUE_PENDING, comment="状态(pending/running/done/failed)")
+    schema_snapshot_id = Column(Integer, ForeignKey("schema_snapshots.id"), comment="触发复审的模式快照ID")
+    report_id = Column(Integer, ForeignKey("review_reports.id"), comment="复审生成的报告ID")
+    error = Column(Text, comment="失败原因")
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), comment="入队时间")
+    started_at = Column(DateTime(timezone=True), comment="开始时间")
+    finished_at = Column(DateTime(timezone=True), comment="完成时间")
+
+    __table_args__ = (
+        Index("ix_review_queue_status_created", "status", "created_at"),
+        Index("ix_review_queue_sql_statement_id", "sql_statement_id"),
+    )
+
+    def __repr__(self):
+        return f"<ReviewQueueItem(sql_id={self.sql_statement_id}, status='{self.status}')>"
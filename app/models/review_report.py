@@ -1,6 +1,6 @@
 """审查报告模型"""
 
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Float, Enum
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Float, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -70,8 +70,41 @@ class ReviewReport(Base):
     # 优化建议
     optimized_sql = Column(Text, comment="优化后的SQL建议")
     
+    # 压缩存储的长文本（review_texts表，按内容去重），为空时使用上面的同名列
+    consistency_details_text_id = Column(Integer, ForeignKey("review_texts.id"), comment="一致性详细分析文本ID")
+    consistency_suggestions_text_id = Column(Integer, ForeignKey("review_texts.id"), comment="一致性改进建议文本ID")
+    conventions_details_text_id = Column(Integer, ForeignKey("review_texts.id"), comment="规范性详细分析文本ID")
+    conventions_suggestions_text_id = Column(Integer, ForeignKey("review_texts.id"), comment="规范性改进建议文本ID")
+    performance_details_text_id = Column(Integer, ForeignKey("review_texts.id"), comment="性能详细分析文本ID")
+    performance_suggestions_text_id = Column(Integer, ForeignKey("review_texts.id"), comment="性能改进建议文本ID")
+    security_details_text_id = Column(Integer, ForeignKey("review_texts.id"), comment="安全性详细分析文本ID")
+    security_suggestions_text_id = Column(Integer, ForeignKey("review_texts.id"), comment="安全性改进建议文本ID")
+    readability_details_text_id = Column(Integer, ForeignKey("review_texts.id"), comment="可读性详细分析文本ID")
+    readability_suggestions_text_id = Column(Integer, ForeignKey("review_texts.id"), comment="可读性改进建议文本ID")
+    maintainability_details_text_id = Column(Integer, ForeignKey("review_texts.id"), comment="可维护性详细分析文本ID")
+    maintainability_suggestions_text_id = Column(Integer, ForeignKey("review_texts.id"), comment="可维护性改进建议文本ID")
+    optimized_sql_text_id = Column(Integer, ForeignKey("review_texts.id"), comment="优化后的SQL建议文本ID")
+    
+    # 增量审查：被审查内容的指纹和版本
+    sql_fingerprint = Column(String(40), comment="被审查SQL的指纹（忽略格式和注释）")
+    sql_version = Column(Integer, comment="被审查的SQL语句版本号")
+    review_mode = Column(String(20), comment="审查方式(full: 完整审查, delta: 基于上次结果的增量审查)")
+    
+    # 审查时目标库的执行计划
+    execution_plan = Column(Text, comment="归一化的执行计划(JSON)，获取失败时记录error")
+    plan_analysis = Column(Text, comment="根据执行计划的启发式性能评分(JSON)，含规则版本和命中的规则")
+    
     # 时间戳
     created_at = Column(DateTime(timezone=True), server_default=func.now(), comment="创建时间")
     
+    __table_args__ = (
+        # 审查历史：按语句查询并按时间排序
+        Index("ix_review_reports_statement_created", "sql_statement_id", "created_at"),
+        # 结果列表与统计：按时间排序/分页
+        Index("ix_review_reports_created_id", "created_at", "id"),
+        # 按评分筛选和排序
+        Index("ix_review_reports_overall_score", "overall_score"),
+    )
+    
     def __repr__(self):
         return f"<ReviewReport(id={self.id}, sql_id={self.sql_statement_id}, status='{self.overall_status.value if self.overall_status else None}')>" 
\ No newline at end of file
@@ -0,0 +1,161 @@
+"""审查报告长文本存储模型"""
+
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import Column, Integer, String, LargeBinary, DateTime, select, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from app.config import get_settings
+from app.utils.text_codec import compress_text, content_hash, decompress_text
+from .database import Base
+
+# 压缩存储到review_texts的审查报告字段（overall_summary较短且列表视图需要，保持内联）
+COMPRESSED_TEXT_FIELDS = [
+    "consistency_details", "consistency_suggestions",
+    "conventions_details", "conventions_suggestions",
+    "performance_details", "performance_suggestions",
+    "security_details", "security_suggestions",
+    "readability_details", "readability_suggestions",
+    "maintainability_details", "maintainability_suggestions",
+    "optimized_sql",
+]
+
+
+def text_id_column(field: str) -> str:
+    """字段对应的文本ID列名"""
+    return f"{field}_text_id"
+
+
+def report_texts_compressed(dialect: str) -> bool:
+    """
+    审查报告长文本是否压缩存储
+    
+    auto时只在SQLite上压缩：SQLite的全文索引自行保存原文，
+    PostgreSQL/MySQL的全文索引只能读取review_reports中的列，压缩后检索不到详细分析和建议
+    
+    Args:
+        dialect: 应用数据库类型
+    """
+    storage = get_settings().report_text_storage
+    if storage == "auto":
+        return dialect == "sqlite"
+    return storage == "compressed"
+
+
+class ReviewText(Base):
+    """审查报告文本（压缩存储，按内容摘要去重，写入后不再修改）"""
+    
+    __tablename__ = "review_texts"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String(64), nullable=False, unique=True, comment="原文SHA-256摘要")
+    codec = Column(String(10), nullable=False, comment="压缩算法(zstd/zlib/none)")
+    original_size = Column(Integer, nullable=False, comment="原文字节数")
+    content = Column(LargeBinary, nullable=False, comment="压缩后的内容")
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), comment="创建时间")
+    
+    def __repr__(self):
+        return f"<ReviewText(id={self.id}, codec='{self.codec}', size={self.original_size})>"
+
+
+def _insert_ignoring_duplicates(executor, table):
+    """忽略content_hash冲突的INSERT：并发审查写入相同文本时，后写入的一方复用已有的行"""
+    dialect = (executor.get_bind() if isinstance(executor, Session) else executor).dialect.name
+    if dialect == "sqlite":
+        return sqlite.insert(table).on_conflict_do_nothing(index_elements=[table.c.content_hash])
+    if dialect == "postgresql":
+        return postgresql.insert(table).on_conflict_do_nothing(index_elements=[table.c.content_hash])
+    if dialect in ("mysql", "mariadb"):
+        return insert(table).prefix_with("IGNORE")
+    return insert(table)
+
+
+def get_or_create_text_ids(executor, values: Iterable[str], codec: str) -> Dict[str, int]:
+    """
+    写入文本并返回 原文 -> 文本ID（已存在相同内容时复用，并发写入相同内容时不会冲突）
+    
+    Args:
+        executor: Session或Connection
+        values: 非空文本
+        codec: 压缩算法
+        
+    Returns:
+        原文到文本ID的映射
+    """
+    by_hash = {content_hash(value): value for value in values if value}
+    if not by_hash:
+        return {}
+    
+    table = ReviewText.__table__
+    existing = dict(executor.execute(
+        select(table.c.content_hash, table.c.id).where(table.c.content_hash.in_(list(by_hash)))
+    ).all())
+    missing = [digest for digest in by_hash if digest not in existing]
+    if missing:
+        rows = []
+        for digest in missing:
+            value = by_hash[digest]
+            used_codec, data = compress_text(value, codec)
+            rows.append({
+                "content_hash": digest,
+                "codec": used_codec,
+                "original_size": len(value.encode("utf-8")),
+                "content": data,
+            })
+        executor.execute(_insert_ignoring_duplicates(executor, table), rows)
+        # 重新按摘要查询ID，包含其他事务并发写入的行
+        existing.update(executor.execute(
+            select(table.c.content_hash, table.c.id).where(table.c.content_hash.in_(missing))
+        ).all())
+    return {value: existing[digest] for digest, value in by_hash.items()}
+
+
+def load_texts(executor, text_ids: Iterable[Optional[int]]) -> Dict[int, str]:
+    """
+    批量读取并解压文本
+    
+    Args:
+        executor: Session或Connection
+        text_ids: 文本ID（忽略None）
+        
+    Returns:
+        文本ID到原文的映射
+    """
+    ids = sorted({text_id for text_id in text_ids if text_id is not None})
+    if not ids:
+        return {}
+    table = ReviewText.__table__
+    rows = executor.execute(
+        select(table.c.id, table.c.codec, table.c.content).where(table.c.id.in_(ids))
+    ).all()
+    return {row.id: decompress_text(row.codec, row.content) for row in rows}
+
+
+def hydrate_text_fields(executor, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    用压缩存储的文本填充结果字典中的长文本字段，并移除文本ID键
+    
+    结果字典中同时包含字段和对应的文本ID键（见text_id_column）时，
+    字段为空则用文本ID对应的原文填充
+    
+    Args:
+        executor: Session或Connection
+        items: 结果字典列表（原地修改）
+        
+    Returns:
+        items
+    """
+    keys = [(field, text_id_column(field)) for field in COMPRESSED_TEXT_FIELDS]
+    texts = load_texts(executor, (
+        item.get(id_key) for item in items for field, id_key in keys if item.get(field) is None
+    ))
+    for item in items:
+        for field, id_key in keys:
+            if id_key not in item:
+                continue
+            text_id = item.pop(id_key)
+            if field in item and item[field] is None and text_id is not None:
+                item[field] = texts.get(text_id)
+    return items
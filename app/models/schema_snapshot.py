@@ -0,0 +1,58 @@
+"""目标数据库模式快照模型"""
+
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.sql import func
+
+from .database import Base
+
+
+class SchemaSnapshot(Base):
+    """
+    数据库连接的模式快照（版本）
+
+    只有模式发生变化时才生成新版本，未变化时只更新检查时间
+    """
+
+    __tablename__ = "schema_snapshots"
+
+    id = Column(Integer, primary_key=True, index=True)
+    db_connection_id = Column(Integer, ForeignKey("database_connections.id"), nullable=False, comment="数据库连接ID")
+    version = Column(Integer, nullable=False, comment="快照版本号（每个连接内递增）")
+    checksum = Column(String(64), nullable=False, comment="全部对象签名的摘要")
+    object_count = Column(Integer, nullable=False, default=0, comment="对象数")
+    changed_count = Column(Integer, nullable=False, default=0, comment="相对上一版本变化的对象数")
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), comment="创建时间")
+    checked_at = Column(DateTime(timezone=True), server_default=func.now(), comment="最近一次检查时间")
+
+    __table_args__ = (
+        UniqueConstraint("db_connection_id", "version", name="uq_schema_snapshots_connection_version"),
+    )
+
+    def __repr__(self):
+        return f"<SchemaSnapshot(connection_id={self.db_connection_id}, version={self.version}, objects={self.object_count})>"
+
+
+class SchemaSnapshotObject(Base):
+    """快照中的表或视图（列、索引、主键和外键以JSON存储）"""
+
+    __tablename__ = "schema_snapshot_objects"
+
+    id = Column(Integer, primary_key=True, index=True)
+    snapshot_id = Column(Integer, ForeignKey("schema_snapshots.id"), nullable=False, comment="快照ID")
+    object_name = Column(String(255), nullable=False, comment="表名或视图名")
+    object_key = Column(String(255), nullable=False, comment="规范名（小写、不含模式前缀），用于查找、过滤和排序")
+    object_type = Column(String(20), nullable=False, comment="对象类型(table/view)")
+    comment = Column(Text, comment="表或视图注释")
+    columns = Column(Text, comment="列定义(JSON)")
+    indexes = Column(Text, comment="索引定义(JSON)")
+    primary_key = Column(Text, comment="主键列(JSON)")
+    foreign_keys = Column(Text, comment="外键定义(JSON)")
+    signature = Column(String(64), nullable=False, comment="对象定义的摘要")
+
+    __table_args__ = (
+        Index("ix_schema_snapshot_objects_snapshot_name", "snapshot_id", "object_name"),
+        Index("ix_schema_snapshot_objects_snapshot_key", "snapshot_id", "object_key"),
+    )
+
+    def __repr__(self):
+        return f"<SchemaSnapshotObject(snapshot_id={self.snapshot_id}, name='{self.object_name}')>"
@@ -1,6 +1,6 @@
 """SQL语句模型"""
 
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -48,5 +48,34 @@ class SQLStatement(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now(), comment="更新时间")
     last_reviewed_at = Column(DateTime(timezone=True), comment="最后审查时间")
     
+    # 引用的表（见sql_statement_tables）对应的版本号，与version不同时需重新解析
+    table_refs_version = Column(Integer, comment="表引用解析时的版本号")
+    
+    __table_args__ = (
+        # 有效语句列表：按时间排序/分页
+        Index("ix_sql_statements_active_created", "is_active", "created_at", "id"),
+        Index("ix_sql_statements_db_connection_id", "db_connection_id"),
+        Index("ix_sql_statements_status", "status"),
+        Index("ix_sql_statements_parent_id", "parent_id"),
+    )
+    
+    def __repr__(self):
+        return f"<SQLStatement(id={self.id}, title='{self.title}', status='{self.status.value}')>" 
+
+
+class SQLStatementTable(Base):
+    """SQL语句引用的表和视图（小写、不含模式前缀），用于查找受模式变化影响的语句"""
+    
+    __tablename__ = "sql_statement_tables"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    sql_statement_id = Column(Integer, ForeignKey("sql_statements.id"), nullable=False, comment="SQL语句ID")
+    table_name = Column(String(255), nullable=False, comment="表名或视图名")
+    
+    __table_args__ = (
+        Index("ix_sql_statement_tables_table_name", "table_name"),
+        Index("ix_sql_statement_tables_statement_id", "sql_statement_id"),
+    )
+    
     def __repr__(self):
-        return f"<SQLStatement(id={self.id}, title='{self.title}', status='{self.status.value}')>" 
\ No newline at end of file
+        return f"<SQLStatementTable(sql_id={self.sql_statement_id}, table='{self.table_name}')>"
@@ -0,0 +1,42 @@
+"""SQL语句版本历史模型"""
+
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, LargeBinary, UniqueConstraint
+from sqlalchemy.sql import func
+
+from .database import Base
+
+
+class SQLStatementVersion(Base):
+    """
+    SQL语句的历史版本
+
+    SQL内容按版本顺序存储：完整快照或相对上一版本的增量（见app.utils.text_delta），
+    两者都经过压缩。每隔一定版本数写入一次快照，还原任意版本最多应用有限个增量
+    """
+
+    __tablename__ = "sql_statement_versions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    sql_statement_id = Column(Integer, ForeignKey("sql_statements.id"), nullable=False, comment="SQL语句ID")
+    version = Column(Integer, nullable=False, comment="版本号")
+    title = Column(String(200), comment="该版本的标题")
+    description = Column(Text, comment="该版本的业务描述")
+
+    # 内容存储
+    is_snapshot = Column(Boolean, nullable=False, default=False, comment="是否为完整快照（否则为相对上一版本的增量）")
+    base_version = Column(Integer, comment="增量的基准版本号")
+    codec = Column(String(10), nullable=False, comment="压缩算法(zstd/zlib/none)")
+    data = Column(LargeBinary, nullable=False, comment="压缩后的快照或增量")
+    content_hash = Column(String(64), nullable=False, comment="完整SQL内容的SHA-256摘要（用于校验还原结果）")
+    content_size = Column(Integer, nullable=False, comment="完整SQL内容的字节数")
+
+    created_by = Column(String(100), comment="创建者")
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), comment="创建时间")
+
+    __table_args__ = (
+        UniqueConstraint("sql_statement_id", "version", name="uq_sql_statement_versions_statement_version"),
+    )
+
+    def __repr__(self):
+        kind = "snapshot" if self.is_snapshot else "delta"
+        return f"<SQLStatementVersion(sql_id={self.sql_statement_id}, version={self.version}, {kind})>"
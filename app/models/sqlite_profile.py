@@ -0,0 +1,150 @@
+"""SQLite应用库引擎配置
+
+默认部署使用SQLite作为应用库，这里为其设置连接参数和PRAGMA：
+- WAL日志模式：读不阻塞写，写不阻塞读
+- synchronous=NORMAL：WAL模式下只在检查点时fsync，提交不再每次刷盘
+- busy_timeout：锁冲突时等待而不是立即报 "database is locked"
+- 进程内写锁：写事务在第一条写语句前获取，提交或回滚时释放，
+  多个线程同时保存审查结果时排队写入，读连接不受影响
+"""
+
+import logging
+import re
+import sqlite3
+import threading
+from typing import Any, Dict
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import StaticPool
+
+logger = logging.getLogger(__name__)
+
+# 需要写锁的语句
+_WRITE_STATEMENT = re.compile(r"^\s*(INSERT|UPDATE|DELETE|REPLACE|CREATE|DROP|ALTER)\b", re.IGNORECASE)
+
+# 连接info中标记已持有写锁的键
+_WRITER_KEY = "sqlite_writer"
+
+
+def is_sqlite_url(database_url: str) -> bool:
+    """是否为SQLite数据库地址"""
+    return make_url(database_url).get_backend_name() == "sqlite"
+
+
+def _is_memory_database(database_url: str) -> bool:
+    database = make_url(database_url).database
+    return not database or database == ":memory:" or "mode=memory" in database_url
+
+
+def sqlite_engine_options(database_url: str, settings) -> Dict[str, Any]:
+    """
+    SQLite引擎的create_engine参数
+
+    Args:
+        database_url: 数据库地址
+        settings: 应用配置
+
+    Returns:
+        create_engine关键字参数
+    """
+    options: Dict[str, Any] = {
+        "connect_args": {
+            # 连接由线程池中的不同线程使用
+            "check_same_thread": False,
+            "timeout": settings.sqlite_busy_timeout / 1000,
+        },
+        "echo": settings.debug,
+    }
+    if _is_memory_database(database_url):
+        # 内存库只能通过同一个连接共享
+        options["poolclass"] = StaticPool
+    else:
+        options.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+        )
+    return options
+
+
+class SQLiteWriteLock:
+    """进程内SQLite写锁，同一时间只有一个连接处于写事务中（持有者记录在连接的info中）"""
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+
+    def acquire(self, dbapi_connection_info: Dict[str, Any]):
+        """
+        写语句执行前获取写锁（同一连接的事务内只获取一次）
+
+        Raises:
+            sqlite3.OperationalError: 等待超过timeout秒（与SQLite的busy_timeout一致，
+                不在未持有写锁的情况下写入）
+        """
+        if dbapi_connection_info.get(_WRITER_KEY):
+            return
+        if not self._lock.acquire(timeout=self.timeout):
+            raise sqlite3.OperationalError(f"database is locked: 等待进程内SQLite写锁超过{self.timeout}秒")
+        dbapi_connection_info[_WRITER_KEY] = True
+
+    def release(self, dbapi_connection_info: Dict[str, Any]):
+        """事务结束时释放写锁"""
+        if dbapi_connection_info.pop(_WRITER_KEY, False):
+            self._lock.release()
+
+
+def install_sqlite_profile(engine: Engine, settings) -> None:
+    """
+    为SQLite引擎注册PRAGMA设置和写锁
+
+    Args:
+        engine: 应用库引擎
+        settings: 应用配置
+    """
+    memory_database = _is_memory_database(str(engine.url))
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            if not memory_database:
+                cursor.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+            cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+            cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout)}")
+            cursor.execute(f"PRAGMA cache_size={-int(settings.sqlite_cache_size_kb)}")
+            cursor.execute("PRAGMA temp_store=MEMORY")
+            if settings.sqlite_mmap_size and not memory_database:
+                cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+        finally:
+            cursor.close()
+
+    if not settings.sqlite_serialize_writes:
+        return
+
+    write_lock = SQLiteWriteLock(settings.sqlite_busy_timeout / 1000)
+    engine.sqlite_write_lock = write_lock
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _acquire_write_lock(conn, cursor, statement, parameters, context, executemany):
+        if _WRITE_STATEMENT.match(statement):
+            try:
+                write_lock.acquire(conn.connection.info)
+            except sqlite3.OperationalError as e:
+                # 与SQLite自身的锁超时一样以SQLAlchemy的OperationalError抛出
+                raise exc.OperationalError(statement, parameters, e) from e
+
+    @event.listens_for(engine, "commit")
+    def _release_on_commit(conn):
+        write_lock.release(conn.connection.info)
+
+    @event.listens_for(engine, "rollback")
+    def _release_on_rollback(conn):
+        write_lock.release(conn.connection.info)
+
+    # 连接归还连接池时兜底释放（如连接失效未经过回滚）
+    @event.listens_for(engine.pool, "checkin")
+    def _release_on_checkin(dbapi_connection, connection_record):
+        if connection_record is not None:
+            write_lock.release(connection_record.info)
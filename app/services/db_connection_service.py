@@ -7,7 +7,7 @@ from sqlalchemy.exc import SQLAlchemyError
 
 from app.models.db_connection import DatabaseConnection
 from app.core.encryption import EncryptionService
-from app.core.schema_extractor import SchemaExtractor
+from app.services.schema_snapshot_service import SchemaSnapshotService
 from app.utils.database_utils import DatabaseUtils
 
 
@@ -18,6 +18,7 @@ class DatabaseConnectionService:
         self.db = db
         self.encryption_service = EncryptionService()
         self.database_utils = DatabaseUtils()
+        self.snapshot_service = SchemaSnapshotService(db)
     
     def test_connection_object(self, db_connection: DatabaseConnection) -> Dict[str, Any]:
         """
@@ -110,15 +111,36 @@ class DatabaseConnectionService:
         except Exception as e:
             return {"success": False, "error": f"连接测试失败: {str(e)}"}
     
-    def get_database_schema(self, connection_id: int) -> Dict[str, Any]:
+    def get_database_schema(
+        self,
+        connection_id: int,
+        refresh: bool = False,
+        object_type: Optional[str] = None,
+        search: Optional[str] = None,
+        match: str = "prefix",
+        page: int = 1,
+        page_size: int = 100,
+        cursor: Optional[str] = None,
+        with_total: bool = True
+    ) -> Dict[str, Any]:
         """
-        获取数据库模式信息
+        分页获取数据库中的表和视图（读取应用库中的模式快照）
+        
+        只返回名称、类型和注释，列和索引通过get_table_details按需获取
         
         Args:
             connection_id: 数据库连接ID
+            refresh: 是否先从目标库刷新快照（没有快照时总会刷新）
+            object_type: 只列出table或view
+            search: 对象名过滤
+            match: prefix前缀匹配，contains包含匹配
+            page: 页码
+            page_size: 每页数量
+            cursor: 上一页返回的next_cursor（键集分页）
+            with_total: 是否返回总数
             
         Returns:
-            数据库模式信息
+            分页结果及连接和快照信息
         """
         try:
             # 获取连接配置
@@ -129,33 +151,37 @@ class DatabaseConnectionService:
             if not db_connection:
                 return {"error": "数据库连接不存在"}
             
-            # 使用共通工具类构建连接字符串
-            connection_string = self.database_utils.build_connection_string(db_connection)
+            snapshot = self._get_snapshot(connection_id, refresh)
+            if isinstance(snapshot, dict):
+                return snapshot
             
-            # 创建引擎
-            engine = create_engine(connection_string)
+            result = self.snapshot_service.page_objects(
+                snapshot.id,
+                object_type=object_type,
+                search=search,
+                match=match,
+                page=page,
+                page_size=page_size,
+                cursor=cursor,
+                with_total=with_total
+            )
+            if "error" in result:
+                return result
             
-            # 获取所有表和视图
-            with engine.connect() as conn:
-                tables = self._get_all_tables(conn, db_connection)
-                views = self._get_all_views(conn, db_connection)
-            
-            return {
-                "tables": tables,
-                "views": views,
-                "connection_info": {
-                    "name": db_connection.name,
-                    "db_type": db_connection.db_type.value,
-                    "database_name": db_connection.database_name
-                }
+            result["connection_info"] = {
+                "name": db_connection.name,
+                "db_type": db_connection.db_type.value,
+                "database_name": db_connection.database_name
             }
+            result["snapshot"] = self._snapshot_info(snapshot)
+            return result
         
         except Exception as e:
             return {"error": f"获取数据库模式失败: {str(e)}"}
     
     def get_table_details(self, connection_id: int, table_name: str, object_type: str = "table") -> Dict[str, Any]:
         """
-        获取表或视图的详细信息
+        获取表或视图的详细信息（读取应用库中的模式快照）
         
         Args:
             connection_id: 数据库连接ID
@@ -163,37 +189,47 @@ class DatabaseConnectionService:
             object_type: 对象类型 (table/view)
             
         Returns:
-            表或视图的详细信息
+            表或视图的详细信息（注释、列、索引、主键、外键）
         """
         try:
-            # 获取连接配置
-            db_connection = self.db.query(DatabaseConnection).filter(
-                DatabaseConnection.id == connection_id
-            ).first()
+            snapshot = self._get_snapshot(connection_id)
+            if isinstance(snapshot, dict):
+                return snapshot
             
-            if not db_connection:
-                return {"error": "数据库连接不存在"}
-            
-            # 使用共通工具类构建连接字符串
-            connection_string = self.database_utils.build_connection_string(db_connection)
-            
-            # 创建引擎和模式提取器
-            engine = create_engine(connection_string)
-            schema_extractor = SchemaExtractor(engine, db_connection.db_type)
-            
-            # 获取表结构信息
-            schema_info = schema_extractor.get_table_schema([table_name])
-            
-            if object_type == "table" and schema_info["tables"]:
-                return schema_info["tables"][0]
-            elif object_type == "view" and schema_info["views"]:
-                return schema_info["views"][0]
-            else:
+            details = self.snapshot_service.get_object(connection_id, table_name, object_type)
+            if details is None:
                 return {"error": f"{object_type} '{table_name}' 不存在"}
+            return details
         
         except Exception as e:
             return {"error": f"获取{object_type}详细信息失败: {str(e)}"}
     
+    def _get_snapshot(self, connection_id: int, refresh: bool = False):
+        """
+        获取连接的最新模式快照，没有快照或要求刷新时先读取目标库
+        
+        Returns:
+            SchemaSnapshot，刷新失败时返回包含error的字典
+        """
+        # 避免循环导入：监测服务会在模式变化时触发复审
+        from app.services.schema_watch_service import SchemaWatchService
+        
+        snapshot = None if refresh else self.snapshot_service.latest_snapshot(connection_id)
+        if snapshot is None:
+            result = SchemaWatchService(self.db).check_connection(connection_id)
+            if "error" in result:
+                return result
+            snapshot = self.snapshot_service.latest_snapshot(connection_id)
+        return snapshot
+    
+    def _snapshot_info(self, snapshot) -> Dict[str, Any]:
+        return {
+            "version": snapshot.version,
+            "object_count": snapshot.object_count,
+            "checked_at": snapshot.checked_at,
+            "is_fresh": self.snapshot_service.is_fresh(snapshot)
+        }
+    
     def _build_connection_string_for_object(self, db_connection: DatabaseConnection) -> str:
         """构建数据库连接字符串（用于测试对象，密码未加密）"""
         password = db_connection.password or ""
@@ -256,123 +292,3 @@ class DatabaseConnectionService:
             return info
         except Exception:
             return {"database_type": db_connection.db_type.value}
-    
-    def _get_all_tables(self, conn, db_connection: DatabaseConnection) -> List[Dict[str, Any]]:
-        """获取所有表"""
-        tables = []
-        
-        try:
-            db_type = db_connection.db_type.value
-            
-            if db_type == "mysql":
-                query = text("""
-                    SELECT table_name, table_comment 
-                    FROM information_schema.tables 
-                    WHERE table_schema = DATABASE() 
-                    AND table_type = 'BASE TABLE'
-                    ORDER BY table_name
-                """)
-            elif db_type == "postgresql":
-                query = text("""
-                    SELECT table_name, '' as table_comment
-                    FROM information_schema.tables 
-                    WHERE table_schema = 'public' 
-                    AND table_type = 'BASE TABLE'
-                    ORDER BY table_name
-                """)
-            elif db_type == "oracle":
-                query = text("""
-                    SELECT table_name, comments as table_comment
-                    FROM user_tab_comments 
-                    WHERE table_type = 'TABLE'
-                    ORDER BY table_name
-                """)
-            elif db_type == "sqlserver":
-                query = text("""
-                    SELECT t.name as table_name, 
-                           ISNULL(ep.value, '') as table_comment
-                    FROM sys.tables t
-                    LEFT JOIN sys.extended_properties ep 
-                        ON ep.major_id = t.object_id 
-                        AND ep.minor_id = 0 
-                        AND ep.name = 'MS_Description'
-                    ORDER BY t.name
-                """)
-            elif db_type == "sqlite":
-                query = text("""
-                    SELECT name as table_name, '' as table_comment
-                    FROM sqlite_master 
-                    WHERE type = 'table' 
-                    AND name NOT LIKE 'sqlite_%'
-                    ORDER BY name
-                """)
-            else:
-                return tables
-            
-            result = conn.execute(query)
-            for row in result:
-                tables.append({
-                    "name": row[0],
-                    "comment": row[1] if len(row) > 1 else "",
-                    "type": "table"
-                })
-        
-        except Exception as e:
-            print(f"获取表列表失败: {e}")
-        
-        return tables
-    
-    def _get_all_views(self, conn, db_connection: DatabaseConnection) -> List[Dict[str, Any]]:
-        """获取所有视图"""
-        views = []
-        
-        try:
-            db_type = db_connection.db_type.value
-            
-            if db_type == "mysql":
-                query = text("""
-                    SELECT table_name 
-                    FROM information_schema.views 
-                    WHERE table_schema = DATABASE()
-                    ORDER BY table_name
-                """)
-            elif db_type == "postgresql":
-                query = text("""
-                    SELECT table_name 
-                    FROM information_schema.views 
-                    WHERE table_schema = 'public'
-                    ORDER BY table_name
-                """)
-            elif db_type == "oracle":
-                query = text("""
-                    SELECT view_name as table_name
-                    FROM user_views
-                    ORDER BY view_name
-                """)
-            elif db_type == "sqlserver":
-                query = text("""
-                    SELECT name as table_name
-                    FROM sys.views
-                    ORDER BY name
-                """)
-            elif db_type == "sqlite":
-                query = text("""
-                    SELECT name as table_name
-                    FROM sqlite_master 
-                    WHERE type = 'view'
-                    ORDER BY name
-                """)
-            else:
-                return views
-            
-            result = conn.execute(query)
-            for row in result:
-                views.append({
-                    "name": row[0],
-                    "type": "view"
-                })
-        
-        except Exception as e:
-            print(f"获取视图列表失败: {e}")
-        
-        return views 
\ No newline at end of file
@@ -0,0 +1,343 @@
+"""数据导出服务 - 流式导出SQL语句和审查报告"""
+
+import csv
+import enum
+import io
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from sqlalchemy import Boolean, DateTime, Float, Integer, Numeric, select
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models.database import SessionLocal
+from app.models.review_report import ReviewReport
+from app.models.review_text import COMPRESSED_TEXT_FIELDS, hydrate_text_fields, text_id_column
+from app.models.sql_statement import SQLStatement
+from app.services.review_service import ReviewService, RESULT_FIELDS
+from app.services.sql_statement_service import SQLStatementService
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# 导出格式 -> (媒体类型, 文件扩展名)
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+
+# 列式格式依赖pyarrow
+COLUMNAR_FORMATS = {"parquet", "arrow"}
+
+# SQL语句导出的字段 -> 对应的数据库列
+STATEMENT_EXPORT_FIELDS = {
+    "id": SQLStatement.id,
+    "title": SQLStatement.title,
+    "sql_content": SQLStatement.sql_content,
+    "description": SQLStatement.description,
+    "status": SQLStatement.status,
+    "category": SQLStatement.category,
+    "tags": SQLStatement.tags,
+    "created_at": SQLStatement.created_at,
+}
+
+# 审查报告原始记录导出的字段（用于归档，长文本字段从review_texts还原） -> 对应的数据库列
+REPORT_EXPORT_FIELDS = {
+    column.name: column
+    for column in ReviewReport.__table__.columns
+    if not column.name.endswith("_text_id")
+}
+
+# SQL语句CSV的表头（与导入格式保持一致）
+STATEMENT_CSV_HEADERS = {
+    "id": "ID",
+    "title": "标题",
+    "sql_content": "SQL语句",
+    "description": "描述",
+    "status": "状态",
+    "category": "分类",
+    "tags": "标签",
+    "created_at": "创建时间",
+}
+
+
+class _ChunkSink:
+    """供pyarrow写入的内存缓冲，每批写入后取出已生成的字节发送给客户端"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ExportService:
+    """
+    流式导出服务
+
+    使用yield_per按批从服务端游标读取，逐批编码为CSV、NDJSON、Parquet或Arrow后发送，
+    内存占用与批大小相关而与数据总量无关。生成器在自己的会话中运行，
+    不依赖请求会话的生命周期
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        batch_size: Optional[int] = None
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size or get_settings().export_batch_size
+
+    @staticmethod
+    def check_format(export_format: str) -> Optional[str]:
+        """
+        检查导出格式是否可用
+
+        Returns:
+            不可用时返回错误信息，否则返回None
+        """
+        if export_format not in EXPORT_FORMATS:
+            return f"不支持的导出格式: {export_format}，可选: {', '.join(EXPORT_FORMATS)}"
+        if export_format in COLUMNAR_FORMATS and not PYARROW_AVAILABLE:
+            return f"导出{export_format}格式需要安装pyarrow"
+        return None
+
+    def export_statements(
+        self,
+        export_format: str = "csv",
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Iterator[bytes]:
+        """
+        流式导出SQL语句
+
+        Args:
+            export_format: 导出格式（csv/ndjson/parquet/arrow）
+            filters: 过滤条件（同SQLStatementService.get_sql_statements）
+
+        Returns:
+            字节块迭代器
+        """
+        fields = list(STATEMENT_EXPORT_FIELDS)
+
+        def fetch(db: Session):
+            query = SQLStatementService(db).build_statement_query(
+                filters, *[STATEMENT_EXPORT_FIELDS[name].label(name) for name in fields]
+            )
+            return db.execute(query.statement.execution_options(yield_per=self.batch_size)).partitions()
+
+        headers = [STATEMENT_CSV_HEADERS[name] for name in fields]
+        return self._stream(export_format, fields, STATEMENT_EXPORT_FIELDS, fetch, headers)
+
+    def export_review_results(
+        self,
+        export_format: str = "csv",
+        selected: Sequence[str] = (),
+        database_name: Optional[str] = None,
+        sql_title: Optional[str] = None,
+        min_score: Optional[float] = None,
+        max_score: Optional[float] = None
+    ) -> Iterator[bytes]:
+        """
+        流式导出审查结果（按报告ID排序）
+
+        Args:
+            export_format: 导出格式（csv/ndjson/parquet/arrow）
+            selected: 导出的字段，见review_service.resolve_result_fields
+            database_name: 数据库名称（模糊匹配）
+            sql_title: SQL标题（模糊匹配）
+            min_score: 最低评分
+            max_score: 最高评分
+
+        Returns:
+            字节块迭代器
+        """
+        fields = list(selected)
+
+        def fetch(db: Session):
+            query = ReviewService(db).build_results_query(
+                fields, database_name, sql_title, min_score, max_score
+            ).order_by(RESULT_FIELDS["id"])
+            return db.execute(query.statement.execution_options(yield_per=self.batch_size)).partitions()
+
+        return self._stream(export_format, fields, RESULT_FIELDS, fetch, hydrate=hydrate_text_fields)
+
+    def export_review_reports(self, export_format: str, report_ids: Sequence[int]) -> Iterator[bytes]:
+        """
+        流式导出审查报告的完整记录（按报告ID排序，不过滤SQL语句状态，用于归档）
+
+        Args:
+            export_format: 导出格式（csv/ndjson/parquet/arrow）
+            report_ids: 审查报告ID
+
+        Returns:
+            字节块迭代器
+        """
+        fields = list(REPORT_EXPORT_FIELDS)
+        table = ReviewReport.__table__
+        columns = [table.c[name] for name in fields]
+        columns += [table.c[text_id_column(field)] for field in COMPRESSED_TEXT_FIELDS]
+        ids = sorted(report_ids)
+
+        def fetch(db: Session):
+            # 按批查询，避免超出数据库的参数个数限制
+            for start in range(0, len(ids), self.batch_size):
+                chunk = ids[start:start + self.batch_size]
+                yield db.execute(
+                    select(*columns).where(table.c.id.in_(chunk)).order_by(table.c.id)
+                ).all()
+
+        return self._stream(export_format, fields, REPORT_EXPORT_FIELDS, fetch, hydrate=hydrate_text_fields)
+
+    def _stream(
+        self,
+        export_format: str,
+        fields: List[str],
+        columns: Dict[str, Any],
+        fetch: Callable[[Session], Iterator[Sequence[Any]]],
+        headers: Optional[List[str]] = None,
+        hydrate: Optional[Callable[[Session, List[Dict[str, Any]]], Any]] = None
+    ) -> Iterator[bytes]:
+        """在独立会话中逐批读取并按格式编码，hydrate用于按批填充压缩存储的字段"""
+        if export_format == "csv":
+            encoder = self._encode_csv(fields, headers or fields)
+        elif export_format == "ndjson":
+            encoder = self._encode_ndjson(fields)
+        else:
+            encoder = self._encode_columnar(export_format, fields, columns)
+
+        db = self.session_factory()
+        try:
+            next(encoder)
+            for batch in fetch(db):
+                items = [dict(row._mapping) for row in batch]
+                if hydrate is not None:
+                    hydrate(db, items)
+                chunk = encoder.send([self._row_values(item, fields) for item in items])
+                if chunk:
+                    yield chunk
+            try:
+                encoder.send(None)
+            except StopIteration as stop:
+                if stop.value:
+                    yield stop.value
+        except Exception as e:
+            logger.error(f"导出{export_format}失败: {e}")
+            raise
+        finally:
+            encoder.close()
+            db.close()
+
+    @staticmethod
+    def _row_values(item: Dict[str, Any], fields: List[str]) -> List[Any]:
+        """取出行中的值，枚举转换为其值，带时区的时间统一为UTC"""
+        values = []
+        for name in fields:
+            value = item[name]
+            if isinstance(value, enum.Enum):
+                value = value.value
+            elif isinstance(value, datetime) and value.tzinfo is not None:
+                value = value.astimezone(timezone.utc).replace(tzinfo=None)
+            values.append(value)
+        return values
+
+    @staticmethod
+    def _encode_csv(fields: List[str], headers: List[str]):
+        """CSV编码器：send一批行返回字节，send(None)结束"""
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(headers)
+        rows = yield
+        while rows is not None:
+            for values in rows:
+                writer.writerow([
+                    value.strftime('%Y-%m-%d %H:%M:%S') if isinstance(value, datetime)
+                    else ('' if value is None else value)
+                    for value in values
+                ])
+            data = output.getvalue().encode("utf-8")
+            output.seek(0)
+            output.truncate()
+            rows = yield data
+        return output.getvalue().encode("utf-8")
+
+    @staticmethod
+    def _encode_ndjson(fields: List[str]):
+        """NDJSON编码器：每行一个JSON对象"""
+        rows = yield
+        while rows is not None:
+            lines = [
+                json.dumps(dict(zip(fields, values)), ensure_ascii=False, default=_json_default)
+                for values in rows
+            ]
+            rows = yield ("\n".join(lines) + "\n").encode("utf-8") if lines else b""
+        return b""
+
+    @staticmethod
+    def _encode_columnar(export_format: str, fields: List[str], columns: Dict[str, Any]):
+        """Parquet/Arrow编码器：每批写入一个行组（记录批）"""
+        schema = pa.schema([(name, _arrow_type(columns[name].type)) for name in fields])
+        sink = _ChunkSink()
+        if export_format == "parquet":
+            writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema, compression="zstd")
+        else:
+            writer = pa.ipc.new_stream(pa.PythonFile(sink, mode="w"), schema)
+        rows = yield
+        while rows is not None:
+            if rows:
+                arrays = [
+                    pa.array([values[index] for values in rows], type=schema.field(index).type)
+                    for index in range(len(fields))
+                ]
+                writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            rows = yield sink.drain()
+        writer.close()
+        return sink.drain()
+
+
+def _arrow_type(column_type) -> "pa.DataType":
+    """将SQLAlchemy列类型映射为Arrow类型"""
+    if isinstance(column_type, Boolean):
+        return pa.bool_()
+    if isinstance(column_type, Integer):
+        return pa.int64()
+    if isinstance(column_type, (Float, Numeric)):
+        return pa.float64()
+    if isinstance(column_type, DateTime):
+        return pa.timestamp("us")
+    return pa.string()
+
+
+def _json_default(value: Any) -> Any:
+    """NDJSON中无法直接序列化的值"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
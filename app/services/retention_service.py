@@ -0,0 +1,431 @@
+"""审查报告保留服务 - 按策略归档过期报告并汇总为每日统计"""
+
+import asyncio
+import gzip
+import logging
+import os
+from datetime import datetime, date, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+import anyio
+from sqlalchemy import func, or_, and_, select
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models.database import SessionLocal
+from app.models.fulltext import delete_sqlite_fulltext_rows
+from app.models.retention import RetentionPolicy, ReviewRollup
+from app.models.review_queue import ReviewQueueItem
+from app.models.review_report import ReviewReport
+from app.models.review_text import COMPRESSED_TEXT_FIELDS, ReviewText, text_id_column
+from app.models.sql_statement import SQLStatement
+from app.services.export_service import ExportService
+from app.services.review_service import score_bucket
+from app.utils.cache import invalidate_review_caches
+
+logger = logging.getLogger(__name__)
+
+# 归档格式 -> (导出格式, 文件扩展名)
+ARCHIVE_FORMATS = {
+    "ndjson": ("ndjson", "ndjson.gz"),
+    "parquet": ("parquet", "parquet"),
+}
+
+# 归档文件所在的子目录
+ARCHIVE_SUBDIR = "review_reports"
+
+
+def _policy_limits(keep_last: Optional[int], keep_days: Optional[int]) -> Dict[str, Optional[int]]:
+    """规范化策略参数（0视为不限）"""
+    return {"keep_last": keep_last or None, "keep_days": keep_days or None}
+
+
+def _match(column, value):
+    """等值条件（NULL需要使用IS NULL比较）"""
+    return column.is_(None) if value is None else column == value
+
+
+class RetentionService:
+    """
+    审查报告保留服务
+
+    每条SQL语句使用自己的保留策略，没有时使用全局策略（数据库中的全局策略优先于配置默认值）。
+    过期报告先写入归档文件，再按天汇总到review_daily_rollups，最后从在线表删除；
+    每条SQL语句最新的一份报告始终保留
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.settings = get_settings()
+
+    # ---------- 策略 ----------
+
+    def get_global_policy(self) -> Dict[str, Any]:
+        """获取全局保留策略"""
+        policy = self.db.query(RetentionPolicy).filter(RetentionPolicy.sql_statement_id.is_(None)).first()
+        if policy is None:
+            limits = _policy_limits(self.settings.retention_keep_last, self.settings.retention_keep_days)
+            return {**limits, "source": "settings", "updated_at": None}
+        return {
+            **_policy_limits(policy.keep_last, policy.keep_days),
+            "source": "database",
+            "updated_at": policy.updated_at
+        }
+
+    def get_policies(self) -> Dict[str, Any]:
+        """
+        获取全部保留策略
+
+        Returns:
+            global: 全局策略；statements: 各SQL语句的策略
+        """
+        rows = self.db.query(RetentionPolicy, SQLStatement.title).join(
+            SQLStatement, RetentionPolicy.sql_statement_id == SQLStatement.id
+        ).order_by(RetentionPolicy.sql_statement_id).all()
+        return {
+            "global": self.get_global_policy(),
+            "statements": [
+                {
+                    "sql_statement_id": policy.sql_statement_id,
+                    "sql_title": title,
+                    **_policy_limits(policy.keep_last, policy.keep_days),
+                    "updated_at": policy.updated_at
+                }
+                for policy, title in rows
+            ]
+        }
+
+    def set_global_policy(self, keep_last: Optional[int], keep_days: Optional[int]) -> Dict[str, Any]:
+        """
+        设置全局保留策略
+
+        Args:
+            keep_last: 每条SQL语句保留最近的报告数，为空或0表示不限
+            keep_days: 保留最近天数内的报告，为空或0表示不限
+
+        Returns:
+            设置后的全局策略
+        """
+        policy = self.db.query(RetentionPolicy).filter(RetentionPolicy.sql_statement_id.is_(None)).first()
+        if policy is None:
+            policy = RetentionPolicy(sql_statement_id=None)
+            self.db.add(policy)
+        policy.keep_last = keep_last or None
+        policy.keep_days = keep_days or None
+        self.db.commit()
+        return self.get_global_policy()
+
+    def set_statement_policy(self, sql_statement_id: int, keep_last: Optional[int], keep_days: Optional[int]) -> Dict[str, Any]:
+        """
+        设置SQL语句的保留策略（覆盖全局策略）
+
+        Args:
+            sql_statement_id: SQL语句ID
+            keep_last: 保留最近的报告数，为空或0表示不限
+            keep_days: 保留最近天数内的报告，为空或0表示不限
+
+        Returns:
+            设置后的策略，SQL语句不存在时返回error
+        """
+        if self.db.query(SQLStatement.id).filter(SQLStatement.id == sql_statement_id).first() is None:
+            return {"error": "SQL语句不存在"}
+        policy = self.db.query(RetentionPolicy).filter(RetentionPolicy.sql_statement_id == sql_statement_id).first()
+        if policy is None:
+            policy = RetentionPolicy(sql_statement_id=sql_statement_id)
+            self.db.add(policy)
+        policy.keep_last = keep_last or None
+        policy.keep_days = keep_days or None
+        self.db.commit()
+        return {
+            "sql_statement_id": sql_statement_id,
+            **_policy_limits(policy.keep_last, policy.keep_days),
+            "updated_at": policy.updated_at
+        }
+
+    def delete_statement_policy(self, sql_statement_id: int) -> bool:
+        """删除SQL语句的保留策略（恢复使用全局策略）"""
+        deleted = self.db.query(RetentionPolicy).filter(
+            RetentionPolicy.sql_statement_id == sql_statement_id
+        ).delete(synchronize_session=False)
+        self.db.commit()
+        return deleted > 0
+
+    def has_policies(self) -> bool:
+        """是否配置了任何生效的保留策略"""
+        limits = self.get_global_policy()
+        if limits["keep_last"] or limits["keep_days"]:
+            return True
+        return self.db.query(RetentionPolicy.id).filter(
+            RetentionPolicy.sql_statement_id.isnot(None),
+            or_(RetentionPolicy.keep_last > 0, RetentionPolicy.keep_days > 0)
+        ).first() is not None
+
+    # ---------- 过期判定 ----------
+
+    def find_expired(self, now: Optional[datetime] = None) -> List[int]:
+        """
+        按保留策略找出过期的审查报告
+
+        Args:
+            now: 计算保留天数的当前时间（UTC），默认当前时间
+
+        Returns:
+            过期报告ID列表（升序）
+        """
+        now = now or datetime.utcnow()
+        ranked = select(
+            ReviewReport.id,
+            ReviewReport.sql_statement_id,
+            ReviewReport.created_at,
+            func.row_number().over(
+                partition_by=ReviewReport.sql_statement_id,
+                order_by=(ReviewReport.created_at.desc(), ReviewReport.id.desc())
+            ).label("position")
+        ).subquery()
+
+        def expired(keep_last: Optional[int], keep_days: Optional[int]):
+            conditions = []
+            if keep_last:
+                conditions.append(ranked.c.position > keep_last)
+            if keep_days:
+                conditions.append(ranked.c.created_at < now - timedelta(days=keep_days))
+            return or_(*conditions) if conditions else None
+
+        statement_policies = self.db.query(RetentionPolicy).filter(RetentionPolicy.sql_statement_id.isnot(None)).all()
+        clauses = []
+        global_policy = self.get_global_policy()
+        global_expired = expired(global_policy["keep_last"], global_policy["keep_days"])
+        if global_expired is not None:
+            overridden = [policy.sql_statement_id for policy in statement_policies]
+            clauses.append(and_(ranked.c.sql_statement_id.notin_(overridden), global_expired) if overridden else global_expired)
+        for policy in statement_policies:
+            condition = expired(policy.keep_last, policy.keep_days)
+            if condition is not None:
+                clauses.append(and_(ranked.c.sql_statement_id == policy.sql_statement_id, condition))
+        if not clauses:
+            return []
+
+        # 最新的一份报告始终保留
+        rows = self.db.execute(
+            select(ranked.c.id).where(ranked.c.position > 1, or_(*clauses)).order_by(ranked.c.id)
+        ).all()
+        return [row.id for row in rows]
+
+    # ---------- 归档 ----------
+
+    def run(self, dry_run: bool = False) -> Dict[str, Any]:
+        """
+        执行一次归档：写入归档文件、汇总为每日统计、删除过期报告并清理不再引用的文本
+
+        Args:
+            dry_run: 只统计过期报告，不做修改
+
+        Returns:
+            执行结果摘要，归档格式不可用时返回error
+        """
+        archive_format = self.settings.retention_archive_format
+        if archive_format not in ARCHIVE_FORMATS:
+            return {"error": f"不支持的归档格式: {archive_format}，可选: {', '.join(ARCHIVE_FORMATS)}"}
+        format_error = ExportService.check_format(ARCHIVE_FORMATS[archive_format][0])
+        if format_error:
+            return {"error": format_error}
+
+        expired_ids = self.find_expired()
+        summary: Dict[str, Any] = {
+            "dry_run": dry_run,
+            "expired": len(expired_ids),
+            "archived": 0,
+            "archive_file": None,
+            "rollup_rows": 0,
+            "texts_removed": 0
+        }
+        if dry_run or not expired_ids:
+            return summary
+
+        summary["archive_file"] = self._write_archive(expired_ids, archive_format)
+        summary["archived"] = len(expired_ids)
+
+        batch_size = self.settings.retention_batch_size
+        text_ids = set()
+        for start in range(0, len(expired_ids), batch_size):
+            batch = expired_ids[start:start + batch_size]
+            summary["rollup_rows"] += self._rollup(batch)
+            text_ids.update(self._referenced_text_ids(batch))
+            # 复审队列仍引用的报告：清空引用，避免悬空ID（PostgreSQL/MySQL上外键约束会使删除失败）
+            self.db.query(ReviewQueueItem).filter(ReviewQueueItem.report_id.in_(batch)).update(
+                {ReviewQueueItem.report_id: None}, synchronize_session=False
+            )
+            # 删除时全文索引由触发器同步（SQLite 3.43以下的contentless索引需先用原文删除）
+            if self.db.get_bind().dialect.name == "sqlite":
+                delete_sqlite_fulltext_rows(self.db.connection(), "review_reports", batch)
+            self.db.query(ReviewReport).filter(ReviewReport.id.in_(batch)).delete(synchronize_session=False)
+            self.db.commit()
+
+        summary["texts_removed"] = self._remove_orphan_texts(text_ids)
+        invalidate_review_caches()
+        logger.info(
+            f"归档审查报告 {summary['archived']} 条到 {summary['archive_file']}，"
+            f"汇总行 {summary['rollup_rows']}，清理文本 {summary['texts_removed']}"
+        )
+        return summary
+
+    def _archive_dir(self) -> str:
+        return os.path.join(self.settings.retention_archive_dir, ARCHIVE_SUBDIR)
+
+    def _write_archive(self, report_ids: List[int], archive_format: str) -> str:
+        """把报告写入归档文件（先写临时文件，完成后再改名），返回文件路径"""
+        export_format, extension = ARCHIVE_FORMATS[archive_format]
+        directory = self._archive_dir()
+        os.makedirs(directory, exist_ok=True)
+        timestamp = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+        path = os.path.join(directory, f"{timestamp}-{report_ids[0]}-{report_ids[-1]}.{extension}")
+        temp_path = f"{path}.tmp"
+
+        bind = self.db.get_bind()
+        exporter = ExportService(
+            session_factory=lambda: Session(bind=bind),
+            batch_size=self.settings.retention_batch_size
+        )
+        chunks = exporter.export_review_reports(export_format, report_ids)
+        try:
+            with (gzip.open(temp_path, "wb") if extension.endswith(".gz") else open(temp_path, "wb")) as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return path
+
+    def _rollup(self, report_ids: Sequence[int]) -> int:
+        """把一批报告按天累加到每日汇总，返回涉及的汇总行数"""
+        score = ReviewReport.overall_score
+        day = func.date(ReviewReport.created_at)
+        bucket = score_bucket(score)
+        rows = self.db.query(
+            day.label("day"),
+            ReviewReport.sql_statement_id,
+            ReviewReport.llm_provider,
+            ReviewReport.llm_model,
+            ReviewReport.overall_status,
+            bucket.label("bucket"),
+            func.count(ReviewReport.id).label("count"),
+            func.count(score).label("scored"),
+            func.sum(score).label("score_sum"),
+            func.min(score).label("score_min"),
+            func.max(score).label("score_max")
+        ).filter(
+            ReviewReport.id.in_(report_ids)
+        ).group_by(
+            day,
+            ReviewReport.sql_statement_id,
+            ReviewReport.llm_provider,
+            ReviewReport.llm_model,
+            ReviewReport.overall_status,
+            bucket
+        ).all()
+
+        for row in rows:
+            row_day = row.day if isinstance(row.day, date) else date.fromisoformat(str(row.day)[:10])
+            rollup = self.db.query(ReviewRollup).filter(
+                ReviewRollup.day == row_day,
+                ReviewRollup.sql_statement_id == row.sql_statement_id,
+                _match(ReviewRollup.llm_provider, row.llm_provider),
+                _match(ReviewRollup.llm_model, row.llm_model),
+                _match(ReviewRollup.overall_status, row.overall_status),
+                ReviewRollup.bucket == row.bucket
+            ).first()
+            if rollup is None:
+                rollup = ReviewRollup(
+                    day=row_day,
+                    sql_statement_id=row.sql_statement_id,
+                    llm_provider=row.llm_provider,
+                    llm_model=row.llm_model,
+                    overall_status=row.overall_status,
+                    bucket=row.bucket,
+                    report_count=0,
+                    scored_count=0,
+                    score_sum=0.0
+                )
+                self.db.add(rollup)
+            rollup.report_count += row.count
+            rollup.scored_count += row.scored or 0
+            rollup.score_sum += row.score_sum or 0.0
+            if row.score_min is not None:
+                rollup.score_min = row.score_min if rollup.score_min is None else min(rollup.score_min, row.score_min)
+            if row.score_max is not None:
+                rollup.score_max = row.score_max if rollup.score_max is None else max(rollup.score_max, row.score_max)
+        self.db.flush()
+        return len(rows)
+
+    def _text_id_columns(self):
+        return [getattr(ReviewReport, text_id_column(field)) for field in COMPRESSED_TEXT_FIELDS]
+
+    def _referenced_text_ids(self, report_ids: Sequence[int]) -> set:
+        """一批报告引用的文本ID"""
+        text_ids = set()
+        for row in self.db.query(*self._text_id_columns()).filter(ReviewReport.id.in_(report_ids)):
+            text_ids.update(value for value in row if value is not None)
+        return text_ids
+
+    def _remove_orphan_texts(self, candidate_ids: set) -> int:
+        """删除候选文本中已不被任何报告引用的文本（文本按内容去重，可能被多份报告共享）"""
+        columns = self._text_id_columns()
+        candidates = sorted(candidate_ids)
+        removed = 0
+        batch_size = self.settings.retention_batch_size
+        for start in range(0, len(candidates), batch_size):
+            batch = candidates[start:start + batch_size]
+            still_used = set()
+            for row in self.db.query(*columns).filter(or_(*[column.in_(batch) for column in columns])):
+                still_used.update(value for value in row if value is not None)
+            orphans = [text_id for text_id in batch if text_id not in still_used]
+            if orphans:
+                removed += self.db.query(ReviewText).filter(ReviewText.id.in_(orphans)).delete(synchronize_session=False)
+            self.db.commit()
+        return removed
+
+    def list_archives(self) -> List[Dict[str, Any]]:
+        """列出归档文件（按文件名倒序，即最新的在前）"""
+        directory = self._archive_dir()
+        if not os.path.isdir(directory):
+            return []
+        archives = []
+        for name in sorted(os.listdir(directory), reverse=True):
+            if name.endswith(".tmp"):
+                continue
+            stat = os.stat(os.path.join(directory, name))
+            archives.append({
+                "name": name,
+                "size": stat.st_size,
+                "modified_at": datetime.utcfromtimestamp(stat.st_mtime)
+            })
+        return archives
+
+
+def run_scheduled_retention() -> Optional[Dict[str, Any]]:
+    """后台任务执行一次归档（没有配置保留策略时跳过）"""
+    db = SessionLocal()
+    try:
+        service = RetentionService(db)
+        if not service.has_policies():
+            return None
+        return service.run()
+    finally:
+        db.close()
+
+
+async def retention_loop(interval: float):
+    """
+    后台定期归档过期审查报告
+
+    Args:
+        interval: 执行间隔（秒）
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await anyio.to_thread.run_sync(run_scheduled_retention)
+        except Exception as e:
+            logger.error(f"归档审查报告失败: {e}")
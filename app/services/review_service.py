@@ -1,19 +1,125 @@
 """审查服务"""
 
-from typing import Dict, Any, Optional
+import enum
+import json
+import re
+import time
+from itertools import chain
+from datetime import datetime, date, timedelta
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, List
 from sqlalchemy.orm import Session
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, func, case
 from sqlalchemy.sql import text
 
+from app.config import get_settings
 from app.core.sql_parser import SQLParser
+from app.core.parallel_parser import ParallelSQLParser
 from app.core.schema_extractor import SchemaExtractor
+from app.core.plan_explainer import PlanExplainer
+from app.core.plan_analyzer import PlanAnalyzer
 from app.core.ai_reviewer import AIReviewer
 from app.core.encryption import EncryptionService
 from app.models.sql_statement import SQLStatement
 from app.models.review_report import ReviewReport, ReviewStatus
+from app.models.retention import ReviewRollup
+from app.models.fulltext import FULLTEXT_TABLES, fulltext_available, insert_sqlite_fulltext_rows
+from app.models.review_text import (
+    COMPRESSED_TEXT_FIELDS, get_or_create_text_ids, hydrate_text_fields, report_texts_compressed, text_id_column
+)
 from app.models.db_connection import DatabaseConnection
 from app.models.llm_config import LLMConfig
+from app.services.schema_snapshot_service import SchemaSnapshotService
+from app.services.sql_statement_service import SQLStatementService
 from app.utils.database_utils import DatabaseUtils
+from app.utils.cache import count_cache, statistics_cache, invalidate_review_caches, invalidate_statement_caches
+from app.utils.pagination import paginate_keyset, strip_cursor_columns
+
+
+# 增量审查时向前查找等价基准版本的最大版本数
+_DELTA_BASE_SEARCH_LIMIT = 10
+
+# 审查维度
+REVIEW_DIMENSIONS = ["consistency", "conventions", "performance", "security", "readability", "maintainability"]
+
+# 审查结果列表可返回的字段 -> 对应的数据库列
+RESULT_FIELDS = {
+    "id": ReviewReport.id,
+    "sql_statement_id": SQLStatement.id,
+    "database_name": DatabaseConnection.name,
+    "sql_title": SQLStatement.title,
+    "sql_description": SQLStatement.description,
+    "sql_content": SQLStatement.sql_content,
+    "overall_score": ReviewReport.overall_score,
+    "overall_status": ReviewReport.overall_status,
+    "overall_summary": ReviewReport.overall_summary,
+}
+for _dimension in REVIEW_DIMENSIONS:
+    for _suffix in ("score", "status", "details", "suggestions"):
+        RESULT_FIELDS[f"{_dimension}_{_suffix}"] = getattr(ReviewReport, f"{_dimension}_{_suffix}")
+RESULT_FIELDS.update({
+    "optimized_sql": ReviewReport.optimized_sql,
+    "llm_provider": ReviewReport.llm_provider,
+    "llm_model": ReviewReport.llm_model,
+    "created_at": ReviewReport.created_at,
+})
+
+# 列表视图（summary）不返回大文本列：SQL内容、优化后的SQL以及各维度的详细分析和改进建议，只在detail视图中返回
+SUMMARY_FIELDS = [
+    name for name in RESULT_FIELDS
+    if not name.endswith("_details") and not name.endswith("_suggestions")
+    and name not in ("sql_content", "optimized_sql")
+]
+
+
+def resolve_result_fields(view: str = "summary", fields: Optional[List[str]] = None) -> List[str]:
+    """
+    根据视图或指定字段确定审查结果返回的字段
+    
+    Args:
+        view: summary只返回评分、摘要等小字段，detail返回全部字段
+        fields: 指定返回的字段，优先于view（总是包含id）
+        
+    Returns:
+        字段名列表
+        
+    Raises:
+        ValueError: 字段或视图不受支持
+    """
+    if fields:
+        unknown = [name for name in fields if name not in RESULT_FIELDS]
+        if unknown:
+            raise ValueError(f"不支持的字段: {', '.join(unknown)}")
+        return list(dict.fromkeys(["id"] + fields))
+    if view == "detail":
+        return list(RESULT_FIELDS)
+    if view == "summary":
+        return SUMMARY_FIELDS
+    raise ValueError(f"不支持的视图: {view}")
+
+
+def _mentions_table(text_value: str, table_name: str) -> bool:
+    """文本中是否出现表名（忽略模式前缀和大小写）"""
+    short_name = table_name.split(".")[-1].strip('"`[]')
+    return re.search(rf"(?<![\w$]){re.escape(short_name)}(?![\w$])", text_value, re.IGNORECASE) is not None
+
+
+def score_bucket(score):
+    """评分区间（0-9, 10-19, ..., 90-100）表达式，使用CASE保证各数据库行为一致"""
+    return case(
+        *[(score >= lower, lower // 10) for lower in range(90, 0, -10)],
+        else_=0
+    )
+
+
+@contextmanager
+def _timed(timings: Dict[str, float], stage: str):
+    """记录审查流程中某个阶段的耗时（毫秒）"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = round((time.perf_counter() - start) * 1000, 3)
 
 
 class ReviewService:
@@ -25,17 +131,32 @@ class ReviewService:
         self.encryption_service = EncryptionService()
         self.database_utils = DatabaseUtils()
     
-    def review_sql_statement(self, sql_statement_id: int, llm_config_id: Optional[int] = None) -> Dict[str, Any]:
+    def review_sql_statement(
+        self,
+        sql_statement_id: int,
+        llm_config_id: Optional[int] = None,
+        force: bool = False,
+        offline: bool = False
+    ) -> Dict[str, Any]:
         """
         审查SQL语句
         
+        与上次审查的版本相比仅格式或注释变化（指纹相同）时沿用上次的审查结果；
+        修改较少时只把差异和上次结论发给AI做增量审查，其余情况完整审查。
+        plan_analysis_mode不为off时，LLM不可用（或offline）会根据执行计划生成只含性能维度的离线报告
+        
         Args:
             sql_statement_id: SQL语句ID
             llm_config_id: LLM配置ID，如果为None则使用默认配置
+            force: 忽略上次审查结果，强制完整审查
+            offline: 不调用LLM，只根据执行计划评估性能维度
             
         Returns:
-            审查结果
+            审查结果，包含审查方式 review_mode（full/delta/skipped/offline）和各阶段耗时 timings（毫秒）
         """
+        timings: Dict[str, float] = {}
+        settings = get_settings()
+        analysis_mode = "offline" if offline else settings.plan_analysis_mode
         try:
             # 获取SQL语句
             sql_statement = self.db.query(SQLStatement).filter(
@@ -49,61 +170,286 @@ class ReviewService:
             if not sql_statement.db_connection:
                 return {"error": "SQL语句未关联数据库连接"}
             
-            # 步骤1: 检测数据库连接是否可用
-            db_connection_test = self._test_database_connection(sql_statement.db_connection)
-            if not db_connection_test["success"]:
-                return {"error": f"数据库连接失败: {db_connection_test['message']}"}
+            sql_parser = SQLParser(sql_statement.db_connection.db_type)
+            fingerprint = sql_parser.fingerprint(sql_statement.sql_content)
             
-            # 获取LLM配置
-            llm_config = self._get_llm_config(llm_config_id)
-            if not llm_config:
-                return {"error": "LLM配置不存在或未配置"}
+            # 与上次审查比较：指纹相同则沿用，修改较少则增量审查
+            delta = None
+            previous = None
+            if get_settings().review_incremental and not force:
+                previous = self._get_last_review(sql_statement.id)
+                if previous is not None and previous.sql_fingerprint == fingerprint:
+                    return self._carry_forward_review(sql_statement, previous, timings)
+                if previous is not None:
+                    with _timed(timings, "diff"):
+                        delta = self._plan_delta_review(sql_statement, previous, sql_parser)
             
-            # 步骤2: 检测大模型是否能够连通
-            llm_connection_test = self._test_llm_connection(llm_config)
-            if not llm_connection_test["success"]:
-                return {"error": f"AI模型连接失败: {llm_connection_test['message']}"}
-            
-            # 步骤3: 解析SQL，提取表名
-            parse_result = self.sql_parser.parse(sql_statement.sql_content)
-            table_names = parse_result["tables"] + parse_result["views"]
+            # 步骤1: 按连接的数据库方言解析SQL，提取表名
+            with _timed(timings, "parse"):
+                parse_result = sql_parser.parse(sql_statement.sql_content)
+            all_table_names = parse_result["tables"] + parse_result["views"]
+            table_names = all_table_names
             # 打印表名
             print("***************************表名:")
             print(table_names)
             if not table_names:
                 return {"error": "无法从SQL中提取表名"}
+            if delta is not None:
+                # 增量审查只需要修改涉及的表
+                table_names = [name for name in table_names if _mentions_table(delta["changed_text"], name)]
+            
+            # 步骤2: 检测数据库连接是否可用
+            if table_names:
+                with _timed(timings, "db_check"):
+                    db_connection_test = self._test_database_connection(sql_statement.db_connection)
+                if not db_connection_test["success"]:
+                    return {"error": f"数据库连接失败: {db_connection_test['message']}"}
+            
+            # 步骤3: 获取LLM配置并检测大模型是否能够连通，不可用时按plan_analysis_mode转为离线审查
+            llm_config = None
+            offline_reason = "离线模式" if analysis_mode == "offline" else None
+            if offline_reason is None:
+                llm_config = self._get_llm_config(llm_config_id)
+                if not llm_config:
+                    llm_error = "LLM配置不存在或未配置"
+                else:
+                    with _timed(timings, "llm_check"):
+                        llm_connection_test = self._test_llm_connection(llm_config)
+                    llm_error = None if llm_connection_test["success"] else f"AI模型连接失败: {llm_connection_test['message']}"
+                if llm_error:
+                    if analysis_mode == "off":
+                        return {"error": llm_error}
+                    offline_reason = llm_error
+            if offline_reason is not None:
+                # 离线审查评估整条SQL，不做增量审查
+                delta = None
+                table_names = all_table_names
             
             # 步骤4: 获取数据库模式信息
-            schema_info = self._get_schema_info(sql_statement.db_connection, table_names)
+            with _timed(timings, "schema"):
+                schema_info = self._get_schema_info(sql_statement.db_connection, table_names) if table_names else {}
             # 打印模式信息
             print("***************************模式信息:")
             print(schema_info)
+            # 可选步骤: 在目标库获取执行计划（EXPLAIN不执行SQL），失败时不影响审查
+            execution_plan = None
+            if settings.review_explain_plan or analysis_mode != "off":
+                with _timed(timings, "explain"):
+                    execution_plan = self._explain_plan(sql_statement.db_connection, sql_statement.sql_content)
+            plan_for_prompt = execution_plan if execution_plan and "error" not in execution_plan else None
+            # 可选步骤: 根据执行计划和表统计信息给性能维度评分
+            plan_analysis = None
+            if plan_for_prompt and analysis_mode != "off":
+                with _timed(timings, "plan_analysis"):
+                    plan_analysis = self._analyze_plan(plan_for_prompt, schema_info, sql_statement.sql_content)
+            if offline_reason is not None:
+                if plan_analysis is None:
+                    plan_error = execution_plan["error"] if execution_plan else "未获取执行计划"
+                    return {"error": f"{offline_reason}，且无法离线审查: {plan_error}"}
+                return self._save_offline_review(
+                    sql_statement, plan_analysis, offline_reason, execution_plan, timings
+                )
+            if plan_analysis is not None and analysis_mode == "first_pass":
+                plan_for_prompt = dict(plan_for_prompt, analysis=plan_analysis)
             # 步骤5: 调用AI进行审查
-            ai_reviewer = AIReviewer(llm_config)
-            review_result = ai_reviewer.review_sql(
-                sql_statement.sql_content,
-                sql_statement.description or "",
-                schema_info
-            )
+            with _timed(timings, "llm_review"):
+                ai_reviewer = AIReviewer(llm_config)
+                if delta is not None:
+                    previous_result = self._report_to_result(previous)
+                    review_result = self._merge_delta_result(previous_result, ai_reviewer.review_sql_delta(
+                        delta["diff"],
+                        sql_statement.description or "",
+                        schema_info,
+                        previous_result,
+                        plan_for_prompt
+                    ))
+                else:
+                    review_result = ai_reviewer.review_sql(
+                        sql_statement.sql_content,
+                        sql_statement.description or "",
+                        schema_info,
+                        plan_for_prompt
+                    )
+            review_mode = "delta" if delta is not None else "full"
             
             # 步骤6: 保存审查报告
-            report = self._save_review_report(sql_statement, review_result, llm_config)
-            
-            # 更新SQL语句状态
-            sql_statement.status = self._determine_sql_status(review_result)
-            sql_statement.last_reviewed_at = report.created_at
-            self.db.commit()
+            with _timed(timings, "save"):
+                report = self._save_review_report(
+                    sql_statement, review_result, llm_config, fingerprint, review_mode, execution_plan, plan_analysis
+                )
+                
+                # 更新SQL语句状态
+                sql_statement.status = self._determine_sql_status(review_result)
+                sql_statement.last_reviewed_at = report.created_at
+                self.db.commit()
             
-            return {
+            result = {
                 "success": True,
                 "report_id": report.id,
-                "review_result": review_result
+                "review_mode": review_mode,
+                "review_result": review_result,
+                "execution_plan": execution_plan,
+                "plan_analysis": plan_analysis,
+                "timings": timings
             }
+            if delta is not None:
+                result["base_version"] = delta["base_version"]
+            return result
         
         except Exception as e:
             self.db.rollback()
             return {"error": f"审查失败: {str(e)}"}
     
+    def _save_offline_review(
+        self,
+        sql_statement: SQLStatement,
+        plan_analysis: Dict[str, Any],
+        reason: str,
+        execution_plan: Dict[str, Any],
+        timings: Dict[str, float]
+    ) -> Dict[str, Any]:
+        """
+        保存只含性能维度的离线审查报告
+        
+        离线报告不记录指纹（不作为增量审查和沿用的基准），也不改变语句的审查状态；
+        只评估了一个维度，不记录总体状态和评分，不计入统计、趋势和结果列表的评分
+        """
+        performance = {key: plan_analysis[key] for key in ("status", "score", "details", "suggestions")}
+        review_result: Dict[str, Any] = {
+            "overall_assessment": {
+                "status": None,
+                "score": None,
+                "summary": f"离线审查（{reason}）：仅根据执行计划和表统计信息评估了性能维度，其他维度未审查"
+            },
+            "optimized_sql": ""
+        }
+        for dimension in REVIEW_DIMENSIONS:
+            review_result[dimension] = performance if dimension == "performance" else {
+                "status": None, "score": None, "details": "", "suggestions": ""
+            }
+        
+        with _timed(timings, "save"):
+            report = self._save_review_report(
+                sql_statement,
+                review_result,
+                {"provider": "plan_analyzer", "model_name": plan_analysis["heuristics_version"]},
+                review_mode="offline",
+                execution_plan=execution_plan,
+                plan_analysis=plan_analysis
+            )
+            self.db.commit()
+        return {
+            "success": True,
+            "report_id": report.id,
+            "review_mode": "offline",
+            "review_result": review_result,
+            "execution_plan": execution_plan,
+            "plan_analysis": plan_analysis,
+            "timings": timings
+        }
+    
+    def _get_last_review(self, sql_statement_id: int) -> Optional[ReviewReport]:
+        """最近一次成功且记录了指纹的审查报告"""
+        return self.db.query(ReviewReport).filter(
+            ReviewReport.sql_statement_id == sql_statement_id,
+            ReviewReport.sql_fingerprint.isnot(None)
+        ).order_by(ReviewReport.created_at.desc(), ReviewReport.id.desc()).first()
+    
+    def _carry_forward_review(self, sql_statement: SQLStatement, previous: ReviewReport, timings: Dict[str, float]) -> Dict[str, Any]:
+        """SQL仅格式或注释变化：不调用AI，恢复上次审查得出的语句状态"""
+        review_result = self._report_to_result(previous)
+        sql_statement.status = self._determine_sql_status(review_result)
+        sql_statement.last_reviewed_at = previous.created_at
+        self.db.commit()
+        invalidate_statement_caches()
+        return {
+            "success": True,
+            "report_id": previous.id,
+            "review_mode": "skipped",
+            "review_result": review_result,
+            "timings": timings
+        }
+    
+    def _plan_delta_review(
+        self,
+        sql_statement: SQLStatement,
+        previous: ReviewReport,
+        sql_parser: SQLParser
+    ) -> Optional[Dict[str, Any]]:
+        """
+        判断能否增量审查
+        
+        Returns:
+            差异文本、变化行和基准版本号；上次审查的版本无法还原或修改过多时返回None
+        """
+        settings = get_settings()
+        if previous.sql_version is None or previous.sql_version >= sql_statement.version:
+            return None
+        statement_service = SQLStatementService(self.db)
+        
+        # 上次审查后可能有过仅格式或注释的修改，以与上次审查内容等价的最新版本为基准，差异中不含这些修改
+        base_version = previous.sql_version
+        for version in range(sql_statement.version - 1, previous.sql_version, -1)[:_DELTA_BASE_SEARCH_LIMIT]:
+            content = statement_service.get_version_content(sql_statement.id, version)
+            if content is not None and sql_parser.fingerprint(content["sql_content"]) == previous.sql_fingerprint:
+                base_version = version
+                break
+        
+        diff = statement_service.diff_versions(
+            sql_statement.id, base_version, sql_statement.version, settings.review_delta_context_lines
+        )
+        if "error" in diff:
+            return None
+        total_lines = max(sql_statement.sql_content.count("\n") + 1, 1)
+        if (diff["added"] + diff["removed"]) / total_lines > settings.review_delta_max_changed_ratio:
+            return None
+        changed_text = "\n".join(
+            line[1:] for line in diff["diff"].splitlines()
+            if line[:1] in ("+", "-") and not line.startswith(("+++", "---"))
+        )
+        return {"diff": diff["diff"], "changed_text": changed_text, "base_version": base_version}
+    
+    def _report_to_result(self, report: ReviewReport) -> Dict[str, Any]:
+        """把审查报告转换为与AI审查结果相同的结构"""
+        texts = self.get_report_texts(report)
+        result: Dict[str, Any] = {
+            "overall_assessment": {
+                "status": report.overall_status.value if report.overall_status else None,
+                "score": report.overall_score,
+                "summary": report.overall_summary or ""
+            },
+            "optimized_sql": texts["optimized_sql"] or ""
+        }
+        for dimension in REVIEW_DIMENSIONS:
+            status = getattr(report, f"{dimension}_status")
+            result[dimension] = {
+                "status": status.value if status else None,
+                "score": getattr(report, f"{dimension}_score"),
+                "details": texts[f"{dimension}_details"] or "",
+                "suggestions": texts[f"{dimension}_suggestions"] or ""
+            }
+        return result
+    
+    def _merge_delta_result(self, previous_result: Dict[str, Any], delta_result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        增量审查中未受修改影响的维度（details/suggestions为空）沿用上次的分析和建议
+        
+        增量提示词只包含差异，模型给出的optimized_sql最多是片段，上次的optimized_sql针对的是旧版本，
+        两者都不能作为整条语句的优化结果，增量审查的报告不记录optimized_sql
+        """
+        if "error" in delta_result:
+            return delta_result
+        merged = dict(delta_result)
+        merged["optimized_sql"] = ""
+        for dimension in REVIEW_DIMENSIONS:
+            section = dict(delta_result.get(dimension) or {})
+            before = previous_result.get(dimension, {})
+            for key in ("details", "suggestions"):
+                if not (section.get(key) or "").strip():
+                    section[key] = before.get(key, "")
+            merged[dimension] = section
+        return merged
+    
     def _get_llm_config(self, llm_config_id: Optional[int]) -> Optional[Dict[str, Any]]:
         """获取LLM配置"""
         if llm_config_id:
@@ -140,21 +486,59 @@ class ReviewService:
             # 使用共通工具类构建数据库连接字符串
             connection_string = self.database_utils.build_connection_string(db_connection)
             
-            # 创建数据库引擎
+            # 创建数据库引擎（快照中已有全部表时不会连接目标库）
             engine = create_engine(connection_string)
             
-            # 创建模式提取器
-            schema_extractor = SchemaExtractor(engine, db_connection.db_type)
-            
-            # 获取表结构信息
-            schema_info = schema_extractor.get_table_schema(table_names)
+            # 创建模式提取器，优先使用未过期的模式快照
+            snapshot = SchemaSnapshotService(self.db).get_schema_objects(db_connection.id, table_names)
+            schema_extractor = SchemaExtractor(engine, db_connection.db_type, snapshot)
             
-            return schema_info
+            # 获取表结构信息（未在快照中的表并行反射）
+            try:
+                return schema_extractor.get_table_schema(table_names)
+            finally:
+                engine.dispose()
         
         except Exception as e:
             print(f"获取数据库模式信息失败: {e}")
             return {"tables": [], "views": []}
     
+    def explain_sql_statement(self, sql_statement_id: int) -> Dict[str, Any]:
+        """
+        获取SQL语句在关联数据库上的执行计划（EXPLAIN不执行SQL）
+        
+        Args:
+            sql_statement_id: SQL语句ID
+            
+        Returns:
+            归一化的执行计划，语句不存在、未关联数据库或获取失败时返回error
+        """
+        sql_statement = self.db.query(SQLStatement).filter(SQLStatement.id == sql_statement_id).first()
+        if not sql_statement:
+            return {"error": "SQL语句不存在"}
+        if not sql_statement.db_connection:
+            return {"error": "SQL语句未关联数据库连接"}
+        return self._explain_plan(sql_statement.db_connection, sql_statement.sql_content)
+    
+    def _analyze_plan(self, execution_plan: Dict[str, Any], schema_info: Dict[str, Any], sql_content: str) -> Dict[str, Any]:
+        """用启发式规则给执行计划评分，表行数取自模式信息中的统计信息"""
+        table_stats = {
+            name: table.get("stats") for name, table in (schema_info.get("tables") or {}).items()
+            if isinstance(table, dict)
+        }
+        return PlanAnalyzer(table_stats, sql_content).analyze(execution_plan)
+    
+    def _explain_plan(self, db_connection: DatabaseConnection, sql_content: str) -> Dict[str, Any]:
+        """在目标库获取执行计划"""
+        try:
+            engine = create_engine(self.database_utils.build_connection_string(db_connection))
+            try:
+                return PlanExplainer(engine, db_connection.db_type).explain(sql_content)
+            finally:
+                engine.dispose()
+        except Exception as e:
+            return {"error": f"获取执行计划失败: {str(e)}"}
+    
     def _test_database_connection(self, db_connection: DatabaseConnection) -> Dict[str, Any]:
         """测试数据库连接"""
         try:
@@ -195,8 +579,17 @@ class ReviewService:
         except Exception as e:
             return {"success": False, "message": f"AI模型连接失败: {str(e)}"}
     
-    def _save_review_report(self, sql_statement: SQLStatement, review_result: Dict[str, Any], llm_config: Dict[str, Any]) -> ReviewReport:
-        """保存审查报告"""
+    def _save_review_report(
+        self,
+        sql_statement: SQLStatement,
+        review_result: Dict[str, Any],
+        llm_config: Dict[str, Any],
+        fingerprint: Optional[str] = None,
+        review_mode: str = "full",
+        execution_plan: Optional[Dict[str, Any]] = None,
+        plan_analysis: Optional[Dict[str, Any]] = None
+    ) -> ReviewReport:
+        """保存审查报告（审查失败的报告不记录指纹，不作为后续增量审查的基准）"""
         
         # 解析审查结果
         overall = review_result.get("overall_assessment", {})
@@ -257,14 +650,72 @@ class ReviewService:
             llm_model=llm_config["model_name"],
             
             # 优化建议
-            optimized_sql=review_result.get("optimized_sql", "")
+            optimized_sql=review_result.get("optimized_sql", ""),
+            
+            # 增量审查
+            sql_fingerprint=None if "error" in review_result else fingerprint,
+            sql_version=sql_statement.version,
+            review_mode=review_mode,
+            
+            # 执行计划
+            execution_plan=json.dumps(execution_plan, ensure_ascii=False) if execution_plan else None,
+            plan_analysis=json.dumps(plan_analysis, ensure_ascii=False) if plan_analysis else None
         )
         
+        if review_mode == "offline":
+            # 离线审查只评估了性能维度，总体和其他维度不记录状态和评分
+            report.overall_status = None
+            report.overall_score = None
+            for dimension in REVIEW_DIMENSIONS:
+                if dimension != "performance":
+                    setattr(report, f"{dimension}_status", None)
+                    setattr(report, f"{dimension}_score", None)
+        
+        dialect = self.db.get_bind().dialect.name
+        texts = None
+        if report_texts_compressed(dialect):
+            texts = self._compress_report_texts(report)
+        
         self.db.add(report)
         self.db.flush()  # 获取ID但不提交
+        if texts and any(texts.values()) and dialect == "sqlite" and fulltext_available(self.db.connection(), "review_reports"):
+            # 含压缩文本的报告不由触发器写入全文索引
+            indexed = {column: getattr(report, column) for column in FULLTEXT_TABLES["review_reports"]["columns"]}
+            indexed.update((field, value) for field, value in texts.items() if value)
+            insert_sqlite_fulltext_rows(self.db.connection(), "review_reports", [{"id": report.id, **indexed}])
+        invalidate_review_caches()
         
         return report
     
+    def _compress_report_texts(self, report: ReviewReport) -> Dict[str, Optional[str]]:
+        """
+        将报告的长文本写入review_texts（按内容去重），报告中只保留文本ID
+        
+        Returns:
+            字段名到原文的映射
+        """
+        values = {field: getattr(report, field) for field in COMPRESSED_TEXT_FIELDS}
+        text_ids = get_or_create_text_ids(self.db, values.values(), get_settings().report_text_codec)
+        for field, value in values.items():
+            if value:
+                setattr(report, text_id_column(field), text_ids[value])
+                setattr(report, field, None)
+        return values
+    
+    def get_report_texts(self, report: ReviewReport) -> Dict[str, Optional[str]]:
+        """
+        获取报告的长文本字段（兼容内联存储和压缩存储）
+        
+        Args:
+            report: 审查报告
+            
+        Returns:
+            字段名到原文的映射
+        """
+        item = {field: getattr(report, field) for field in COMPRESSED_TEXT_FIELDS}
+        item.update({text_id_column(field): getattr(report, text_id_column(field)) for field in COMPRESSED_TEXT_FIELDS})
+        return hydrate_text_fields(self.db, [item])[0]
+    
     def _parse_status(self, status_str: str) -> ReviewStatus:
         """解析状态字符串为枚举"""
         if not status_str:
@@ -297,8 +748,397 @@ class ReviewService:
         """获取审查报告"""
         return self.db.query(ReviewReport).filter(ReviewReport.id == report_id).first()
     
-    def get_sql_review_history(self, sql_statement_id: int) -> list:
-        """获取SQL语句的审查历史"""
-        return self.db.query(ReviewReport).filter(
+    def get_review_results(
+        self,
+        page: int = 1,
+        page_size: int = 10,
+        database_name: Optional[str] = None,
+        sql_title: Optional[str] = None,
+        min_score: Optional[float] = None,
+        max_score: Optional[float] = None,
+        order_by: str = "created_at",
+        order_dir: str = "desc",
+        view: str = "summary",
+        fields: Optional[List[str]] = None,
+        cursor: Optional[str] = None,
+        with_total: bool = True
+    ) -> Dict[str, Any]:
+        """
+        分页查询审查结果列表
+        
+        通过一次联表查询按需投影列，避免逐行懒加载SQL语句和数据库连接。
+        传入cursor时使用键集分页（忽略page），深页与首页代价相同；总数按筛选条件缓存
+        
+        Args:
+            page: 页码
+            page_size: 每页数量
+            database_name: 数据库名称（模糊匹配）
+            sql_title: SQL标题（模糊匹配）
+            min_score: 最低评分
+            max_score: 最高评分
+            order_by: 排序字段
+            order_dir: 排序方向（asc/desc）
+            view: summary只返回评分和摘要，detail额外返回各维度的详细分析和建议
+            fields: 指定返回的字段，优先于view
+            cursor: 上一页返回的next_cursor
+            with_total: 是否返回总数（为False时跳过count查询）
+            
+        Returns:
+            包含 items、page、page_size、pages、total、next_cursor 的字典，参数错误时包含error
+        """
+        try:
+            selected = resolve_result_fields(view, fields)
+        except ValueError as e:
+            return {"error": str(e)}
+        
+        query = self.build_results_query(selected, database_name, sql_title, min_score, max_score)
+        
+        # 排序（以报告ID作为次级排序保证结果稳定）
+        if order_by in ReviewReport.__table__.columns:
+            order_column = ReviewReport.__table__.columns[order_by]
+        elif order_by in SQLStatement.__table__.columns:
+            order_column = SQLStatement.__table__.columns[order_by]
+        elif order_by in RESULT_FIELDS:
+            order_column = RESULT_FIELDS[order_by]
+        else:
+            order_column = ReviewReport.created_at
+        
+        total = None
+        if with_total:
+            cache_key = ("review_results", database_name, sql_title, min_score, max_score)
+            total = count_cache.get_or_set(cache_key, query.count)
+        
+        try:
+            rows, next_cursor = paginate_keyset(
+                query,
+                order_column,
+                ReviewReport.id,
+                descending=order_dir.lower() == "desc",
+                page_size=page_size,
+                cursor=cursor,
+                offset=None if cursor else (page - 1) * page_size
+            )
+        except ValueError as e:
+            return {"error": str(e)}
+        
+        return {
+            "items": hydrate_text_fields(self.db, [self._serialize_row(row) for row in rows]),
+            "page": None if cursor else page,
+            "page_size": page_size,
+            "pages": (total + page_size - 1) // page_size if total is not None else None,
+            "total": total,
+            "next_cursor": next_cursor
+        }
+    
+    def build_results_query(
+        self,
+        selected: List[str],
+        database_name: Optional[str] = None,
+        sql_title: Optional[str] = None,
+        min_score: Optional[float] = None,
+        max_score: Optional[float] = None
+    ):
+        """
+        构建审查结果的投影联表查询（不含排序和分页）
+        
+        结果中压缩存储的长文本字段附带对应的文本ID列，需经hydrate_text_fields填充
+        
+        Args:
+            selected: 返回的字段（RESULT_FIELDS中的键）
+            database_name: 数据库名称（模糊匹配）
+            sql_title: SQL标题（模糊匹配）
+            min_score: 最低评分
+            max_score: 最高评分
+            
+        Returns:
+            查询对象
+        """
+        # 压缩存储的长文本字段同时查询文本ID，由hydrate_text_fields批量填充
+        text_ids = [
+            getattr(ReviewReport, text_id_column(name)).label(text_id_column(name))
+            for name in selected if name in COMPRESSED_TEXT_FIELDS
+        ]
+        query = self.db.query(
+            *[RESULT_FIELDS[name].label(name) for name in selected], *text_ids
+        ).select_from(ReviewReport).join(
+            SQLStatement, ReviewReport.sql_statement_id == SQLStatement.id
+        ).join(
+            DatabaseConnection, SQLStatement.db_connection_id == DatabaseConnection.id
+        ).filter(
+            SQLStatement.is_active == True
+        )
+        
+        # 应用筛选条件
+        if database_name:
+            query = query.filter(DatabaseConnection.name.ilike(f"%{database_name}%"))
+        
+        if sql_title:
+            query = query.filter(SQLStatement.title.ilike(f"%{sql_title}%"))
+        
+        if min_score is not None:
+            query = query.filter(ReviewReport.overall_score >= min_score)
+        
+        if max_score is not None:
+            query = query.filter(ReviewReport.overall_score <= max_score)
+        
+        return query
+    
+    def _serialize_row(self, row) -> Dict[str, Any]:
+        """将查询结果行转换为可序列化的字典"""
+        item = {}
+        for name, value in strip_cursor_columns(row._mapping).items():
+            if isinstance(value, enum.Enum):
+                value = value.value
+            elif isinstance(value, datetime):
+                value = value.isoformat()
+            item[name] = value
+        return item
+    
+    def get_review_statistics(self, days: int = 30) -> Dict[str, Any]:
+        """
+        获取审查统计信息（仪表盘）
+        
+        通过一次分组查询计算评分分布、各数据库连接和各模型的平均分以及每日审查量，
+        结果按TTL缓存，保存审查报告时主动失效，仪表盘加载不随历史数据量增长
+        
+        Args:
+            days: 每日审查量统计的天数
+            
+        Returns:
+            统计信息
+        """
+        return statistics_cache.get_or_set(
+            ("review_statistics", days),
+            lambda: self._compute_review_statistics(days)
+        )
+    
+    def _compute_review_statistics(self, days: int) -> Dict[str, Any]:
+        """计算审查统计信息"""
+        score = ReviewReport.overall_score
+        bucket = score_bucket(score).label("bucket")
+        day = func.date(ReviewReport.created_at).label("day")
+        
+        rows = self.db.query(
+            DatabaseConnection.name.label("database_name"),
+            ReviewReport.llm_provider,
+            ReviewReport.llm_model,
+            ReviewReport.overall_status,
+            day,
+            bucket,
+            func.count(ReviewReport.id).label("count"),
+            func.count(score).label("scored"),
+            func.sum(score).label("score_sum")
+        ).select_from(ReviewReport).join(
+            SQLStatement, ReviewReport.sql_statement_id == SQLStatement.id
+        ).outerjoin(
+            DatabaseConnection, SQLStatement.db_connection_id == DatabaseConnection.id
+        ).filter(
+            SQLStatement.is_active == True
+        ).group_by(
+            DatabaseConnection.name,
+            ReviewReport.llm_provider,
+            ReviewReport.llm_model,
+            ReviewReport.overall_status,
+            day,
+            bucket
+        ).all()
+        
+        # 已归档报告的每日汇总（分组维度相同）
+        rollup_rows = self.db.query(
+            DatabaseConnection.name.label("database_name"),
+            ReviewRollup.llm_provider,
+            ReviewRollup.llm_model,
+            ReviewRollup.overall_status,
+            ReviewRollup.day.label("day"),
+            ReviewRollup.bucket.label("bucket"),
+            func.sum(ReviewRollup.report_count).label("count"),
+            func.sum(ReviewRollup.scored_count).label("scored"),
+            func.sum(ReviewRollup.score_sum).label("score_sum")
+        ).select_from(ReviewRollup).join(
+            SQLStatement, ReviewRollup.sql_statement_id == SQLStatement.id
+        ).outerjoin(
+            DatabaseConnection, SQLStatement.db_connection_id == DatabaseConnection.id
+        ).filter(
+            SQLStatement.is_active == True
+        ).group_by(
+            DatabaseConnection.name,
+            ReviewRollup.llm_provider,
+            ReviewRollup.llm_model,
+            ReviewRollup.overall_status,
+            ReviewRollup.day,
+            ReviewRollup.bucket
+        ).all()
+        
+        def new_group() -> Dict[str, float]:
+            return {"count": 0, "scored": 0, "score_sum": 0.0}
+        
+        def add(group: Dict[str, float], row):
+            group["count"] += row.count
+            group["scored"] += row.scored
+            group["score_sum"] += row.score_sum or 0.0
+        
+        def average(group: Dict[str, float]) -> Optional[float]:
+            return round(group["score_sum"] / group["scored"], 2) if group["scored"] else None
+        
+        overall = new_group()
+        histogram = [0] * 10
+        status_counts = {status.value: 0 for status in ReviewStatus}
+        by_connection: Dict[str, Dict[str, float]] = {}
+        by_llm: Dict[tuple, Dict[str, float]] = {}
+        by_day: Dict[str, Dict[str, float]] = {}
+        
+        for row in chain(rows, rollup_rows):
+            add(overall, row)
+            if row.scored:
+                histogram[row.bucket] += row.scored
+            if row.overall_status is not None:
+                status_counts[row.overall_status.value] += row.count
+            add(by_connection.setdefault(row.database_name or "未知", new_group()), row)
+            add(by_llm.setdefault((row.llm_provider, row.llm_model), new_group()), row)
+            if row.day is not None:
+                add(by_day.setdefault(str(row.day), new_group()), row)
+        
+        since = (date.today() - timedelta(days=days - 1)).isoformat()
+        
+        return {
+            "total_reviews": overall["count"],
+            "average_score": average(overall),
+            "status_distribution": status_counts,
+            "score_histogram": [
+                {"range": f"{i * 10}-{i * 10 + 9 if i < 9 else 100}", "count": histogram[i]}
+                for i in range(10)
+            ],
+            "by_connection": [
+                {"database_name": name, "count": group["count"], "average_score": average(group)}
+                for name, group in sorted(by_connection.items(), key=lambda item: -item[1]["count"])
+            ],
+            "by_llm": [
+                {"provider": provider, "model": model, "count": group["count"], "average_score": average(group)}
+                for (provider, model), group in sorted(by_llm.items(), key=lambda item: -item[1]["count"])
+            ],
+            "daily_volume": [
+                {"date": day_value, "count": group["count"], "average_score": average(group)}
+                for day_value, group in sorted(by_day.items())
+                if day_value >= since
+            ]
+        }
+    
+    def get_score_trend(self, sql_statement_id: Optional[int] = None, days: int = 30) -> List[Dict[str, Any]]:
+        """
+        获取每日评分趋势（合并在线报告和已归档报告的每日汇总）
+        
+        Args:
+            sql_statement_id: SQL语句ID，为None时统计全部有效语句
+            days: 统计最近的天数
+            
+        Returns:
+            按日期排序的 date、count、average_score、min_score、max_score 列表
+        """
+        since = date.today() - timedelta(days=days - 1)
+        score = ReviewReport.overall_score
+        day = func.date(ReviewReport.created_at)
+        live = self.db.query(
+            day.label("day"),
+            func.count(ReviewReport.id).label("count"),
+            func.count(score).label("scored"),
+            func.sum(score).label("score_sum"),
+            func.min(score).label("score_min"),
+            func.max(score).label("score_max")
+        ).join(
+            SQLStatement, ReviewReport.sql_statement_id == SQLStatement.id
+        ).filter(
+            SQLStatement.is_active == True,
+            ReviewReport.created_at >= datetime.combine(since, datetime.min.time())
+        )
+        archived = self.db.query(
+            ReviewRollup.day.label("day"),
+            func.sum(ReviewRollup.report_count).label("count"),
+            func.sum(ReviewRollup.scored_count).label("scored"),
+            func.sum(ReviewRollup.score_sum).label("score_sum"),
+            func.min(ReviewRollup.score_min).label("score_min"),
+            func.max(ReviewRollup.score_max).label("score_max")
+        ).join(
+            SQLStatement, ReviewRollup.sql_statement_id == SQLStatement.id
+        ).filter(
+            SQLStatement.is_active == True,
+            ReviewRollup.day >= since
+        )
+        if sql_statement_id is not None:
+            live = live.filter(ReviewReport.sql_statement_id == sql_statement_id)
+            archived = archived.filter(ReviewRollup.sql_statement_id == sql_statement_id)
+        
+        by_day: Dict[str, Dict[str, Any]] = {}
+        for row in chain(live.group_by(day).all(), archived.group_by(ReviewRollup.day).all()):
+            group = by_day.setdefault(str(row.day), {"count": 0, "scored": 0, "score_sum": 0.0, "min": None, "max": None})
+            group["count"] += row.count
+            group["scored"] += row.scored or 0
+            group["score_sum"] += row.score_sum or 0.0
+            if row.score_min is not None:
+                group["min"] = row.score_min if group["min"] is None else min(group["min"], row.score_min)
+            if row.score_max is not None:
+                group["max"] = row.score_max if group["max"] is None else max(group["max"], row.score_max)
+        
+        return [
+            {
+                "date": day_value,
+                "count": group["count"],
+                "average_score": round(group["score_sum"] / group["scored"], 2) if group["scored"] else None,
+                "min_score": group["min"],
+                "max_score": group["max"]
+            }
+            for day_value, group in sorted(by_day.items())
+        ]
+    
+    def get_sql_review_history(self, sql_statement_id: int, limit: Optional[int] = None) -> list:
+        """
+        获取SQL语句的审查历史（按时间倒序）
+        
+        Args:
+            sql_statement_id: SQL语句ID
+            limit: 最多返回的报告数，为None时返回全部在线报告（已归档的报告见归档文件和评分趋势）
+            
+        Returns:
+            审查报告列表
+        """
+        query = self.db.query(ReviewReport).filter(
             ReviewReport.sql_statement_id == sql_statement_id
-        ).order_by(ReviewReport.created_at.desc()).all() 
\ No newline at end of file
+        ).order_by(ReviewReport.created_at.desc(), ReviewReport.id.desc())
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+    
+    def analyze_sql_statements(self, sql_statement_ids: List[int]) -> List[Dict[str, Any]]:
+        """
+        审查前批量分析SQL语句（并行解析表名、类型和指纹）
+        
+        Args:
+            sql_statement_ids: SQL语句ID列表（只分析其中有效的语句）
+            
+        Returns:
+            分析结果列表
+        """
+        rows = self.db.query(
+            SQLStatement.id, SQLStatement.sql_content, DatabaseConnection.db_type
+        ).outerjoin(
+            DatabaseConnection, SQLStatement.db_connection_id == DatabaseConnection.id
+        ).filter(
+            SQLStatement.is_active == True,
+            SQLStatement.id.in_(sql_statement_ids)
+        ).order_by(SQLStatement.id).all()
+        analyses = ParallelSQLParser().parse_many(
+            [row.sql_content for row in rows],
+            [row.db_type for row in rows]
+        )
+        
+        results = []
+        for row, analysis in zip(rows, analyses):
+            results.append({
+                "sql_statement_id": row.id,
+                "sql_type": analysis["sql_type"],
+                "tables": analysis["tables"],
+                "views": analysis["views"],
+                "fingerprint": analysis["fingerprint"],
+                "reviewable": bool(analysis["tables"] or analysis["views"])
+            })
+        
+        return results
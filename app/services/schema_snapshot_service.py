@@ -0,0 +1,381 @@
+"""模式快照存储服务 - 在应用库中按版本保存目标库的表、视图、注释、列和索引
+
+模式浏览和审查时的DDL生成都读取这里的快照，不再每次查询目标库的系统目录
+"""
+
+import hashlib
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import create_engine, func, insert, update
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.core.schema_extractor import SchemaExtractor, object_key
+from app.models.db_connection import DatabaseConnection
+from app.models.review_queue import ReviewQueueItem
+from app.models.schema_snapshot import SchemaSnapshot, SchemaSnapshotObject
+from app.utils.cache import count_cache
+from app.utils.database_utils import DatabaseUtils
+from app.utils.pagination import paginate_keyset
+
+logger = logging.getLogger(__name__)
+
+# 按对象名批量查询时每批的数量
+_NAME_BATCH = 500
+# 计入对象签名的字段（对象名和类型单独比较）
+_SIGNATURE_FIELDS = ("comment", "columns", "indexes", "primary_key", "foreign_keys")
+# 除列和索引外，变化时单独列出的字段
+_ATTRIBUTE_FIELDS = ("comment", "primary_key", "foreign_keys")
+# 对象名过滤方式
+MATCH_MODES = ("prefix", "contains")
+
+
+def _signature(entry: Dict[str, Any]) -> str:
+    payload = json.dumps({field: entry.get(field) for field in _SIGNATURE_FIELDS}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _checksum(objects: Dict[str, Dict[str, Any]]) -> str:
+    return hashlib.sha256("\n".join(
+        f"{key}:{objects[key]['type']}:{objects[key]['signature']}" for key in sorted(objects)
+    ).encode("utf-8")).hexdigest()
+
+
+def _diff_named(old: List[Dict[str, Any]], new: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+    old_by_name = {item["name"]: item for item in old}
+    new_by_name = {item["name"]: item for item in new}
+    return {
+        "added": sorted(name for name in new_by_name if name not in old_by_name),
+        "removed": sorted(name for name in old_by_name if name not in new_by_name),
+        "modified": sorted(
+            name for name in new_by_name
+            if name in old_by_name and new_by_name[name] != old_by_name[name]
+        ),
+    }
+
+
+def diff_schema(old: Dict[str, Dict[str, Any]], new: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    比较两个模式快照
+
+    Args:
+        old: 旧快照（object_key -> 对象）
+        new: 新快照
+
+    Returns:
+        added/removed：新增和删除的对象；
+        changed：对象 -> 列和索引的增删改，以及注释、主键、外键中发生变化的项（attributes）
+    """
+    changed = {}
+    for key in sorted(old.keys() & new.keys()):
+        before, after = old[key], new[key]
+        if before["signature"] == after["signature"] and before["type"] == after["type"]:
+            continue
+        changed[after["name"]] = {
+            "columns": _diff_named(before["columns"], after["columns"]),
+            "indexes": _diff_named(before["indexes"], after["indexes"]),
+            "attributes": [field for field in _ATTRIBUTE_FIELDS if before.get(field) != after.get(field)],
+        }
+    return {
+        "added": sorted(new[key]["name"] for key in new.keys() - old.keys()),
+        "removed": sorted(old[key]["name"] for key in old.keys() - new.keys()),
+        "changed": changed,
+    }
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # SQLite返回不带时区的UTC时间，其他数据库可能带时区
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class SchemaSnapshotService:
+    """模式快照存储服务"""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.settings = get_settings()
+        self.database_utils = DatabaseUtils()
+
+    # ---------- 读取 ----------
+
+    def latest_snapshot(self, connection_id: int) -> Optional[SchemaSnapshot]:
+        return self.db.query(SchemaSnapshot).filter(
+            SchemaSnapshot.db_connection_id == connection_id
+        ).order_by(SchemaSnapshot.version.desc()).first()
+
+    def is_fresh(self, snapshot: Optional[SchemaSnapshot]) -> bool:
+        """快照是否在schema_snapshot_max_age内检查过（0表示不过期）"""
+        if snapshot is None:
+            return False
+        max_age = self.settings.schema_snapshot_max_age
+        if max_age <= 0:
+            return True
+        checked_at = _as_utc(snapshot.checked_at or snapshot.created_at)
+        return checked_at is not None and (datetime.utcnow() - checked_at).total_seconds() <= max_age
+
+    @staticmethod
+    def _row_to_entry(row: SchemaSnapshotObject) -> Dict[str, Any]:
+        return {
+            "name": row.object_name,
+            "type": row.object_type,
+            "comment": row.comment,
+            "columns": json.loads(row.columns or "[]"),
+            "indexes": json.loads(row.indexes or "[]"),
+            "primary_key": json.loads(row.primary_key or "[]"),
+            "foreign_keys": json.loads(row.foreign_keys or "[]"),
+            "signature": row.signature,
+        }
+
+    def load_snapshot(self, snapshot_id: int, names: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        读取已保存的快照
+
+        Args:
+            snapshot_id: 快照ID
+            names: 只读取这些对象（不区分大小写，可带模式前缀），为None时读取全部
+
+        Returns:
+            object_key -> 对象
+        """
+        query = self.db.query(SchemaSnapshotObject).filter(SchemaSnapshotObject.snapshot_id == snapshot_id)
+        if names is None:
+            rows = query.all()
+        else:
+            keys = sorted({object_key(name) for name in names})
+            rows = []
+            for start in range(0, len(keys), _NAME_BATCH):
+                rows.extend(query.filter(SchemaSnapshotObject.object_key.in_(keys[start:start + _NAME_BATCH])).all())
+        return {row.object_key or object_key(row.object_name): self._row_to_entry(row) for row in rows}
+
+    def get_schema_objects(self, connection_id: int, names: Iterable[str]) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        审查时生成DDL所需的对象（供SchemaExtractor使用）
+
+        Returns:
+            object_key -> 对象；没有快照或快照已过期时返回None，由调用方直接读取目标库
+        """
+        snapshot = self.latest_snapshot(connection_id)
+        if not self.is_fresh(snapshot):
+            return None
+        return self.load_snapshot(snapshot.id, names)
+
+    def get_object(self, connection_id: int, name: str, object_type: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """读取最新快照中的一个表或视图，不存在时返回None"""
+        snapshot = self.latest_snapshot(connection_id)
+        if snapshot is None:
+            return None
+        entry = self.load_snapshot(snapshot.id, [name]).get(object_key(name))
+        if entry is None or (object_type and entry["type"] != object_type):
+            return None
+        entry.pop("signature")
+        entry["snapshot_version"] = snapshot.version
+        entry["checked_at"] = snapshot.checked_at
+        return entry
+
+    def page_objects(
+        self,
+        snapshot_id: int,
+        object_type: Optional[str] = None,
+        search: Optional[str] = None,
+        match: str = "prefix",
+        page: int = 1,
+        page_size: int = 100,
+        cursor: Optional[str] = None,
+        with_total: bool = True
+    ) -> Dict[str, Any]:
+        """
+        分页列出快照中的对象（名称、类型、注释，不含列定义）
+
+        按规范名排序，前缀过滤可以使用 (snapshot_id, object_key) 索引；传入cursor时使用键集分页（忽略page）。
+        快照不可变，总数和各类型数量按快照缓存
+
+        Args:
+            snapshot_id: 快照ID
+            object_type: 只列出table或view
+            search: 对象名过滤（不区分大小写）
+            match: prefix前缀匹配，contains包含匹配
+            page: 页码
+            page_size: 每页数量
+            cursor: 上一页返回的next_cursor
+            with_total: 是否返回总数
+
+        Returns:
+            包含 items、page、page_size、pages、total、next_cursor、counts 的字典，参数无效时包含error
+        """
+        if match not in MATCH_MODES:
+            return {"error": f"不支持的匹配方式: {match}，可选: {', '.join(MATCH_MODES)}"}
+
+        query = self.db.query(
+            SchemaSnapshotObject.object_name, SchemaSnapshotObject.object_type, SchemaSnapshotObject.comment
+        ).filter(SchemaSnapshotObject.snapshot_id == snapshot_id)
+        if object_type:
+            query = query.filter(SchemaSnapshotObject.object_type == object_type)
+        search = (search or "").strip().lower()
+        if search:
+            escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            pattern = f"{escaped}%" if match == "prefix" else f"%{escaped}%"
+            query = query.filter(SchemaSnapshotObject.object_key.like(pattern, escape="\\"))
+
+        total = None
+        if with_total:
+            total = count_cache.get_or_set(("schema_objects", snapshot_id, object_type, search, match), query.count)
+        counts = count_cache.get_or_set(("schema_objects", snapshot_id), lambda: dict(
+            self.db.query(SchemaSnapshotObject.object_type, func.count(SchemaSnapshotObject.id)).filter(
+                SchemaSnapshotObject.snapshot_id == snapshot_id
+            ).group_by(SchemaSnapshotObject.object_type).all()
+        ))
+
+        try:
+            rows, next_cursor = paginate_keyset(
+                query,
+                SchemaSnapshotObject.object_key,
+                SchemaSnapshotObject.id,
+                descending=False,
+                page_size=page_size,
+                cursor=cursor,
+                offset=None if cursor else (page - 1) * page_size
+            )
+        except ValueError as e:
+            return {"error": str(e)}
+
+        return {
+            "items": [{"name": row[0], "type": row[1], "comment": row[2] or ""} for row in rows],
+            "page": None if cursor else page,
+            "page_size": page_size,
+            "pages": (total + page_size - 1) // page_size if total is not None else None,
+            "total": total,
+            "next_cursor": next_cursor,
+            "counts": {"table": counts.get("table", 0), "view": counts.get("view", 0)}
+        }
+
+    def list_snapshots(self, connection_id: int) -> List[Dict[str, Any]]:
+        """列出连接的模式快照版本（最新的在前）"""
+        snapshots = self.db.query(SchemaSnapshot).filter(
+            SchemaSnapshot.db_connection_id == connection_id
+        ).order_by(SchemaSnapshot.version.desc()).all()
+        return [
+            {
+                "id": snapshot.id,
+                "version": snapshot.version,
+                "object_count": snapshot.object_count,
+                "changed_count": snapshot.changed_count,
+                "created_at": snapshot.created_at,
+                "checked_at": snapshot.checked_at,
+            }
+            for snapshot in snapshots
+        ]
+
+    def compare_snapshots(self, connection_id: int, from_version: int, to_version: int) -> Dict[str, Any]:
+        """比较连接的两个快照版本，版本不存在时返回error"""
+        snapshots = {
+            snapshot.version: snapshot
+            for snapshot in self.db.query(SchemaSnapshot).filter(
+                SchemaSnapshot.db_connection_id == connection_id,
+                SchemaSnapshot.version.in_([from_version, to_version])
+            )
+        }
+        if from_version not in snapshots or to_version not in snapshots:
+            return {"error": "模式快照版本不存在"}
+        changes = diff_schema(
+            self.load_snapshot(snapshots[from_version].id), self.load_snapshot(snapshots[to_version].id)
+        )
+        return {"from_version": from_version, "to_version": to_version, **changes}
+
+    # ---------- 刷新 ----------
+
+    def refresh(self, db_connection: DatabaseConnection) -> Dict[str, Any]:
+        """
+        读取目标库当前模式并与最新快照比较，变化时保存新版本（不提交）
+
+        Args:
+            db_connection: 数据库连接
+
+        Returns:
+            snapshot：当前快照；created：是否保存了新版本；changes：diff_schema结果（首次和未变化时为None）；
+            读取模式失败时返回error
+        """
+        try:
+            engine = create_engine(self.database_utils.build_connection_string(db_connection))
+            try:
+                objects = SchemaExtractor(engine, db_connection.db_type).capture_catalog()
+            finally:
+                engine.dispose()
+        except Exception as e:
+            logger.error(f"读取数据库连接{db_connection.id}的模式失败: {e}")
+            return {"error": f"读取数据库模式失败: {str(e)}"}
+
+        for entry in objects.values():
+            entry["signature"] = _signature(entry)
+        checksum = _checksum(objects)
+
+        previous = self.latest_snapshot(db_connection.id)
+        if previous is not None and previous.checksum == checksum:
+            previous.checked_at = datetime.utcnow()
+            self.db.flush()
+            return {"snapshot": previous, "created": False, "changes": None, "object_count": len(objects)}
+
+        changes = None
+        changed_count = 0
+        if previous is not None:
+            changes = diff_schema(self.load_snapshot(previous.id), objects)
+            changed_count = len(changes["added"]) + len(changes["removed"]) + len(changes["changed"])
+        snapshot = self._save_snapshot(db_connection.id, objects, checksum, previous, changed_count)
+        return {"snapshot": snapshot, "created": True, "changes": changes, "object_count": len(objects)}
+
+    def _save_snapshot(
+        self,
+        connection_id: int,
+        objects: Dict[str, Dict[str, Any]],
+        checksum: str,
+        previous: Optional[SchemaSnapshot],
+        changed_count: int
+    ) -> SchemaSnapshot:
+        snapshot = SchemaSnapshot(
+            db_connection_id=connection_id,
+            version=(previous.version + 1) if previous else 1,
+            checksum=checksum,
+            object_count=len(objects),
+            changed_count=changed_count,
+        )
+        self.db.add(snapshot)
+        self.db.flush()
+        rows = [
+            {
+                "snapshot_id": snapshot.id,
+                "object_name": entry["name"],
+                "object_key": key,
+                "object_type": entry["type"],
+                "comment": entry["comment"],
+                "columns": json.dumps(entry["columns"], ensure_ascii=False),
+                "indexes": json.dumps(entry["indexes"], ensure_ascii=False),
+                "primary_key": json.dumps(entry["primary_key"], ensure_ascii=False),
+                "foreign_keys": json.dumps(entry["foreign_keys"], ensure_ascii=False),
+                "signature": entry["signature"],
+            }
+            for key, entry in objects.items()
+        ]
+        if rows:
+            self.db.execute(insert(SchemaSnapshotObject), rows)
+        self._prune_snapshots(connection_id)
+        return snapshot
+
+    def _prune_snapshots(self, connection_id: int):
+        """只保留最近的若干个快照版本"""
+        keep = max(self.settings.schema_snapshot_keep, 2)
+        stale = [
+            row.id for row in self.db.query(SchemaSnapshot.id).filter(
+                SchemaSnapshot.db_connection_id == connection_id
+            ).order_by(SchemaSnapshot.version.desc()).offset(keep)
+        ]
+        if not stale:
+            return
+        self.db.execute(
+            update(ReviewQueueItem).where(ReviewQueueItem.schema_snapshot_id.in_(stale)).values(schema_snapshot_id=None)
+        )
+        self.db.query(SchemaSnapshotObject).filter(SchemaSnapshotObject.snapshot_id.in_(stale)).delete(synchronize_session=False)
+        self.db.query(SchemaSnapshot).filter(SchemaSnapshot.id.in_(stale)).delete(synchronize_session=False)
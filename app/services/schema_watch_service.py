@@ -0,0 +1,326 @@
+"""模式变化监测服务 - 定期为目标库生成模式快照，变化时将受影响的SQL语句加入复审队列"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+import anyio
+from sqlalchemy import or_, insert, update
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.core.parallel_parser import ParallelSQLParser
+from app.core.schema_extractor import object_key
+from app.models.database import SessionLocal
+from app.models.db_connection import DatabaseConnection
+from app.models.review_queue import ReviewQueueItem, QUEUE_PENDING, QUEUE_RUNNING, QUEUE_DONE, QUEUE_FAILED
+from app.models.sql_statement import SQLStatement, SQLStatementTable
+from app.services.schema_snapshot_service import SchemaSnapshotService
+from app.utils.concurrency import get_external_limiter
+
+logger = logging.getLogger(__name__)
+
+# 按表名批量查询时每批的数量
+_NAME_BATCH = 500
+# 入队原因中最多列出的对象数
+_REASON_MAX_OBJECTS = 10
+# 注释和约束变化在入队原因中的名称
+_ATTRIBUTE_LABELS = {"comment": "注释", "primary_key": "主键", "foreign_keys": "外键"}
+
+
+def _describe_changes(changes: Dict[str, Any], names: Iterable[str]) -> str:
+    """生成入队原因，如 orders(列 +email ~status; 索引 -ix_orders_date; 主键)"""
+    parts = []
+    for name in sorted(names):
+        if name in changes["added"]:
+            parts.append(f"{name}(新增)")
+        elif name in changes["removed"]:
+            parts.append(f"{name}(删除)")
+        else:
+            details = []
+            for label, key in (("列", "columns"), ("索引", "indexes")):
+                diff = changes["changed"][name][key]
+                items = [f"+{item}" for item in diff["added"]] + [f"-{item}" for item in diff["removed"]] + \
+                    [f"~{item}" for item in diff["modified"]]
+                if items:
+                    details.append(f"{label} {' '.join(items)}")
+            details.extend(_ATTRIBUTE_LABELS[field] for field in changes["changed"][name]["attributes"])
+            parts.append(f"{name}({'; '.join(details)})")
+    if len(parts) > _REASON_MAX_OBJECTS:
+        parts = parts[:_REASON_MAX_OBJECTS] + [f"等{len(parts)}个对象"]
+    return "模式变化: " + ", ".join(parts)
+
+
+class SchemaWatchService:
+    """模式变化监测服务"""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.settings = get_settings()
+        self.snapshot_service = SchemaSnapshotService(db)
+
+    # ---------- 检查 ----------
+
+    def check_connection(self, connection_id: int) -> Dict[str, Any]:
+        """
+        检查连接的模式是否变化
+
+        首次检查只保存基线快照；之后与最新快照比较，变化时保存新版本，
+        并把引用了变化对象且审查过的语句加入复审队列
+
+        Args:
+            connection_id: 数据库连接ID
+
+        Returns:
+            检查结果（版本、变化的对象、入队的语句数），连接不存在或读取模式失败时返回error
+        """
+        db_connection = self.db.query(DatabaseConnection).filter(
+            DatabaseConnection.id == connection_id,
+            DatabaseConnection.is_active == True
+        ).first()
+        if not db_connection:
+            return {"error": "数据库连接不存在"}
+
+        refreshed = self.snapshot_service.refresh(db_connection)
+        if "error" in refreshed:
+            return refreshed
+        self.refresh_table_refs(connection_id)
+
+        snapshot, changes = refreshed["snapshot"], refreshed["changes"]
+        result: Dict[str, Any] = {
+            "connection_id": connection_id,
+            "version": snapshot.version,
+            "object_count": refreshed["object_count"],
+            "changed": False,
+            "added": [],
+            "removed": [],
+            "changed_objects": {},
+            "enqueued": 0,
+        }
+        if changes is None:
+            # 首次检查只保存基线，或者模式未变化
+            self.db.commit()
+            if refreshed["created"]:
+                result["baseline"] = True
+            return result
+
+        changed_names = set(changes["added"]) | set(changes["removed"]) | set(changes["changed"])
+        enqueued = self._enqueue_affected(connection_id, snapshot.id, changes, changed_names)
+        self.db.commit()
+
+        logger.info(f"数据库连接{connection_id}的模式变化{len(changed_names)}个对象，{enqueued}条语句加入复审队列")
+        result.update(
+            changed=True,
+            added=changes["added"],
+            removed=changes["removed"],
+            changed_objects=changes["changed"],
+            enqueued=enqueued,
+        )
+        return result
+
+    def refresh_table_refs(self, connection_id: int) -> int:
+        """
+        重新解析表引用已过期（语句版本变化或从未解析）的语句
+
+        Returns:
+            重新解析的语句数
+        """
+        statements = self.db.query(
+            SQLStatement.id, SQLStatement.sql_content, SQLStatement.version
+        ).filter(
+            SQLStatement.db_connection_id == connection_id,
+            SQLStatement.is_active == True,
+            or_(SQLStatement.table_refs_version.is_(None), SQLStatement.table_refs_version != SQLStatement.version)
+        ).all()
+        if not statements:
+            return 0
+
+        db_type = self.db.query(DatabaseConnection.db_type).filter(DatabaseConnection.id == connection_id).scalar()
+        analyses = ParallelSQLParser().parse_many(
+            [statement.sql_content for statement in statements], [db_type] * len(statements)
+        )
+        ids = [statement.id for statement in statements]
+        for start in range(0, len(ids), _NAME_BATCH):
+            self.db.query(SQLStatementTable).filter(
+                SQLStatementTable.sql_statement_id.in_(ids[start:start + _NAME_BATCH])
+            ).delete(synchronize_session=False)
+        rows = [
+            {"sql_statement_id": statement.id, "table_name": name}
+            for statement, analysis in zip(statements, analyses)
+            for name in sorted({object_key(ref) for ref in analysis["tables"] + analysis["views"]})
+        ]
+        if rows:
+            self.db.execute(insert(SQLStatementTable), rows)
+        for statement in statements:
+            self.db.execute(
+                update(SQLStatement).where(SQLStatement.id == statement.id).values(table_refs_version=statement.version)
+            )
+        self.db.flush()
+        return len(statements)
+
+    def _enqueue_affected(self, connection_id: int, snapshot_id: int, changes: Dict[str, Any], changed_names: set) -> int:
+        """把引用了变化对象、且审查过的语句加入复审队列（已在队列中等待的语句只更新原因）"""
+        refs: Dict[int, set] = {}
+        keys = {object_key(name): name for name in changed_names}
+        key_list = list(keys)
+        for start in range(0, len(key_list), _NAME_BATCH):
+            rows = self.db.query(SQLStatementTable.sql_statement_id, SQLStatementTable.table_name).join(
+                SQLStatement, SQLStatementTable.sql_statement_id == SQLStatement.id
+            ).filter(
+                SQLStatement.db_connection_id == connection_id,
+                SQLStatement.is_active == True,
+                SQLStatement.last_reviewed_at.isnot(None),
+                SQLStatementTable.table_name.in_(key_list[start:start + _NAME_BATCH])
+            ).all()
+            for statement_id, table_name in rows:
+                refs.setdefault(statement_id, set()).add(keys[table_name])
+        if not refs:
+            return 0
+
+        pending = {
+            item.sql_statement_id: item
+            for item in self.db.query(ReviewQueueItem).filter(
+                ReviewQueueItem.status == QUEUE_PENDING,
+                ReviewQueueItem.sql_statement_id.in_(list(refs))
+            )
+        }
+        for statement_id, names in refs.items():
+            reason = _describe_changes(changes, names)
+            item = pending.get(statement_id)
+            if item is None:
+                self.db.add(ReviewQueueItem(
+                    sql_statement_id=statement_id, reason=reason, schema_snapshot_id=snapshot_id, status=QUEUE_PENDING
+                ))
+            else:
+                item.reason = reason
+                item.schema_snapshot_id = snapshot_id
+        return len(refs)
+
+    # ---------- 复审队列 ----------
+
+    def list_queue(self, status: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """列出复审队列（最新的在前）"""
+        query = self.db.query(ReviewQueueItem, SQLStatement.title).join(
+            SQLStatement, ReviewQueueItem.sql_statement_id == SQLStatement.id
+        )
+        if status:
+            query = query.filter(ReviewQueueItem.status == status)
+        return [
+            {
+                "id": item.id,
+                "sql_statement_id": item.sql_statement_id,
+                "sql_title": title,
+                "reason": item.reason,
+                "status": item.status,
+                "report_id": item.report_id,
+                "error": item.error,
+                "created_at": item.created_at,
+                "started_at": item.started_at,
+                "finished_at": item.finished_at,
+            }
+            for item, title in query.order_by(ReviewQueueItem.id.desc()).limit(limit).all()
+        ]
+
+    def process_queue(self, limit: Optional[int] = None) -> Dict[str, int]:
+        """
+        依次复审队列中等待的语句（强制完整审查，模式变化不会改变SQL指纹）
+
+        Args:
+            limit: 本次最多处理的数量，默认review_queue_batch_size
+
+        Returns:
+            完成和失败的数量
+        """
+        # 避免循环导入：审查服务依赖的模块较多
+        from app.services.review_service import ReviewService
+
+        limit = limit or self.settings.review_queue_batch_size
+        self._requeue_stale_items()
+        item_ids = [row.id for row in self.db.query(ReviewQueueItem.id).filter(
+            ReviewQueueItem.status == QUEUE_PENDING
+        ).order_by(ReviewQueueItem.id).limit(limit)]
+        summary = {"done": 0, "failed": 0}
+        for item_id in item_ids:
+            # 条件更新认领：后台任务和接口同时处理队列时，同一项只由一方复审
+            claimed = self.db.execute(
+                update(ReviewQueueItem.__table__).where(
+                    ReviewQueueItem.id == item_id, ReviewQueueItem.status == QUEUE_PENDING
+                ).values(status=QUEUE_RUNNING, started_at=datetime.utcnow())
+            ).rowcount
+            self.db.commit()
+            if not claimed:
+                continue
+            item = self.db.get(ReviewQueueItem, item_id)
+
+            try:
+                result = ReviewService(self.db).review_sql_statement(item.sql_statement_id, force=True)
+            except Exception as e:
+                # 异常时回滚审查中未提交的修改，标记失败后继续处理后续项
+                self.db.rollback()
+                logger.exception(f"复审队列项{item_id}失败")
+                item = self.db.get(ReviewQueueItem, item_id)
+                result = {"error": str(e) or type(e).__name__}
+            item.finished_at = datetime.utcnow()
+            if "error" in result:
+                item.status = QUEUE_FAILED
+                item.error = result["error"]
+                summary["failed"] += 1
+            else:
+                item.status = QUEUE_DONE
+                item.report_id = result.get("report_id")
+                summary["done"] += 1
+            self.db.commit()
+        return summary
+
+
+    def _requeue_stale_items(self) -> int:
+        """把复审超时未完成的项（处理过程中进程退出）重新排队"""
+        timeout = self.settings.review_queue_stale_timeout
+        if timeout <= 0:
+            return 0
+        requeued = self.db.execute(
+            update(ReviewQueueItem.__table__).where(
+                ReviewQueueItem.status == QUEUE_RUNNING,
+                ReviewQueueItem.started_at < datetime.utcnow() - timedelta(seconds=timeout)
+            ).values(status=QUEUE_PENDING, started_at=None)
+        ).rowcount
+        self.db.commit()
+        if requeued:
+            logger.warning(f"{requeued}个复审超过{timeout}秒未完成，已重新排队")
+        return requeued
+
+
+def run_schema_watch() -> Dict[str, Any]:
+    """后台任务执行一次：检查全部有效连接的模式，然后处理复审队列"""
+    db = SessionLocal()
+    try:
+        service = SchemaWatchService(db)
+        connection_ids = [row.id for row in db.query(DatabaseConnection.id).filter(DatabaseConnection.is_active == True)]
+        checked = {}
+        for connection_id in connection_ids:
+            try:
+                checked[connection_id] = service.check_connection(connection_id)
+            except Exception as e:
+                db.rollback()
+                logger.error(f"检查数据库连接{connection_id}的模式失败: {e}")
+        return {"checked": checked, "queue": service.process_queue()}
+    finally:
+        db.close()
+
+
+async def schema_watch_loop(interval: float):
+    """
+    后台定期检查目标库模式变化并复审受影响的语句
+
+    在外部调用限流器下执行，与接口中的目标库和LLM调用共享并发上限
+
+    Args:
+        interval: 执行间隔（秒）
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await anyio.to_thread.run_sync(run_schema_watch, limiter=get_external_limiter())
+        except Exception as e:
+            logger.error(f"模式变化检查失败: {e}")
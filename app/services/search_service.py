@@ -0,0 +1,336 @@
+"""全文检索服务"""
+
+import html
+import re
+from typing import Dict, Any, List, Optional
+
+from sqlalchemy import Integer, and_, column, or_, text
+from sqlalchemy.orm import Session
+
+from app.models.fulltext import (
+    FULLTEXT_TABLES,
+    SQLITE_TRIGRAM,
+    SQLITE_TRIGRAM_MIN_LENGTH,
+    fulltext_available,
+    postgresql_document,
+    sqlite_fulltext_values,
+)
+from app.models.review_report import ReviewReport
+from app.models.review_text import COMPRESSED_TEXT_FIELDS, hydrate_text_fields, text_id_column
+from app.models.sql_statement import SQLStatement, SQLStatementStatus
+
+# 数据库生成摘要时使用的高亮标记，转义HTML后再替换为<mark>，避免摘要中的内容被当作HTML
+_MARK_OPEN = "\x02"
+_MARK_CLOSE = "\x03"
+# 摘要长度（SQLite为词元数，回退方案为字符数）
+_SNIPPET_TOKENS = 32
+_SNIPPET_CHARS = 120
+
+
+def _render_snippet(snippet: Optional[str]) -> str:
+    """转义摘要并把高亮标记替换为<mark>标签"""
+    if not snippet:
+        return ""
+    return html.escape(snippet).replace(_MARK_OPEN, "<mark>").replace(_MARK_CLOSE, "</mark>")
+
+
+def _make_snippet(texts: List[Optional[str]], terms: List[str]) -> str:
+    """在Python中生成摘要（用于没有数据库摘要函数的情况）"""
+    pattern = re.compile("|".join(re.escape(term) for term in terms), re.IGNORECASE) if terms else None
+    for value in texts:
+        if not value:
+            continue
+        match = pattern.search(value) if pattern else None
+        if match is None:
+            continue
+        start = max(0, match.start() - _SNIPPET_CHARS // 4)
+        end = min(len(value), start + _SNIPPET_CHARS)
+        window = value[start:end]
+        marked = pattern.sub(lambda m: f"{_MARK_OPEN}{m.group()}{_MARK_CLOSE}", window)
+        return _render_snippet(("…" if start > 0 else "") + marked + ("…" if end < len(value) else ""))
+    first = next((value for value in texts if value), "")
+    return _render_snippet(first[:_SNIPPET_CHARS])
+
+
+def _status_value(status) -> Optional[str]:
+    """原生SQL返回的是枚举名称，转换为枚举值"""
+    if status is None:
+        return None
+    if isinstance(status, SQLStatementStatus):
+        return status.value
+    try:
+        return SQLStatementStatus[status].value
+    except KeyError:
+        return status
+
+
+class SearchService:
+    """
+    全文检索服务
+
+    SQLite使用FTS5（bm25排序、snippet摘要），PostgreSQL使用tsvector/GIN，
+    MySQL使用FULLTEXT索引；全文索引不可用或查询词过短时回退到LIKE匹配
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.dialect = db.get_bind().dialect.name
+
+    def search(self, query: str, scope: str = "all", limit: int = 20, offset: int = 0) -> Dict[str, Any]:
+        """
+        检索SQL语句和审查报告
+
+        Args:
+            query: 检索词，多个词以空格分隔（需同时匹配）
+            scope: all、statements 或 reports
+            limit: 每类结果的最大数量
+            offset: 每类结果的偏移量
+
+        Returns:
+            包含 statements、reports 的字典，结果按相关度排序，snippet中匹配部分以<mark>标记
+        """
+        result: Dict[str, Any] = {"query": query}
+        if scope in ("all", "statements"):
+            result["statements"] = self.search_statements(query, limit, offset)
+        if scope in ("all", "reports"):
+            result["reports"] = self.search_reports(query, limit, offset)
+        return result
+
+    def search_statements(self, query: str, limit: int = 20, offset: int = 0) -> List[Dict[str, Any]]:
+        """检索有效的SQL语句"""
+        terms = self._terms(query)
+        if not terms:
+            return []
+
+        mode = self._mode("sql_statements", terms)
+        if mode == "sqlite":
+            fts = FULLTEXT_TABLES["sql_statements"]["fts_table"]
+            rows = self.db.execute(text(
+                f"SELECT s.id, s.title, s.status, s.db_connection_id, "
+                f"snippet({fts}, -1, :mark_open, :mark_close, '…', {_SNIPPET_TOKENS}) AS snippet, "
+                f"bm25({fts}, {self._weights('sql_statements')}) AS rank "
+                f"FROM {fts} JOIN sql_statements s ON s.id = {fts}.rowid "
+                f"WHERE {fts} MATCH :match AND s.is_active = 1 "
+                f"ORDER BY rank LIMIT :limit OFFSET :offset"
+            ), self._sqlite_params(terms, limit, offset)).all()
+            return [self._statement_item(row, _render_snippet(row.snippet), -row.rank) for row in rows]
+
+        if mode == "postgresql":
+            document = postgresql_document("sql_statements", "s")
+            rows = self.db.execute(text(
+                f"SELECT s.id, s.title, s.status, s.db_connection_id, "
+                f"ts_headline('simple', concat_ws(' ', s.title, s.description, s.sql_content), q, :headline) AS snippet, "
+                f"ts_rank({document}, q) AS rank "
+                f"FROM sql_statements s, plainto_tsquery('simple', :query) q "
+                f"WHERE {document} @@ q AND s.is_active = true "
+                f"ORDER BY rank DESC LIMIT :limit OFFSET :offset"
+            ), self._postgresql_params(terms, limit, offset)).all()
+            return [self._statement_item(row, _render_snippet(row.snippet), row.rank) for row in rows]
+
+        if mode == "mysql":
+            rows = self.db.execute(text(
+                "SELECT id, title, status, db_connection_id, description, sql_content, "
+                "MATCH(title, description, sql_content) AGAINST (:query IN BOOLEAN MODE) AS rank_score "
+                "FROM sql_statements "
+                "WHERE MATCH(title, description, sql_content) AGAINST (:query IN BOOLEAN MODE) AND is_active = 1 "
+                "ORDER BY rank_score DESC LIMIT :limit OFFSET :offset"
+            ), {"query": self._mysql_query(terms), "limit": limit, "offset": offset}).all()
+            return [
+                self._statement_item(row, _make_snippet([row.title, row.description, row.sql_content], terms), row.rank_score)
+                for row in rows
+            ]
+
+        statements = self.db.query(SQLStatement).filter(
+            SQLStatement.is_active == True,
+            *[self._like_any(term, [SQLStatement.title, SQLStatement.description, SQLStatement.sql_content]) for term in terms]
+        ).order_by(SQLStatement.id.desc()).offset(offset).limit(limit).all()
+        return [
+            {
+                "id": statement.id,
+                "title": statement.title,
+                "status": statement.status.value if statement.status else None,
+                "db_connection_id": statement.db_connection_id,
+                "snippet": _make_snippet([statement.title, statement.description, statement.sql_content], terms),
+                "score": None
+            }
+            for statement in statements
+        ]
+
+    def search_reports(self, query: str, limit: int = 20, offset: int = 0) -> List[Dict[str, Any]]:
+        """检索有效SQL语句的审查报告"""
+        terms = self._terms(query)
+        if not terms:
+            return []
+
+        columns = FULLTEXT_TABLES["review_reports"]["columns"]
+        mode = self._mode("review_reports", terms)
+        if mode == "sqlite":
+            # contentless索引不保存原文，无法使用snippet()，读取原文后在Python中生成摘要
+            fts = FULLTEXT_TABLES["review_reports"]["fts_table"]
+            rows = self.db.execute(text(
+                f"SELECT r.id, r.sql_statement_id, s.title AS sql_title, r.overall_score, r.created_at, "
+                f"bm25({fts}, {self._weights('review_reports')}) AS rank "
+                f"FROM {fts} JOIN review_reports r ON r.id = {fts}.rowid "
+                f"JOIN sql_statements s ON s.id = r.sql_statement_id "
+                f"WHERE {fts} MATCH :match AND s.is_active = 1 "
+                f"ORDER BY rank LIMIT :limit OFFSET :offset"
+            ), {"match": self._sqlite_match(terms), "limit": limit, "offset": offset}).all()
+            texts = {
+                item["id"]: item
+                for item in sqlite_fulltext_values(self.db.connection(), "review_reports", [row.id for row in rows])
+            }
+            return [
+                self._report_item(row, _make_snippet([texts.get(row.id, {}).get(name) for name in columns], terms), -row.rank)
+                for row in rows
+            ]
+
+        if mode == "postgresql":
+            document = postgresql_document("review_reports", "r")
+            concat = ", ".join(f"r.{name}" for name in columns)
+            rows = self.db.execute(text(
+                f"SELECT r.id, r.sql_statement_id, s.title AS sql_title, r.overall_score, r.created_at, "
+                f"ts_headline('simple', concat_ws(' ', {concat}), q, :headline) AS snippet, "
+                f"ts_rank({document}, q) AS rank "
+                f"FROM review_reports r JOIN sql_statements s ON s.id = r.sql_statement_id, "
+                f"plainto_tsquery('simple', :query) q "
+                f"WHERE {document} @@ q AND s.is_active = true "
+                f"ORDER BY rank DESC LIMIT :limit OFFSET :offset"
+            ), self._postgresql_params(terms, limit, offset)).all()
+            return [self._report_item(row, _render_snippet(row.snippet), row.rank) for row in rows]
+
+        if mode == "mysql":
+            match = f"MATCH({', '.join(f'r.{name}' for name in columns)}) AGAINST (:query IN BOOLEAN MODE)"
+            rows = self.db.execute(text(
+                f"SELECT r.id, r.sql_statement_id, s.title AS sql_title, r.overall_score, r.created_at, "
+                f"{', '.join(f'r.{name}' for name in columns)}, {match} AS rank_score "
+                f"FROM review_reports r JOIN sql_statements s ON s.id = r.sql_statement_id "
+                f"WHERE {match} AND s.is_active = 1 "
+                f"ORDER BY rank_score DESC LIMIT :limit OFFSET :offset"
+            ), {"query": self._mysql_query(terms), "limit": limit, "offset": offset}).all()
+            return [
+                self._report_item(row, _make_snippet([getattr(row, name) for name in columns], terms), row.rank_score)
+                for row in rows
+            ]
+
+        # 压缩存储的长文本不在review_reports中，LIKE回退只匹配内联存储的列
+        report_columns = [getattr(ReviewReport, name) for name in columns]
+        text_id_columns = [getattr(ReviewReport, text_id_column(name)) for name in columns if name in COMPRESSED_TEXT_FIELDS]
+        query = self.db.query(
+            ReviewReport.id, ReviewReport.sql_statement_id, SQLStatement.title.label("sql_title"),
+            ReviewReport.overall_score, ReviewReport.created_at, *report_columns, *text_id_columns
+        )
+        rows = query.join(
+            SQLStatement, ReviewReport.sql_statement_id == SQLStatement.id
+        ).filter(
+            SQLStatement.is_active == True,
+            *[self._like_any(term, report_columns) for term in terms]
+        ).order_by(ReviewReport.id.desc()).offset(offset).limit(limit).all()
+        texts = hydrate_text_fields(self.db, [dict(row._mapping) for row in rows])
+        return [
+            self._report_item(row, _make_snippet([item[name] for name in columns], terms), None)
+            for row, item in zip(rows, texts)
+        ]
+
+    def statement_filter(self, query: str):
+        """
+        生成SQL语句检索条件，供列表查询复用（可用全文索引时不再扫描大文本列）
+
+        Returns:
+            SQLAlchemy过滤条件，检索词为空时返回None
+        """
+        terms = self._terms(query)
+        if not terms:
+            return None
+
+        mode = self._mode("sql_statements", terms)
+        if mode == "sqlite":
+            fts = FULLTEXT_TABLES["sql_statements"]["fts_table"]
+            matched = text(f"SELECT rowid FROM {fts} WHERE {fts} MATCH :match").bindparams(
+                match=self._sqlite_match(terms)
+            ).columns(column("rowid", Integer))
+            return SQLStatement.id.in_(matched)
+        if mode == "postgresql":
+            return text(
+                f"{postgresql_document('sql_statements', 'sql_statements')} @@ plainto_tsquery('simple', :fts_query)"
+            ).bindparams(fts_query=" ".join(terms))
+        if mode == "mysql":
+            return text(
+                "MATCH(sql_statements.title, sql_statements.description, sql_statements.sql_content) "
+                "AGAINST (:fts_query IN BOOLEAN MODE)"
+            ).bindparams(fts_query=self._mysql_query(terms))
+        return and_(*[
+            self._like_any(term, [SQLStatement.title, SQLStatement.description, SQLStatement.sql_content])
+            for term in terms
+        ])
+
+    def _mode(self, table: str, terms: List[str]) -> str:
+        """确定检索方式：sqlite、postgresql、mysql 或 like"""
+        if self.dialect not in ("sqlite", "postgresql", "mysql"):
+            return "like"
+        if self.dialect == "sqlite" and SQLITE_TRIGRAM and min(len(term) for term in terms) < SQLITE_TRIGRAM_MIN_LENGTH:
+            # trigram分词器无法用索引匹配过短的词
+            return "like"
+        if not fulltext_available(self.db.connection(), table):
+            return "like"
+        return self.dialect
+
+    def _terms(self, query: str) -> List[str]:
+        return [term for term in (query or "").split() if term]
+
+    def _weights(self, table: str) -> str:
+        return ", ".join(str(weight) for weight in FULLTEXT_TABLES[table]["weights"])
+
+    def _sqlite_match(self, terms: List[str]) -> str:
+        """构造FTS5查询：每个词作为短语（转义双引号），多个词同时匹配"""
+        quoted = ['"' + term.replace('"', '""') + '"' for term in terms]
+        if not SQLITE_TRIGRAM:
+            # unicode61分词器按前缀匹配
+            quoted = [term + "*" for term in quoted]
+        return " ".join(quoted)
+
+    def _sqlite_params(self, terms: List[str], limit: int, offset: int) -> Dict[str, Any]:
+        return {
+            "match": self._sqlite_match(terms),
+            "mark_open": _MARK_OPEN,
+            "mark_close": _MARK_CLOSE,
+            "limit": limit,
+            "offset": offset
+        }
+
+    def _postgresql_params(self, terms: List[str], limit: int, offset: int) -> Dict[str, Any]:
+        return {
+            "query": " ".join(terms),
+            "headline": f"StartSel={_MARK_OPEN}, StopSel={_MARK_CLOSE}, MaxWords=24, MinWords=8",
+            "limit": limit,
+            "offset": offset
+        }
+
+    def _mysql_query(self, terms: List[str]) -> str:
+        """构造MySQL布尔模式查询：每个词作为必须出现的短语"""
+        return " ".join('+"' + term.replace('"', " ") + '"' for term in terms)
+
+    def _like_any(self, term: str, columns):
+        escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return or_(*[col.ilike(f"%{escaped}%", escape="\\") for col in columns])
+
+    def _statement_item(self, row, snippet: str, score) -> Dict[str, Any]:
+        return {
+            "id": row.id,
+            "title": row.title,
+            "status": _status_value(row.status),
+            "db_connection_id": row.db_connection_id,
+            "snippet": snippet,
+            "score": float(score) if score is not None else None
+        }
+
+    def _report_item(self, row, snippet: str, score) -> Dict[str, Any]:
+        created_at = row.created_at
+        return {
+            "id": row.id,
+            "sql_statement_id": row.sql_statement_id,
+            "sql_title": row.sql_title,
+            "overall_score": row.overall_score,
+            "created_at": created_at.isoformat() if hasattr(created_at, "isoformat") else created_at,
+            "snippet": snippet,
+            "score": float(score) if score is not None else None
+        }
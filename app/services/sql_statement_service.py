@@ -2,13 +2,25 @@
 
 import csv
 import io
-from typing import Dict, Any, List, Optional
+import logging
+from typing import Dict, Any, List, Optional, Callable, Iterator
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import desc, func, insert
 from fastapi import UploadFile
 
 from app.models.sql_statement import SQLStatement, SQLStatementStatus
+from app.models.sql_version import SQLStatementVersion
 from app.models.db_connection import DatabaseConnection
+from app.config import get_settings
+from app.core.parallel_parser import ParallelSQLParser
+from app.core.sql_splitter import SQLScriptSplitter
+from app.services.search_service import SearchService
+from app.utils.cache import count_cache, statistics_cache, invalidate_statement_caches, invalidate_review_caches
+from app.utils.pagination import paginate_keyset
+from app.utils.text_codec import compress_text, content_hash, decompress_text
+from app.utils.text_delta import apply_delta, make_delta, unified_diff
+
+logger = logging.getLogger(__name__)
 
 
 class SQLStatementService:
@@ -39,8 +51,11 @@ class SQLStatementService:
             )
             
             self.db.add(statement)
+            self.db.flush()
+            self._append_version(statement)
             self.db.commit()
             self.db.refresh(statement)
+            invalidate_statement_caches()
             
             return {
                 "success": True,
@@ -73,7 +88,8 @@ class SQLStatementService:
                 return {"success": False, "error": "SQL语句不存在"}
             
             # 如果SQL内容发生变化，创建新版本
-            if "sql_content" in statement_data and statement_data["sql_content"] != statement.sql_content:
+            new_version = "sql_content" in statement_data and statement_data["sql_content"] != statement.sql_content
+            if new_version:
                 self._create_new_version(statement, statement_data)
             else:
                 # 只更新元数据
@@ -82,8 +98,11 @@ class SQLStatementService:
                         setattr(statement, field, value)
             
             self.db.commit()
+            if new_version:
+                # 新版本的状态重置为草稿
+                invalidate_statement_caches()
             
-            return {"success": True, "message": "SQL语句更新成功"}
+            return {"success": True, "message": "SQL语句更新成功", "version": statement.version}
         
         except Exception as e:
             self.db.rollback()
@@ -106,7 +125,20 @@ class SQLStatementService:
         Returns:
             SQL语句列表
         """
-        query = self.db.query(SQLStatement).filter(SQLStatement.is_active == True)
+        return self.build_statement_query(filters).all()
+    
+    def build_statement_query(self, filters: Optional[Dict[str, Any]] = None, *entities):
+        """
+        构建按条件过滤并按创建时间倒序的SQL语句查询
+        
+        Args:
+            filters: 过滤条件
+            entities: 查询的列，为空时查询SQLStatement实体
+            
+        Returns:
+            查询对象
+        """
+        query = self.db.query(*(entities or (SQLStatement,))).filter(SQLStatement.is_active == True)
         
         if filters:
             if "db_connection_id" in filters:
@@ -116,14 +148,70 @@ class SQLStatementService:
             if "category" in filters:
                 query = query.filter(SQLStatement.category == filters["category"])
             if "search" in filters:
-                search_term = f"%{filters['search']}%"
-                query = query.filter(
-                    SQLStatement.title.like(search_term) |
-                    SQLStatement.description.like(search_term) |
-                    SQLStatement.sql_content.like(search_term)
-                )
-        
-        return query.order_by(desc(SQLStatement.created_at)).all()
+                # 优先使用全文索引，避免对大文本列做LIKE全表扫描
+                search_filter = SearchService(self.db).statement_filter(filters["search"])
+                if search_filter is not None:
+                    query = query.filter(search_filter)
+        
+        return query.order_by(desc(SQLStatement.created_at), desc(SQLStatement.id))
+    
+    def list_sql_statements(
+        self,
+        page: int = 1,
+        page_size: int = 10,
+        order_by: str = "created_at",
+        order_dir: str = "desc",
+        cursor: Optional[str] = None,
+        with_total: bool = True
+    ) -> Dict[str, Any]:
+        """
+        分页获取SQL语句列表
+        
+        传入cursor时使用 (排序列, id) 键集分页（忽略page），总数按TTL缓存
+        
+        Args:
+            page: 页码
+            page_size: 每页数量
+            order_by: 排序字段
+            order_dir: 排序方向（asc/desc）
+            cursor: 上一页返回的next_cursor
+            with_total: 是否返回总数
+            
+        Returns:
+            包含 items、page、page_size、pages、total、next_cursor 的字典，游标无效时包含error
+        """
+        query = self.db.query(SQLStatement).filter(SQLStatement.is_active == True)
+        
+        if order_by in SQLStatement.__table__.columns:
+            order_column = SQLStatement.__table__.columns[order_by]
+        else:
+            order_column = SQLStatement.created_at
+        
+        total = None
+        if with_total:
+            total = count_cache.get_or_set(("sql_statements",), query.count)
+        
+        try:
+            rows, next_cursor = paginate_keyset(
+                query,
+                order_column,
+                SQLStatement.id,
+                descending=order_dir.lower() == "desc",
+                page_size=page_size,
+                cursor=cursor,
+                offset=None if cursor else (page - 1) * page_size
+            )
+        except ValueError as e:
+            return {"error": str(e)}
+        
+        return {
+            "items": [row[0] for row in rows],
+            "page": None if cursor else page,
+            "page_size": page_size,
+            "pages": (total + page_size - 1) // page_size if total is not None else None,
+            "total": total,
+            "next_cursor": next_cursor
+        }
     
     def delete_sql_statement(self, statement_id: int) -> Dict[str, Any]:
         """
@@ -145,6 +233,8 @@ class SQLStatementService:
             
             statement.is_active = False
             self.db.commit()
+            invalidate_statement_caches()
+            invalidate_review_caches()
             
             return {"success": True, "message": "SQL语句删除成功"}
         
@@ -154,85 +244,210 @@ class SQLStatementService:
     
     def get_sql_versions(self, statement_id: int) -> List[Dict[str, Any]]:
         """
-        获取SQL语句的版本历史
+        获取SQL语句的版本历史（不含SQL内容，内容通过get_version_content按需还原）
         
         Args:
             statement_id: SQL语句ID
             
         Returns:
-            版本历史列表
+            版本历史列表（最新的在前），SQL语句不存在时返回空列表
         """
-        # 获取主版本
-        main_statement = self.db.query(SQLStatement).filter(
+        statement = self.db.query(SQLStatement).filter(
             SQLStatement.id == statement_id
         ).first()
         
-        if not main_statement:
+        if not statement:
             return []
         
-        # 获取所有版本（包括主版本和子版本）
-        versions = self.db.query(SQLStatement).filter(
-            (SQLStatement.id == statement_id) |
-            (SQLStatement.parent_id == statement_id)
-        ).order_by(desc(SQLStatement.version)).all()
+        versions = self.db.query(
+            SQLStatementVersion.id,
+            SQLStatementVersion.version,
+            SQLStatementVersion.title,
+            SQLStatementVersion.description,
+            SQLStatementVersion.is_snapshot,
+            SQLStatementVersion.content_size,
+            SQLStatementVersion.created_by,
+            SQLStatementVersion.created_at
+        ).filter(
+            SQLStatementVersion.sql_statement_id == statement_id
+        ).order_by(desc(SQLStatementVersion.version)).all()
         
-        return [
+        history = [
             {
                 "id": version.id,
                 "version": version.version,
                 "title": version.title,
                 "description": version.description,
-                "sql_content": version.sql_content,
+                "is_snapshot": version.is_snapshot,
+                "size": version.content_size,
+                "created_by": version.created_by,
                 "created_at": version.created_at,
-                "is_current": version.id == statement_id
+                "is_current": version.version == statement.version
             }
             for version in versions
         ]
+        if not history or history[0]["version"] != statement.version:
+            # 尚未记录历史的语句（如批量导入），当前内容即为最新版本
+            history.insert(0, {
+                "id": None,
+                "version": statement.version,
+                "title": statement.title,
+                "description": statement.description,
+                "is_snapshot": True,
+                "size": len(statement.sql_content.encode("utf-8")),
+                "created_by": statement.created_by,
+                "created_at": statement.updated_at or statement.created_at,
+                "is_current": True
+            })
+        return history
+    
+    def get_version_content(self, statement_id: int, version: int) -> Optional[Dict[str, Any]]:
+        """
+        还原指定版本
+        
+        从不晚于该版本的最近快照开始依次应用增量，并用内容摘要校验还原结果
+        
+        Args:
+            statement_id: SQL语句ID
+            version: 版本号
+            
+        Returns:
+            版本信息和SQL内容，版本不存在时返回None
+            
+        Raises:
+            ValueError: 还原结果与记录的内容摘要不一致
+        """
+        statement = self.db.query(SQLStatement).filter(
+            SQLStatement.id == statement_id
+        ).first()
+        if not statement:
+            return None
+        
+        if version == statement.version:
+            # 当前版本直接读取语句本身
+            return {
+                "version": statement.version,
+                "title": statement.title,
+                "description": statement.description,
+                "sql_content": statement.sql_content,
+                "is_current": True
+            }
+        
+        snapshot_version = self.db.query(func.max(SQLStatementVersion.version)).filter(
+            SQLStatementVersion.sql_statement_id == statement_id,
+            SQLStatementVersion.is_snapshot == True,
+            SQLStatementVersion.version <= version
+        ).scalar()
+        if snapshot_version is None:
+            return None
+        
+        chain = self.db.query(SQLStatementVersion).filter(
+            SQLStatementVersion.sql_statement_id == statement_id,
+            SQLStatementVersion.version >= snapshot_version,
+            SQLStatementVersion.version <= version
+        ).order_by(SQLStatementVersion.version).all()
+        if not chain or chain[-1].version != version:
+            return None
+        
+        content = None
+        for row in chain:
+            payload = decompress_text(row.codec, row.data)
+            content = payload if row.is_snapshot else apply_delta(content, payload)
+            if content_hash(content) != row.content_hash:
+                raise ValueError(f"SQL语句{statement_id}的版本{row.version}还原结果校验失败")
+        
+        target = chain[-1]
+        return {
+            "version": target.version,
+            "title": target.title,
+            "description": target.description,
+            "sql_content": content,
+            "is_current": False
+        }
     
-    def restore_version(self, statement_id: int, version_id: int) -> Dict[str, Any]:
+    def diff_versions(self, statement_id: int, from_version: int, to_version: int, context: int = 3) -> Dict[str, Any]:
         """
-        恢复到指定版本
+        对比两个版本的SQL内容
         
         Args:
-            statement_id: 主SQL语句ID
-            version_id: 要恢复的版本ID
+            statement_id: SQL语句ID
+            from_version: 旧版本号
+            to_version: 新版本号
+            context: 差异上下文行数
             
         Returns:
-            恢复结果
+            统一格式的差异文本和增删行数，版本不存在时返回error，还原校验失败时另含 corrupted=True
         """
         try:
-            # 获取当前版本
-            current_statement = self.db.query(SQLStatement).filter(
-                SQLStatement.id == statement_id
-            ).first()
+            old = self.get_version_content(statement_id, from_version)
+            new = self.get_version_content(statement_id, to_version)
+        except ValueError as e:
+            return {"error": str(e), "corrupted": True}
+        if old is None or new is None:
+            return {"error": "SQL语句或版本不存在"}
+        
+        diff = unified_diff(
+            old["sql_content"], new["sql_content"], f"v{from_version}", f"v{to_version}", context
+        )
+        lines = diff.splitlines()
+        return {
+            "from_version": from_version,
+            "to_version": to_version,
+            "diff": diff,
+            "added": sum(1 for line in lines if line.startswith("+") and not line.startswith("+++")),
+            "removed": sum(1 for line in lines if line.startswith("-") and not line.startswith("---"))
+        }
+    
+    def restore_version(self, statement_id: int, version: int, updated_by: Optional[str] = None) -> Dict[str, Any]:
+        """
+        恢复到指定版本（以该版本的内容创建一个新版本，历史不会被改写）
+        
+        Args:
+            statement_id: SQL语句ID
+            version: 要恢复的版本号
+            updated_by: 执行恢复的用户，记为新版本的创建者
             
-            # 获取要恢复的版本
-            target_version = self.db.query(SQLStatement).filter(
-                SQLStatement.id == version_id
+        Returns:
+            恢复结果，历史版本还原校验失败时包含 corrupted=True
+        """
+        try:
+            current_statement = self.db.query(SQLStatement).filter(
+                SQLStatement.id == statement_id,
+                SQLStatement.is_active == True
             ).first()
+            target_version = self.get_version_content(statement_id, version) if current_statement else None
             
             if not current_statement or not target_version:
                 return {"success": False, "error": "SQL语句或版本不存在"}
             
+            if target_version["is_current"]:
+                return {"success": False, "error": "该版本已是当前版本"}
+            
             # 创建新版本（基于目标版本）
             new_version_data = {
-                "title": target_version.title,
-                "sql_content": target_version.sql_content,
-                "description": target_version.description
+                "title": target_version["title"],
+                "sql_content": target_version["sql_content"],
+                "description": target_version["description"],
+                "updated_by": updated_by
             }
             
             self._create_new_version(current_statement, new_version_data)
             self.db.commit()
+            invalidate_statement_caches()
             
-            return {"success": True, "message": "版本恢复成功"}
+            return {"success": True, "message": "版本恢复成功", "version": current_statement.version}
         
+        except ValueError as e:
+            # 历史版本还原结果与摘要不一致
+            self.db.rollback()
+            return {"success": False, "error": str(e), "corrupted": True}
         except Exception as e:
             self.db.rollback()
             return {"success": False, "error": f"版本恢复失败: {str(e)}"}
     
     def import_from_csv(self, file: UploadFile, default_db_connection_id: Optional[int] = None) -> Dict[str, Any]:
         """
-        从CSV文件导入SQL语句
+        从CSV文件导入SQL语句（兼容旧接口，等同于 import_file）
         
         Args:
             file: CSV文件
@@ -241,125 +456,236 @@ class SQLStatementService:
         Returns:
             导入结果
         """
-        try:
-            # 读取CSV内容
-            content = file.file.read().decode('utf-8')
-            csv_reader = csv.DictReader(io.StringIO(content))
-            
-            imported_count = 0
-            errors = []
-            
-            for row_num, row in enumerate(csv_reader, start=2):
-                try:
-                    # 解析CSV行
-                    title = row.get('title', row.get('标题', f'导入SQL-{row_num}'))
-                    sql_content = row.get('sql_content', row.get('SQL语句', ''))
-                    description = row.get('description', row.get('描述', ''))
-                    
-                    if not sql_content.strip():
-                        errors.append(f"第{row_num}行: SQL内容为空")
-                        continue
-                    
-                    # 创建SQL语句
-                    statement = SQLStatement(
-                        title=title,
-                        sql_content=sql_content,
-                        description=description,
-                        db_connection_id=default_db_connection_id,
-                        created_by="csv_import"
-                    )
-                    
-                    self.db.add(statement)
-                    imported_count += 1
-                
-                except Exception as e:
-                    errors.append(f"第{row_num}行: {str(e)}")
-            
-            self.db.commit()
+        return self.import_file(file, default_db_connection_id)
+    
+    def import_file(
+        self,
+        file: UploadFile,
+        default_db_connection_id: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        流式导入SQL语句
+        
+        边读取边解码（CSV按行解析，.sql脚本按语句拆分），按批次解析并用批量INSERT写入，
+        每批单独提交：某一批失败只回滚该批，不影响已提交的数据。内存占用与文件大小无关。
+        
+        Args:
+            file: 上传的CSV或.sql文件
+            default_db_connection_id: 默认数据库连接ID
+            batch_size: 每批行数，默认使用配置 import_batch_size
+            progress_callback: 每批处理完成后的回调，参数为该批的进度信息
             
-            result = {
-                "success": True,
-                "imported_count": imported_count,
-                "message": f"成功导入 {imported_count} 条SQL语句"
+        Returns:
+            导入结果
+        """
+        settings = get_settings()
+        batch_size = batch_size or settings.import_batch_size
+        max_messages = settings.import_max_messages
+        filename = file.filename or ""
+        
+        # 按默认连接的方言解析和拆分SQL
+        db_type = None
+        if default_db_connection_id:
+            db_connection = self.db.query(DatabaseConnection).filter(
+                DatabaseConnection.id == default_db_connection_id
+            ).first()
+            db_type = db_connection.db_type if db_connection else None
+        
+        stats = {
+            "imported_count": 0,
+            "error_count": 0,
+            "warning_count": 0,
+            "chunks": 0,
+            "failed_chunks": 0,
+            "sql_type_distribution": {},
+            "errors": [],
+            "warnings": []
+        }
+        
+        def add_message(kind: str, message: str):
+            # 只保留前若干条明细，避免百万行导入时消息列表无限增长
+            stats[f"{kind[:-1]}_count"] += 1
+            if len(stats[kind]) < max_messages:
+                stats[kind].append(message)
+        
+        parser = ParallelSQLParser()
+        
+        def flush(batch: List[Dict[str, Any]]):
+            stats["chunks"] += 1
+            chunk = {
+                "chunk": stats["chunks"],
+                "first_row": batch[0]["row_num"],
+                "last_row": batch[-1]["row_num"],
+                "rows": len(batch),
+                "imported": 0,
+                "error": None
             }
+            try:
+                analyses = parser.parse_many([item["sql_content"] for item in batch], [db_type] * len(batch))
+                self.db.execute(insert(SQLStatement), [
+                    {
+                        "title": item["title"],
+                        "sql_content": item["sql_content"],
+                        "description": item["description"],
+                        "db_connection_id": default_db_connection_id,
+                        "created_by": item["created_by"]
+                    }
+                    for item in batch
+                ])
+                self.db.commit()
+            except Exception as e:
+                self.db.rollback()
+                stats["failed_chunks"] += 1
+                chunk["error"] = str(e)
+                add_message("errors", f"第{chunk['first_row']}-{chunk['last_row']}行: 批量写入失败: {str(e)}")
+            else:
+                chunk["imported"] = len(batch)
+                stats["imported_count"] += len(batch)
+                distribution = stats["sql_type_distribution"]
+                for item, analysis in zip(batch, analyses):
+                    distribution[analysis["sql_type"]] = distribution.get(analysis["sql_type"], 0) + 1
+                    if not analysis["tables"] and not analysis["views"]:
+                        add_message("warnings", f"第{item['row_num']}行: 无法从SQL中提取表名，审查时可能失败")
             
-            if errors:
-                result["errors"] = errors
+            logger.info(
+                f"导入 {filename} 第{chunk['chunk']}批 (第{chunk['first_row']}-{chunk['last_row']}行): "
+                f"写入 {chunk['imported']}/{chunk['rows']} 条，累计 {stats['imported_count']} 条"
+            )
+            if progress_callback:
+                progress_callback(dict(chunk, imported_total=stats["imported_count"], error_total=stats["error_count"]))
+        
+        try:
+            # 增量解码，utf-8-sig兼容Excel导出的BOM
+            stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+            if filename.lower().endswith(".sql"):
+                rows = self._iter_sql_script_rows(stream, filename, db_type)
+            else:
+                rows = self._iter_csv_rows(stream, add_message)
             
-            return result
+            batch: List[Dict[str, Any]] = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    flush(batch)
+                    batch = []
+            if batch:
+                flush(batch)
+            # 与底层文件分离，避免关闭包装器时关闭上传文件
+            stream.detach()
         
         except Exception as e:
             self.db.rollback()
-            return {"success": False, "error": f"导入失败: {str(e)}"}
-    
-    def export_to_csv(self, filters: Optional[Dict[str, Any]] = None) -> str:
-        """
-        导出SQL语句为CSV
+            return {
+                "success": False,
+                "error": f"导入失败: {str(e)}",
+                "imported_count": stats["imported_count"]
+            }
+        finally:
+            if stats["imported_count"]:
+                invalidate_statement_caches()
         
-        Args:
-            filters: 过滤条件
+        result = {
+            "success": True,
+            "imported_count": stats["imported_count"],
+            "sql_type_distribution": stats["sql_type_distribution"],
+            "chunks": stats["chunks"],
+            "failed_chunks": stats["failed_chunks"],
+            "message": f"成功导入 {stats['imported_count']} 条SQL语句"
+        }
+        
+        if stats["errors"]:
+            result["errors"] = stats["errors"]
+            result["error_count"] = stats["error_count"]
+        if stats["warnings"]:
+            result["warnings"] = stats["warnings"]
+            result["warning_count"] = stats["warning_count"]
+        
+        return result
+    
+    def _iter_csv_rows(self, stream, add_message: Callable[[str, str], None]) -> Iterator[Dict[str, Any]]:
+        """逐行读取CSV，生成待导入的语句"""
+        csv_reader = csv.DictReader(stream)
+        for row_num, row in enumerate(csv_reader, start=2):
+            # 解析CSV行
+            title = row.get('title', row.get('标题', f'导入SQL-{row_num}'))
+            sql_content = row.get('sql_content', row.get('SQL语句', '')) or ''
+            description = row.get('description', row.get('描述', ''))
             
-        Returns:
-            CSV内容
-        """
-        statements = self.get_sql_statements(filters)
-        
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # 写入标题行
-        writer.writerow(['ID', '标题', 'SQL语句', '描述', '状态', '分类', '标签', '创建时间'])
-        
-        # 写入数据行
-        for stmt in statements:
-            writer.writerow([
-                stmt.id,
-                stmt.title or '',
-                stmt.sql_content or '',
-                stmt.description or '',
-                stmt.status.value if stmt.status else '',
-                stmt.category or '',
-                stmt.tags or '',
-                stmt.created_at.strftime('%Y-%m-%d %H:%M:%S') if stmt.created_at else ''
-            ])
-        
-        return output.getvalue()
+            if not sql_content.strip():
+                add_message("errors", f"第{row_num}行: SQL内容为空")
+                continue
+            
+            yield {
+                "row_num": row_num,
+                "title": title or f'导入SQL-{row_num}',
+                "sql_content": sql_content,
+                "description": description,
+                "created_by": "csv_import"
+            }
+    
+    def _iter_sql_script_rows(self, stream, filename: str, db_type) -> Iterator[Dict[str, Any]]:
+        """按语句拆分SQL脚本，生成待导入的语句（行号为语句起始行）"""
+        base_name = filename.rsplit("/", 1)[-1]
+        for statement in SQLScriptSplitter(db_type=db_type).split(stream):
+            yield {
+                "row_num": statement["start_line"],
+                "title": f"{base_name} #{statement['index'] + 1}",
+                "sql_content": statement["sql"],
+                "description": f"从 {base_name} 第{statement['start_line']}-{statement['end_line']}行导入",
+                "created_by": "sql_import"
+            }
     
     def get_statistics(self) -> Dict[str, Any]:
         """
         获取SQL语句统计信息
         
+        通过一次按（数据库连接, 状态）分组的查询得到全部分布，结果按TTL缓存，
+        语句增删或审查后主动失效
+        
         Returns:
             统计信息
         """
-        total_count = self.db.query(SQLStatement).filter(SQLStatement.is_active == True).count()
-        
-        status_counts = {}
-        for status in SQLStatementStatus:
-            count = self.db.query(SQLStatement).filter(
-                SQLStatement.is_active == True,
-                SQLStatement.status == status
-            ).count()
-            status_counts[status.value] = count
-        
-        # 按数据库连接分组统计
-        db_stats = self.db.query(
+        return statistics_cache.get_or_set(("sql_statistics",), self._compute_statistics)
+    
+    def _compute_statistics(self) -> Dict[str, Any]:
+        """计算SQL语句统计信息"""
+        rows = self.db.query(
             DatabaseConnection.name,
-            self.db.func.count(SQLStatement.id).label('count')
-        ).join(
-            SQLStatement, DatabaseConnection.id == SQLStatement.db_connection_id
+            SQLStatement.status,
+            func.count(SQLStatement.id)
+        ).outerjoin(
+            DatabaseConnection, DatabaseConnection.id == SQLStatement.db_connection_id
         ).filter(
             SQLStatement.is_active == True
-        ).group_by(DatabaseConnection.name).all()
+        ).group_by(DatabaseConnection.name, SQLStatement.status).all()
+        
+        total_count = 0
+        status_counts = {status.value: 0 for status in SQLStatementStatus}
+        db_counts: Dict[str, int] = {}
+        for db_name, status, count in rows:
+            total_count += count
+            if status is not None:
+                status_counts[status.value] += count
+            # 未关联数据库连接的语句不计入数据库分布
+            if db_name is not None:
+                db_counts[db_name] = db_counts.get(db_name, 0) + count
         
         return {
             "total_count": total_count,
             "status_distribution": status_counts,
-            "database_distribution": {name: count for name, count in db_stats}
+            "database_distribution": db_counts
         }
     
     def _create_new_version(self, current_statement: SQLStatement, new_data: Dict[str, Any]):
-        """创建新版本"""
+        """创建新版本（当前内容记入版本历史后更新语句，new_data中的updated_by记为新版本的创建者）"""
+        # 没有历史记录的语句（批量导入或历史功能之前创建）先补记当前版本
+        previous = self._latest_version(current_statement.id)
+        if previous is None or previous.version != current_statement.version:
+            previous = self._append_version(current_statement)
+        previous_content = current_statement.sql_content
+        
         # 更新当前版本
         current_statement.version += 1
         
@@ -370,4 +696,72 @@ class SQLStatementService:
         # 重置状态为草稿（因为内容发生了变化）
         if "sql_content" in new_data:
             current_statement.status = SQLStatementStatus.DRAFT
-            current_statement.last_reviewed_at = None 
\ No newline at end of file
+            current_statement.last_reviewed_at = None
+        
+        self._append_version(current_statement, previous_content, previous, new_data.get("updated_by") or "system")
+    
+    def _latest_version(self, statement_id: int) -> Optional[SQLStatementVersion]:
+        return self.db.query(SQLStatementVersion).filter(
+            SQLStatementVersion.sql_statement_id == statement_id
+        ).order_by(desc(SQLStatementVersion.version)).first()
+    
+    def _append_version(
+        self,
+        statement: SQLStatement,
+        previous_content: Optional[str] = None,
+        previous: Optional[SQLStatementVersion] = None,
+        created_by: Optional[str] = None
+    ) -> SQLStatementVersion:
+        """
+        记录语句当前内容为一个版本
+        
+        与上一版本相距snapshot_interval个版本、没有上一版本或增量不比快照小时存储完整快照，
+        否则存储相对上一版本的增量
+        
+        Args:
+            statement: SQL语句（已更新为新版本）
+            previous_content: 上一版本的SQL内容
+            previous: 上一版本的历史记录（为None时查询）
+            created_by: 版本的创建者，默认为语句的创建者
+            
+        Returns:
+            新增的版本记录
+        """
+        settings = get_settings()
+        content = statement.sql_content
+        codec, data = compress_text(content, settings.sql_version_codec)
+        is_snapshot = True
+        base_version = None
+        
+        if previous_content is not None:
+            if previous is None:
+                previous = self._latest_version(statement.id)
+            last_snapshot = self.db.query(func.max(SQLStatementVersion.version)).filter(
+                SQLStatementVersion.sql_statement_id == statement.id,
+                SQLStatementVersion.is_snapshot == True
+            ).scalar()
+            if previous is not None and last_snapshot is not None and \
+                    statement.version - last_snapshot < settings.sql_version_snapshot_interval:
+                delta_codec, delta = compress_text(make_delta(previous_content, content), settings.sql_version_codec)
+                if len(delta) < len(data):
+                    codec, data = delta_codec, delta
+                    is_snapshot = False
+                    base_version = previous.version
+        
+        version = SQLStatementVersion(
+            sql_statement_id=statement.id,
+            version=statement.version,
+            title=statement.title,
+            description=statement.description,
+            is_snapshot=is_snapshot,
+            base_version=base_version,
+            codec=codec,
+            data=data,
+            content_hash=content_hash(content),
+            content_size=len(content.encode("utf-8")),
+            created_by=created_by or statement.created_by
+        )
+        self.db.add(version)
+        # 会话未开启autoflush，后续查询快照位置前需写入
+        self.db.flush()
+        return version
@@ -0,0 +1,96 @@
+"""进程内TTL缓存"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from app.config import get_settings
+
+
+class TTLCache:
+    """
+    线程安全的TTL缓存
+
+    键建议使用元组，第一个元素作为命名空间，便于按命名空间整体失效
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """获取未过期的缓存值"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        """写入缓存值"""
+        with self._lock:
+            if len(self._data) >= self.maxsize and key not in self._data:
+                self._evict()
+            self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def get_or_set(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """获取缓存值，不存在或已过期时调用factory计算并写入"""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = factory()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, namespace: Optional[Hashable] = None):
+        """
+        使缓存失效
+
+        Args:
+            namespace: 命名空间（元组键的第一个元素），为None时清空全部
+        """
+        with self._lock:
+            if namespace is None:
+                self._data.clear()
+                return
+            for key in [k for k in self._data if k == namespace or (isinstance(k, tuple) and k and k[0] == namespace)]:
+                del self._data[key]
+
+    def _evict(self):
+        """清理过期项，仍然已满时淘汰最早过期的一项"""
+        now = time.monotonic()
+        for key in [k for k, (expires_at, _) in self._data.items() if expires_at < now]:
+            del self._data[key]
+        if len(self._data) >= self.maxsize:
+            oldest = min(self._data, key=lambda k: self._data[k][0])
+            del self._data[oldest]
+
+
+# 列表总数缓存（分页时避免每次全量count）
+count_cache = TTLCache(get_settings().count_cache_ttl)
+
+# 统计数据缓存（仪表盘）
+statistics_cache = TTLCache(get_settings().statistics_cache_ttl)
+
+# 目标库表统计信息缓存（行数、大小、索引基数）
+table_stats_cache = TTLCache(get_settings().table_stats_cache_ttl, maxsize=10000)
+
+
+def invalidate_statement_caches():
+    """SQL语句增删或状态变化后，使相关列表总数和统计缓存失效"""
+    count_cache.invalidate("sql_statements")
+    statistics_cache.invalidate("sql_statistics")
+
+
+def invalidate_review_caches():
+    """审查报告变化后，使相关列表总数和统计缓存失效"""
+    count_cache.invalidate("review_results")
+    statistics_cache.invalidate("review_statistics")
+    # 审查会更新语句状态
+    statistics_cache.invalidate("sql_statistics")
@@ -0,0 +1,52 @@
+"""阻塞调用的线程池调度
+
+应用库上的短查询路由声明为普通函数，由FastAPI放到默认线程池执行；
+连接目标数据库或调用LLM的慢操作通过 run_external 放到单独限流的线程中执行，
+慢操作排队时不会占满默认线程池，健康检查和列表查询等请求的延迟不受影响
+"""
+
+import functools
+from typing import Any, Callable, Optional, TypeVar
+
+import anyio.to_thread
+from anyio import CapacityLimiter
+
+from app.config import get_settings
+
+T = TypeVar("T")
+
+_external_limiter: Optional[CapacityLimiter] = None
+
+
+def configure_threadpools():
+    """设置默认线程池大小并创建外部调用限流器（需在事件循环中调用，应用启动时执行）"""
+    global _external_limiter
+    settings = get_settings()
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.threadpool_size
+    _external_limiter = CapacityLimiter(settings.external_io_concurrency)
+
+
+def get_external_limiter() -> CapacityLimiter:
+    """获取外部调用（目标数据库、LLM）的限流器"""
+    global _external_limiter
+    if _external_limiter is None:
+        _external_limiter = CapacityLimiter(get_settings().external_io_concurrency)
+    return _external_limiter
+
+
+async def run_external(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    在外部调用专用的线程中执行阻塞函数
+
+    Args:
+        func: 阻塞函数（如连接测试、模式提取、LLM审查）
+        args: 位置参数
+        kwargs: 关键字参数
+
+    Returns:
+        函数返回值
+    """
+    return await anyio.to_thread.run_sync(
+        functools.partial(func, *args, **kwargs),
+        limiter=get_external_limiter()
+    )
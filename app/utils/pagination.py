@@ -0,0 +1,116 @@
+"""键集（游标）分页工具"""
+
+import base64
+import json
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import DateTime, String, and_, asc, cast, desc, literal, or_
+from sqlalchemy.orm import Query
+
+# 附加到查询中的游标列名
+CURSOR_VALUE = "_cursor_value"
+CURSOR_ID = "_cursor_id"
+
+
+def encode_cursor(value: Any, last_id: int) -> str:
+    """将排序值和ID编码为不透明的游标字符串"""
+    payload = json.dumps([value, last_id], separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, int]:
+    """
+    解码游标字符串
+
+    Raises:
+        ValueError: 游标格式无效
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        value, last_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return value, int(last_id)
+    except (ValueError, TypeError, UnicodeError) as e:
+        raise ValueError(f"无效的分页游标: {cursor}") from e
+
+
+def _is_datetime(column) -> bool:
+    return isinstance(getattr(column, "type", None), DateTime)
+
+
+def _is_nullable(column) -> bool:
+    # 有服务端默认值的列（如created_at）视为非空
+    return bool(getattr(column, "nullable", True)) and getattr(column, "server_default", None) is None
+
+
+def paginate_keyset(
+    query: Query,
+    order_column,
+    id_column,
+    descending: bool,
+    page_size: int,
+    cursor: Optional[str] = None,
+    offset: Optional[int] = None
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    按 (排序列, ID) 进行键集分页
+
+    不使用OFFSET，翻到任意深度的页面代价与第一页相同。排序列可为空时，
+    空值始终排在最后。日期时间列以数据库中的文本形式参与游标比较，
+    避免驱动对时间格式的转换导致相等判断失效。
+
+    Args:
+        query: 已应用筛选条件、尚未排序的查询
+        order_column: 排序列
+        id_column: 唯一ID列（次级排序）
+        descending: 是否降序
+        page_size: 每页数量
+        cursor: 上一页返回的游标，为None时从第一页开始
+        offset: 兼容页码分页的偏移量（仅在未传游标时使用）
+
+    Returns:
+        (本页行列表, 下一页游标)，没有下一页时游标为None。
+        每行末尾附加了 _cursor_value 和 _cursor_id 两列
+
+    Raises:
+        ValueError: 游标格式无效
+    """
+    is_datetime = _is_datetime(order_column)
+    nullable = _is_nullable(order_column)
+    cursor_expr = cast(order_column, String) if is_datetime else order_column
+    direction = desc if descending else asc
+
+    query = query.add_columns(cursor_expr.label(CURSOR_VALUE), id_column.label(CURSOR_ID))
+
+    if cursor:
+        value, last_id = decode_cursor(cursor)
+        id_after = id_column < last_id if descending else id_column > last_id
+        if value is None:
+            # 已进入排序值为空的部分
+            query = query.filter(and_(order_column.is_(None), id_after))
+        else:
+            bound = literal(value, String()) if is_datetime else value
+            value_after = order_column < bound if descending else order_column > bound
+            condition = or_(value_after, and_(order_column == bound, id_after))
+            if nullable:
+                condition = or_(and_(order_column.isnot(None), condition), order_column.is_(None))
+            query = query.filter(condition)
+
+    order_clauses = [direction(order_column), direction(id_column)]
+    if nullable:
+        order_clauses.insert(0, order_column.is_(None))
+    query = query.order_by(*order_clauses)
+    if offset and not cursor:
+        query = query.offset(offset)
+    rows = query.limit(page_size + 1).all()
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]._mapping
+        next_cursor = encode_cursor(last[CURSOR_VALUE], last[CURSOR_ID])
+    return rows, next_cursor
+
+
+def strip_cursor_columns(mapping: Sequence) -> dict:
+    """从结果行映射中去除游标列"""
+    return {key: value for key, value in dict(mapping).items() if key not in (CURSOR_VALUE, CURSOR_ID)}
@@ -0,0 +1,84 @@
+"""文本压缩编解码
+
+优先使用zstd（需安装zstandard），未安装时使用标准库zlib；
+压缩后不比原文小的短文本以原文存储（codec为none）
+"""
+
+import hashlib
+import zlib
+from typing import Optional, Tuple
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+CODEC_NONE = "none"
+CODEC_ZLIB = "zlib"
+CODEC_ZSTD = "zstd"
+
+_ZSTD_LEVEL = 6
+_ZLIB_LEVEL = 6
+
+
+def content_hash(value: str) -> str:
+    """文本内容的SHA-256摘要（用于去重）"""
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+def resolve_codec(codec: str) -> str:
+    """返回实际可用的压缩算法（zstd不可用时回退到zlib）"""
+    if codec == CODEC_ZSTD and not ZSTD_AVAILABLE:
+        return CODEC_ZLIB
+    if codec not in (CODEC_NONE, CODEC_ZLIB, CODEC_ZSTD):
+        raise ValueError(f"不支持的压缩算法: {codec}")
+    return codec
+
+
+def compress_text(value: str, codec: str = CODEC_ZSTD) -> Tuple[str, bytes]:
+    """
+    压缩文本
+
+    Args:
+        value: 原文
+        codec: 压缩算法（zstd/zlib/none）
+
+    Returns:
+        (实际使用的压缩算法, 压缩后的字节)
+    """
+    raw = value.encode("utf-8")
+    codec = resolve_codec(codec)
+    if codec == CODEC_ZSTD:
+        data = zstandard.ZstdCompressor(level=_ZSTD_LEVEL).compress(raw)
+    elif codec == CODEC_ZLIB:
+        data = zlib.compress(raw, _ZLIB_LEVEL)
+    else:
+        return CODEC_NONE, raw
+    if len(data) >= len(raw):
+        return CODEC_NONE, raw
+    return codec, data
+
+
+def decompress_text(codec: Optional[str], data: Optional[bytes]) -> Optional[str]:
+    """
+    解压文本
+
+    Args:
+        codec: 压缩算法
+        data: 压缩后的字节
+
+    Returns:
+        原文，data为None时返回None
+    """
+    if data is None:
+        return None
+    if codec == CODEC_ZSTD:
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("读取zstd压缩的文本需要安装zstandard")
+        raw = zstandard.ZstdDecompressor().decompress(data)
+    elif codec == CODEC_ZLIB:
+        raw = zlib.decompress(data)
+    else:
+        raw = data
+    return bytes(raw).decode("utf-8")
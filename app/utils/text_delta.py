@@ -0,0 +1,80 @@
+"""文本增量编码
+
+按行比较新旧文本，增量由两种操作组成：
+- [起始行, 结束行]：复制旧文本中的行（左闭右开）
+- 字符串：插入的新内容
+增量序列化为紧凑JSON，应用时只需按顺序拼接，与文本长度成线性关系
+"""
+
+import difflib
+import json
+from typing import List, Union
+
+DeltaOp = Union[List[int], str]
+
+
+def _split_lines(text: str) -> List[str]:
+    # 保留行尾，拼接后可还原原文
+    return text.splitlines(keepends=True)
+
+
+def make_delta(base: str, target: str) -> str:
+    """
+    计算从base到target的增量
+
+    Args:
+        base: 旧文本
+        target: 新文本
+
+    Returns:
+        JSON格式的增量
+    """
+    base_lines = _split_lines(base)
+    target_lines = _split_lines(target)
+    # 不使用autojunk：空行、END等高频行在长脚本中很常见，被当作噪声会使增量变大
+    matcher = difflib.SequenceMatcher(None, base_lines, target_lines, autojunk=False)
+    ops: List[DeltaOp] = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif j2 > j1:
+            # replace和insert都写入新内容，delete只需跳过旧行
+            ops.append("".join(target_lines[j1:j2]))
+    return json.dumps(ops, ensure_ascii=False, separators=(",", ":"))
+
+
+def apply_delta(base: str, delta: str) -> str:
+    """
+    将增量应用到base上
+
+    Args:
+        base: 旧文本
+        delta: make_delta生成的增量
+
+    Returns:
+        新文本
+    """
+    base_lines = _split_lines(base)
+    parts = []
+    for op in json.loads(delta):
+        if isinstance(op, list):
+            parts.extend(base_lines[op[0]:op[1]])
+        else:
+            parts.append(op)
+    return "".join(parts)
+
+
+def unified_diff(old: str, new: str, old_label: str, new_label: str, context: int = 3) -> str:
+    """
+    生成统一格式的差异文本
+
+    最后一行没有换行符时与git一样补换行并标记“\\ No newline at end of file”，避免与下一行拼接
+    """
+    lines = []
+    for line in difflib.unified_diff(
+        _split_lines(old), _split_lines(new), fromfile=old_label, tofile=new_label, n=context
+    ):
+        lines.append(line)
+        if not line.endswith("\n"):
+            lines.append("\n\\ No newline at end of file\n")
+    return "".join(lines)
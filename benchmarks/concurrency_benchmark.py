@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+混合负载并发基准测试
+
+在进程内启动应用和LLM桩服务，先只压测快速接口（健康检查、语句列表、审查统计）得到基线延迟，
+再在持续的慢请求（调用目标库和LLM的审查接口）背景下重复同样的压测，
+对比两个阶段快速接口的延迟分位数。慢操作在单独限流的线程中执行时，快速接口的延迟应基本不变。
+
+用法:
+    python -m benchmarks.concurrency_benchmark --slow-concurrency 16 --latency-ms 1000 --duration 10
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List
+
+# 添加项目根目录到Python路径
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+import requests
+
+from benchmarks.stats import percentile
+from benchmarks.stub_llm_server import StubLLMServer
+from benchmarks.review_benchmark import start_app_in_process, _free_port
+# 注意：应用模块必须在设置DATABASE_URL之后再导入，target_db只在函数内导入应用模块
+from benchmarks import target_db
+
+# 快速接口：只访问应用库或不访问数据库
+FAST_ENDPOINTS = {
+    "health": "/health",
+    "statements": "/api/sql-statements/?page_size=20",
+    "review_statistics": "/api/reviews/statistics",
+}
+
+
+def probe_fast_endpoints(app_url: str, concurrency: int, duration: float, timeout: float) -> Dict[str, List[float]]:
+    """在指定时长内并发循环请求快速接口，返回每个接口的延迟（毫秒）列表，失败记为超时值"""
+    latencies: Dict[str, List[float]] = {name: [] for name in FAST_ENDPOINTS}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(index: int):
+        session = requests.Session()
+        names = list(FAST_ENDPOINTS)
+        i = index
+        while time.perf_counter() < deadline:
+            name = names[i % len(names)]
+            i += 1
+            start = time.perf_counter()
+            try:
+                ok = session.get(f"{app_url}{FAST_ENDPOINTS[name]}", timeout=timeout).status_code == 200
+            except requests.RequestException:
+                ok = False
+            elapsed = (time.perf_counter() - start) * 1000 if ok else timeout * 1000
+            with lock:
+                latencies[name].append(elapsed)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(worker, range(concurrency)))
+    return latencies
+
+
+class SlowLoad:
+    """后台持续发送慢请求（审查接口，包含目标库模式提取和LLM调用）"""
+
+    def __init__(self, app_url: str, statement_ids: List[int], llm_config_id: int, concurrency: int, timeout: float):
+        self.app_url = app_url
+        self.statement_ids = statement_ids
+        self.llm_config_id = llm_config_id
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.completed = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def _run(self, index: int):
+        session = requests.Session()
+        i = index
+        while not self._stop.is_set():
+            statement_id = self.statement_ids[i % len(self.statement_ids)]
+            i += self.concurrency
+            try:
+                ok = session.post(
+                    f"{self.app_url}/api/reviews/sql/{statement_id}/review",
+                    params={"llm_config_id": self.llm_config_id},
+                    timeout=self.timeout
+                ).status_code == 200
+            except requests.RequestException:
+                ok = False
+            with self._lock:
+                if ok:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+
+    def start(self) -> "SlowLoad":
+        for index in range(self.concurrency):
+            thread = threading.Thread(target=self._run, args=(index,), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=self.timeout)
+
+
+def summarize(latencies: Dict[str, List[float]], duration: float) -> Dict[str, Any]:
+    """汇总各快速接口的延迟分位数"""
+    summary = {}
+    for name, samples in latencies.items():
+        summary[name] = {
+            "requests": len(samples),
+            "per_sec": round(len(samples) / duration, 1),
+            "p50_ms": round(percentile(samples, 50), 3),
+            "p90_ms": round(percentile(samples, 90), 3),
+            "p99_ms": round(percentile(samples, 99), 3),
+            "max_ms": round(max(samples), 3) if samples else 0.0
+        }
+    return summary
+
+
+def print_report(report: Dict[str, Any]):
+    """打印基准测试报告"""
+    config = report["config"]
+    print("=" * 72)
+    print("混合负载并发基准测试")
+    print("=" * 72)
+    print(
+        f"快速接口并发 {config['fast_concurrency']}, 慢请求并发 {config['slow_concurrency']}, "
+        f"LLM桩延迟 {config['latency_ms']}ms, 每阶段 {config['duration']}s"
+    )
+    slow = report["slow_load"]
+    print(f"背景慢请求: 完成 {slow['completed']}, 失败 {slow['failed']}")
+    print()
+    print(f"{'接口':<20}{'阶段':<8}{'请求/秒':>10}{'p50(ms)':>12}{'p90(ms)':>12}{'p99(ms)':>12}{'max(ms)':>12}")
+    for name in FAST_ENDPOINTS:
+        for phase, label in (("baseline", "基线"), ("mixed", "混合")):
+            stats = report[phase][name]
+            print(
+                f"{name:<20}{label:<8}{stats['per_sec']:>10.1f}{stats['p50_ms']:>12.3f}"
+                f"{stats['p90_ms']:>12.3f}{stats['p99_ms']:>12.3f}{stats['max_ms']:>12.3f}"
+            )
+
+
+def main():
+    """主函数"""
+    arg_parser = argparse.ArgumentParser(description="混合负载并发基准测试")
+    arg_parser.add_argument("--app-db", default=f"sqlite:///{os.path.join(ROOT_DIR, 'benchmarks', 'bench_app.db')}",
+                            help="进程内应用使用的应用库DATABASE_URL")
+    arg_parser.add_argument("--target-db", default=os.path.join(ROOT_DIR, "benchmarks", "bench_target.db"),
+                            help="生成的SQLite目标库路径")
+    arg_parser.add_argument("--tables", type=int, default=200, help="目标库表数量")
+    arg_parser.add_argument("--statements", type=int, default=50, help="生成的SQL语句数")
+    arg_parser.add_argument("--fast-concurrency", type=int, default=4, help="快速接口并发数")
+    arg_parser.add_argument("--slow-concurrency", type=int, default=16, help="背景慢请求并发数")
+    arg_parser.add_argument("--latency-ms", type=float, default=1000, help="LLM桩首包延迟(毫秒)")
+    arg_parser.add_argument("--duration", type=float, default=10, help="每个阶段的时长(秒)")
+    arg_parser.add_argument("--timeout", type=float, default=30, help="单个请求超时(秒)")
+    arg_parser.add_argument("--json", dest="json_path", help="将结果写入JSON文件")
+    args = arg_parser.parse_args()
+
+    # 必须在导入应用模块之前设置，使进程内应用使用独立的应用库
+    os.environ["DATABASE_URL"] = args.app_db
+
+    stub = StubLLMServer(latency_ms=args.latency_ms).start()
+    app_server = None
+    seeded = None
+    slow_load = None
+    try:
+        tables = target_db.generate_target_database(args.target_db, args.tables, 0, overwrite=True)
+        seeded = target_db.seed_app_database(
+            args.target_db,
+            target_db.generate_statements(tables, args.statements),
+            "openai",
+            stub.openai_base_url
+        )
+
+        port = _free_port()
+        app_server = start_app_in_process(port)
+        app_url = f"http://127.0.0.1:{port}"
+
+        # 预热
+        probe_fast_endpoints(app_url, args.fast_concurrency, 1, args.timeout)
+
+        baseline = probe_fast_endpoints(app_url, args.fast_concurrency, args.duration, args.timeout)
+
+        slow_load = SlowLoad(
+            app_url, seeded["sql_statement_ids"], seeded["llm_config_id"], args.slow_concurrency, args.timeout
+        ).start()
+        # 等待慢请求占满线程后再开始测量
+        time.sleep(min(args.latency_ms / 1000, 2))
+        mixed = probe_fast_endpoints(app_url, args.fast_concurrency, args.duration, args.timeout)
+        slow_load.stop()
+
+        report = {
+            "config": {
+                "fast_concurrency": args.fast_concurrency,
+                "slow_concurrency": args.slow_concurrency,
+                "latency_ms": args.latency_ms,
+                "duration": args.duration
+            },
+            "baseline": summarize(baseline, args.duration),
+            "mixed": summarize(mixed, args.duration),
+            "slow_load": {"completed": slow_load.completed, "failed": slow_load.failed}
+        }
+        print_report(report)
+
+        if args.json_path:
+            with open(args.json_path, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+    finally:
+        if slow_load is not None:
+            slow_load.stop()
+        if app_server is not None:
+            app_server.should_exit = True
+            app_server.thread.join(timeout=10)
+        target_db.cleanup_app_database(seeded)
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+SQL解析器基准测试
+
+对带标注的语料（OLTP增删改查、多表关联报表、CTE链、各数据库方言、大脚本）
+测量吞吐量、p50/p99延迟以及表名提取准确率。
+
+用法:
+    python -m benchmarks.parser_benchmark [--iterations N] [--script-kb KB] [--json 输出文件]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from typing import Dict, Any, List, Optional
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.sql_parser import SQLParser
+from app.models.db_connection import DatabaseType
+from benchmarks.parser_corpus import get_labeled_corpus, make_script
+from benchmarks.stats import percentile
+
+
+def tables_match(actual: List[str], expected: List[str]) -> bool:
+    """比较提取结果与标注（忽略大小写和顺序）"""
+    return {t.lower() for t in actual} == {t.lower() for t in expected}
+
+
+def _get_parser(parsers: Dict[Optional[DatabaseType], SQLParser], db_type: Optional[DatabaseType]) -> SQLParser:
+    parser = parsers.get(db_type)
+    if parser is None:
+        parser = SQLParser(db_type)
+        parsers[db_type] = parser
+    return parser
+
+
+def evaluate_accuracy(corpus: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    计算表名提取准确率
+
+    Args:
+        corpus: 标注用例列表，默认使用完整语料
+
+    Returns:
+        包含 total、passed、accuracy、failures 的字典
+    """
+    corpus = corpus if corpus is not None else get_labeled_corpus()
+    parsers: Dict[Optional[DatabaseType], SQLParser] = {}
+    failures = []
+
+    for case in corpus:
+        tables = _get_parser(parsers, case["db_type"]).parse(case["sql"])["tables"]
+        if not tables_match(tables, case["expected_tables"]):
+            failures.append({
+                "name": case["name"],
+                "expected": sorted(case["expected_tables"]),
+                "actual": sorted(tables)
+            })
+
+    total = len(corpus)
+    return {
+        "total": total,
+        "passed": total - len(failures),
+        "accuracy": (total - len(failures)) / total if total else 1.0,
+        "failures": failures
+    }
+
+
+def bench_statements(corpus: List[Dict[str, Any]], iterations: int) -> List[Dict[str, Any]]:
+    """按类别测量单语句解析的吞吐量与延迟"""
+    parsers: Dict[Optional[DatabaseType], SQLParser] = {}
+    by_category: Dict[str, Dict[str, Any]] = {}
+
+    for case in corpus:
+        parser = _get_parser(parsers, case["db_type"])
+        stats = by_category.setdefault(case["category"], {"samples": [], "bytes": 0, "cases": 0})
+        stats["cases"] += 1
+        size = len(case["sql"].encode("utf-8"))
+        for _ in range(iterations):
+            start = time.perf_counter()
+            parser.parse(case["sql"])
+            stats["samples"].append(time.perf_counter() - start)
+            stats["bytes"] += size
+
+    results = []
+    for category, stats in by_category.items():
+        samples = stats["samples"]
+        elapsed = sum(samples)
+        results.append({
+            "category": category,
+            "cases": stats["cases"],
+            "statements": len(samples),
+            "throughput_per_sec": len(samples) / elapsed if elapsed else 0.0,
+            "mb_per_sec": stats["bytes"] / elapsed / 1024 / 1024 if elapsed else 0.0,
+            "p50_ms": percentile(samples, 50) * 1000,
+            "p99_ms": percentile(samples, 99) * 1000
+        })
+    return results
+
+
+def bench_script(script_kb: int) -> Dict[str, Any]:
+    """测量大脚本的拆分+逐条解析性能，并校验每条语句的表名"""
+    case = make_script(script_kb * 1024)
+    parser = SQLParser()
+    samples = []
+    mismatched = 0
+    count = 0
+
+    start = time.perf_counter()
+    last = start
+    for item, expected in zip(parser.parse_script(case["sql"]), case["expected_statements"]):
+        now = time.perf_counter()
+        samples.append(now - last)
+        last = now
+        count += 1
+        if not tables_match(item["tables"], expected):
+            mismatched += 1
+    elapsed = time.perf_counter() - start
+
+    return {
+        "category": case["category"],
+        "name": case["name"],
+        "statements": count,
+        "expected_statements": len(case["expected_statements"]),
+        "mismatched": mismatched,
+        "elapsed_sec": elapsed,
+        "throughput_per_sec": count / elapsed if elapsed else 0.0,
+        "mb_per_sec": len(case["sql"].encode("utf-8")) / elapsed / 1024 / 1024 if elapsed else 0.0,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000
+    }
+
+
+def run_benchmark(iterations: int = 50, script_kb: int = 1024) -> Dict[str, Any]:
+    """运行完整基准测试"""
+    corpus = get_labeled_corpus()
+    return {
+        "accuracy": evaluate_accuracy(corpus),
+        "statements": bench_statements(corpus, iterations),
+        "script": bench_script(script_kb) if script_kb > 0 else None
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    """打印基准测试报告"""
+    print("=" * 78)
+    print("SQL解析器基准测试")
+    print("=" * 78)
+    print(f"{'类别':<14}{'用例':>6}{'次数':>8}{'语句/秒':>12}{'MB/秒':>10}{'p50(ms)':>12}{'p99(ms)':>12}")
+    for row in report["statements"]:
+        print(
+            f"{row['category']:<14}{row['cases']:>6}{row['statements']:>8}{row['throughput_per_sec']:>12.1f}"
+            f"{row['mb_per_sec']:>10.2f}{row['p50_ms']:>12.3f}{row['p99_ms']:>12.3f}"
+        )
+
+    script = report.get("script")
+    if script:
+        print()
+        print(
+            f"脚本 {script['name']}: {script['statements']}/{script['expected_statements']} 条语句, "
+            f"耗时 {script['elapsed_sec']:.2f}s, {script['throughput_per_sec']:.1f} 语句/秒, "
+            f"{script['mb_per_sec']:.2f} MB/秒, p50 {script['p50_ms']:.3f}ms, p99 {script['p99_ms']:.3f}ms, "
+            f"表名不符 {script['mismatched']} 条"
+        )
+
+    accuracy = report["accuracy"]
+    print()
+    print(f"提取准确率: {accuracy['passed']}/{accuracy['total']} ({accuracy['accuracy']:.1%})")
+    for failure in accuracy["failures"]:
+        print(f"  ✗ {failure['name']}: 期望 {failure['expected']}, 实际 {failure['actual']}")
+
+
+def main():
+    """主函数"""
+    arg_parser = argparse.ArgumentParser(description="SQL解析器基准测试")
+    arg_parser.add_argument("--iterations", type=int, default=50, help="每个用例的解析次数")
+    arg_parser.add_argument("--script-kb", type=int, default=1024, help="大脚本大小(KB)，0表示跳过")
+    arg_parser.add_argument("--json", dest="json_path", help="将结果写入JSON文件")
+    args = arg_parser.parse_args()
+
+    report = run_benchmark(args.iterations, args.script_kb)
+    print_report(report)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    script = report.get("script")
+    failed = report["accuracy"]["failures"] or (
+        script and (script["mismatched"] or script["statements"] != script["expected_statements"])
+    )
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
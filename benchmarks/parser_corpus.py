@@ -0,0 +1,193 @@
+"""
+SQL解析器基准语料
+
+每个用例包含SQL文本、数据库类型和期望提取的表名（已标注），
+既用于吞吐量/延迟基准，也用于校验表名提取的准确率
+"""
+
+from typing import Dict, Any, List, Optional
+
+from app.models.db_connection import DatabaseType
+
+
+def _case(
+    name: str,
+    category: str,
+    sql: str,
+    expected_tables: List[str],
+    db_type: Optional[DatabaseType] = None
+) -> Dict[str, Any]:
+    return {
+        "name": name,
+        "category": category,
+        "sql": sql,
+        "db_type": db_type,
+        "expected_tables": expected_tables
+    }
+
+
+# OLTP常见的增删改查
+OLTP_CASES = [
+    _case(
+        "select_by_pk", "oltp",
+        "SELECT id, name, email FROM users WHERE id = 42",
+        ["users"]
+    ),
+    _case(
+        "select_join_filter", "oltp",
+        "SELECT o.id, o.total, u.name FROM orders o JOIN users u ON u.id = o.user_id "
+        "WHERE o.status = 'paid' AND o.created_at > '2024-01-01' ORDER BY o.created_at DESC LIMIT 20",
+        ["orders", "users"]
+    ),
+    _case(
+        "insert_values", "oltp",
+        "INSERT INTO order_items (order_id, product_id, quantity, price) VALUES (1001, 7, 2, 19.90)",
+        ["order_items"]
+    ),
+    _case(
+        "insert_select", "oltp",
+        "INSERT INTO order_archive (id, user_id, total) SELECT id, user_id, total FROM orders WHERE created_at < '2023-01-01'",
+        ["order_archive", "orders"]
+    ),
+    _case(
+        "update_simple", "oltp",
+        "UPDATE products SET stock = stock - 1, updated_at = CURRENT_TIMESTAMP WHERE id = 7 AND stock > 0",
+        ["products"]
+    ),
+    _case(
+        "delete_simple", "oltp",
+        "DELETE FROM sessions WHERE expires_at < CURRENT_TIMESTAMP",
+        ["sessions"]
+    ),
+    _case(
+        "select_subquery_in", "oltp",
+        "SELECT id, name FROM customers WHERE id IN (SELECT customer_id FROM invoices WHERE amount > 1000)",
+        ["customers", "invoices"]
+    ),
+    _case(
+        "select_exists", "oltp",
+        "SELECT p.id FROM products p WHERE EXISTS (SELECT 1 FROM reviews r WHERE r.product_id = p.id AND r.rating >= 4)",
+        ["products", "reviews"]
+    ),
+    _case(
+        "select_group_having", "oltp",
+        "SELECT c.region, COUNT(*) AS cnt, SUM(o.total) AS revenue FROM orders o "
+        "LEFT JOIN customers c ON c.id = o.customer_id GROUP BY c.region HAVING COUNT(*) > 10",
+        ["orders", "customers"]
+    ),
+    _case(
+        "select_schema_qualified", "oltp",
+        "SELECT a.id FROM sales.accounts a INNER JOIN sales.contacts c ON c.account_id = a.id",
+        ["accounts", "contacts"]
+    ),
+]
+
+
+# 方言相关语法
+DIALECT_CASES = [
+    _case(
+        "mysql_backticks", "dialect",
+        "SELECT `u`.`id`, `o`.`total` FROM `shop`.`users` `u` JOIN `orders` `o` ON `o`.`user_id` = `u`.`id` "
+        "WHERE `u`.`name` = \"it's\" # 行尾注释 FROM fake_table",
+        ["users", "orders"],
+        DatabaseType.MYSQL
+    ),
+    _case(
+        "mysql_upsert", "dialect",
+        "INSERT INTO `counters` (`k`, `v`) VALUES ('a', 1) ON DUPLICATE KEY UPDATE `v` = `v` + 1",
+        ["counters"],
+        DatabaseType.MYSQL
+    ),
+    _case(
+        "postgresql_casts", "dialect",
+        "SELECT e.id, e.payload::jsonb ->> 'type', e.created_at::timestamp with time zone "
+        "FROM events e JOIN event_types t ON t.id = e.type_id::int WHERE e.tags::text[] @> ARRAY['x']",
+        ["events", "event_types"],
+        DatabaseType.POSTGRESQL
+    ),
+    _case(
+        "postgresql_quoted", "dialect",
+        'SELECT "userId" FROM public."UserAccounts" ua JOIN audit_log al ON al.user_id = ua."userId"',
+        ["UserAccounts", "audit_log"],
+        DatabaseType.POSTGRESQL
+    ),
+    _case(
+        "oracle_dblink_outer_join", "dialect",
+        "SELECT e.ename, d.dname FROM scott.emp@remote_db e, dept d WHERE e.deptno = d.deptno(+)",
+        ["emp", "dept"],
+        DatabaseType.ORACLE
+    ),
+    _case(
+        "oracle_dollar_views", "dialect",
+        "SELECT s.sid, s.username FROM v$session s JOIN v$process p ON p.addr = s.paddr",
+        ["v$session", "v$process"],
+        DatabaseType.ORACLE
+    ),
+    _case(
+        "sqlserver_brackets_hints", "dialect",
+        "SELECT TOP 10 od.[OrderID] FROM [dbo].[Order Details] od WITH (NOLOCK) "
+        "JOIN [dbo].[Orders] o WITH (NOLOCK, INDEX(IX_Orders)) ON o.[OrderID] = od.[OrderID]",
+        ["Order Details", "Orders"],
+        DatabaseType.SQLSERVER
+    ),
+    _case(
+        "sqlite_mixed_quotes", "dialect",
+        "SELECT \"a\".id FROM \"albums\" \"a\" JOIN [tracks] t ON t.album_id = a.id JOIN `artists` ar ON ar.id = a.artist_id",
+        ["albums", "tracks", "artists"],
+        DatabaseType.SQLITE
+    ),
+]
+
+
+def make_join_report(joins: int = 50) -> Dict[str, Any]:
+    """生成多表关联的报表查询"""
+    tables = [f"dim_{i:02d}" for i in range(joins)]
+    lines = ["SELECT f.id, " + ", ".join(f"t{i}.name AS name_{i}" for i in range(joins))]
+    lines.append("FROM fact_sales f")
+    for i, table in enumerate(tables):
+        join = "LEFT JOIN" if i % 3 else "JOIN"
+        lines.append(f"{join} {table} t{i} ON t{i}.id = f.dim_{i:02d}_id")
+    lines.append("WHERE f.sale_date BETWEEN '2024-01-01' AND '2024-12-31'")
+    lines.append("ORDER BY f.id")
+    return _case(f"join_report_{joins}", "join_report", "\n".join(lines), ["fact_sales"] + tables)
+
+
+def make_cte_chain(depth: int = 12) -> Dict[str, Any]:
+    """生成CTE链式查询，每一级CTE依赖上一级并关联一张基础表"""
+    base_tables = [f"src_{i:02d}" for i in range(depth)]
+    ctes = [f"step_0 AS (SELECT id, amount FROM {base_tables[0]})"]
+    for i in range(1, depth):
+        ctes.append(
+            f"step_{i} AS (SELECT s.id, s.amount + b.amount AS amount FROM step_{i - 1} s "
+            f"JOIN {base_tables[i]} b ON b.id = s.id)"
+        )
+    sql = "WITH " + ",\n".join(ctes) + f"\nSELECT id, SUM(amount) FROM step_{depth - 1} GROUP BY id"
+    return _case(f"cte_chain_{depth}", "cte_chain", sql, base_tables)
+
+
+def get_labeled_corpus() -> List[Dict[str, Any]]:
+    """获取全部带标注的单语句用例"""
+    return OLTP_CASES + DIALECT_CASES + [make_join_report(10), make_join_report(50), make_cte_chain(12)]
+
+
+def make_script(target_bytes: int = 1024 * 1024) -> Dict[str, Any]:
+    """
+    生成指定大小的多语句脚本
+
+    由OLTP用例循环拼接而成，返回的用例额外包含每条语句的期望表名
+    """
+    parts = []
+    expected = []
+    size = 0
+    index = 0
+    while size < target_bytes:
+        case = OLTP_CASES[index % len(OLTP_CASES)]
+        statement = f"-- statement {index}\n{case['sql']};\n"
+        parts.append(statement)
+        expected.append(case["expected_tables"])
+        size += len(statement.encode("utf-8"))
+        index += 1
+
+    result = _case(f"script_{target_bytes // 1024}kb", "script", "".join(parts), [])
+    result["expected_statements"] = expected
+    return result
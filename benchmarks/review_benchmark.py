@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+审查流程端到端基准测试
+
+启动本地LLM桩服务、生成包含大量表的SQLite目标库并写入测试数据，
+然后以指定并发调用 /api/reviews/sql/{id}/review，
+统计每秒审查数、请求及各阶段（连接检测、解析、模式提取、LLM审查、保存）的延迟分位数和内存占用。
+
+默认在当前进程内启动应用（使用 --app-db 指定的独立应用库），此时可统计应用内存；
+指定 --app-url 时压测已运行的服务，此时需保证本脚本与服务使用同一个应用库（DATABASE_URL），
+可通过 --app-pid 读取服务进程的内存。
+
+用法:
+    python -m benchmarks.review_benchmark --tables 2000 --statements 200 --concurrency 8 --provider openai
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+
+# 添加项目根目录到Python路径
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+import requests
+
+from benchmarks.stats import percentile
+from benchmarks.stub_llm_server import StubLLMServer
+# 注意：应用模块必须在设置DATABASE_URL之后再导入，target_db只在函数内导入应用模块
+from benchmarks import target_db
+
+STAGES = ["db_check", "llm_check", "parse", "schema", "llm_review", "save"]
+
+
+def _read_rss_mb(pid: Optional[int] = None) -> Optional[float]:
+    """读取进程当前常驻内存（MB），仅支持Linux"""
+    try:
+        with open(f"/proc/{pid or 'self'}/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class MemorySampler:
+    """后台线程周期性采样进程内存"""
+
+    def __init__(self, pid: Optional[int] = None, interval: float = 0.2):
+        self.pid = pid
+        self.interval = interval
+        self.samples: List[float] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            rss = _read_rss_mb(self.pid)
+            if rss is not None:
+                self.samples.append(rss)
+            self._stop.wait(self.interval)
+
+    def start(self) -> "MemorySampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> Optional[Dict[str, float]]:
+        self._stop.set()
+        self._thread.join()
+        if not self.samples:
+            return None
+        return {
+            "start_mb": round(self.samples[0], 1),
+            "peak_mb": round(max(self.samples), 1),
+            "end_mb": round(self.samples[-1], 1)
+        }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_app_in_process(port: int):
+    """在后台线程中启动应用，返回uvicorn服务实例"""
+    import uvicorn
+    from app.main import app
+
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+
+    deadline = time.time() + 30
+    while not server.started:
+        if time.time() > deadline or not thread.is_alive():
+            raise RuntimeError("应用启动失败")
+        time.sleep(0.05)
+    server.thread = thread
+    return server
+
+
+def run_requests(
+    app_url: str,
+    statement_ids: List[int],
+    llm_config_id: int,
+    total: int,
+    concurrency: int,
+    timeout: float
+) -> List[Dict[str, Any]]:
+    """按指定并发发送审查请求，返回每个请求的结果"""
+    local = threading.local()
+
+    def review(i: int) -> Dict[str, Any]:
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        statement_id = statement_ids[i % len(statement_ids)]
+        start = time.perf_counter()
+        try:
+            response = session.post(
+                f"{app_url}/api/reviews/sql/{statement_id}/review",
+                params={"llm_config_id": llm_config_id},
+                timeout=timeout
+            )
+            elapsed = time.perf_counter() - start
+            body = response.json() if response.headers.get("content-type", "").startswith("application/json") else {}
+            return {
+                "ok": response.status_code == 200,
+                "status_code": response.status_code,
+                "latency": elapsed,
+                "timings": body.get("timings", {}) if response.status_code == 200 else {},
+                "error": None if response.status_code == 200 else body.get("detail", response.text[:200])
+            }
+        except requests.RequestException as e:
+            return {"ok": False, "status_code": None, "latency": time.perf_counter() - start, "timings": {}, "error": str(e)}
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(review, range(total)))
+
+
+def summarize(results: List[Dict[str, Any]], wall_time: float) -> Dict[str, Any]:
+    """汇总请求结果"""
+    succeeded = [r for r in results if r["ok"]]
+    latencies = [r["latency"] * 1000 for r in succeeded]
+
+    stages = {}
+    for stage in STAGES:
+        samples = [r["timings"][stage] for r in succeeded if stage in r["timings"]]
+        if samples:
+            stages[stage] = {
+                "p50_ms": round(percentile(samples, 50), 3),
+                "p90_ms": round(percentile(samples, 90), 3),
+                "p99_ms": round(percentile(samples, 99), 3),
+                "mean_ms": round(sum(samples) / len(samples), 3)
+            }
+
+    errors: Dict[str, int] = {}
+    for r in results:
+        if not r["ok"]:
+            key = str(r["error"])[:120]
+            errors[key] = errors.get(key, 0) + 1
+
+    return {
+        "requests": len(results),
+        "succeeded": len(succeeded),
+        "failed": len(results) - len(succeeded),
+        "wall_time_sec": round(wall_time, 3),
+        "reviews_per_sec": round(len(succeeded) / wall_time, 3) if wall_time else 0.0,
+        "latency": {
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p90_ms": round(percentile(latencies, 90), 3),
+            "p99_ms": round(percentile(latencies, 99), 3)
+        },
+        "stages": stages,
+        "errors": errors
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    """打印基准测试报告"""
+    config = report["config"]
+    print("=" * 72)
+    print("审查流程端到端基准测试")
+    print("=" * 72)
+    print(
+        f"目标库 {config['tables']} 张表, {config['requests']} 个请求, 并发 {config['concurrency']}, "
+        f"LLM桩 {config['provider']} (延迟 {config['latency_ms']}ms, 速率 {config['token_rate']} 令牌/秒, "
+        f"{config['tokens']} 令牌)"
+    )
+    print(f"目标库生成耗时 {report['setup']['generate_sec']}s, 数据初始化耗时 {report['setup']['seed_sec']}s")
+    print()
+
+    summary = report["summary"]
+    print(
+        f"成功 {summary['succeeded']}/{summary['requests']}, 总耗时 {summary['wall_time_sec']}s, "
+        f"吞吐 {summary['reviews_per_sec']} 次审查/秒"
+    )
+    latency = summary["latency"]
+    print(f"请求延迟: p50 {latency['p50_ms']}ms, p90 {latency['p90_ms']}ms, p99 {latency['p99_ms']}ms")
+    print()
+    print(f"{'阶段':<14}{'p50(ms)':>12}{'p90(ms)':>12}{'p99(ms)':>12}{'平均(ms)':>12}")
+    for stage, stats in summary["stages"].items():
+        print(f"{stage:<14}{stats['p50_ms']:>12.3f}{stats['p90_ms']:>12.3f}{stats['p99_ms']:>12.3f}{stats['mean_ms']:>12.3f}")
+
+    memory = report.get("memory")
+    if memory:
+        print()
+        print(f"内存: 开始 {memory['start_mb']}MB, 峰值 {memory['peak_mb']}MB, 结束 {memory['end_mb']}MB")
+
+    if summary["errors"]:
+        print()
+        print("错误:")
+        for error, count in summary["errors"].items():
+            print(f"  {count} × {error}")
+
+
+def main():
+    """主函数"""
+    arg_parser = argparse.ArgumentParser(description="审查流程端到端基准测试")
+    arg_parser.add_argument("--app-url", help="已运行服务的地址，不指定则在当前进程内启动应用")
+    arg_parser.add_argument("--app-db", default=f"sqlite:///{os.path.join(ROOT_DIR, 'benchmarks', 'bench_app.db')}",
+                            help="进程内启动应用时使用的应用库DATABASE_URL")
+    arg_parser.add_argument("--app-pid", type=int, help="压测外部服务时用于采样内存的进程ID")
+    arg_parser.add_argument("--target-db", default=os.path.join(ROOT_DIR, "benchmarks", "bench_target.db"),
+                            help="生成的SQLite目标库路径")
+    arg_parser.add_argument("--tables", type=int, default=2000, help="目标库表数量")
+    arg_parser.add_argument("--rows", type=int, default=0, help="目标库每张表的行数")
+    arg_parser.add_argument("--reuse-target", action="store_true", help="目标库已存在且表数量足够时直接复用")
+    arg_parser.add_argument("--statements", type=int, default=200, help="生成的SQL语句数")
+    arg_parser.add_argument("--requests", type=int, help="请求总数，默认等于语句数")
+    arg_parser.add_argument("--concurrency", type=int, default=8, help="并发数")
+    arg_parser.add_argument("--timeout", type=float, default=120, help="单个请求超时(秒)")
+    arg_parser.add_argument("--provider", choices=["openai", "ollama"], default="openai", help="LLM桩的接口类型")
+    arg_parser.add_argument("--latency-ms", type=float, default=200, help="LLM桩首包延迟(毫秒)")
+    arg_parser.add_argument("--token-rate", type=float, default=0, help="LLM桩生成速率(令牌/秒)，0表示不限")
+    arg_parser.add_argument("--tokens", type=int, default=300, help="LLM桩每次返回的令牌数")
+    arg_parser.add_argument("--keep-data", action="store_true", help="结束后保留写入应用库的测试数据")
+    arg_parser.add_argument("--json", dest="json_path", help="将结果写入JSON文件")
+    args = arg_parser.parse_args()
+
+    if not args.app_url:
+        # 必须在导入应用模块之前设置，使进程内应用使用独立的应用库
+        os.environ["DATABASE_URL"] = args.app_db
+
+    stub = StubLLMServer(
+        latency_ms=args.latency_ms,
+        token_rate=args.token_rate,
+        completion_tokens=args.tokens
+    ).start()
+    app_server = None
+    seeded = None
+    try:
+        start = time.perf_counter()
+        tables = target_db.generate_target_database(
+            args.target_db, args.tables, args.rows, overwrite=not args.reuse_target
+        )
+        generate_sec = time.perf_counter() - start
+
+        start = time.perf_counter()
+        llm_base_url = stub.openai_base_url if args.provider == "openai" else stub.base_url
+        seeded = target_db.seed_app_database(
+            args.target_db,
+            target_db.generate_statements(tables, args.statements),
+            args.provider,
+            llm_base_url
+        )
+        seed_sec = time.perf_counter() - start
+
+        if args.app_url:
+            app_url = args.app_url.rstrip("/")
+            memory_pid = args.app_pid
+        else:
+            port = _free_port()
+            app_server = start_app_in_process(port)
+            app_url = f"http://127.0.0.1:{port}"
+            memory_pid = None
+
+        sampler = MemorySampler(memory_pid).start() if (memory_pid or not args.app_url) else None
+        total = args.requests or len(seeded["sql_statement_ids"])
+        start = time.perf_counter()
+        results = run_requests(
+            app_url, seeded["sql_statement_ids"], seeded["llm_config_id"], total, args.concurrency, args.timeout
+        )
+        wall_time = time.perf_counter() - start
+
+        report = {
+            "config": {
+                "tables": len(tables),
+                "statements": args.statements,
+                "requests": total,
+                "concurrency": args.concurrency,
+                "provider": args.provider,
+                "latency_ms": args.latency_ms,
+                "token_rate": args.token_rate,
+                "tokens": args.tokens,
+                "app_url": app_url
+            },
+            "setup": {"generate_sec": round(generate_sec, 3), "seed_sec": round(seed_sec, 3)},
+            "summary": summarize(results, wall_time),
+            "memory": sampler.stop() if sampler else None,
+            "llm_requests": stub.request_count
+        }
+        print_report(report)
+
+        if args.json_path:
+            with open(args.json_path, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+    finally:
+        if app_server is not None:
+            app_server.should_exit = True
+            app_server.thread.join(timeout=10)
+        if not args.keep_data:
+            target_db.cleanup_app_database(seeded)
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
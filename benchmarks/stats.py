@@ -0,0 +1,12 @@
+"""基准测试统计工具"""
+
+from typing import List
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """计算百分位数（最近秩法）"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+本地LLM桩服务
+
+同时提供OpenAI兼容（/v1/chat/completions）和Ollama兼容（/api/generate、/api/tags）接口，
+按配置的首包延迟和生成速率（令牌/秒）休眠后返回固定格式的审查结果，
+用于在不调用真实模型的情况下测量审查流程的吞吐量。
+
+用法:
+    python -m benchmarks.stub_llm_server --port 18080 --latency-ms 200 --token-rate 50 --tokens 300
+"""
+
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional
+
+
+def build_review_content(tokens: int) -> str:
+    """构建符合AIReviewer解析格式的审查结果，并用说明文字填充到约定的令牌数"""
+    section = {"status": "pass", "score": 85, "details": "基准测试桩返回的结果", "suggestions": ""}
+    result = {
+        "overall_assessment": {"status": "pass", "score": 85, "summary": "基准测试桩返回的结果"},
+        "consistency": dict(section),
+        "conventions": dict(section),
+        "performance": dict(section),
+        "security": dict(section),
+        "readability": dict(section),
+        "maintainability": dict(section),
+        "optimized_sql": ""
+    }
+    # 粗略按空格分词计算令牌数
+    used = len(json.dumps(result).split())
+    if tokens > used:
+        result["performance"]["details"] = " ".join(["token"] * (tokens - used))
+    return "```json\n" + json.dumps(result, ensure_ascii=False) + "\n```"
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """桩服务请求处理器"""
+
+    server_version = "StubLLM/1.0"
+
+    def log_message(self, format, *args):
+        # 压测时不输出访问日志
+        pass
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        try:
+            return json.loads(body or b"{}")
+        except ValueError:
+            return {}
+
+    def _send_json(self, payload: Dict[str, Any], status: int = 200):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _simulate(self, prompt: str):
+        """模拟首包延迟和逐令牌生成耗时"""
+        stub: "StubLLMServer" = self.server.stub
+        with stub.lock:
+            stub.request_count += 1
+            stub.prompt_chars += len(prompt)
+        delay = stub.latency_ms / 1000
+        if stub.token_rate > 0:
+            delay += stub.completion_tokens / stub.token_rate
+        if delay > 0:
+            time.sleep(delay)
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/api/tags":
+            self._send_json({"models": [{"name": self.server.stub.model_name}]})
+        elif self.path.rstrip("/") in ("/v1/models", "/models"):
+            self._send_json({"object": "list", "data": [{"id": self.server.stub.model_name, "object": "model"}]})
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def do_POST(self):
+        stub: "StubLLMServer" = self.server.stub
+        data = self._read_json()
+        path = self.path.rstrip("/")
+
+        if path.endswith("/chat/completions"):
+            prompt = "".join(str(message.get("content", "")) for message in data.get("messages", []))
+            self._simulate(prompt)
+            self._send_json({
+                "id": f"chatcmpl-stub-{stub.request_count}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": data.get("model", stub.model_name),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": stub.content},
+                    "finish_reason": "stop"
+                }],
+                "usage": {
+                    "prompt_tokens": len(prompt.split()),
+                    "completion_tokens": stub.completion_tokens,
+                    "total_tokens": len(prompt.split()) + stub.completion_tokens
+                }
+            })
+        elif path == "/api/generate":
+            prompt = str(data.get("prompt", ""))
+            self._simulate(prompt)
+            self._send_json({
+                "model": data.get("model", stub.model_name),
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "response": stub.content,
+                "done": True,
+                "eval_count": stub.completion_tokens
+            })
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+
+class StubLLMServer:
+    """可在后台线程运行的LLM桩服务"""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 0,
+        token_rate: float = 0,
+        completion_tokens: int = 300,
+        model_name: str = "stub-model"
+    ):
+        """
+        Args:
+            host: 监听地址
+            port: 监听端口，0表示自动分配
+            latency_ms: 每个请求的首包延迟（毫秒）
+            token_rate: 生成速率（令牌/秒），0表示不模拟生成耗时
+            completion_tokens: 每次返回的令牌数
+            model_name: 模型名称
+        """
+        self.latency_ms = latency_ms
+        self.token_rate = token_rate
+        self.completion_tokens = completion_tokens
+        self.model_name = model_name
+        self.content = build_review_content(completion_tokens)
+        self.lock = threading.Lock()
+        self.request_count = 0
+        self.prompt_chars = 0
+
+        self._httpd = ThreadingHTTPServer((host, port), _StubHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.stub = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def openai_base_url(self) -> str:
+        return f"{self.base_url}/v1"
+
+    def start(self) -> "StubLLMServer":
+        """在后台线程启动服务"""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """停止服务"""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def serve_forever(self):
+        """在当前线程运行服务"""
+        self._httpd.serve_forever()
+
+
+def main():
+    """主函数"""
+    arg_parser = argparse.ArgumentParser(description="OpenAI/Ollama兼容的LLM桩服务")
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=18080)
+    arg_parser.add_argument("--latency-ms", type=float, default=200, help="首包延迟(毫秒)")
+    arg_parser.add_argument("--token-rate", type=float, default=0, help="生成速率(令牌/秒)，0表示不限")
+    arg_parser.add_argument("--tokens", type=int, default=300, help="每次返回的令牌数")
+    args = arg_parser.parse_args()
+
+    server = StubLLMServer(args.host, args.port, args.latency_ms, args.token_rate, args.tokens)
+    print(f"LLM桩服务已启动: OpenAI兼容 {server.openai_base_url}，Ollama兼容 {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+基准测试用的目标数据库生成与应用数据初始化
+
+生成包含大量表（带索引、外键和视图）的SQLite目标库，
+并按 generate_test_data.py 的方式在应用库中写入数据库连接、LLM配置和SQL语句
+"""
+
+import os
+import random
+import sqlite3
+from typing import Dict, Any, List, Optional
+
+_COLUMN_TYPES = ["INTEGER", "TEXT", "REAL", "NUMERIC", "VARCHAR(100)", "DATETIME"]
+
+
+def table_name(index: int) -> str:
+    return f"bench_table_{index:05d}"
+
+
+def generate_target_database(
+    path: str,
+    tables: int = 2000,
+    rows_per_table: int = 0,
+    seed: int = 42,
+    overwrite: bool = True
+) -> List[str]:
+    """
+    生成SQLite目标数据库
+
+    Args:
+        path: 数据库文件路径
+        tables: 表数量
+        rows_per_table: 每张表插入的行数
+        seed: 随机种子，保证结构可复现
+        overwrite: 文件已存在时是否重建
+
+    Returns:
+        生成的表名列表
+    """
+    if os.path.exists(path):
+        if not overwrite:
+            conn = sqlite3.connect(path)
+            try:
+                rows = conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'bench_table_%' ORDER BY name"
+                ).fetchall()
+            finally:
+                conn.close()
+            if len(rows) >= tables:
+                return [row[0] for row in rows[:tables]]
+        os.remove(path)
+
+    rng = random.Random(seed)
+    names = [table_name(i) for i in range(tables)]
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        for i, name in enumerate(names):
+            columns = ["id INTEGER PRIMARY KEY", "parent_id INTEGER", "status VARCHAR(20)", "created_at DATETIME"]
+            for c in range(rng.randint(3, 12)):
+                columns.append(f"col_{c:02d} {rng.choice(_COLUMN_TYPES)}")
+            if i > 0:
+                columns.append(f"FOREIGN KEY (parent_id) REFERENCES {names[rng.randrange(i)]}(id)")
+            conn.execute(f"CREATE TABLE {name} ({', '.join(columns)})")
+            conn.execute(f"CREATE INDEX idx_{name}_parent ON {name} (parent_id)")
+            if rng.random() < 0.3:
+                conn.execute(f"CREATE INDEX idx_{name}_status_created ON {name} (status, created_at)")
+            if rng.random() < 0.05:
+                conn.execute(f"CREATE VIEW v_{name} AS SELECT id, status FROM {name} WHERE status = 'active'")
+            if rows_per_table:
+                conn.executemany(
+                    f"INSERT INTO {name} (id, parent_id, status, created_at) VALUES (?, ?, ?, datetime('now'))",
+                    [(r, rng.randint(1, rows_per_table), rng.choice(["active", "inactive"])) for r in range(1, rows_per_table + 1)]
+                )
+        conn.commit()
+    finally:
+        conn.close()
+    return names
+
+
+def generate_statements(tables: List[str], count: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """
+    生成引用目标库表的SQL语句（单表查询、多表关联、更新、聚合）
+
+    Returns:
+        语句列表，每项包含 title、sql_content、description
+    """
+    rng = random.Random(seed)
+    statements = []
+    for i in range(count):
+        kind = i % 4
+        picked = rng.sample(tables, k=min(len(tables), rng.randint(2, 5)))
+        if kind == 0:
+            sql = f"SELECT * FROM {picked[0]} WHERE status = 'active' ORDER BY created_at DESC LIMIT 100"
+        elif kind == 1:
+            sql = f"SELECT t0.id, t0.status FROM {picked[0]} t0"
+            for j, name in enumerate(picked[1:], start=1):
+                sql += f"\nJOIN {name} t{j} ON t{j}.parent_id = t{j - 1}.id"
+            sql += "\nWHERE t0.created_at > '2024-01-01'"
+        elif kind == 2:
+            sql = f"UPDATE {picked[0]} SET status = 'inactive' WHERE created_at < '2023-01-01'"
+        else:
+            sql = (
+                f"SELECT a.status, COUNT(*) FROM {picked[0]} a LEFT JOIN {picked[1]} b ON b.parent_id = a.id "
+                f"GROUP BY a.status HAVING COUNT(*) > 10"
+            )
+        statements.append({
+            "title": f"基准测试语句 {i + 1}",
+            "sql_content": sql,
+            "description": "审查流程基准测试自动生成"
+        })
+    return statements
+
+
+def seed_app_database(
+    target_path: str,
+    statements: List[Dict[str, Any]],
+    llm_provider: str,
+    llm_base_url: str,
+    model_name: str = "stub-model"
+) -> Dict[str, Any]:
+    """
+    在应用库中写入基准测试所需的数据库连接、LLM配置和SQL语句
+
+    Args:
+        target_path: 目标SQLite数据库路径
+        statements: generate_statements 生成的语句
+        llm_provider: LLM提供商（openai 或 ollama）
+        llm_base_url: 桩服务地址
+        model_name: 模型名称
+
+    Returns:
+        包含 db_connection_id、llm_config_id、sql_statement_ids 的字典
+    """
+    from app.models.database import SessionLocal, create_tables
+    from app.models.db_connection import DatabaseConnection, DatabaseType
+    from app.models.llm_config import LLMConfig, LLMProvider
+    from app.models.sql_statement import SQLStatement
+    from app.core.encryption import EncryptionService
+
+    create_tables()
+    encryption = EncryptionService()
+    db = SessionLocal()
+    try:
+        db_connection = DatabaseConnection(
+            name=f"基准测试目标库 {os.path.basename(target_path)}",
+            db_type=DatabaseType.SQLITE,
+            database_name=os.path.abspath(target_path),
+            description="审查流程基准测试自动生成"
+        )
+        llm_config = LLMConfig(
+            name=f"基准测试桩 {llm_provider}",
+            provider=LLMProvider(llm_provider),
+            model_name=model_name,
+            api_key=encryption.encrypt("stub-api-key"),
+            base_url=llm_base_url,
+            temperature=0.1,
+            max_tokens=4000,
+            description="审查流程基准测试自动生成",
+            is_default=False
+        )
+        db.add_all([db_connection, llm_config])
+        db.flush()
+
+        sql_statements = [
+            SQLStatement(db_connection_id=db_connection.id, category="基准测试", **statement)
+            for statement in statements
+        ]
+        db.add_all(sql_statements)
+        db.commit()
+
+        return {
+            "db_connection_id": db_connection.id,
+            "llm_config_id": llm_config.id,
+            "sql_statement_ids": [statement.id for statement in sql_statements]
+        }
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def cleanup_app_database(seeded: Optional[Dict[str, Any]]):
+    """删除 seed_app_database 写入的数据（包括产生的审查报告）"""
+    if not seeded:
+        return
+
+    from app.models.database import SessionLocal
+    from app.models.db_connection import DatabaseConnection
+    from app.models.llm_config import LLMConfig
+    from app.models.sql_statement import SQLStatement, SQLStatementTable
+    from app.models.review_report import ReviewReport
+    from app.models.review_queue import ReviewQueueItem
+    from app.models.schema_snapshot import SchemaSnapshot, SchemaSnapshotObject
+
+    db = SessionLocal()
+    try:
+        ids = seeded["sql_statement_ids"]
+        snapshot_ids = db.query(SchemaSnapshot.id).filter(SchemaSnapshot.db_connection_id == seeded["db_connection_id"])
+        db.query(ReviewQueueItem).filter(ReviewQueueItem.sql_statement_id.in_(ids)).delete(synchronize_session=False)
+        db.query(SQLStatementTable).filter(SQLStatementTable.sql_statement_id.in_(ids)).delete(synchronize_session=False)
+        db.query(SchemaSnapshotObject).filter(SchemaSnapshotObject.snapshot_id.in_(snapshot_ids)).delete(synchronize_session=False)
+        db.query(SchemaSnapshot).filter(SchemaSnapshot.db_connection_id == seeded["db_connection_id"]).delete(synchronize_session=False)
+        db.query(ReviewReport).filter(ReviewReport.sql_statement_id.in_(ids)).delete(synchronize_session=False)
+        db.query(SQLStatement).filter(SQLStatement.id.in_(ids)).delete(synchronize_session=False)
+        db.query(DatabaseConnection).filter(DatabaseConnection.id == seeded["db_connection_id"]).delete()
+        db.query(LLMConfig).filter(LLMConfig.id == seeded["llm_config_id"]).delete()
+        db.commit()
+    finally:
+        db.close()
@@ -102,19 +102,34 @@ def check_database_connection() -> Tuple[bool, str]:
     except Exception as e:
         return False, f"数据库连接失败: {e}"
 
+def check_database_indexes() -> Tuple[bool, str]:
+    """检查热点查询所需的数据库索引"""
+    try:
+        from app.models.database import engine
+        from app.models.migrations import verify_indexes
+        
+        missing = verify_indexes(engine)
+        
+        if not missing:
+            return True, "数据库索引完整"
+        else:
+            return False, f"缺失索引（启动应用会自动执行迁移）: {', '.join(missing)}"
+            
+    except Exception as e:
+        return False, f"数据库索引检查失败: {e}"
+
 def check_sql_parser() -> Tuple[bool, str]:
-    """检查SQL解析器"""
+    """检查SQL解析器（使用带标注的基准语料校验表名提取准确率）"""
     try:
-        from app.core.sql_parser import SQLParser
+        from benchmarks.parser_benchmark import evaluate_accuracy
         
-        parser = SQLParser()
-        test_sql = "SELECT u.id, u.name FROM users u WHERE u.status = 'active'"
-        result = parser.parse(test_sql)
+        result = evaluate_accuracy()
         
-        if 'tables' in result and 'users' in result['tables']:
-            return True, "SQL解析器工作正常"
+        if not result['failures']:
+            return True, f"SQL解析器工作正常，标注用例 {result['passed']}/{result['total']} 全部通过"
         else:
-            return False, f"SQL解析结果异常: {result}"
+            names = ", ".join(failure['name'] for failure in result['failures'])
+            return False, f"SQL解析准确率 {result['accuracy']:.1%}，未通过用例: {names}"
             
     except Exception as e:
         return False, f"SQL解析器检查失败: {e}"
@@ -198,6 +213,7 @@ def run_all_checks(check_server: bool = False) -> Dict[str, Tuple[bool, str]]:
         "依赖包": check_dependencies,
         "环境配置": check_environment_config,
         "数据库连接": check_database_connection,
+        "数据库索引": check_database_indexes,
         "SQL解析器": check_sql_parser,
         "加密服务": check_encryption_service,
     }
@@ -591,7 +591,11 @@ async function reviewSQL() {
         if (response.ok) {
             const result = await response.json();
             currentReportId = result.report_id;
-            displayReviewReport(result.review_result);
+            displayReviewReport({
+                ...result.review_result,
+                execution_plan: result.execution_plan,
+                plan_analysis: result.plan_analysis
+            });
             showAlert('AI审查完成', 'success');
         } else {
             const error = await response.json();
@@ -644,7 +648,8 @@ function displayReviewReport(report) {
     
     sections.forEach(section => {
         const data = report[section.key];
-        if (data) {
+        // 离线审查只评估性能维度，其他维度没有状态
+        if (data && data.status !== null) {
             const statusClass = getStatusClass(data.status);
             const scoreColor = getScoreColor(data.score);
             
@@ -677,6 +682,11 @@ function displayReviewReport(report) {
         `;
     }
 
+    // 添加执行计划
+    if (report.execution_plan) {
+        html += renderExecutionPlan(report.execution_plan, report.plan_analysis);
+    }
+
     contentContainer.innerHTML = html;
     reportContainer.style.display = 'block';
     
@@ -686,6 +696,41 @@ function displayReviewReport(report) {
     }
 }
 
+// 渲染执行计划（按层级缩进的算子和摘要）
+function renderExecutionPlan(plan, analysis) {
+    const escape = (value) => {
+        const div = document.createElement('div');
+        div.textContent = value;
+        return div.innerHTML;
+    };
+    if (plan.error) {
+        return `
+            <div class="review-section">
+                <h6>🧭 执行计划</h6>
+                <p class="text-muted">${escape(plan.error)}</p>
+            </div>
+        `;
+    }
+    const lines = plan.operators.map(op => {
+        let line = '  '.repeat(op.depth) + op.operation;
+        if (op.rows !== undefined) line += `  rows≈${Math.round(op.rows)}`;
+        if (op.cost !== undefined) line += `  cost=${op.cost}`;
+        return line;
+    });
+    if (plan.truncated) lines.push('...');
+    const summary = plan.summary || {};
+    return `
+        <div class="review-section">
+            <h6>🧭 执行计划 <small class="text-muted">(${escape(plan.dialect)}，估算)</small></h6>
+            <p class="mb-1"><strong>全表扫描:</strong> ${escape((summary.full_scans || []).join(', ') || '无')}</p>
+            <p class="mb-1"><strong>连接方式:</strong> ${escape((summary.joins || []).join(', ') || '无')}</p>
+            <p class="mb-2"><strong>临时排序/哈希:</strong> ${escape((summary.temp_structures || []).join(', ') || '无')}</p>
+            ${analysis ? `<p class="mb-2"><strong>规则评分:</strong> ${analysis.score}（${escape(analysis.heuristics_version)}）</p>` : ''}
+            <pre>${escape(lines.join('\n'))}</pre>
+        </div>
+    `;
+}
+
 // 获取状态对应的CSS类
 function getStatusClass(status) {
     const statusMap = {
@@ -900,8 +945,19 @@ function showDatabaseExplorer() {
     modal.show();
 }
 
-// 加载数据库模式
-async function loadDatabaseSchema() {
+// 数据库浏览器分页状态
+const SCHEMA_PAGE_SIZE = 200;
+let schemaNextCursor = null;
+let schemaSearchTimer = null;
+
+// 输入过滤条件后延迟加载，避免每次按键都请求
+function onSchemaSearchInput() {
+    clearTimeout(schemaSearchTimer);
+    schemaSearchTimer = setTimeout(() => loadDatabaseSchema(), 300);
+}
+
+// 加载数据库模式（refresh为true时先从目标库刷新模式快照，append为true时加载下一页）
+async function loadDatabaseSchema(refresh = false, append = false) {
     const connectionId = document.getElementById('explorer-connection').value;
     const schemaTree = document.getElementById('schema-tree');
     const objectDetails = document.getElementById('object-details');
@@ -912,12 +968,26 @@ async function loadDatabaseSchema() {
         return;
     }
     
+    const params = new URLSearchParams({ page_size: SCHEMA_PAGE_SIZE });
+    const search = document.getElementById('explorer-search').value.trim();
+    if (search) {
+        params.set('search', search);
+        params.set('match', document.getElementById('explorer-match').value);
+    }
+    if (append && schemaNextCursor) {
+        params.set('cursor', schemaNextCursor);
+        params.set('with_total', 'false');
+    }
+    if (refresh) {
+        params.set('refresh', 'true');
+    }
+    
     try {
-        const response = await fetch(`/api/db-connections/${connectionId}/schema`);
+        const response = await fetch(`/api/db-connections/${connectionId}/schema?${params}`);
         
         if (response.ok) {
             const schema = await response.json();
-            displaySchemaTree(schema);
+            displaySchemaTree(schema, append);
         } else {
             schemaTree.innerHTML = '<div class="text-danger">加载数据库模式失败</div>';
         }
@@ -926,55 +996,53 @@ async function loadDatabaseSchema() {
     }
 }
 
-// 显示数据库模式树
-function displaySchemaTree(schema) {
+// 显示数据库模式树（append为true时追加到已有列表）
+function displaySchemaTree(schema, append = false) {
     const schemaTree = document.getElementById('schema-tree');
+    schemaNextCursor = schema.next_cursor;
+    
+    const items = schema.items.map(item => {
+        const icon = item.type === 'table' ? 'table' : 'eye';
+        const comment = item.comment ? ` <span class="text-muted small">${item.comment}</span>` : '';
+        return `
+            <div class="py-1">
+                <a href="#" class="text-decoration-none" onclick="showTableDetails('${item.name}', '${item.type}')">
+                    <i class="bi bi-${icon}"></i> ${item.name}
+                </a>${comment}
+            </div>
+        `;
+    }).join('');
+    const loadMore = schema.next_cursor
+        ? '<button class="btn btn-sm btn-link" id="schema-load-more" onclick="loadDatabaseSchema(false, true)">加载更多</button>'
+        : '';
+    
+    if (append) {
+        document.getElementById('schema-load-more')?.remove();
+        document.getElementById('schema-items').insertAdjacentHTML('beforeend', items);
+        schemaTree.insertAdjacentHTML('beforeend', loadMore);
+        return;
+    }
     
     let html = '';
     
-    // 显示表
-    if (schema.tables && schema.tables.length > 0) {
+    // 显示快照版本、对象数量和刷新入口
+    if (schema.snapshot) {
+        const checkedAt = schema.snapshot.checked_at ? new Date(schema.snapshot.checked_at).toLocaleString() : '-';
         html += `
-            <div class="mb-2">
-                <strong><i class="bi bi-table"></i> 表 (${schema.tables.length})</strong>
-                <div class="ms-3">
+            <div class="small text-muted mb-2">
+                快照 v${schema.snapshot.version}，检查于 ${checkedAt}
+                <a href="#" class="ms-2" onclick="loadDatabaseSchema(true); return false;"><i class="bi bi-arrow-clockwise"></i> 刷新</a>
+                <div>表 ${schema.counts.table}，视图 ${schema.counts.view}${schema.total !== null ? `，匹配 ${schema.total}` : ''}</div>
+            </div>
         `;
-        
-        schema.tables.forEach(table => {
-            html += `
-                <div class="py-1">
-                    <a href="#" class="text-decoration-none" onclick="showTableDetails('${table.name}', 'table')">
-                        <i class="bi bi-table"></i> ${table.name}
-                    </a>
-                </div>
-            `;
-        });
-        
-        html += '</div></div>';
     }
     
-    // 显示视图
-    if (schema.views && schema.views.length > 0) {
-        html += `
-            <div class="mb-2">
-                <strong><i class="bi bi-eye"></i> 视图 (${schema.views.length})</strong>
-                <div class="ms-3">
-        `;
-        
-        schema.views.forEach(view => {
-            html += `
-                <div class="py-1">
-                    <a href="#" class="text-decoration-none" onclick="showTableDetails('${view.name}', 'view')">
-                        <i class="bi bi-eye"></i> ${view.name}
-                    </a>
-                </div>
-            `;
-        });
-        
-        html += '</div></div>';
+    if (schema.items.length === 0) {
+        schemaTree.innerHTML = html + '<div class="text-muted">未找到数据库对象</div>';
+        return;
     }
     
-    schemaTree.innerHTML = html || '<div class="text-muted">未找到数据库对象</div>';
+    schemaTree.innerHTML = html + `<div id="schema-items">${items}</div>` + loadMore;
 }
 
 // 显示表/视图详细信息
@@ -1130,14 +1198,14 @@ function displayVersionHistory(versions) {
         html += `
             <div class="list-group-item">
                 <div class="d-flex w-100 justify-content-between">
-                    <h6 class="mb-1">版本 ${version.version} ${index === 0 ? '<span class="badge bg-primary">当前</span>' : ''}</h6>
+                    <h6 class="mb-1">版本 ${version.version} ${version.is_current ? '<span class="badge bg-primary">当前</span>' : ''}</h6>
                     <small class="text-muted">${new Date(version.created_at).toLocaleString()}</small>
                 </div>
                 <p class="mb-1">${version.description || '无描述'}</p>
                 <div class="mt-2">
-                    <button class="btn btn-sm btn-outline-primary" onclick="viewVersion(${version.id})">查看</button>
-                    ${index > 0 ? `<button class="btn btn-sm btn-outline-info" onclick="compareVersions(${versions[index-1].id}, ${version.id})">对比</button>` : ''}
-                    ${index > 0 ? `<button class="btn btn-sm btn-outline-warning" onclick="selectVersionForRestore(${version.id})">恢复</button>` : ''}
+                    <button class="btn btn-sm btn-outline-primary" onclick="viewVersion(${version.version})">查看</button>
+                    ${index > 0 ? `<button class="btn btn-sm btn-outline-info" onclick="compareVersions(${version.version}, ${versions[index-1].version})">对比</button>` : ''}
+                    ${index > 0 ? `<button class="btn btn-sm btn-outline-warning" onclick="selectVersionForRestore(${version.version})">恢复</button>` : ''}
                 </div>
             </div>
         `;
@@ -1149,6 +1217,39 @@ function displayVersionHistory(versions) {
 
 let selectedVersionForRestore = null;
 
+// 获取指定版本的内容
+async function fetchVersion(version) {
+    const response = await fetch(`/api/sql-statements/${currentSQLId}/versions/${version}`);
+    if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+    }
+    return response.json();
+}
+
+// 查看版本内容
+async function viewVersion(version) {
+    try {
+        const data = await fetchVersion(version);
+        document.getElementById('old-version-content').textContent = '';
+        document.getElementById('new-version-content').textContent = data.sql_content;
+        document.getElementById('version-diff').style.display = 'block';
+    } catch (error) {
+        showAlert('加载版本失败: ' + error.message, 'danger');
+    }
+}
+
+// 对比两个版本
+async function compareVersions(oldVersion, newVersion) {
+    try {
+        const [oldData, newData] = await Promise.all([fetchVersion(oldVersion), fetchVersion(newVersion)]);
+        document.getElementById('old-version-content').textContent = oldData.sql_content;
+        document.getElementById('new-version-content').textContent = newData.sql_content;
+        document.getElementById('version-diff').style.display = 'block';
+    } catch (error) {
+        showAlert('加载版本失败: ' + error.message, 'danger');
+    }
+}
+
 // 选择要恢复的版本
 function selectVersionForRestore(versionId) {
     selectedVersionForRestore = versionId;